@@ -14,6 +14,17 @@ if REPO_ROOT not in sys.path:
     sys.path.insert(0, REPO_ROOT)
 
 from orders_analytics.utils.constants import DEFAULT_DB_PATH, NORMALIZED_DIR, ERRORS_PATH
+from orders_analytics.utils.errors import error_store_path, load_errors as load_error_store, resolve_error
+from orders_analytics.utils.normalized_changes import (
+    CHANGE_COLUMNS,
+    DELETED,
+    INSERTED,
+    UPDATED,
+    build_run_id,
+    latest_changes,
+    load_state,
+)
+from orders_analytics.utils.normalized_parquet import sync_normalized_table
 
 ORDER_COLUMNS = [
     "order_id",
@@ -131,27 +142,14 @@ def ingest_normalized(conn: duckdb.DuckDBPyConnection) -> int:
     ]
     if not files:
         return 0
-    frames = []
-    for path in files:
-        df = pd.read_csv(path, low_memory=False)
-        if "phone" in df.columns:
-            def _normalize_phone(value):
-                if pd.isna(value):
-                    return ""
-                text = str(value).strip()
-                if not text or text.lower() == "nan":
-                    return ""
-                if text.endswith(".0") and text.replace(".", "", 1).isdigit():
-                    text = text[:-2]
-                return text
-
-            df["phone"] = df["phone"].apply(_normalize_phone)
-        df["source_file"] = os.path.basename(path)
-        frames.append(df)
-    data = pd.concat(frames, ignore_index=True)
-    conn.register("orders_df", data)
-    conn.execute("CREATE OR REPLACE TABLE orders_raw AS SELECT * FROM orders_df")
-    return len(data)
+    return sync_normalized_table(conn, files)
+
+def _naive_utc(values: pd.Series) -> pd.Series:
+    # orders_raw built from Parquet already holds naive UTC timestamps; older tables hold ISO text.
+    if pd.api.types.is_datetime64_dtype(values):
+        return values
+    parsed = pd.to_datetime(values, errors="coerce", utc=True, format="ISO8601")
+    return parsed.dt.tz_convert(None)
 
 def load_orders(conn: duckdb.DuckDBPyConnection) -> pd.DataFrame:
     tables = conn.execute("SHOW TABLES").fetchall()
@@ -163,10 +161,7 @@ def load_orders(conn: duckdb.DuckDBPyConnection) -> pd.DataFrame:
             raw[col] = ""
     overrides = conn.execute("SELECT * FROM order_overrides").df()
     if overrides.empty:
-        raw["order_datetime"] = pd.to_datetime(
-            raw["order_datetime"], errors="coerce", utc=True, format="ISO8601"
-        )
-        raw["order_datetime"] = raw["order_datetime"].dt.tz_convert(None)
+        raw["order_datetime"] = _naive_utc(raw["order_datetime"])
         return raw[ORDER_COLUMNS]
 
     merged = raw.merge(
@@ -197,10 +192,10 @@ def load_orders(conn: duckdb.DuckDBPyConnection) -> pd.DataFrame:
             merged[col] = merged[override_col].combine_first(merged[col])
     # Handle order_datetime separately to avoid pandas trying to infer a strict format.
     if "order_datetime" in merged.columns:
-        base_dt = pd.to_datetime(merged["order_datetime"], errors="coerce", utc=True, format="ISO8601")
+        base_dt = _naive_utc(merged["order_datetime"])
         override_col = "order_datetime_override"
         if override_col in merged.columns:
-            override_dt = pd.to_datetime(merged[override_col], errors="coerce", utc=True, format="ISO8601")
+            override_dt = _naive_utc(merged[override_col])
             merged["order_datetime"] = override_dt.combine_first(base_dt)
         else:
             merged["order_datetime"] = base_dt
@@ -228,30 +223,19 @@ def load_orders(conn: duckdb.DuckDBPyConnection) -> pd.DataFrame:
             merged[col] = merged[override_col].combine_first(merged[col])
     if "item_count" in merged.columns:
         merged["item_count"] = pd.to_numeric(merged["item_count"], errors="coerce")
-    merged["order_datetime"] = pd.to_datetime(
-        merged["order_datetime"], errors="coerce", utc=True, format="ISO8601"
-    )
-    merged["order_datetime"] = merged["order_datetime"].dt.tz_convert(None)
+    merged["order_datetime"] = _naive_utc(merged["order_datetime"])
     merged = merged[ORDER_COLUMNS]
     return merged
 
 def load_errors() -> pd.DataFrame:
-    if not os.path.exists(ERRORS_PATH):
+    df = load_error_store(ERRORS_PATH)
+    if df.empty:
         return pd.DataFrame()
-    df = pd.read_csv(ERRORS_PATH)
-    if "resolved" not in df.columns:
-        df["resolved"] = ""
-    if "resolved_time" not in df.columns:
-        df["resolved_time"] = ""
     return df
 
-def resolve_error_row(row_id: int) -> None:
-    df = load_errors()
-    if df.empty or row_id not in df.index:
-        return
-    df.loc[row_id, "resolved"] = "true"
-    df.loc[row_id, "resolved_time"] = datetime.utcnow().isoformat()
-    df.to_csv(ERRORS_PATH, index=False)
+def resolve_error_row(row: dict) -> None:
+    # Updates the one row in the error store; errors.csv is re-exported by the next CLI run.
+    resolve_error(ERRORS_PATH, row, datetime.utcnow().isoformat())
 
 def load_markdown_file(path: str) -> str:
     file_path = Path(path)
@@ -295,6 +279,30 @@ def build_sync_status() -> pd.DataFrame:
         })
     return pd.DataFrame(rows)
 
+def build_change_status() -> tuple:
+    """Per-platform counts and entries of the last normalize run's changelog."""
+    from orders_analytics.utils.platforms import Platforms
+
+    normalized_root = Path("orders_analytics/data/normalized")
+    summary = []
+    entries = []
+    for platform in Platforms.all_platforms():
+        normalized_path = str(normalized_root / f"{platform}_orders_normalized.csv")
+        state = load_state(normalized_path)
+        if state is None:
+            continue
+        counts = state.get("counts", {})
+        summary.append({
+            "platform": platform,
+            "run_id": build_run_id(state),
+            "normalized_at": state.get("built_at", ""),
+            "inserted": counts.get(INSERTED, 0),
+            "updated": counts.get(UPDATED, 0),
+            "deleted": counts.get(DELETED, 0),
+        })
+        entries.extend(latest_changes(normalized_path))
+    return pd.DataFrame(summary), pd.DataFrame(entries, columns=CHANGE_COLUMNS)
+
 def load_wave_payouts(provider: str) -> pd.DataFrame:
     base_dir = Path(f"orders_analytics/data/raw/{provider}")
     paths = sorted(base_dir.glob("wave_payouts_*.csv"))
@@ -329,7 +337,7 @@ def load_wave_payouts(provider: str) -> pd.DataFrame:
 def build_global_status() -> pd.DataFrame:
     rows = []
     geocode_cache = Path("orders_analytics/data/raw/geocode_cache.csv")
-    errors_path = Path(ERRORS_PATH)
+    errors_path = Path(error_store_path(ERRORS_PATH))
     normalized_root = Path("orders_analytics/data/normalized")
     raw_root = Path("orders_analytics/data/raw")
 
@@ -368,17 +376,24 @@ def main() -> None:
         if st.button("Normalize + refresh (all platforms)"):
             from orders_analytics.cli import run_normalize
             from orders_analytics.utils.constants import ERRORS_PATH
+            from orders_analytics.utils.errors import (
+                apply_error_ops,
+                deferred_errors,
+                reset_errors_store,
+            )
 
-            if os.path.exists(ERRORS_PATH):
-                os.remove(ERRORS_PATH)
+            reset_errors_store(ERRORS_PATH)
             from orders_analytics.utils.platforms import Platforms
 
-            for platform in Platforms.all_platforms():
-                run_normalize(platform, None, None, None, None, {})
+            with deferred_errors() as error_ops:
+                for platform in Platforms.all_platforms():
+                    run_normalize(platform, None, None, None, None, {})
+            apply_error_ops(error_ops)
             count = ingest_normalized(conn)
             st.success(f"Normalized + ingested {count} rows.")
         if st.button("Rebuild orders_raw from CSVs"):
             conn.execute("DROP TABLE IF EXISTS orders_raw")
+            conn.execute("DROP TABLE IF EXISTS orders_raw_versions")
             count = ingest_normalized(conn)
             st.success(f"Rebuilt orders_raw with {count} rows.")
         if st.button("Refresh from normalized CSVs"):
@@ -533,6 +548,14 @@ def main() -> None:
         st.subheader("Sync Status")
         st.caption("Raw vs normalized timestamps, plus geocode cache freshness.")
         st.dataframe(build_sync_status(), width="stretch")
+        st.subheader("Changes since last normalize")
+        change_summary, change_entries = build_change_status()
+        if change_summary.empty:
+            st.info("No changelog yet; it is written by the next parse/normalize run.")
+        else:
+            st.dataframe(change_summary, width="stretch")
+            if not change_entries.empty:
+                st.dataframe(change_entries, width="stretch")
         st.subheader("Artifacts")
         st.dataframe(build_global_status(), width="stretch")
 
@@ -1383,7 +1406,7 @@ def main() -> None:
                 with st.expander(f"{row.get('order_id','')} | {row.get('platform','')} | {row.get('provider','')} | {row.get('error_code','')}"):
                     st.write(str(row.get("message", "")))
                     if st.button("Resolve", key=f"resolve_{row['row_id']}"):
-                        resolve_error_row(int(row["row_id"]))
+                        resolve_error_row(row.to_dict())
                         st.rerun()
 
     with tab_orders:
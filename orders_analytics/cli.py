@@ -1,13 +1,24 @@
 #!/usr/bin/env python3
 import argparse
+import datetime as dt
 import os
 import sys
+import time
 from typing import Dict, List, Tuple, Optional
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from orders_analytics.utils.platforms import Platforms
 from orders_analytics.utils.constants import takeout_path
+from orders_analytics.utils.platform_registry import extract_platforms, get_spec, load, run_steps
+from orders_analytics.utils.profiling import profile_run
+
+
+def iso_date(value: str) -> str:
+    try:
+        return dt.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, got {value!r}")
 
 
 def parse_extras(values: Optional[List[str]]) -> Dict[str, str]:
@@ -22,6 +33,13 @@ def parse_extras(values: Optional[List[str]]) -> Dict[str, str]:
     return extras
 
 
+def _report_changes(platform: str, stats) -> None:
+    if stats.changes:
+        from orders_analytics.utils.normalized_changes import format_changes
+
+        print(f"[{platform}] changes since last output: {format_changes(stats.changes)}")
+
+
 def run_parse(
     platform: str,
     input_path: Optional[str],
@@ -29,316 +47,26 @@ def run_parse(
     billings_mbox: Optional[str],
     extras: Dict[str, str],
 ) -> None:
-    if platform == Platforms.EATSTREET:
-        from orders_analytics.parsers.eatstreet import (
-            extract_eatstreet_billings_raw,
-            extract_eatstreet_orders_raw,
-            normalize_eatstreet_from_raw,
-        )
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_mbox = input_path or extras.pop(
-            "orders_mbox", takeout_path("Mail", "Orders-Eatstreet.mbox")
-        )
-        billings = billings_mbox or extras.pop(
-            "billings_mbox", takeout_path("Mail", "Billings-Eatstreet.mbox")
-        )
-        orders_raw = extras.pop("orders_raw", raw_path("eatstreet", "orders_raw.csv"))
-        billings_raw = extras.pop("billings_raw", raw_path("eatstreet", "billings_raw.csv"))
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("eatstreet_orders_normalized.csv")
-        )
-
-        extract_eatstreet_orders_raw.run(orders_mbox, orders_raw)
-        extract_eatstreet_billings_raw.run(billings, billings_raw)
-        normalize_eatstreet_from_raw.run(orders_raw, billings_raw, normalized_out)
-        print("[eatstreet] extracted raw orders + billings and normalized.")
-        return
-    elif platform == Platforms.BEYONDMENU:
-        from orders_analytics.parsers.beyondmenu.parse_beyondmenu_orders import (
-            BeyondMenuOrdersParser,
-        )
-
-        runner = BeyondMenuOrdersParser(input_path=input_path, out_path=out_path, **extras)
-    elif platform == Platforms.FOODJA:
-        from orders_analytics.parsers.foodja.parse_foodja_orders import FoodjaOrdersParser
-
-        runner = FoodjaOrdersParser(input_path=input_path, out_path=out_path, **extras)
-    elif platform == Platforms.FOODA:
-        from orders_analytics.parsers.fooda.parse_fooda_orders import FoodaOrdersParser
-
-        runner = FoodaOrdersParser(input_path=input_path, out_path=out_path, **extras)
-    elif platform == Platforms.EZCATER:
-        from orders_analytics.parsers.ezcater.parse_ezcater_orders import EzCaterOrdersParser
-
-        runner = EzCaterOrdersParser(input_path=input_path, out_path=out_path, **extras)
-    elif platform == Platforms.UBEREATS:
-        from orders_analytics.parsers.ubereats.parse_ubereats_orders import (
-            UberEatsOrdersParser,
-        )
-
-        runner = UberEatsOrdersParser(input_path=input_path, out_path=out_path, **extras)
-    elif platform == Platforms.GRUBHUB:
-        from orders_analytics.parsers.grubhub.parse_grubhub_orders import GrubhubOrdersParser
-
-        runner = GrubhubOrdersParser(input_path=input_path, out_path=out_path, **extras)
-    elif platform == Platforms.DOORDASH:
-        from orders_analytics.parsers.doordash.parse_doordash_orders import DoorDashOrdersParser
-
-        runner = DoorDashOrdersParser(input_path=input_path, out_path=out_path, **extras)
-    elif platform == Platforms.MEALHI5:
-        from orders_analytics.parsers.mealhi5.parse_mealhi5_orders import MealHi5OrdersParser
-
-        runner = MealHi5OrdersParser(input_path=input_path, out_path=out_path, **extras)
-    elif platform == Platforms.DELIVERYCOM:
-        from orders_analytics.parsers.deliverycom.parse_deliverycom_orders import (
-            DeliveryComOrdersParser,
-        )
-
-        runner = DeliveryComOrdersParser(input_path=input_path, out_path=out_path, **extras)
-    elif platform == Platforms.CATER2ME:
-        from orders_analytics.parsers.cater2me import (
-            extract_cater2me_billings_raw,
-            extract_cater2me_orders_raw,
-            normalize_cater2me_from_raw,
-        )
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_mbox = input_path or extras.pop(
-            "orders_mbox", takeout_path("Mail", "Orders-Cater2Me.mbox")
-        )
-        billings = billings_mbox or extras.pop(
-            "billings_mbox", takeout_path("Mail", "Billings-Cater2Me.mbox")
-        )
-        orders_raw = extras.pop("orders_raw", raw_path("cater2me", "orders_raw.csv"))
-        billings_raw = extras.pop("billings_raw", raw_path("cater2me", "billings_raw.csv"))
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("cater2me_orders_normalized.csv")
-        )
-        extract_cater2me_orders_raw.run(orders_mbox, orders_raw)
-        extract_cater2me_billings_raw.run(billings, billings_raw)
-        normalize_cater2me_from_raw.run(orders_raw, billings_raw, normalized_out)
-        print("[cater2me] extracted raw orders + billings and normalized.")
-        return
-    elif platform == Platforms.MENUSTAR:
-        from orders_analytics.parsers.menustar import (
-            extract_menustar_billings_raw,
-            extract_menustar_orders_raw,
-            normalize_menustar_from_raw,
-        )
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_mbox = input_path or extras.pop(
-            "orders_mbox", takeout_path("Mail", "Orders-Menustar.mbox")
-        )
-        billings = billings_mbox or extras.pop(
-            "billings_mbox", takeout_path("Mail", "Billings-Menustar.mbox")
-        )
-        orders_raw = extras.pop("orders_raw", raw_path("menustar", "orders_raw.csv"))
-        billings_raw = extras.pop("billings_raw", raw_path("menustar", "billings_raw.csv"))
-        adjustments_raw = extras.pop("adjustments_raw", raw_path("menustar", "adjustments_raw.csv"))
-        billings_overrides_raw = extras.pop(
-            "billings_overrides_raw", raw_path("menustar", "billings_overrides.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("menustar_orders_normalized.csv")
-        )
-        extract_menustar_orders_raw.run(orders_mbox, orders_raw)
-        extract_menustar_billings_raw.run(billings, billings_raw)
-        include_zip_backfill = str(extras.pop("include_zip_backfill", "")).strip().lower() in {
-            "1",
-            "true",
-            "yes",
-            "y",
-        }
-        if include_zip_backfill:
-            from orders_analytics.scripts import menustar_zip_reports
-
-            zip_merge_into_billings = str(
-                extras.pop("zip_merge_into_billings", "")
-            ).strip().lower() in {"1", "true", "yes", "y"}
-            menustar_zip_reports.run(
-                zip_dir=extras.pop("zip_dir", takeout_path("Mail", "menustar")),
-                orders_out=extras.pop(
-                    "zip_orders_out", raw_path("menustar", "orders_from_zip_reports.csv")
-                ),
-                yearly_out=extras.pop(
-                    "zip_yearly_out", raw_path("menustar", "yearly_summaries_from_zip_reports.csv")
-                ),
-                merge_into_billings=zip_merge_into_billings,
-                billings_out=billings_raw,
-            )
-        normalize_menustar_from_raw.run(
-            orders_raw, billings_raw, adjustments_raw, billings_overrides_raw, normalized_out
-        )
-        print("[menustar] extracted raw orders + billings and normalized.")
-        return
-    elif platform == Platforms.DELIVERYCOM:
-        from orders_analytics.parsers.deliverycom import (
-            extract_deliverycom_billings_raw,
-            extract_deliverycom_orders_raw,
-            normalize_deliverycom_from_raw,
-        )
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_mbox = input_path or extras.pop(
-            "orders_mbox", takeout_path("Mail", "Orders-DeliveryCom.mbox")
-        )
-        billings = billings_mbox or extras.pop(
-            "billings_mbox", takeout_path("Mail", "Billings-DeliveryCom.mbox")
-        )
-        orders_raw = extras.pop("orders_raw", raw_path("deliverycom", "orders_raw.csv"))
-        billings_raw = extras.pop("billings_raw", raw_path("deliverycom", "billings_raw.csv"))
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("deliverycom_orders_normalized.csv")
-        )
-        extract_deliverycom_orders_raw.run(orders_mbox, orders_raw)
-        extract_deliverycom_billings_raw.run(billings, billings_raw)
-        normalize_deliverycom_from_raw.run(orders_raw, billings_raw, normalized_out)
-        print("[deliverycom] extracted raw orders + billings and normalized.")
-        return
-    elif platform == Platforms.FOODEE:
-        from orders_analytics.parsers.foodee import (
-            extract_foodee_billings_raw,
-            extract_foodee_orders_raw,
-            normalize_foodee_from_raw,
-        )
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_mbox = input_path or extras.pop(
-            "orders_mbox", takeout_path("Mail", "Orders-Foodee.mbox")
-        )
-        billings = billings_mbox or extras.pop(
-            "billings_mbox", takeout_path("Mail", "Billings-Foodee.mbox")
-        )
-        orders_raw = extras.pop("orders_raw", raw_path("foodee", "orders_raw.csv"))
-        billings_raw = extras.pop("billings_raw", raw_path("foodee", "billings_raw.csv"))
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("foodee_orders_normalized.csv")
-        )
-        extract_foodee_orders_raw.run(orders_mbox, orders_raw)
-        extract_foodee_billings_raw.run(billings, billings_raw)
-        normalize_foodee_from_raw.run(orders_raw, billings_raw, normalized_out)
-        print("[foodee] extracted raw orders + billings and normalized.")
-        return
-    elif platform == Platforms.FOODRUNNERS:
-        from orders_analytics.parsers.foodrunners import (
-            extract_foodrunners_billings_raw,
-            extract_foodrunners_orders_raw,
-            normalize_foodrunners_from_raw,
-        )
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_mbox = input_path or extras.pop(
-            "orders_mbox", takeout_path("Mail", "Orders-FoodRunners.mbox")
-        )
-        billings = billings_mbox or extras.pop(
-            "billings_mbox", takeout_path("Mail", "Billings-FoodRunners.mbox")
-        )
-        orders_raw = extras.pop("orders_raw", raw_path("foodrunners", "orders_raw.csv"))
-        billings_raw = extras.pop("billings_raw", raw_path("foodrunners", "billings_raw.csv"))
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("foodrunners_orders_normalized.csv")
-        )
-        extract_foodrunners_orders_raw.run(orders_mbox, orders_raw)
-        extract_foodrunners_billings_raw.run(billings, billings_raw)
-        normalize_foodrunners_from_raw.run(orders_raw, billings_raw, normalized_out)
-        print("[foodrunners] extracted raw orders + billings and normalized.")
-        return
-    elif platform == Platforms.OFFICECATERER:
-        from orders_analytics.parsers.officecaterer import (
-            extract_officecaterer_billings_raw,
-            extract_officecaterer_orders_raw,
-            normalize_officecaterer_from_raw,
-        )
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_mbox = input_path or extras.pop(
-            "orders_mbox", takeout_path("Mail", "Orders-OfficeCaterer.mbox")
-        )
-        billings = billings_mbox or extras.pop(
-            "billings_mbox", takeout_path("Mail", "Billings-OfficeCaterer.mbox")
-        )
-        orders_raw = extras.pop("orders_raw", raw_path("officecaterer", "orders_raw.csv"))
-        billings_raw = extras.pop(
-            "billings_raw", raw_path("officecaterer", "billings_raw.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("officecaterer_orders_normalized.csv")
-        )
-        extract_officecaterer_orders_raw.run(orders_mbox, orders_raw)
-        extract_officecaterer_billings_raw.run(billings, billings_raw)
-        normalize_officecaterer_from_raw.run(
-            orders_raw,
-            normalized_out,
-            billings_raw_path=billings_raw,
-        )
-        print("[officecaterer] extracted raw orders + billings and normalized.")
-        return
-    elif platform == Platforms.BRYGID:
-        from orders_analytics.parsers.brygid import (
-            extract_brygid_billings_raw,
-            extract_brygid_orders_raw,
-            normalize_brygid_from_raw,
-        )
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_mbox = input_path or extras.pop(
-            "orders_mbox", takeout_path("Mail", "Orders-Brygid.mbox")
-        )
-        orders_raw = extras.pop("orders_raw", raw_path("brygid", "orders_raw.csv"))
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("brygid_orders_normalized.csv")
-        )
-        extract_brygid_orders_raw.run(orders_mbox, orders_raw)
-        extract_brygid_billings_raw.run(
-            takeout_path("Mail", "Billings-Brygid.mbox"),
-            raw_path("brygid", "billings_raw.csv"),
-        )
-        normalize_brygid_from_raw.run(orders_raw, normalized_out)
-        print("[brygid] extracted raw orders and normalized.")
-        return
-    elif platform == Platforms.ORDERINN:
-        from orders_analytics.parsers.orderinn import (
-            extract_orderinn_raw,
-            normalize_orderinn_from_raw,
-        )
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        raw_out = extras.pop("orders_raw", raw_path("orderinn", "commissions_raw.csv"))
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("orderinn_orders_normalized.csv")
-        )
-        extract_orderinn_raw.run(raw_out)
-        normalize_orderinn_from_raw.run(raw_out, normalized_out)
-        print("[orderinn] extracted raw commissions and normalized.")
-        return
-    elif platform == Platforms.WAVE:
-        from orders_analytics.parsers.wave import (
-            extract_wave_orders_raw,
-            normalize_wave_from_raw,
-        )
-        from orders_analytics.utils.constants import normalized_path, raw_path, wave_aroma_path
-
-        accounting_csv = extras.pop("accounting_csv", wave_aroma_path("accounting.csv"))
-        customers_csv = extras.pop("customers_csv", wave_aroma_path("customers.csv"))
-        raw_out = extras.pop("orders_raw", raw_path("wave", "orders_raw.csv"))
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("wave_orders_normalized.csv")
-        )
-        extract_wave_orders_raw.run(accounting_csv, customers_csv, raw_out)
-        normalize_wave_from_raw.run(raw_out, normalized_out)
-        print("[wave] extracted raw invoice payments and normalized.")
-        return
-    else:
-        raise ValueError(f"Unknown platform: {platform}")
-
+    spec = get_spec(platform)
+    if not spec.parser:
+        # Extract, then normalize from the raw files just written.
+        context = spec.context(
+            {"orders_mbox": input_path, "billings_mbox": billings_mbox, "normalized_out": out_path},
+            extras,
+        )
+        context.update(incremental=True, workers=1, reset_errors=False)
+        run_steps(spec.extract, context, "parse")
+        run_steps(spec.normalize, context, "parse")
+        print(f"[{platform}] extracted raw data and normalized -> {context['normalized_out']}")
+        return
+    runner = load(spec.parser)(input_path=input_path, out_path=out_path, **extras)
     stats = runner.run()
     if not stats.rows_written:
         print(f"No rows parsed for {platform}.")
         return
     out_path = runner.resolve_paths()[1]
     print(f"[{platform}] wrote {stats.rows_written} rows -> {out_path}")
+    _report_changes(platform, stats)
     if stats.duplicates_removed:
         print(f"[{platform}] removed {stats.duplicates_removed} duplicate rows by order_id")
     if stats.conflicts:
@@ -347,160 +75,26 @@ def run_parse(
 
 def run_extract(
     platform: str,
-    orders_mbox: str,
-    billings_mbox: str,
-    orders_raw: str,
-    billings_raw: str,
+    orders_mbox: Optional[str],
+    billings_mbox: Optional[str],
+    orders_raw: Optional[str],
+    billings_raw: Optional[str],
+    incremental: bool = True,
+    workers: int = 1,
 ) -> None:
-    if platform == Platforms.EATSTREET:
-        from orders_analytics.parsers.eatstreet import (
-            extract_eatstreet_billings_raw,
-            extract_eatstreet_orders_raw,
-        )
-
-        extract_eatstreet_orders_raw.run(orders_mbox, orders_raw)
-        extract_eatstreet_billings_raw.run(billings_mbox, billings_raw)
-        return
-    if platform == Platforms.CATER2ME:
-        from orders_analytics.parsers.cater2me import (
-            extract_cater2me_billings_raw,
-            extract_cater2me_orders_raw,
-        )
-
-        extract_cater2me_orders_raw.run(orders_mbox, orders_raw)
-        extract_cater2me_billings_raw.run(billings_mbox, billings_raw)
-        return
-    if platform == Platforms.MENUSTAR:
-        from orders_analytics.parsers.menustar import (
-            extract_menustar_billings_raw,
-            extract_menustar_orders_raw,
-        )
-
-        extract_menustar_orders_raw.run(orders_mbox, orders_raw)
-        extract_menustar_billings_raw.run(billings_mbox, billings_raw)
-        return
-    if platform == Platforms.DELIVERYCOM:
-        from orders_analytics.parsers.deliverycom import (
-            extract_deliverycom_billings_raw,
-            extract_deliverycom_orders_raw,
-        )
-
-        extract_deliverycom_orders_raw.run(orders_mbox, orders_raw)
-        extract_deliverycom_billings_raw.run(billings_mbox, billings_raw)
-        return
-    if platform == Platforms.FOODA:
-        from orders_analytics.parsers.fooda import extract_fooda_orders_raw
-        from orders_analytics.utils.constants import raw_path, takeout_path
-
-        source_csv = orders_mbox or takeout_path("Mail", "fooda_sales.csv")
-        orders_raw_path = orders_raw or raw_path("fooda", "fooda_sales.csv")
-        extract_fooda_orders_raw.run(source_csv, orders_raw_path)
-        return
-    if platform == Platforms.FOODEE:
-        from orders_analytics.parsers.foodee import (
-            extract_foodee_billings_raw,
-            extract_foodee_orders_raw,
-        )
-
-        extract_foodee_orders_raw.run(orders_mbox, orders_raw)
-        extract_foodee_billings_raw.run(billings_mbox, billings_raw)
-        return
-    if platform == Platforms.FOODRUNNERS:
-        from orders_analytics.parsers.foodrunners import (
-            extract_foodrunners_billings_raw,
-            extract_foodrunners_orders_raw,
-        )
-
-        extract_foodrunners_orders_raw.run(orders_mbox, orders_raw)
-        extract_foodrunners_billings_raw.run(billings_mbox, billings_raw)
-        return
-    if platform == Platforms.OFFICECATERER:
-        from orders_analytics.parsers.officecaterer import (
-            extract_officecaterer_billings_raw,
-            extract_officecaterer_orders_raw,
-        )
-
-        extract_officecaterer_orders_raw.run(orders_mbox, orders_raw)
-        extract_officecaterer_billings_raw.run(billings_mbox, billings_raw)
-        return
-    if platform == Platforms.MENUFY:
-        from orders_analytics.parsers.menufy import extract_menufy_orders_raw
-
-        orders_root = "Takeout/Menufy/orders"
-        emails_csv = "Takeout/Menufy/Customer_Emails_02-05-2026.csv"
-        addresses_csv = "Takeout/Menufy/Customer_Delivery_Addresses_02-05-2026.csv"
-        extract_menufy_orders_raw.run(orders_root, orders_raw, emails_csv, addresses_csv)
-        return
-    if platform == Platforms.SLICE:
-        from orders_analytics.parsers.slice import extract_slice_orders_raw
-
-        orders_root = "Takeout/Slice"
-        extract_slice_orders_raw.run(orders_root, orders_raw)
-        return
-    if platform == Platforms.GRUBHUB:
-        from orders_analytics.parsers.grubhub import extract_grubhub_orders_raw
-        from orders_analytics.utils.constants import raw_path, takeout_path
-
-        orders_raw_path = orders_raw or raw_path("grubhub", "orders_raw.csv")
-        extract_grubhub_orders_raw.run(takeout_path("gh_jan25_jun25.csv"), orders_raw_path)
-        return
-
-    if platform == Platforms.CHOWNOW:
-        from orders_analytics.parsers.chownow import (
-            extract_chownow_orders_raw,
-            extract_chownow_billings_raw,
-        )
-
-        orders_mbox = takeout_path("Mail", "Orders-ChowNow.mbox")
-        billings_mbox = takeout_path("Mail", "Billings-ChowNow.mbox")
-        customer_files = [
-            "Takeout/Chownow/CustomerOrders_lastran_06Feb26.xls",
-            "Takeout/Chownow/CustomerOrders_lastran_06Feb26 (1).xls",
-        ]
-        extract_chownow_orders_raw.run(orders_mbox, orders_raw, customer_files)
-        extract_chownow_billings_raw.run(billings_mbox, billings_raw)
-        return
-    if platform == Platforms.BRYGID:
-        from orders_analytics.parsers.brygid import (
-            extract_brygid_billings_raw,
-            extract_brygid_orders_raw,
-        )
-        from orders_analytics.utils.constants import raw_path
-
-        orders_mbox = takeout_path("Mail", "Orders-Brygid.mbox")
-        extract_brygid_orders_raw.run(orders_mbox, orders_raw)
-        extract_brygid_billings_raw.run(
-            takeout_path("Mail", "Billings-Brygid.mbox"),
-            raw_path("brygid", "billings_raw.csv"),
-        )
-        return
-    if platform == Platforms.ORDERINN:
-        from orders_analytics.parsers.orderinn import extract_orderinn_raw
-        from orders_analytics.utils.constants import raw_path
-
-        out_path = orders_raw or raw_path("orderinn", "commissions_raw.csv")
-        extract_orderinn_raw.run(out_path)
-        return
-    if platform == Platforms.WAVE:
-        from orders_analytics.parsers.wave import extract_wave_orders_raw
-        from orders_analytics.utils.constants import wave_aroma_path
-
-        out_path = orders_raw
-        accounting_csv = orders_mbox or wave_aroma_path("accounting.csv")
-        customers_csv = billings_mbox or wave_aroma_path("customers.csv")
-        extract_wave_orders_raw.run(accounting_csv, customers_csv, out_path)
-        return
-    if platform == Platforms.MAYAEATS:
-        from orders_analytics.parsers.mayaeats import extract_mayaeats_billings_raw
-
-        extract_mayaeats_billings_raw.run(billings_mbox, billings_raw)
-        return
-    if platform == Platforms.NEXTBITE:
-        from orders_analytics.parsers.nextbite import extract_nextbite_billings_raw
-
-        extract_nextbite_billings_raw.run(billings_mbox, orders_raw, billings_raw)
-        return
-    raise ValueError(f"Extract not supported for platform: {platform}")
+    spec = get_spec(platform)
+    if not spec.can_extract:
+        raise ValueError(f"Extract not supported for platform: {platform}")
+    context = spec.context(
+        {
+            "orders_mbox": orders_mbox,
+            "billings_mbox": billings_mbox,
+            "orders_raw": orders_raw,
+            "billings_raw": billings_raw,
+        }
+    )
+    context.update(incremental=incremental, workers=workers)
+    run_steps(spec.extract, context, "extract")
 
 
 def run_normalize(
@@ -512,351 +106,101 @@ def run_normalize(
     extras: Dict[str, str],
     reset_errors: bool = False,
 ) -> None:
+    spec = get_spec(platform)
+    if spec.normalize:
+        context = spec.context(
+            {"orders_raw": orders_raw, "billings_raw": billings_raw, "normalized_out": out_path},
+            dict(extras),
+        )
+        context["reset_errors"] = reset_errors
+        run_steps(spec.normalize, context, "normalize")
+        print(f"[{platform}] normalized -> {context['normalized_out']}")
+        return
     if reset_errors:
         extras = dict(extras)
         extras["reset_errors"] = True
-    if platform == Platforms.EATSTREET:
-        from orders_analytics.parsers.eatstreet import normalize_eatstreet_from_raw
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_raw_path = orders_raw or extras.pop(
-            "orders_raw", raw_path("eatstreet", "orders_raw.csv")
-        )
-        billings_raw_path = billings_raw or extras.pop(
-            "billings_raw", raw_path("eatstreet", "billings_raw.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("eatstreet_orders_normalized.csv")
-        )
-        normalize_eatstreet_from_raw.run(
-            orders_raw_path, billings_raw_path, normalized_out, reset_errors=reset_errors
-        )
-        print(f"[eatstreet] normalized -> {normalized_out}")
-        return
-    if platform == Platforms.CATER2ME:
-        from orders_analytics.parsers.cater2me import normalize_cater2me_from_raw
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_raw_path = orders_raw or extras.pop(
-            "orders_raw", raw_path("cater2me", "orders_raw.csv")
-        )
-        billings_raw_path = billings_raw or extras.pop(
-            "billings_raw", raw_path("cater2me", "billings_raw.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("cater2me_orders_normalized.csv")
-        )
-        normalize_cater2me_from_raw.run(
-            orders_raw_path, billings_raw_path, normalized_out, reset_errors=reset_errors
-        )
-        print(f"[cater2me] normalized -> {normalized_out}")
-        return
-    if platform == Platforms.MENUSTAR:
-        from orders_analytics.parsers.menustar import normalize_menustar_from_raw
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_raw_path = orders_raw or extras.pop(
-            "orders_raw", raw_path("menustar", "orders_raw.csv")
-        )
-        billings_raw_path = billings_raw or extras.pop(
-            "billings_raw", raw_path("menustar", "billings_raw.csv")
-        )
-        adjustments_raw_path = extras.pop(
-            "adjustments_raw", raw_path("menustar", "adjustments_raw.csv")
-        )
-        billings_overrides_raw_path = extras.pop(
-            "billings_overrides_raw", raw_path("menustar", "billings_overrides.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("menustar_orders_normalized.csv")
-        )
-        normalize_menustar_from_raw.run(
-            orders_raw_path,
-            billings_raw_path,
-            adjustments_raw_path,
-            billings_overrides_raw_path,
-            normalized_out,
-            reset_errors=reset_errors,
-        )
-        print(f"[menustar] normalized -> {normalized_out}")
-        return
-    if platform == Platforms.DELIVERYCOM:
-        from orders_analytics.parsers.deliverycom import normalize_deliverycom_from_raw
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_raw_path = orders_raw or extras.pop(
-            "orders_raw", raw_path("deliverycom", "orders_raw.csv")
-        )
-        billings_raw_path = billings_raw or extras.pop(
-            "billings_raw", raw_path("deliverycom", "billings_raw.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("deliverycom_orders_normalized.csv")
-        )
-        normalize_deliverycom_from_raw.run(
-            orders_raw_path, billings_raw_path, normalized_out, reset_errors=reset_errors
-        )
-        print(f"[deliverycom] normalized -> {normalized_out}")
-        return
-    if platform == Platforms.FOODEE:
-        from orders_analytics.parsers.foodee import normalize_foodee_from_raw
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_raw_path = orders_raw or extras.pop(
-            "orders_raw", raw_path("foodee", "orders_raw.csv")
-        )
-        billings_raw_path = billings_raw or extras.pop(
-            "billings_raw", raw_path("foodee", "billings_raw.csv")
-        )
-        adjustments_raw_path = extras.pop(
-            "adjustments_raw", raw_path("foodee", "adjustments_raw.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("foodee_orders_normalized.csv")
-        )
-        normalize_foodee_from_raw.run(
-            orders_raw_path,
-            billings_raw_path,
-            adjustments_raw_path,
-            normalized_out,
-            reset_errors=reset_errors,
-        )
-        print(f"[foodee] normalized -> {normalized_out}")
-        return
-    if platform == Platforms.FOODRUNNERS:
-        from orders_analytics.parsers.foodrunners import normalize_foodrunners_from_raw
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_raw_path = orders_raw or extras.pop(
-            "orders_raw", raw_path("foodrunners", "orders_raw.csv")
-        )
-        billings_raw_path = billings_raw or extras.pop(
-            "billings_raw", raw_path("foodrunners", "billings_raw.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("foodrunners_orders_normalized.csv")
-        )
-        normalize_foodrunners_from_raw.run(
-            orders_raw_path, billings_raw_path, normalized_out, reset_errors=reset_errors
-        )
-        print(f"[foodrunners] normalized -> {normalized_out}")
-        return
-    if platform == Platforms.OFFICECATERER:
-        from orders_analytics.parsers.officecaterer import normalize_officecaterer_from_raw
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_raw_path = orders_raw or extras.pop(
-            "orders_raw", raw_path("officecaterer", "orders_raw.csv")
-        )
-        billings_raw_path = billings_raw or extras.pop(
-            "billings_raw", raw_path("officecaterer", "billings_raw.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("officecaterer_orders_normalized.csv")
-        )
-        normalize_officecaterer_from_raw.run(
-            orders_raw_path,
-            normalized_out,
-            reset_errors=reset_errors,
-            billings_raw_path=billings_raw_path,
-        )
-        print(f"[officecaterer] normalized -> {normalized_out}")
-        return
-    if platform == Platforms.MENUFY:
-        from orders_analytics.parsers.menufy import normalize_menufy_from_raw
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_raw_path = orders_raw or extras.pop(
-            "orders_raw", raw_path("menufy", "orders_raw.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("menufy_orders_normalized.csv")
-        )
-        normalize_menufy_from_raw.run(
-            orders_raw_path, normalized_out, reset_errors=reset_errors
-        )
-        print(f"[menufy] normalized -> {normalized_out}")
-        return
-    if platform == Platforms.SLICE:
-        from orders_analytics.parsers.slice import normalize_slice_from_raw
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_raw_path = orders_raw or extras.pop(
-            "orders_raw", raw_path("slice", "orders_raw.csv")
-        )
-        adjustments_raw_path = extras.pop(
-            "adjustments_raw", raw_path("slice", "adjustments_raw.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("slice_orders_normalized.csv")
-        )
-        normalize_slice_from_raw.run(
-            orders_raw_path,
-            adjustments_raw_path,
-            normalized_out,
-            reset_errors=reset_errors,
-        )
-        print(f"[slice] normalized -> {normalized_out}")
-        return
-    if platform == Platforms.CHOWNOW:
-        from orders_analytics.parsers.chownow import normalize_chownow_from_raw
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_raw_path = orders_raw or extras.pop(
-            "orders_raw", raw_path("chownow", "orders_raw.csv")
-        )
-        billings_raw_path = billings_raw or extras.pop(
-            "billings_raw", raw_path("chownow", "billings_raw.csv")
-        )
-        cancellations_raw_path = extras.pop(
-            "cancellations_raw", raw_path("chownow", "cancellations_raw.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("chownow_orders_normalized.csv")
-        )
-        normalize_chownow_from_raw.run(
-            orders_raw_path,
-            billings_raw_path,
-            cancellations_raw_path,
-            normalized_out,
-            reset_errors=reset_errors,
-        )
-        print(f"[chownow] normalized -> {normalized_out}")
-        return
-    if platform == Platforms.BRYGID:
-        from orders_analytics.scripts import (
-            brygid_merge_email_csv_orders,
-            brygid_normalize_report_csvs,
-        )
-        from orders_analytics.parsers.brygid import normalize_brygid_from_raw
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        # Ensure Brygid CSV + email merges are fresh before normalization.
-        brygid_normalize_report_csvs.run()
-        brygid_merge_email_csv_orders.run()
-
-        orders_raw_path = orders_raw or extras.pop(
-            "orders_raw", raw_path("brygid", "orders_raw.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("brygid_orders_normalized.csv")
-        )
-        normalize_brygid_from_raw.run(
-            orders_raw_path,
-            normalized_out,
-            reset_errors=reset_errors,
-        )
-        print(f"[brygid] normalized -> {normalized_out}")
-        return
-    if platform == Platforms.ORDERINN:
-        from orders_analytics.parsers.orderinn import normalize_orderinn_from_raw
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_raw_path = orders_raw or extras.pop(
-            "orders_raw", raw_path("orderinn", "commissions_raw.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("orderinn_orders_normalized.csv")
-        )
-        normalize_orderinn_from_raw.run(
-            orders_raw_path,
-            normalized_out,
-        )
-        print(f"[orderinn] normalized -> {normalized_out}")
-        return
-    if platform == Platforms.NEXTBITE:
-        from orders_analytics.parsers.nextbite import normalize_nextbite_from_raw
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_raw_path = orders_raw or extras.pop(
-            "orders_raw", raw_path("nextbite", "orders_raw.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("nextbite_orders_normalized.csv")
-        )
-        normalize_nextbite_from_raw.run(
-            orders_raw_path,
-            normalized_out,
-            reset_errors=reset_errors,
-        )
-        print(f"[nextbite] normalized -> {normalized_out}")
-        return
-    if platform == Platforms.WAVE:
-        from orders_analytics.parsers.wave import normalize_wave_from_raw
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        orders_raw_path = orders_raw or extras.pop(
-            "orders_raw", raw_path("wave", "orders_raw.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("wave_orders_normalized.csv")
-        )
-        normalize_wave_from_raw.run(
-            orders_raw_path,
-            normalized_out,
-            reset_errors=reset_errors,
-        )
-        print(f"[wave] normalized -> {normalized_out}")
-        return
-    if platform == Platforms.MAYAEATS:
-        from orders_analytics.parsers.mayaeats import normalize_mayaeats_from_raw
-        from orders_analytics.utils.constants import normalized_path, raw_path
-
-        billings_raw_path = billings_raw or extras.pop(
-            "billings_raw", raw_path("mayaeats", "billings_raw.csv")
-        )
-        normalized_out = out_path or extras.pop(
-            "normalized_out", normalized_path("mayaeats_orders_normalized.csv")
-        )
-        normalize_mayaeats_from_raw.run(
-            billings_raw_path,
-            normalized_out,
-            reset_errors=reset_errors,
-        )
-        print(f"[mayaeats] normalized -> {normalized_out}")
-        return
-    if platform == Platforms.BEYONDMENU:
-        from orders_analytics.parsers.beyondmenu.parse_beyondmenu_orders import (
-            BeyondMenuOrdersParser,
-        )
-
-        runner = BeyondMenuOrdersParser(input_path=input_path, out_path=out_path, **extras)
-    elif platform == Platforms.FOODJA:
-        from orders_analytics.parsers.foodja.parse_foodja_orders import FoodjaOrdersParser
-
-        runner = FoodjaOrdersParser(input_path=input_path, out_path=out_path, **extras)
-    elif platform == Platforms.FOODA:
-        from orders_analytics.parsers.fooda.parse_fooda_orders import FoodaOrdersParser
-
-        runner = FoodaOrdersParser(input_path=input_path, out_path=out_path, **extras)
-    elif platform == Platforms.EZCATER:
-        from orders_analytics.parsers.ezcater.parse_ezcater_orders import EzCaterOrdersParser
-
-        runner = EzCaterOrdersParser(input_path=input_path, out_path=out_path, **extras)
-    elif platform == Platforms.UBEREATS:
-        from orders_analytics.parsers.ubereats.parse_ubereats_orders import (
-            UberEatsOrdersParser,
-        )
-
-        runner = UberEatsOrdersParser(input_path=input_path, out_path=out_path, **extras)
-    elif platform == Platforms.GRUBHUB:
-        from orders_analytics.parsers.grubhub.parse_grubhub_orders import GrubhubOrdersParser
-
-        runner = GrubhubOrdersParser(input_path=input_path, out_path=out_path, **extras)
-    elif platform == Platforms.DOORDASH:
-        from orders_analytics.parsers.doordash.parse_doordash_orders import DoorDashOrdersParser
-
-        runner = DoorDashOrdersParser(input_path=input_path, out_path=out_path, **extras)
-    elif platform == Platforms.MEALHI5:
-        from orders_analytics.parsers.mealhi5.parse_mealhi5_orders import MealHi5OrdersParser
-
-        runner = MealHi5OrdersParser(input_path=input_path, out_path=out_path, **extras)
-    else:
-        raise ValueError(f"Unknown platform: {platform}")
-
+    runner = load(spec.parser)(input_path=input_path, out_path=out_path, **extras)
     stats = runner.run()
     out_path = runner.resolve_paths()[1]
     print(f"[{platform}] normalized -> {out_path} ({stats.rows_written} rows)")
+    _report_changes(platform, stats)
+
+
+def run_platform_jobs(jobs, workers: int, platforms: List[str], replays=None) -> list:
+    """
+    Run per-platform jobs (in a process pool when `workers` > 1), then reconcile the
+    errors every platform produced (or `replays` carries for it) into errors.csv once,
+    in `platforms` order. Returns the results in job order.
+    """
+    from orders_analytics.utils.errors import apply_error_ops
+    from orders_analytics.utils.platform_runner import format_wall_times, iter_results
+    from orders_analytics.utils.profiling import append_history
+
+    replays = replays or {}
+    started = time.perf_counter()
+    results = {}
+    for result in iter_results(jobs, workers):
+        print(result.output, end="")
+        if not result.ok:
+            print(f"[{result.platform}] failed:\n{result.failure}", file=sys.stderr)
+        if result.run is not None:
+            append_history(result.run)
+        results[result.platform] = result
+    error_ops: List[list] = []
+    for platform in platforms:
+        if platform in replays:
+            error_ops.extend(replays[platform])
+        elif platform in results:
+            error_ops.extend(results[platform].error_ops)
+    apply_error_ops(error_ops)
+    ordered = [results[job.platform] for job in jobs]
+    if len(ordered) > 1:
+        print(format_wall_times(ordered, time.perf_counter() - started))
+    return ordered
+
+
+def run_profile(
+    platform: str,
+    flow: str,
+    extras: Dict[str, str],
+    out_dir: str,
+    top: int = 25,
+) -> None:
+    import cProfile
+    import json
+    import pstats
+
+    from orders_analytics.utils.datetimes import format_datetime_stats, reset_datetime_stats
+    from orders_analytics.utils.profiling import format_stages, profile_run
+
+    reset_datetime_stats()
+    profiler = cProfile.Profile()
+    with profile_run(flow, platform) as run:
+        profiler.enable()
+        try:
+            if flow == "normalize":
+                run_normalize(platform, None, None, None, None, extras)
+            else:
+                run_parse(platform, None, None, None, extras)
+        finally:
+            profiler.disable()
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, f"{platform}-{flow}-{dt.datetime.now():%Y%m%d-%H%M%S}")
+    profiler.dump_stats(f"{base}.pstats")
+    with open(f"{base}.json", "w", encoding="utf-8") as handle:
+        json.dump(run.to_dict(), handle, indent=2)
+    print(format_stages(run.stages))
+    print(format_datetime_stats())
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(top)
+    print(f"Wrote {base}.pstats and {base}.json")
+
+
+def _report_rewrite(csv_path: str) -> None:
+    from orders_analytics.utils.normalized_changes import format_changes, record_rewrite
+
+    changes = record_rewrite(csv_path)
+    if changes is not None:
+        print(f"Changes to {csv_path}: {format_changes(changes.counts())}")
 
 
 def run_fees(args) -> None:
@@ -869,6 +213,7 @@ def run_fees(args) -> None:
         missing_out=args.missing_out,
         backup_dir=args.backup_dir,
     )
+    _report_rewrite(args.out)
 
 
 def run_ingest(db_path: Optional[str]) -> None:
@@ -887,6 +232,7 @@ def run_geocode(
     cache_only: bool,
     counts_out: Optional[str],
     misses_out: Optional[str],
+    changed_only: bool = False,
 ) -> None:
     import pandas as pd
     import os
@@ -902,8 +248,20 @@ def run_geocode(
             raise ValueError("GEOCODE_API_KEY is required unless --cache-only is set.")
 
     df = pd.read_csv(input_path, dtype=str).fillna("")
+    scope = df
+    if changed_only:
+        from orders_analytics.utils.normalized_changes import DELETED, current_run_id, latest_changes
+
+        if current_run_id(input_path) is None:
+            print(f"No changelog for {input_path}; geocoding all rows.")
+        else:
+            changed = {
+                entry["order_id"] for entry in latest_changes(input_path) if entry["change"] != DELETED
+            }
+            scope = df[df["order_id"].isin(changed)]
+            print(f"Geocoding {len(scope)} changed row(s) of {len(df)}.")
     cache = geocode_addresses(
-        df.to_dict("records"),
+        scope.to_dict("records"),
         api_key=api_key,
         cache_path=cache_path,
         batch_size=batch_size,
@@ -954,7 +312,7 @@ def run_geocode(
     cache_missing_formatted = 0
     already_formatted = 0
     misses: List[Dict[str, str]] = []
-    for idx, row in df.iterrows():
+    for idx, row in scope.iterrows():
         address = str(row.get("address") or "").strip()
         if not address:
             continue
@@ -992,6 +350,7 @@ def run_geocode(
     output = out_path or input_path
     df.to_csv(output, index=False)
     print(f"Geocoded {updated} row(s) -> {output}")
+    _report_rewrite(output)
     print(
         "Geocode stats:",
         f"rows_with_address={rows_with_address}",
@@ -1055,20 +414,12 @@ def main() -> None:
         help="Additional parser args as key=value (can repeat).",
     )
 
-    from orders_analytics.utils.constants import normalized_path, raw_path
-
     extract_cmd = subparsers.add_parser(
         "extract", help="Extract raw data from provider inputs."
     )
     extract_cmd.add_argument(
         "--platform",
-        choices=[
-            *Platforms.mbox_platforms(),
-            Platforms.FOODA,
-            Platforms.MENUFY,
-            Platforms.SLICE,
-            Platforms.ORDERINN,
-        ],
+        choices=extract_platforms(),
         default=Platforms.EATSTREET,
         help="Platform to extract.",
     )
@@ -1092,6 +443,34 @@ def main() -> None:
         default=None,
         help="Output billings raw CSV path (platform-specific default if omitted).",
     )
+    extract_cmd.add_argument(
+        "--full-rescan",
+        action="store_true",
+        help="Re-parse every mbox message instead of only mail added since the last extract.",
+    )
+    extract_cmd.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Parse across N processes (eatstreet/menustar/deliverycom order mail, slice PDFs).",
+    )
+    extract_cmd.add_argument(
+        "--rebuild-pdf-cache",
+        action="store_true",
+        help="Discard cached PDF attachment text and re-run pdfplumber on every statement.",
+    )
+    extract_cmd.add_argument(
+        "--since",
+        type=iso_date,
+        default=None,
+        help="Only parse mbox mail dated on or after YYYY-MM-DD (backfill; upserts rows).",
+    )
+    extract_cmd.add_argument(
+        "--until",
+        type=iso_date,
+        default=None,
+        help="Only parse mbox mail dated on or before YYYY-MM-DD (backfill; upserts rows).",
+    )
 
     normalize_cmd = subparsers.add_parser(
         "normalize", help="Normalize raw data into canonical schema."
@@ -1131,7 +510,29 @@ def main() -> None:
         default=True,
         help="Reset errors.csv before normalizing (default: true).",
     )
+    normalize_cmd.add_argument(
+        "--force",
+        action="store_true",
+        help="With --platform all, rebuild platforms whose inputs and code are unchanged.",
+    )
+    normalize_cmd.add_argument(
+        "--explain",
+        action="store_true",
+        help="Print why each platform is rebuilt or skipped.",
+    )
+    normalize_cmd.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Run up to N platforms at once in separate processes (errors.csv is reconciled once at the end).",
+    )
     parse_cmd.add_argument("--out", help="Override output path.")
+    parse_cmd.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Run up to N platforms at once in separate processes (errors.csv is reconciled once at the end).",
+    )
 
     fees_cmd = subparsers.add_parser("fees", help="Update EatStreet fees from billings.")
     fees_cmd.add_argument(
@@ -1214,6 +615,11 @@ def main() -> None:
         default=None,
         help="Write geocode cache misses CSV to this path.",
     )
+    geocode_cmd.add_argument(
+        "--changed-only",
+        action="store_true",
+        help="Only geocode rows inserted or updated by the last parse/normalize run.",
+    )
 
     sheets_cmd = subparsers.add_parser(
         "sheets", help="Download registered Google Sheets."
@@ -1234,7 +640,47 @@ def main() -> None:
     errors_cmd.add_argument(
         "--reset",
         action="store_true",
-        help="Delete existing errors.csv before rebuilding.",
+        help="Delete existing errors.csv (and its store) before rebuilding.",
+    )
+    errors_cmd.add_argument(
+        "--export",
+        action="store_true",
+        help="Only rewrite errors.csv from the error store.",
+    )
+
+    from orders_analytics.utils.constants import PROFILE_DIR
+
+    profile_cmd = subparsers.add_parser(
+        "profile", help="Run one platform under cProfile and report per-stage timings."
+    )
+    profile_cmd.add_argument(
+        "--platform",
+        choices=Platforms.all_platforms(),
+        required=True,
+        help="Platform to profile.",
+    )
+    profile_cmd.add_argument(
+        "--flow",
+        choices=["parse", "normalize"],
+        default="parse",
+        help="Flow to profile (parse = extract + normalize).",
+    )
+    profile_cmd.add_argument(
+        "--extra",
+        action="append",
+        default=None,
+        help="Additional parser args as key=value (can repeat).",
+    )
+    profile_cmd.add_argument(
+        "--out-dir",
+        default=PROFILE_DIR,
+        help="Directory for the .pstats dump and .json stage breakdown.",
+    )
+    profile_cmd.add_argument(
+        "--top",
+        type=int,
+        default=25,
+        help="Number of functions to print, by cumulative time.",
     )
 
     args = parser.parse_args()
@@ -1249,122 +695,76 @@ def main() -> None:
             )
         else:
             platforms = [args.platform]
+        from orders_analytics.utils.platform_runner import PlatformJob
+
         base_extras = parse_extras(args.extra)
-        for platform in platforms:
-            run_parse(
+        jobs = [
+            PlatformJob(
+                "parse",
                 platform,
-                args.input,
-                args.out,
-                args.billings_mbox,
-                dict(base_extras),
+                run_parse,
+                (platform, args.input, args.out, args.billings_mbox, dict(base_extras)),
             )
+            for platform in platforms
+        ]
+        results = run_platform_jobs(jobs, args.jobs, platforms)
+        failed = [result.platform for result in results if not result.ok]
+        if failed:
+            raise SystemExit(f"Failed platforms: {', '.join(failed)}")
     elif args.command == "fees":
         run_fees(args)
     elif args.command == "ingest":
         run_ingest(args.db_path)
     elif args.command == "errors":
         from orders_analytics.utils.constants import ERRORS_PATH
-
-        if args.reset and os.path.exists(ERRORS_PATH):
-            os.remove(ERRORS_PATH)
+        from orders_analytics.utils.errors import (
+            apply_error_ops,
+            deferred_errors,
+            export_errors_csv,
+            reset_errors_store,
+        )
+
+        if args.export:
+            count = export_errors_csv(ERRORS_PATH)
+            print(f"Exported {count} errors to {ERRORS_PATH}")
+            return
+        if args.reset and reset_errors_store(ERRORS_PATH):
             print(f"Deleted {ERRORS_PATH}")
         # Re-run validations by re-normalizing/parsing platforms.
-        run_parse(Platforms.EATSTREET, None, None, None, {})
-        run_parse(Platforms.BEYONDMENU, None, None, None, {})
+        with deferred_errors() as error_ops:
+            run_parse(Platforms.EATSTREET, None, None, None, {})
+            run_parse(Platforms.BEYONDMENU, None, None, None, {})
+        apply_error_ops(error_ops)
     elif args.command == "extract":
-        from orders_analytics.utils.constants import raw_path
-
-        if args.platform == Platforms.EATSTREET:
-            orders_mbox = args.orders_mbox or takeout_path("Mail", "Orders-Eatstreet.mbox")
-            billings_mbox = args.billings_mbox or takeout_path("Mail", "Billings-Eatstreet.mbox")
-            orders_raw = args.orders_raw or raw_path("eatstreet", "orders_raw.csv")
-            billings_raw = args.billings_raw or raw_path("eatstreet", "billings_raw.csv")
-        elif args.platform == Platforms.CATER2ME:
-            orders_mbox = args.orders_mbox or takeout_path("Mail", "Orders-Cater2Me.mbox")
-            billings_mbox = args.billings_mbox or takeout_path("Mail", "Billings-Cater2Me.mbox")
-            orders_raw = args.orders_raw or raw_path("cater2me", "orders_raw.csv")
-            billings_raw = args.billings_raw or raw_path("cater2me", "billings_raw.csv")
-        elif args.platform == Platforms.MENUSTAR:
-            orders_mbox = args.orders_mbox or takeout_path("Mail", "Orders-Menustar.mbox")
-            billings_mbox = args.billings_mbox or takeout_path("Mail", "Billings-Menustar.mbox")
-            orders_raw = args.orders_raw or raw_path("menustar", "orders_raw.csv")
-            billings_raw = args.billings_raw or raw_path("menustar", "billings_raw.csv")
-        elif args.platform == Platforms.FOODEE:
-            orders_mbox = args.orders_mbox or takeout_path("Mail", "Orders-Foodee.mbox")
-            billings_mbox = args.billings_mbox or takeout_path("Mail", "Billings-Foodee.mbox")
-            orders_raw = args.orders_raw or raw_path("foodee", "orders_raw.csv")
-            billings_raw = args.billings_raw or raw_path("foodee", "billings_raw.csv")
-        elif args.platform == Platforms.FOODRUNNERS:
-            orders_mbox = args.orders_mbox or takeout_path("Mail", "Orders-FoodRunners.mbox")
-            billings_mbox = args.billings_mbox or takeout_path("Mail", "Billings-FoodRunners.mbox")
-            orders_raw = args.orders_raw or raw_path("foodrunners", "orders_raw.csv")
-            billings_raw = args.billings_raw or raw_path("foodrunners", "billings_raw.csv")
-        elif args.platform == Platforms.OFFICECATERER:
-            orders_mbox = args.orders_mbox or takeout_path("Mail", "Orders-OfficeCaterer.mbox")
-            billings_mbox = args.billings_mbox or takeout_path(
-                "Mail", "Billings-OfficeCaterer.mbox"
+        if args.rebuild_pdf_cache:
+            from orders_analytics.utils.constants import PDF_CACHE_DIR
+            from orders_analytics.utils.pdf_cache import clear_pdf_cache
+
+            clear_pdf_cache()
+            print(f"Cleared {PDF_CACHE_DIR}")
+        from orders_analytics.utils.mbox_index import date_window
+
+        # The window applies to incremental readers and already re-reads from the start.
+        with profile_run("extract", args.platform), date_window(args.since, args.until):
+            run_extract(
+                args.platform,
+                args.orders_mbox,
+                args.billings_mbox,
+                args.orders_raw,
+                args.billings_raw,
+                incremental=not args.full_rescan or bool(args.since or args.until),
+                workers=args.workers,
             )
-            orders_raw = args.orders_raw or raw_path("officecaterer", "orders_raw.csv")
-            billings_raw = args.billings_raw or raw_path("officecaterer", "billings_raw.csv")
-        elif args.platform == Platforms.MENUFY:
-            orders_mbox = args.orders_mbox or ""
-            billings_mbox = args.billings_mbox or ""
-            orders_raw = args.orders_raw or raw_path("menufy", "orders_raw.csv")
-            billings_raw = args.billings_raw or ""
-        elif args.platform == Platforms.SLICE:
-            orders_mbox = args.orders_mbox or ""
-            billings_mbox = args.billings_mbox or ""
-            orders_raw = args.orders_raw or raw_path("slice", "orders_raw.csv")
-            billings_raw = args.billings_raw or ""
-        elif args.platform == Platforms.CHOWNOW:
-            orders_mbox = args.orders_mbox or takeout_path("Mail", "Orders-ChowNow.mbox")
-            billings_mbox = args.billings_mbox or takeout_path("Mail", "Billings-ChowNow.mbox")
-            orders_raw = args.orders_raw or raw_path("chownow", "orders_raw.csv")
-            billings_raw = args.billings_raw or raw_path("chownow", "billings_raw.csv")
-        elif args.platform == Platforms.BRYGID:
-            orders_mbox = args.orders_mbox or takeout_path("Mail", "Orders-Brygid.mbox")
-            billings_mbox = args.billings_mbox or ""
-            orders_raw = args.orders_raw or raw_path("brygid", "orders_raw.csv")
-            billings_raw = args.billings_raw or ""
-        elif args.platform == Platforms.ORDERINN:
-            orders_mbox = ""
-            billings_mbox = ""
-            orders_raw = args.orders_raw or raw_path("orderinn", "commissions_raw.csv")
-            billings_raw = ""
-        elif args.platform == Platforms.WAVE:
-            orders_mbox = args.orders_mbox or takeout_path("wave_aroma", "accounting.csv")
-            billings_mbox = args.billings_mbox or takeout_path("wave_aroma", "customers.csv")
-            orders_raw = args.orders_raw or raw_path("wave", "orders_raw.csv")
-            billings_raw = ""
-        elif args.platform == Platforms.MAYAEATS:
-            orders_mbox = ""
-            billings_mbox = args.billings_mbox or takeout_path("Mail", "Billings-Mayaeats.mbox")
-            orders_raw = ""
-            billings_raw = args.billings_raw or raw_path("mayaeats", "billings_raw.csv")
-        elif args.platform == Platforms.NEXTBITE:
-            orders_mbox = ""
-            billings_mbox = args.billings_mbox or takeout_path("Mail", "Billings-Nextbite.mbox")
-            orders_raw = args.orders_raw or raw_path("nextbite", "orders_raw.csv")
-            billings_raw = args.billings_raw or raw_path("nextbite", "billings_raw.csv")
-        elif args.platform == Platforms.DELIVERYCOM:
-            orders_mbox = args.orders_mbox or takeout_path("Mail", "Orders-DeliveryCom.mbox")
-            billings_mbox = args.billings_mbox or takeout_path("Mail", "Billings-DeliveryCom.mbox")
-            orders_raw = args.orders_raw or raw_path("deliverycom", "orders_raw.csv")
-            billings_raw = args.billings_raw or raw_path("deliverycom", "billings_raw.csv")
-        elif args.platform == Platforms.FOODA:
-            orders_mbox = args.orders_mbox or takeout_path("Mail", "fooda_sales.csv")
-            billings_mbox = ""
-            orders_raw = args.orders_raw or raw_path("fooda", "fooda_sales.csv")
-            billings_raw = ""
-        else:
-            raise ValueError(f"Extract not supported for platform: {args.platform}")
-        run_extract(args.platform, orders_mbox, billings_mbox, orders_raw, billings_raw)
     elif args.command == "normalize":
+        from orders_analytics.utils.build_cache import BuildCache, Decision
         from orders_analytics.utils.constants import ERRORS_PATH
+        from orders_analytics.utils.platform_runner import PlatformJob
 
-        if args.reset_errors and args.platform == "all" and os.path.exists(ERRORS_PATH):
-            os.remove(ERRORS_PATH)
-            print(f"Deleted {ERRORS_PATH}")
+        if args.reset_errors and args.platform == "all":
+            from orders_analytics.utils.errors import reset_errors_store
+
+            if reset_errors_store(ERRORS_PATH):
+                print(f"Deleted {ERRORS_PATH}")
         platforms: List[str]
         if args.platform == "all":
             platforms = (
@@ -1375,16 +775,63 @@ def main() -> None:
         else:
             platforms = [args.platform]
         base_extras = parse_extras(args.extra)
+        builds = BuildCache()
+        jobs: List[PlatformJob] = []
+        replays: Dict[str, List[list]] = {}
+        build_args = {
+            "input": args.input,
+            "out": args.out,
+            "orders_raw": args.orders_raw,
+            "billings_raw": args.billings_raw,
+            "extra": base_extras,
+        }
         for platform in platforms:
-            run_normalize(
-                platform,
-                args.input,
-                args.out,
-                args.orders_raw,
-                args.billings_raw,
-                dict(base_extras),
-                reset_errors=args.reset_errors,
+            # Only `--platform all` skips up-to-date platforms; a named platform always rebuilds.
+            if args.platform == "all":
+                decision = builds.decide(platform, build_args, force=args.force)
+            else:
+                decision = Decision(platform, True, ["platform selected explicitly"])
+            if args.explain:
+                print(f"[{platform}] {'rebuild' if decision.rebuild else 'skip'}:")
+                for reason in decision.reasons:
+                    print(f"  - {reason}")
+            if not decision.rebuild:
+                replays[platform] = builds.replay_errors(platform, args.reset_errors)
+                carried = sum(len(op[2]) for op in replays[platform] if op[0] == "reconcile")
+                print(f"[{platform}] up to date, skipped ({carried} errors carried forward)")
+                continue
+            builds.invalidate(platform)
+            jobs.append(
+                PlatformJob(
+                    "normalize",
+                    platform,
+                    run_normalize,
+                    (
+                        platform,
+                        args.input,
+                        args.out,
+                        args.orders_raw,
+                        args.billings_raw,
+                        dict(base_extras),
+                    ),
+                    {"reset_errors": args.reset_errors},
+                )
             )
+        results = run_platform_jobs(jobs, args.jobs, platforms, replays=replays)
+        for result in results:
+            if result.ok:
+                builds.record(result.platform, build_args, result.error_ops, result.run.started_at)
+        failed = [result.platform for result in results if not result.ok]
+        if failed:
+            raise SystemExit(f"Failed platforms: {', '.join(failed)}")
+    elif args.command == "profile":
+        run_profile(
+            args.platform,
+            args.flow,
+            parse_extras(args.extra),
+            args.out_dir,
+            top=args.top,
+        )
     elif args.command == "geocode":
         platforms: List[str]
         if args.all or args.platform == "all":
@@ -1392,7 +839,7 @@ def main() -> None:
         else:
             platforms = [args.platform]
         for platform in platforms:
-            input_path = args.input or normalized_path(f"{platform}_orders_normalized.csv")
+            input_path = args.input or get_spec(platform).normalized_out
             run_geocode(
                 input_path,
                 args.out,
@@ -1402,6 +849,7 @@ def main() -> None:
                 args.cache_only,
                 args.counts_out,
                 args.misses_out,
+                args.changed_only,
             )
     elif args.command == "sheets":
         from orders_analytics.utils.google_sheets import GoogleSheetsDownloader
@@ -2,9 +2,10 @@
 import os
 
 import duckdb
-import pandas as pd
 
 from orders_analytics.utils.constants import DEFAULT_DB_PATH, NORMALIZED_DIR, ERRORS_PATH
+from orders_analytics.utils.errors import load_errors
+from orders_analytics.utils.normalized_parquet import sync_normalized_table
 
 
 def ingest_normalized(db_path: str = DEFAULT_DB_PATH) -> int:
@@ -17,21 +18,14 @@ def ingest_normalized(db_path: str = DEFAULT_DB_PATH) -> int:
     ]
     if not files:
         return 0
-    frames = []
-    for path in files:
-        df = pd.read_csv(path)
-        df["source_file"] = os.path.basename(path)
-        frames.append(df)
-    data = pd.concat(frames, ignore_index=True)
     conn = duckdb.connect(db_path)
-    conn.register("orders_df", data)
-    conn.execute("CREATE OR REPLACE TABLE orders_raw AS SELECT * FROM orders_df")
-    if os.path.exists(ERRORS_PATH):
-        errors_df = pd.read_csv(ERRORS_PATH)
+    count = sync_normalized_table(conn, files)
+    errors_df = load_errors(ERRORS_PATH)
+    if not errors_df.empty:
         conn.register("errors_df", errors_df)
         conn.execute("CREATE OR REPLACE TABLE orders_errors AS SELECT * FROM errors_df")
     conn.close()
-    return len(data)
+    return count
 
 
 def main() -> None:
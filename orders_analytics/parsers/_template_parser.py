@@ -3,11 +3,13 @@
 Template parser for new providers.
 
 Goal: map provider-specific exports to the canonical schema in
-orders_analytics/utils/schema.py, then write a normalized CSV.
+orders_analytics/utils/schema.py, then write a normalized CSV (plus its typed Parquet twin and changelog).
 """
 import argparse
 from typing import Dict, Iterable, List
 
+from orders_analytics.utils.normalized_changes import diff_rows
+from orders_analytics.utils.normalized_parquet import parquet_path, write_normalized_parquet
 from orders_analytics.utils.schema import canonicalize_rows, write_normalized_rows
 from orders_analytics.utils.normalize import (
     normalize_datetime,
@@ -56,7 +58,10 @@ def main() -> None:
     rows = pre_process(rows)
     rows = post_process(rows)
     rows = canonicalize_rows(rows)
+    changes = diff_rows(rows, args.out, platform=str(rows[0].get("platform") or ""))
     write_normalized_rows(rows, args.out)
+    write_normalized_parquet(rows, parquet_path(args.out))
+    changes.record()
     print(f"Wrote {len(rows)} rows to {args.out}")
 
 
@@ -10,6 +10,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../.
 
 from orders_analytics.utils.base_parser import BaseParser
 from orders_analytics.utils.constants import normalized_path, raw_path
+from orders_analytics.utils.money import allocate_groups, parse_cents
 from orders_analytics.utils.providers import normalize_provider
 from orders_analytics.utils.normalize import (
     normalize_datetime,
@@ -38,24 +39,6 @@ def parse_float(value) -> float:
         return 0.0
 
 
-def allocate_amount(amount: float, weights: List[float]) -> List[float]:
-    if not weights:
-        return []
-    total_weight = sum(weights)
-    if total_weight <= 0:
-        base = round(amount / len(weights), 2)
-        alloc = [base] * len(weights)
-    else:
-        alloc = [round(amount * (w / total_weight), 2) for w in weights]
-    remainder = round(amount - sum(alloc), 2)
-    cents = int(round(remainder * 100))
-    step = 0.01 if cents > 0 else -0.01
-    for idx in range(abs(cents)):
-        alloc_idx = idx % len(alloc)
-        alloc[alloc_idx] = round(alloc[alloc_idx] + step, 2)
-    return alloc
-
-
 def normalize_restaurant(store: str) -> str:
     name = (store or "").lower()
     if "aroma" in name:
@@ -266,8 +249,10 @@ class BeyondMenuOrdersParser(BaseParser):
             aroma_2023_override = -float(aroma_2023.get("additional", 0.0) + aroma_2024.get("credits", 0.0))
             aroma_2024_override = -float(aroma_2024.get("additional", 0.0))  # credits handled in 2023 override
 
-            allocations: Dict[int, float] = {}
-            notes_additions: Dict[int, str] = {}
+            # Every (provider, year) target in one batched allocation over the rows.
+            group_index: Dict[tuple, int] = {}
+            targets: List[int] = []
+            group_notes: List[str] = []
             for (provider, year), _vals in annual_map.items():
                 target_amount = net_adjustment(provider, year)
                 special_note = "additional_charges_distribution"
@@ -279,24 +264,30 @@ class BeyondMenuOrdersParser(BaseParser):
 
                 if abs(target_amount) < 0.005:
                     continue
-
-                idxs = [
-                    idx
-                    for idx, (p, y) in enumerate(zip(row_providers, row_years))
-                    if p == provider and y == year
-                ]
-                if provider == "AROMA" and year == 2024:
-                    filtered = [idx for idx in idxs if row_order_ids[idx] != "101559574"]
-                    if filtered:
-                        idxs = filtered
-
-                if not idxs:
-                    continue
-                weights = [row_subtotals[idx] for idx in idxs]
-                alloc = allocate_amount(target_amount, weights)
-                for idx, amt in zip(idxs, alloc):
-                    allocations[idx] = allocations.get(idx, 0.0) + amt
-                    notes_additions[idx] = special_note
+                group_index[(provider, year)] = len(targets)
+                targets.append(parse_cents(target_amount) or 0)
+                group_notes.append(special_note)
+
+            row_groups = [group_index.get(key, -1) for key in zip(row_providers, row_years)]
+            idxs = [idx for idx, group in enumerate(row_groups) if group >= 0]
+            # AROMA 2024 skips order 101559574, unless it is the only order that year.
+            aroma_2024_rows = [idx for idx in idxs if (row_providers[idx], row_years[idx]) == ("AROMA", 2024)]
+            skipped = {idx for idx in aroma_2024_rows if row_order_ids[idx] == "101559574"}
+            if len(skipped) == len(aroma_2024_rows):
+                skipped = set()
+            exclude = [idx in skipped for idx in idxs]
+            shares = allocate_groups(
+                [row_groups[idx] for idx in idxs],
+                [parse_cents(row_subtotals[idx]) or 0 for idx in idxs],
+                targets,
+                exclude,
+            )
+            allocations: Dict[int, float] = {}
+            notes_additions: Dict[int, str] = {}
+            for idx, cents, excluded in zip(idxs, shares, exclude):
+                if not excluded:
+                    allocations[idx] = int(cents) / 100
+                    notes_additions[idx] = group_notes[row_groups[idx]]
 
             for idx, amt in allocations.items():
                 current = parse_float(rows[idx].get("misc_fee", ""))
@@ -1,19 +1,19 @@
 #!/usr/bin/env python3
 import argparse
-import io
-import mailbox
 import os
 import re
 from datetime import datetime
 from email.utils import parsedate_to_datetime
 from typing import Dict, List
 
-import pdfplumber
 import pandas as pd
 
 from orders_analytics.utils.constants import raw_path, takeout_path
 from orders_analytics.utils.wave import filter_transactions, load_wave_transactions
 from orders_analytics.utils.normalize import normalize_money
+from orders_analytics.utils.mbox_index import iter_mbox
+from orders_analytics.utils.pdf_cache import pdf_page_texts, pdf_text
+from orders_analytics.utils.profiling import profiled
 
 RAW_COLUMNS = [
     "billing_date",
@@ -151,37 +151,35 @@ def parse_invoice_pdf_payload(payload: bytes, source_file: str) -> Dict[str, str
     invoice_number = ""
     due_date = ""
     invoice_total = ""
-    with pdfplumber.open(io.BytesIO(payload)) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            if not invoice_number:
-                match = re.search(r"Invoice\s*#\s*([A-Za-z0-9-]+)", text, flags=re.IGNORECASE)
-                if match:
-                    invoice_number = match.group(1).strip()
-            if not account_number:
-                match = re.search(r"Account\s*#\s*[:#]?\s*([A-Za-z0-9-]+)", text, flags=re.IGNORECASE)
-                if match:
-                    account_number = match.group(1).strip()
-            if not due_date:
+    for text in pdf_page_texts(payload):
+        if not invoice_number:
+            match = re.search(r"Invoice\s*#\s*([A-Za-z0-9-]+)", text, flags=re.IGNORECASE)
+            if match:
+                invoice_number = match.group(1).strip()
+        if not account_number:
+            match = re.search(r"Account\s*#\s*[:#]?\s*([A-Za-z0-9-]+)", text, flags=re.IGNORECASE)
+            if match:
+                account_number = match.group(1).strip()
+        if not due_date:
+            match = re.search(
+                r"Due\s*Date\s*[:#]?\s*(\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{2,4})",
+                text,
+                flags=re.IGNORECASE,
+            )
+            if match:
+                due_date = normalize_date(match.group(1))
+        if not invoice_total:
+            match = re.search(r"Total\s+USD\s+([\d,]+\.\d{2})", text, flags=re.IGNORECASE)
+            if not match:
+                match = re.search(r"Balance\s*Due\s*USD\s*([\d,]+\.\d{2})", text, flags=re.IGNORECASE)
+            if not match:
                 match = re.search(
-                    r"Due\s*Date\s*[:#]?\s*(\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{2,4})",
+                    r"Total\s*(?:Amount\s*Due)?\s*[:#]?\s*\$?\s*([\d,]+\.\d{2})",
                     text,
                     flags=re.IGNORECASE,
                 )
-                if match:
-                    due_date = normalize_date(match.group(1))
-            if not invoice_total:
-                match = re.search(r"Total\s+USD\s+([\d,]+\.\d{2})", text, flags=re.IGNORECASE)
-                if not match:
-                    match = re.search(r"Balance\s*Due\s*USD\s*([\d,]+\.\d{2})", text, flags=re.IGNORECASE)
-                if not match:
-                    match = re.search(
-                        r"Total\s*(?:Amount\s*Due)?\s*[:#]?\s*\$?\s*([\d,]+\.\d{2})",
-                        text,
-                        flags=re.IGNORECASE,
-                    )
-                if match:
-                    invoice_total = normalize_money(match.group(1))
+            if match:
+                invoice_total = normalize_money(match.group(1))
     return {
         "account_number": account_number,
         "invoice_number": invoice_number,
@@ -193,8 +191,7 @@ def parse_invoice_pdf_payload(payload: bytes, source_file: str) -> Dict[str, str
 
 def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
+    for msg in iter_mbox(mbox_path):
         email_date = ""
         if msg.get("Date"):
             try:
@@ -223,8 +220,7 @@ def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
                         )
                     )
                 elif content_type == "application/pdf" or filename.lower().endswith(".pdf"):
-                    with pdfplumber.open(io.BytesIO(payload)) as pdf:
-                        text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+                    text = pdf_text(payload)
                     if "order summary" in text.lower() or "total order count" in text.lower():
                         summary = parse_summary_pdf_text(
                             text,
@@ -282,6 +278,7 @@ def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
     return rows
 
 
+@profiled
 def run(mbox_path: str, out_path: str) -> int:
     rows = [row for row in parse_mbox(mbox_path) if row.get("billing_date")]
     if not rows:
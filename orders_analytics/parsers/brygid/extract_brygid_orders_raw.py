@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 import argparse
-import mailbox
 import os
 import re
 import html as html_lib
@@ -14,6 +13,8 @@ from orders_analytics.utils.constants import raw_path, takeout_path
 from orders_analytics.utils.normalize import normalize_money
 from orders_analytics.utils.order_types import OrderTypes
 from orders_analytics.utils.providers import normalize_provider
+from orders_analytics.utils.mbox_index import MboxFilter, iter_mbox
+from orders_analytics.utils.profiling import profiled
 
 RAW_COLUMNS = [
     "order_id",
@@ -39,6 +40,8 @@ RAW_COLUMNS = [
     "added_at",
 ]
 
+PREFILTER = MboxFilter(senders=("onlineorders@brygid.com", "no-reply@brygid.online"))
+
 
 def _get_part_payload(msg) -> str:
     if msg.is_multipart():
@@ -211,8 +214,7 @@ def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
     if not os.path.exists(mbox_path):
         return rows
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
+    for msg in iter_mbox(mbox_path, prefilter=PREFILTER):
         if not _is_order_sender(msg.get("From", "")):
             continue
         payload = _get_part_payload(msg)
@@ -233,6 +235,7 @@ def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
     return rows
 
 
+@profiled
 def run(mbox_path: str, out_path: str) -> int:
     rows = parse_mbox(mbox_path)
     if not rows:
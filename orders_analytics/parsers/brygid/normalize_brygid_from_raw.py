@@ -8,11 +8,13 @@ import pandas as pd
 
 from orders_analytics.utils.base_parser import BaseParser
 from orders_analytics.utils.constants import normalized_path, raw_path
+from orders_analytics.utils.money import allocate_cents, parse_cents
 from orders_analytics.utils.normalize import normalize_datetime, normalize_order_type, normalize_payment_type
 from orders_analytics.utils.order_types import OrderTypes
 from orders_analytics.utils.payment_types import PaymentTypes
 from orders_analytics.utils.platforms import Platforms
 from orders_analytics.utils.schema import build_normalized_row
+from orders_analytics.utils.profiling import profiled
 
 
 def parse_order_dt(text: str) -> Optional[datetime]:
@@ -48,21 +50,8 @@ def compute_commission(values: pd.Series, rate: float = 0.025) -> pd.Series:
 def allocate_proportional(total: float, weights: List[float]) -> List[float]:
     if not weights:
         return []
-    total_weight = sum(w for w in weights if w > 0)
-    n = len(weights)
-    if total_weight <= 0:
-        raw = [total / n for _ in weights]
-    else:
-        raw = [total * (w / total_weight) for w in weights]
-    rounded = [round(value, 2) for value in raw]
-    diff = round(total - sum(rounded), 2)
-    cents = int(round(diff * 100))
-    if cents:
-        order = sorted(range(n), key=lambda i: (raw[i] - rounded[i]), reverse=cents > 0)
-        step = 0.01 if cents > 0 else -0.01
-        for idx in range(abs(cents)):
-            rounded[order[idx % n]] += step
-    return rounded
+    shares = allocate_cents(parse_cents(total) or 0, [parse_cents(w) or 0 for w in weights])
+    return [int(cents) / 100 for cents in shares]
 
 
 def format_money(value: float) -> str:
@@ -347,6 +336,7 @@ class BrygidNormalizer(BaseParser):
         return normalize_rows(rows_df.to_dict("records"))
 
 
+@profiled
 def run(orders_raw_path: str, out_path: str, reset_errors: bool = False) -> int:
     parser = BrygidNormalizer(input_path=orders_raw_path, out_path=out_path, reset_errors=reset_errors)
     stats = parser.run()
@@ -1,18 +1,18 @@
 #!/usr/bin/env python3
 import argparse
 import datetime as dt
-import io
-import mailbox
 import os
 import re
 from email.utils import parsedate_to_datetime
 from typing import Dict, List
 
 import pandas as pd
-import pdfplumber
 
 from orders_analytics.utils.constants import raw_path, takeout_path
 from orders_analytics.utils.normalize import normalize_money
+from orders_analytics.utils.mbox_index import MboxFilter, commit_mbox, iter_mbox
+from orders_analytics.utils.pdf_cache import pdf_text
+from orders_analytics.utils.profiling import profiled
 
 RAW_COLUMNS = [
     "order_id",
@@ -39,10 +39,11 @@ RAW_COLUMNS = [
     "added_at",
 ]
 
+PREFILTER = MboxFilter(content_types=("application/pdf",))
+
 
 def extract_pdf_text(payload: bytes) -> str:
-    with pdfplumber.open(io.BytesIO(payload)) as pdf:
-        return "\n".join(page.extract_text() or "" for page in pdf.pages)
+    return pdf_text(payload)
 
 
 def statement_period_range(text: str) -> tuple[str, str]:
@@ -247,10 +248,9 @@ def parse_pdf(payload: bytes) -> List[Dict[str, str]]:
     return rows
 
 
-def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
+def parse_mbox(mbox_path: str, consumer: str = "") -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
+    for msg in iter_mbox(mbox_path, consumer, PREFILTER):
         email_date = ""
         if msg.get("Date"):
             try:
@@ -335,9 +335,11 @@ def upsert_raw(existing_path: str, new_rows: List[Dict[str, str]]) -> int:
     return updated
 
 
-def run(mbox_path: str, out_path: str) -> int:
-    rows = parse_mbox(mbox_path)
+@profiled
+def run(mbox_path: str, out_path: str, incremental: bool = True) -> int:
+    rows = parse_mbox(mbox_path, consumer=out_path if incremental else "")
     updated = upsert_raw(out_path, rows)
+    commit_mbox(mbox_path, out_path)
     print(f"Upserted {updated} billing row(s) into {out_path}")
     return updated
 
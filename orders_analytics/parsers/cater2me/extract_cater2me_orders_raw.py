@@ -1,17 +1,14 @@
 #!/usr/bin/env python3
 import argparse
-import datetime as dt
-import io
-import mailbox
-import os
 import re
 from email.utils import parsedate_to_datetime
 from typing import Dict, List
 
-import pandas as pd
-import pdfplumber
-
 from orders_analytics.utils.constants import raw_path, takeout_path
+from orders_analytics.utils.mbox_index import MboxFilter, commit_mbox, iter_mbox
+from orders_analytics.utils.pdf_cache import pdf_text
+from orders_analytics.utils.raw_store import replace_changed, upsert_rows
+from orders_analytics.utils.profiling import profiled
 
 RAW_COLUMNS = [
     "order_id",
@@ -29,10 +26,11 @@ RAW_COLUMNS = [
     "added_at",
 ]
 
+PREFILTER = MboxFilter(content_types=("application/pdf",))
+
 
 def extract_pdf_text(payload: bytes) -> str:
-    with pdfplumber.open(io.BytesIO(payload)) as pdf:
-        return "\n".join(page.extract_text() or "" for page in pdf.pages)
+    return pdf_text(payload)
 
 
 def parse_order_text(text: str) -> Dict[str, str]:
@@ -171,10 +169,9 @@ def parse_order_text(text: str) -> Dict[str, str]:
     return row
 
 
-def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
+def parse_mbox(mbox_path: str, consumer: str = "") -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
+    for msg in iter_mbox(mbox_path, consumer, PREFILTER):
         email_date = ""
         if msg.get("Date"):
             try:
@@ -200,55 +197,25 @@ def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
     return rows
 
 
-def upsert_raw(existing_path: str, new_rows: List[Dict[str, str]]) -> int:
-    now = dt.datetime.now().isoformat()
-    if os.path.exists(existing_path):
-        existing_df = pd.read_csv(existing_path, dtype=str).fillna("")
-        existing_rows = existing_df.to_dict("records")
-    else:
-        existing_rows = []
+def merge_keep_cancelled(current: Dict[str, str], row: Dict[str, str], columns: List[str]) -> Dict[str, str]:
+    merged = replace_changed(current, row, columns)
+    # If any row shows cancelled, prefer cancelled status.
+    if row["status"].strip().lower() == "cancelled":
+        merged["status"] = "cancelled"
+    elif current["status"].strip().lower() == "cancelled":
+        merged["status"] = current["status"]
+    return merged
 
-    existing_map = {str(row.get("order_id", "")).strip(): row for row in existing_rows}
-    updated = 0
-    for row in new_rows:
-        order_id = str(row.get("order_id", "")).strip()
-        if not order_id:
-            continue
-        current = existing_map.get(order_id)
-        if current is None:
-            row["added_at"] = now
-            existing_map[order_id] = row
-            updated += 1
-            continue
-        # If any row shows cancelled, prefer cancelled status.
-        if (row.get("status") or "").strip().lower() == "cancelled":
-            current["status"] = "cancelled"
-        changed = False
-        for col in RAW_COLUMNS:
-            if col == "added_at":
-                continue
-            if col == "status" and str(current.get("status", "")).strip().lower() == "cancelled":
-                continue
-            old_val = str(current.get(col, "") or "")
-            new_val = str(row.get(col, "") or "")
-            if old_val != new_val:
-                current[col] = new_val
-                changed = True
-        if changed:
-            current["added_at"] = now
-            updated += 1
 
-    final_rows = list(existing_map.values())
-    for row in final_rows:
-        row.setdefault("added_at", now)
-    os.makedirs(os.path.dirname(existing_path), exist_ok=True)
-    pd.DataFrame(final_rows).reindex(columns=RAW_COLUMNS).to_csv(existing_path, index=False)
-    return updated
+def upsert_raw(existing_path: str, new_rows: List[Dict[str, str]]) -> int:
+    return upsert_rows(existing_path, new_rows, RAW_COLUMNS, merge=merge_keep_cancelled)
 
 
-def run(mbox_path: str, out_path: str) -> int:
-    rows = parse_mbox(mbox_path)
+@profiled
+def run(mbox_path: str, out_path: str, incremental: bool = True) -> int:
+    rows = parse_mbox(mbox_path, consumer=out_path if incremental else "")
     updated = upsert_raw(out_path, rows)
+    commit_mbox(mbox_path, out_path)
     print(f"Upserted {updated} order row(s) into {out_path}")
     return updated
 
@@ -13,6 +13,7 @@ from orders_analytics.utils.order_types import OrderTypes
 from orders_analytics.utils.payment_types import PaymentTypes
 from orders_analytics.utils.platforms import Platforms
 from orders_analytics.utils.schema import build_normalized_row
+from orders_analytics.utils.profiling import profiled
 
 
 def load_raw(path: str) -> pd.DataFrame:
@@ -207,6 +208,7 @@ class Cater2MeNormalizer(BaseParser):
         return normalize_rows(rows, inputs["cancellations_raw"])
 
 
+@profiled
 def run(
     orders_raw_path: str,
     billings_raw_path: str,
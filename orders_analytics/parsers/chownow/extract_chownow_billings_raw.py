@@ -2,7 +2,6 @@
 import argparse
 import datetime as dt
 import io
-import mailbox
 import os
 from email.utils import parsedate_to_datetime
 from typing import Dict, List
@@ -10,6 +9,8 @@ from typing import Dict, List
 import pandas as pd
 
 from orders_analytics.utils.constants import raw_path, takeout_path
+from orders_analytics.utils.mbox_index import iter_mbox
+from orders_analytics.utils.profiling import profiled
 
 
 def read_report(payload: bytes) -> pd.DataFrame:
@@ -39,8 +40,7 @@ def normalize_order_id(value: object) -> str:
 
 def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
+    for msg in iter_mbox(mbox_path):
         email_date = ""
         if msg.get("Date"):
             try:
@@ -110,6 +110,7 @@ def write_raw(path: str, rows: List[Dict[str, str]]) -> int:
     return len(rows)
 
 
+@profiled
 def run(mbox_path: str, out_path: str) -> int:
     rows = parse_mbox(mbox_path)
     rows = dedupe_rows(rows)
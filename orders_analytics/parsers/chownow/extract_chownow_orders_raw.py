@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 import argparse
 import datetime as dt
-import mailbox
 import os
 import re
 from email.utils import parsedate_to_datetime
@@ -15,6 +14,9 @@ from orders_analytics.utils.google_sheets_registry import SHEETS
 from orders_analytics.utils.normalize import normalize_money
 from orders_analytics.utils.order_types import OrderTypes
 from orders_analytics.utils.providers import normalize_provider
+from orders_analytics.utils.mbox_index import commit_mbox, iter_mbox
+from orders_analytics.utils.raw_store import upsert_rows
+from orders_analytics.utils.profiling import profiled
 
 RAW_COLUMNS = [
     "order_id",
@@ -368,10 +370,11 @@ def parse_manual_missing_orders(path: str) -> List[Dict[str, str]]:
     return rows
 
 
-def parse_mbox(mbox_path: str, customer_email_map: Dict[str, str]) -> List[Dict[str, str]]:
+def parse_mbox(
+    mbox_path: str, customer_email_map: Dict[str, str], consumer: str = ""
+) -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
+    for msg in iter_mbox(mbox_path, consumer):
         subject = msg.get("Subject", "") or ""
         email_date = ""
         if msg.get("Date"):
@@ -392,48 +395,15 @@ def parse_mbox(mbox_path: str, customer_email_map: Dict[str, str]) -> List[Dict[
 
 
 def upsert_raw(existing_path: str, new_rows: List[Dict[str, str]]) -> int:
-    now = dt.datetime.now().isoformat()
-    if os.path.exists(existing_path):
-        existing_df = pd.read_csv(existing_path, dtype=str).fillna("")
-        existing_rows = existing_df.to_dict("records")
-    else:
-        existing_rows = []
-    existing_map = {str(row.get("order_id", "")).strip(): row for row in existing_rows}
-    updated = 0
-    for row in new_rows:
-        order_id = str(row.get("order_id", "")).strip()
-        if not order_id:
-            continue
-        current = existing_map.get(order_id)
-        if current is None:
-            row["added_at"] = now
-            existing_map[order_id] = row
-            updated += 1
-            continue
-        changed = False
-        for col in RAW_COLUMNS:
-            if col == "added_at":
-                continue
-            old_val = str(current.get(col, "") or "")
-            new_val = str(row.get(col, "") or "")
-            if old_val != new_val:
-                current[col] = new_val
-                changed = True
-        if changed:
-            current["added_at"] = now
-            updated += 1
-
-    final_rows = list(existing_map.values())
-    for row in final_rows:
-        row.setdefault("added_at", now)
-    os.makedirs(os.path.dirname(existing_path), exist_ok=True)
-    pd.DataFrame(final_rows).reindex(columns=RAW_COLUMNS).to_csv(existing_path, index=False)
-    return updated
+    return upsert_rows(existing_path, new_rows, RAW_COLUMNS)
 
 
-def run(mbox_path: str, out_path: str, customer_files: List[str]) -> int:
+@profiled
+def run(
+    mbox_path: str, out_path: str, customer_files: List[str], incremental: bool = True
+) -> int:
     customer_email_map = load_customer_emails(customer_files)
-    rows = parse_mbox(mbox_path, customer_email_map)
+    rows = parse_mbox(mbox_path, customer_email_map, consumer=out_path if incremental else "")
     manual_sheet = SHEETS.get("chownow_manual_missing_orders")
     manual_path = (
         manual_sheet["out"]
@@ -448,6 +418,7 @@ def run(mbox_path: str, out_path: str, customer_files: List[str]) -> int:
                 raise
     rows.extend(parse_manual_missing_orders(manual_path))
     updated = upsert_raw(out_path, rows)
+    commit_mbox(mbox_path, out_path)
     print(f"Upserted {updated} ChowNow order row(s) into {out_path}")
     return updated
 
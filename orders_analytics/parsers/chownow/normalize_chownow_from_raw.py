@@ -14,6 +14,7 @@ from orders_analytics.utils.validation import normalize_order_type
 from orders_analytics.utils.payment_types import PaymentTypes
 from orders_analytics.utils.platforms import Platforms
 from orders_analytics.utils.schema import build_normalized_row
+from orders_analytics.utils.profiling import profiled
 
 
 def load_raw(path: str) -> pd.DataFrame:
@@ -320,6 +321,7 @@ class ChowNowNormalizer(BaseParser):
         )
 
 
+@profiled
 def run(
     orders_raw_path: str,
     billings_raw_path: str,
@@ -1,22 +1,21 @@
 #!/usr/bin/env python3
 import argparse
 import email
-import datetime as dt
 from datetime import datetime
-import mailbox
 from pathlib import Path
 import os
 import re
 from email.utils import parsedate_to_datetime
+from functools import partial
 from typing import Dict, List
 
-import pandas as pd
-
-
 from orders_analytics.utils.constants import raw_path, takeout_path
 from orders_analytics.utils.normalize import normalize_money, normalize_datetime
 from orders_analytics.utils.providers import normalize_provider
+from orders_analytics.utils.mbox_index import commit_mbox, map_mbox
+from orders_analytics.utils.raw_store import keep_nonblank, upsert_rows
 from orders_analytics.parsers.deliverycom.parse_deliverycom_orders import parse_order
+from orders_analytics.utils.profiling import profiled
 
 RAW_COLUMNS = [
     "order_id",
@@ -167,100 +166,69 @@ def parse_daily_summary_eml(eml_path: str) -> list[dict]:
     return parse_daily_summary_html(html)
 
 def upsert_raw(existing_path: str, new_rows: List[Dict[str, str]]) -> int:
-    now = dt.datetime.now().isoformat()
-    if os.path.exists(existing_path):
-        existing_df = pd.read_csv(existing_path, dtype=str).fillna("")
-        existing_rows = existing_df.to_dict("records")
-    else:
-        existing_rows = []
-
-    existing_map = {str(row.get("order_id", "")).strip(): row for row in existing_rows}
-    updated = 0
-    for row in new_rows:
-        order_id = str(row.get("order_id", "")).strip()
-        if not order_id:
-            continue
-        current = existing_map.get(order_id)
-        if current is None:
-            row["added_at"] = now
-            existing_map[order_id] = row
-            updated += 1
-            continue
-        changed = False
-        for col in RAW_COLUMNS:
-            if col == "added_at":
-                continue
-            old_val = str(current.get(col, "") or "")
-            new_val = str(row.get(col, "") or "")
-            if new_val == "" and old_val != "":
-                continue
-            if old_val != new_val:
-                current[col] = new_val
-                changed = True
-        if changed:
-            current["added_at"] = now
-            updated += 1
-
-    final_rows = list(existing_map.values())
-    for row in final_rows:
-        row.setdefault("added_at", now)
-    os.makedirs(os.path.dirname(existing_path), exist_ok=True)
-    pd.DataFrame(final_rows).reindex(columns=RAW_COLUMNS).to_csv(existing_path, index=False)
-    return updated
+    return upsert_rows(existing_path, new_rows, RAW_COLUMNS, merge=keep_nonblank)
 
 
-def run(mbox_path: str, out_path: str) -> int:
-    rows: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
-        parsed = parse_order(msg)
-        if not parsed:
-            html = extract_html_from_msg(msg)
-            parsed_rows = parse_daily_summary_html(html)
-            if parsed_rows:
-                email_date = ""
-                if msg.get("Date"):
-                    try:
-                        email_date = parsedate_to_datetime(msg.get("Date")).isoformat()
-                    except Exception:
-                        email_date = ""
-                for row in parsed_rows:
-                    row["source_file"] = os.path.basename(mbox_path)
-                    row["email_date"] = email_date
-                rows.extend(parsed_rows)
-            continue
+def parse_order_message(msg, source_file: str) -> List[Dict[str, str]]:
+    parsed = parse_order(msg)
+    if not parsed:
+        html = extract_html_from_msg(msg)
+        parsed_rows = parse_daily_summary_html(html)
+        if not parsed_rows:
+            return []
         email_date = ""
         if msg.get("Date"):
             try:
                 email_date = parsedate_to_datetime(msg.get("Date")).isoformat()
             except Exception:
                 email_date = ""
-        rows.append(
-            {
-                "order_id": parsed.get("order_id", ""),
-                "provider": parsed.get("provider", ""),
-                "restaurant_name": parsed.get("restaurant_name", ""),
-                "order_datetime": parsed.get("order_datetime", ""),
-                "order_type": parsed.get("order_type", ""),
-                "payment_type": parsed.get("payment_type", ""),
-                "customer_name": parsed.get("customer_name", ""),
-                "phone": parsed.get("phone", ""),
-                "address": parsed.get("address", ""),
-                "items": parsed.get("items", ""),
-                "item_count": parsed.get("item_count", ""),
-                "subtotal": parsed.get("subtotal", ""),
-                "tax": parsed.get("tax", ""),
-                "tip": parsed.get("tip", ""),
-                "delivery_fee": parsed.get("delivery_fee", ""),
-                "total": parsed.get("total", ""),
-                "discount": parsed.get("discount", ""),
-                "dcom_credit": parsed.get("dcom_credit", ""),
-                "dcom_promo": parsed.get("dcom_promo", ""),
-                "notes": parsed.get("notes", ""),
-                "source_file": os.path.basename(mbox_path),
-                "email_date": email_date,
-            }
-        )
+        for row in parsed_rows:
+            row["source_file"] = source_file
+            row["email_date"] = email_date
+        return parsed_rows
+    email_date = ""
+    if msg.get("Date"):
+        try:
+            email_date = parsedate_to_datetime(msg.get("Date")).isoformat()
+        except Exception:
+            email_date = ""
+    return [
+        {
+            "order_id": parsed.get("order_id", ""),
+            "provider": parsed.get("provider", ""),
+            "restaurant_name": parsed.get("restaurant_name", ""),
+            "order_datetime": parsed.get("order_datetime", ""),
+            "order_type": parsed.get("order_type", ""),
+            "payment_type": parsed.get("payment_type", ""),
+            "customer_name": parsed.get("customer_name", ""),
+            "phone": parsed.get("phone", ""),
+            "address": parsed.get("address", ""),
+            "items": parsed.get("items", ""),
+            "item_count": parsed.get("item_count", ""),
+            "subtotal": parsed.get("subtotal", ""),
+            "tax": parsed.get("tax", ""),
+            "tip": parsed.get("tip", ""),
+            "delivery_fee": parsed.get("delivery_fee", ""),
+            "total": parsed.get("total", ""),
+            "discount": parsed.get("discount", ""),
+            "dcom_credit": parsed.get("dcom_credit", ""),
+            "dcom_promo": parsed.get("dcom_promo", ""),
+            "notes": parsed.get("notes", ""),
+            "source_file": source_file,
+            "email_date": email_date,
+        }
+    ]
+
+
+@profiled
+def run(mbox_path: str, out_path: str, incremental: bool = True, workers: int = 1) -> int:
+    parse_message = partial(parse_order_message, source_file=os.path.basename(mbox_path))
+    rows: List[Dict[str, str]] = map_mbox(
+        mbox_path,
+        parse_message,
+        consumer=out_path if incremental else "",
+        workers=workers,
+    )
     mail_dir = os.path.dirname(mbox_path)
     if os.path.isdir(mail_dir):
         for fname in os.listdir(mail_dir):
@@ -288,6 +256,7 @@ def run(mbox_path: str, out_path: str) -> int:
             rows.extend(parsed_rows)
 
     updated = upsert_raw(out_path, rows)
+    commit_mbox(mbox_path, out_path)
     print(f"Upserted {updated} order row(s) into {out_path}")
     return updated
 
@@ -14,6 +14,7 @@ from orders_analytics.utils.providers import normalize_provider
 from orders_analytics.utils.validation import normalize_order_type, normalize_payment_type
 from orders_analytics.utils.platforms import Platforms
 from orders_analytics.utils.schema import build_normalized_row
+from orders_analytics.utils.profiling import profiled
 
 
 def to_decimal(value: str) -> Decimal | None:
@@ -379,6 +380,7 @@ class DeliveryComNormalizer(BaseParser):
         return normalize_rows(merged, canceled_ids, overrides)
 
 
+@profiled
 def run(
     orders_raw_path: str,
     billings_raw_path: str,
@@ -9,12 +9,12 @@ from typing import Dict, List, Optional, Tuple
 import html as html_lib
 
 import pandas as pd
-import mailbox
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
 
 from orders_analytics.utils.base_parser import BaseParser
 from orders_analytics.utils.constants import normalized_path
+from orders_analytics.utils.mbox_index import map_mbox
 from orders_analytics.utils.normalize import normalize_datetime, normalize_money
 from orders_analytics.utils.providers import normalize_provider
 from orders_analytics.utils.validation import normalize_order_type, normalize_payment_type
@@ -479,6 +479,11 @@ def parse_order(msg) -> Optional[Dict[str, str]]:
     }
 
 
+def parse_order_rows(msg) -> List[Dict[str, str]]:
+    parsed = parse_order(msg)
+    return [parsed] if parsed else []
+
+
 class DeliveryComOrdersParser(BaseParser):
     platform = "DELIVERYCOM"
     dedupe_key = "order_id"
@@ -489,16 +494,9 @@ class DeliveryComOrdersParser(BaseParser):
     def default_out_path(self) -> str:
         return normalized_path("deliverycom_orders_normalized.csv")
 
-    def load_inputs(self, input_path: str):
-        return mailbox.mbox(input_path)
-
     def parse_rows(self, inputs) -> List[Dict[str, str]]:
-        rows: List[Dict[str, str]] = []
-        for msg in inputs:
-            parsed = parse_order(msg)
-            if parsed:
-                rows.append(parsed)
-        return rows
+        workers = int(self.extra.get("workers", 1) or 1)
+        return map_mbox(inputs, parse_order_rows, workers=workers)
 
 
 def main() -> None:
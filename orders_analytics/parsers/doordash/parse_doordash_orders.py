@@ -1,19 +1,31 @@
 #!/usr/bin/env python3
 import argparse
 import os
-from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Set
 
+import numpy as np
 import pandas as pd
 
 from orders_analytics.utils.base_parser import BaseParser
+from orders_analytics.utils.column_mapping import (
+    Const,
+    Mapped,
+    MappingSpec,
+    Money,
+    MoneySum,
+    Note,
+    Notes,
+    Text,
+    join_notes,
+    money_text,
+    normalized_rows,
+)
 from orders_analytics.utils.constants import normalized_path, raw_path
-from orders_analytics.utils.normalize import normalize_money
+from orders_analytics.utils.money import format_cents
 from orders_analytics.utils.order_types import OrderTypes
 from orders_analytics.utils.payment_types import PaymentTypes
 from orders_analytics.utils.platforms import Platforms
 from orders_analytics.utils.providers import normalize_provider
-from orders_analytics.utils.schema import build_normalized_row
 
 
 def parse_float(value: str) -> float:
@@ -23,23 +35,32 @@ def parse_float(value: str) -> float:
         return 0.0
 
 
-def normalize_order_type(row: pd.Series) -> str:
-    if parse_float(row.get("Consumer delivery fee", "")) > 0:
-        return OrderTypes.DELIVERY
-    return OrderTypes.PICKUP
+ORDER_ID_SOURCES = (
+    ("DoorDash order ID", ""),
+    ("Delivery UUID", "DD_DELIVERY_"),
+    ("DoorDash transaction ID", "DD_TX_"),
+)
 
 
-def choose_order_id(row: pd.Series, idx: int) -> str:
-    order_id = str(row.get("DoorDash order ID", "")).strip()
-    if order_id:
-        return order_id
-    delivery_uuid = str(row.get("Delivery UUID", "")).strip()
-    if delivery_uuid:
-        return f"DD_DELIVERY_{delivery_uuid}"
-    tx_id = str(row.get("DoorDash transaction ID", "")).strip()
-    if tx_id:
-        return f"DD_TX_{tx_id}"
-    return f"DD_ROW_{idx}"
+def choose_order_ids(df: pd.DataFrame) -> pd.Series:
+    """Order id per row: the first filled-in id source (prefixed), else `DD_ROW_<index>`."""
+    ids = pd.Series([f"DD_ROW_{idx}" for idx in df.index], index=df.index, dtype=object)
+    for column, prefix in reversed(ORDER_ID_SOURCES):
+        if column not in df.columns:
+            continue
+        values = df[column].astype(str).str.strip()
+        ids = (prefix + values).where(values != "", ids)
+    return ids
+
+
+ERRORS_SPEC = MappingSpec(fields={"errors_total": MoneySum(("Error charges", "Adjustments"))})
+ERROR_TOTALS_SPEC = MappingSpec(
+    group_by="errors_order_id",
+    fields={
+        "order_id": Text("errors_order_id", strip=False),
+        "adjustments": MoneySum(("errors_total",)),
+    },
+)
 
 
 def load_errors(errors_path: str) -> pd.DataFrame:
@@ -47,13 +68,8 @@ def load_errors(errors_path: str) -> pd.DataFrame:
         return pd.DataFrame()
     df = pd.read_csv(errors_path, dtype=str).fillna("")
     df.columns = [c.strip() for c in df.columns]
-    df["errors_total"] = df.apply(
-        lambda r: parse_float(r.get("Error charges", "")) + parse_float(r.get("Adjustments", "")),
-        axis=1,
-    )
-    df["errors_order_id"] = df.apply(
-        lambda r: choose_order_id(r, r.name), axis=1
-    )
+    df["errors_total"] = ERRORS_SPEC.apply(df).frame["errors_total"].to_numpy()
+    df["errors_order_id"] = choose_order_ids(df)
     return df
 
 
@@ -79,6 +95,117 @@ def map_total(row: pd.Series) -> str:
     return f"{total:.2f}" if total else ""
 
 
+STORE_NAME = Text("Store name", strip=False)
+ORDER_SPEC = MappingSpec(
+    fields={
+        "order_datetime": Text("Timestamp local time", strip=False),
+        "provider": Mapped(STORE_NAME, normalize_provider),
+        "restaurant_name": STORE_NAME,
+        "payment_type": Const(PaymentTypes.CREDIT),
+        "subtotal": Money("Subtotal"),
+        "tax": Money("Subtotal tax passed to merchant"),
+        "tax_withheld": Money("Subtotal tax remitted by DoorDash to tax authorities"),
+        "tip": Money("Staff tip"),
+        "__ad_fee_tax": Money("Ad fee tax (for historical reference only)"),
+        "delivery_fee": Money("Consumer delivery fee"),
+        "commission_fee": Money("Commission"),
+        "processing_fee": Money("Payment processing fee"),
+        "marketing_fee": MoneySum(
+            (
+                "Marketing fees | (including any applicable taxes)",
+                "Customer discounts from marketing | (funded by you)",
+                "Customer discounts from marketing | (funded by DoorDash)",
+                "Customer discounts from marketing | (funded by a third-party)",
+                "DoorDash marketing credit",
+                "Marketing fees (for historical reference only) | (all discounts and fees)",
+                "Ad fee (for historical reference only)",
+            ),
+            blank_zero=True,
+        ),
+        "adjustments": MoneySum(("Error charges", "Adjustments"), blank_zero=True),
+        "total": Money("Net total"),
+        "payout": Money("Net total"),
+        "__row_notes": Notes(
+            (
+                Note("status={}", Text("Final order status", strip=False)),
+                Note("transaction_type={}", Text("Transaction type", strip=False)),
+                Note("description={}", Text("Description", strip=False)),
+            )
+        ),
+        "__payout_note": Notes((Note("payout_id={}", Text("Payout ID", strip=False)),)),
+    }
+)
+
+
+def _clean_orders(orders: pd.DataFrame) -> pd.DataFrame:
+    orders = orders.fillna("")
+    orders.columns = [c.strip() for c in orders.columns]
+    return orders
+
+
+def error_totals(errors: pd.DataFrame) -> pd.Series:
+    """Error report total (cents) per order id, in the order the ids first appear."""
+    if "errors_order_id" in errors.columns:
+        errors = errors[errors["errors_order_id"] != ""]
+    else:
+        errors = pd.DataFrame({"errors_order_id": [], "errors_total": []}, dtype=object)
+    totals = ERROR_TOTALS_SPEC.apply(errors)
+    first_seen = np.argsort(totals.first_rows, kind="stable")
+    error_ids = totals.frame["order_id"].to_numpy(dtype=object)[first_seen]
+    return pd.Series(totals.cents["adjustments"][first_seen], index=error_ids, dtype=np.int64)
+
+
+def order_frame(orders: pd.DataFrame, error_cents: pd.Series) -> pd.DataFrame:
+    """Normalized columns of `orders` (a frame, or a chunk of one, with its original index)."""
+    mapped = ORDER_SPEC.apply(orders)
+    out = mapped.frame
+    cents = mapped.cents
+    out["order_id"] = choose_order_ids(orders).to_numpy()
+    out["order_type"] = np.where(cents["delivery_fee"] > 0, OrderTypes.DELIVERY, OrderTypes.PICKUP)
+
+    ad_fee_tax = cents["__ad_fee_tax"]
+    out["tax"] = np.where(ad_fee_tax != 0, money_text(cents["tax"] + ad_fee_tax), out["tax"])
+
+    # The detailed adjustments are kept; a disagreeing error report is only noted.
+    extra_error = out["order_id"].map(error_cents)
+    matched = extra_error.notna().to_numpy()
+    extra_cents = extra_error.fillna(0).to_numpy(dtype=np.int64)
+    adjustments = cents["adjustments"]
+    mismatch = matched & (extra_cents != adjustments)
+    mismatch_note = np.array(
+        [
+            f"error_adjustment_mismatch detailed={format_cents(detailed)} errors={format_cents(reported)}"
+            if flagged
+            else ""
+            for flagged, detailed, reported in zip(mismatch, adjustments, extra_cents)
+        ],
+        dtype=object,
+    )
+    out["notes"] = join_notes(
+        [
+            out["__row_notes"].to_numpy(dtype=object),
+            mismatch_note,
+            out["__payout_note"].to_numpy(dtype=object),
+        ]
+    )
+    out["errors"] = ""
+    return out
+
+
+def error_only_frame(error_cents: pd.Series, order_ids: Iterable[str]) -> pd.DataFrame:
+    """Rows for error report totals whose order id is not among `order_ids`."""
+    error_only = ~error_cents.index.isin(list(order_ids))
+    return pd.DataFrame(
+        {
+            "order_id": error_cents.index[error_only],
+            "order_type": OrderTypes.PICKUP,
+            "payment_type": PaymentTypes.CREDIT,
+            "adjustments": money_text(error_cents.to_numpy()[error_only]),
+            "notes": "errors_only_record",
+        }
+    )
+
+
 class DoorDashOrdersParser(BaseParser):
     platform = Platforms.DOORDASH.upper()
     total_components_fields = (
@@ -96,138 +223,26 @@ class DoorDashOrdersParser(BaseParser):
         return normalized_path("doordash_orders_normalized.csv")
 
     def load_inputs(self, input_path: str):
-        orders = pd.read_csv(input_path, dtype=str).fillna("")
-        orders.columns = [c.strip() for c in orders.columns]
+        orders = _clean_orders(pd.read_csv(input_path, dtype=str))
         errors = load_errors(raw_path("doordash", "errors_raw.csv"))
         payouts = load_payouts(raw_path("doordash", "payouts_raw.csv"))
         return {"orders": orders, "errors": errors, "payouts": payouts}
 
     def parse_rows(self, inputs) -> List[Dict[str, str]]:
-        orders = inputs["orders"].copy()
-        errors = inputs["errors"].copy()
-        payouts = inputs["payouts"].copy()
-
-        error_map = {}
-        for _, row in errors.iterrows():
-            oid = row.get("errors_order_id", "")
-            if not oid:
-                continue
-            error_map[oid] = error_map.get(oid, 0.0) + parse_float(row.get("errors_total", ""))
-
-        rows: List[Dict[str, str]] = []
-        seen_error_ids = set()
-        for idx, row in orders.iterrows():
-            order_id = choose_order_id(row, idx)
-            order_datetime = row.get("Timestamp local time", "")
-            payout_id = row.get("Payout ID", "")
-            status = row.get("Final order status", "")
-
-            subtotal = normalize_money(row.get("Subtotal", ""))
-            tax = normalize_money(row.get("Subtotal tax passed to merchant", ""))
-            tax_withheld = normalize_money(row.get("Subtotal tax remitted by DoorDash to tax authorities", ""))
-            tip = normalize_money(row.get("Staff tip", ""))
-            ad_fee_tax = parse_float(row.get("Ad fee tax (for historical reference only)", ""))
-            if ad_fee_tax:
-                tax = f"{parse_float(tax) + ad_fee_tax:.2f}"
-            delivery_fee = normalize_money(row.get("Consumer delivery fee", ""))
-            commission_fee = normalize_money(row.get("Commission", ""))
-            processing_fee = normalize_money(row.get("Payment processing fee", ""))
-            marketing_total = (
-                parse_float(row.get("Marketing fees | (including any applicable taxes)", ""))
-                + parse_float(row.get("Customer discounts from marketing | (funded by you)", ""))
-                + parse_float(row.get("Customer discounts from marketing | (funded by DoorDash)", ""))
-                + parse_float(row.get("Customer discounts from marketing | (funded by a third-party)", ""))
-                + parse_float(row.get("DoorDash marketing credit", ""))
-                + parse_float(row.get("Marketing fees (for historical reference only) | (all discounts and fees)", ""))
-                + parse_float(row.get("Ad fee (for historical reference only)", ""))
-            )
-            marketing_fee = f"{marketing_total:.2f}" if marketing_total else ""
-            misc_fee = ""
-            adjustments = parse_float(row.get("Error charges", "")) + parse_float(row.get("Adjustments", ""))
-
-            extra_error = error_map.get(order_id)
-            if extra_error is not None:
-                seen_error_ids.add(order_id)
-                if round(extra_error - adjustments, 2) != 0:
-                    # keep detailed adjustment but note mismatch
-                    note_mismatch = True
-                else:
-                    note_mismatch = False
-            else:
-                note_mismatch = False
-
-            adjustments_str = f"{adjustments:.2f}" if adjustments else ""
-            total = normalize_money(row.get("Net total", ""))
-
-            notes = []
-            if status:
-                notes.append(f"status={status}")
-            if row.get("Transaction type"):
-                notes.append(f"transaction_type={row.get('Transaction type')}")
-            if row.get("Description"):
-                notes.append(f"description={row.get('Description')}")
-            if note_mismatch:
-                notes.append(f"error_adjustment_mismatch detailed={adjustments:.2f} errors={extra_error:.2f}")
-            if payout_id:
-                notes.append(f"payout_id={payout_id}")
-
-            rows.append(
-                build_normalized_row(
-                    Platforms.DOORDASH.upper(),
-                    order_id=order_id,
-                    provider=normalize_provider(row.get("Store name", "")),
-                    restaurant_name=row.get("Store name", ""),
-                    order_datetime=order_datetime,
-                    order_type=normalize_order_type(row),
-                    payment_type=PaymentTypes.CREDIT,
-                    subtotal=subtotal,
-                    tax=tax,
-                    tax_withheld=tax_withheld,
-                    tip=tip,
-                    delivery_fee=delivery_fee,
-                    total=total,
-                    processing_fee=processing_fee,
-                    commission_fee=commission_fee,
-                    marketing_fee=marketing_fee,
-                    misc_fee=misc_fee,
-                    adjustments=adjustments_str,
-                    payout=normalize_money(row.get("Net total", "")),
-                    notes=" | ".join(notes),
-                    errors="",
-                )
-            )
-
-        # Add any error-only rows (no matching order id)
-        for oid, total_err in error_map.items():
-            if oid in seen_error_ids:
-                continue
-            rows.append(
-                build_normalized_row(
-                    Platforms.DOORDASH.upper(),
-                    order_id=oid,
-                    provider="",
-                    restaurant_name="",
-                    order_datetime="",
-                    order_type=OrderTypes.PICKUP,
-                    payment_type=PaymentTypes.CREDIT,
-                    subtotal="",
-                    tax="",
-                    tax_withheld="",
-                    tip="",
-                    delivery_fee="",
-                    total="",
-                    processing_fee="",
-                    commission_fee="",
-                    marketing_fee="",
-                    misc_fee="",
-                    adjustments=f"{total_err:.2f}",
-                    payout="",
-                    notes="errors_only_record",
-                    errors="",
-                )
-            )
-
-        return rows
+        error_cents = error_totals(inputs["errors"])
+        orders = order_frame(inputs["orders"].copy(), error_cents)
+        extra = error_only_frame(error_cents, orders["order_id"])
+        return normalized_rows(orders, self.platform) + normalized_rows(extra, self.platform)
+
+    def parse_batches(self, input_path: str) -> Iterator[List[Dict[str, str]]]:
+        # Orders are independent rows: only the error report totals span chunks.
+        error_cents = error_totals(load_errors(raw_path("doordash", "errors_raw.csv")))
+        matched: Set[str] = set()
+        for chunk in pd.read_csv(input_path, dtype=str, chunksize=self.batch_rows):
+            orders = order_frame(_clean_orders(chunk), error_cents)
+            matched.update(orders["order_id"][orders["order_id"].isin(error_cents.index)])
+            yield normalized_rows(orders, self.platform)
+        yield normalized_rows(error_only_frame(error_cents, matched), self.platform)
 
 
 def main() -> None:
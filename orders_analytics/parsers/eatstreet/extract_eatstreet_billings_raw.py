@@ -1,17 +1,16 @@
 #!/usr/bin/env python3
 import argparse
-import datetime as dt
 import html
-import mailbox
 import os
 import re
 from email.utils import parsedate_to_datetime
 from typing import Dict, List, Tuple
 
-import pandas as pd
-
 from orders_analytics.utils.constants import raw_path, takeout_path
 from orders_analytics.utils.normalize import normalize_money
+from orders_analytics.utils.mbox_index import commit_mbox, iter_mbox
+from orders_analytics.utils.raw_store import upsert_rows
+from orders_analytics.utils.profiling import profiled
 
 RAW_COLUMNS = [
     "order_id",
@@ -113,10 +112,9 @@ def detect_provider(text: str, subject: str) -> str:
     return ""
 
 
-def parse_billings_mbox(mbox_path: str) -> List[Dict[str, str]]:
+def parse_billings_mbox(mbox_path: str, consumer: str = "") -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
+    for msg in iter_mbox(mbox_path, consumer):
         email_date = ""
         if msg.get("Date"):
             try:
@@ -147,50 +145,15 @@ def parse_billings_mbox(mbox_path: str) -> List[Dict[str, str]]:
 
 
 def upsert_raw(existing_path: str, new_rows: List[Dict[str, str]]) -> int:
-    now = dt.datetime.now().isoformat()
-    if os.path.exists(existing_path):
-        existing_df = pd.read_csv(existing_path, dtype=str).fillna("")
-        existing_rows = existing_df.to_dict("records")
-    else:
-        existing_rows = []
-
-    existing_map = {str(row.get("order_id", "")).strip(): row for row in existing_rows}
-    updated = 0
-    for row in new_rows:
-        order_id = str(row.get("order_id", "")).strip()
-        if not order_id:
-            continue
-        current = existing_map.get(order_id)
-        if current is None:
-            row["added_at"] = now
-            existing_map[order_id] = row
-            updated += 1
-            continue
-        changed = False
-        for col in RAW_COLUMNS:
-            if col == "added_at":
-                continue
-            old_val = str(current.get(col, "") or "")
-            new_val = str(row.get(col, "") or "")
-            if old_val != new_val:
-                current[col] = new_val
-                changed = True
-        if changed:
-            current["added_at"] = now
-            updated += 1
-
-    final_rows = list(existing_map.values())
-    for row in final_rows:
-        row.setdefault("added_at", now)
-    os.makedirs(os.path.dirname(existing_path), exist_ok=True)
-    pd.DataFrame(final_rows).reindex(columns=RAW_COLUMNS).to_csv(existing_path, index=False)
-    return updated
+    return upsert_rows(existing_path, new_rows, RAW_COLUMNS)
 
 
-def run(mbox: str, out: str) -> int:
-    rows = parse_billings_mbox(mbox)
+@profiled
+def run(mbox: str, out: str, incremental: bool = True) -> int:
+    rows = parse_billings_mbox(mbox, consumer=out if incremental else "")
     rows = [row for row in rows if row.get("order_id")]
     updated = upsert_raw(out, rows)
+    commit_mbox(mbox, out)
     print(f"Upserted {updated} billing row(s) into {out}")
     return updated
 
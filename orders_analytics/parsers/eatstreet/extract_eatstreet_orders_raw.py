@@ -1,20 +1,21 @@
 #!/usr/bin/env python3
 import argparse
-import datetime as dt
 import html
 import json
-import mailbox
 import os
 import re
 from email.utils import parsedate_to_datetime
+from functools import partial
 from typing import Dict, List, Optional
 
-import pandas as pd
-
 from orders_analytics.utils.constants import raw_path, takeout_path
 from orders_analytics.utils.providers import normalize_provider
 from orders_analytics.utils.normalize import normalize_datetime
 from orders_analytics.utils.order_types import OrderTypes
+from orders_analytics.utils.mbox_index import MboxFilter, commit_mbox, map_mbox
+from orders_analytics.utils.html_cells import HtmlDoc, block_spans
+from orders_analytics.utils.raw_store import upsert_rows
+from orders_analytics.utils.profiling import profiled
 
 RAW_COLUMNS = [
     "order_id",
@@ -43,6 +44,19 @@ RAW_COLUMNS = [
     "added_at",
 ]
 
+ORDER_TYPE_RE = re.compile(r"\b(DELIVERY|PICKUP)\b", re.IGNORECASE)
+FEE_RE = re.compile(
+    r'fee_label[^>]*>\s*(?:<span>)?\s*([A-Z ]+):\s*(?:</span>)?\s*</td>\s*'
+    r'<td[^>]*fee[^>]*>\s*(?:<span>)?\s*([0-9]+\.[0-9]{2})',
+    re.IGNORECASE | re.DOTALL,
+)
+TOTAL_RE = re.compile(
+    r'<b>\s*TOTAL:\s*</b>.*?<b>\s*([0-9]+\.[0-9]{2})\s*</b>',
+    re.IGNORECASE | re.DOTALL,
+)
+
+PREFILTER = MboxFilter(content_types=("text/html",))
+
 
 def extract_html(msg) -> str:
     if msg.is_multipart():
@@ -86,36 +100,23 @@ def extract_order_info(html_text: str) -> Optional[Dict]:
 
 
 def extract_spans_from_block(block: str) -> List[str]:
-    spans = re.findall(
-        r"<span[^>]*>\s*([^<]+?)\s*</span>",
-        block,
-        re.IGNORECASE | re.DOTALL,
-    )
-    cleaned = [normalize_space(html.unescape(s)) for s in spans]
-    return [s for s in cleaned if s]
+    return block_spans(block)
 
 
-def extract_td_block(html_text: str, label: str) -> Optional[str]:
-    match = re.search(
-        rf"<td[^>]*>(?:(?!</td>).)*{label}(?:(?!</td>).)*</td>",
-        html_text,
-        re.IGNORECASE | re.DOTALL,
-    )
-    return match.group(0) if match else None
+def extract_td_block(doc: HtmlDoc, label: str) -> Optional[str]:
+    cell = doc.find_cell(label)
+    return cell.block if cell else None
 
 
-def extract_header_fields(html_text: str) -> Dict[str, str]:
+def extract_header_fields(doc: HtmlDoc) -> Dict[str, str]:
     fields: Dict[str, str] = {}
-    type_match = re.search(r"\b(DELIVERY|PICKUP)\b", html_text, re.IGNORECASE)
-    if not type_match:
+    type_matches = doc.find_all(ORDER_TYPE_RE)
+    if not type_matches:
         return fields
 
-    td_blocks = re.findall(r"<td[^>]*>.*?</td>", html_text, re.IGNORECASE | re.DOTALL)
     candidate_spans = []
-    for block in td_blocks:
-        if not re.search(r"\b(DELIVERY|PICKUP)\b", block, re.IGNORECASE):
-            continue
-        spans = extract_spans_from_block(block)
+    for cell in doc.top_level_cells_matching(ORDER_TYPE_RE):
+        spans = cell.spans
         if not spans:
             continue
         first = spans[0].strip().lower()
@@ -142,16 +143,16 @@ def extract_header_fields(html_text: str) -> Dict[str, str]:
             fields["order_date"] = selected[2]
         return fields
 
-    fields["order_type"] = type_match.group(1).strip().lower()
+    fields["order_type"] = type_matches[0].group(1).strip().lower()
     return fields
 
 
-def extract_customer_info(html_text: str) -> Dict[str, str]:
+def extract_customer_info(doc: HtmlDoc) -> Dict[str, str]:
     fields: Dict[str, str] = {}
-    block = extract_td_block(html_text, "Customer Info:")
-    if not block:
+    cell = doc.find_cell("Customer Info:")
+    if not cell:
         return fields
-    spans = extract_spans_from_block(block)
+    spans = cell.spans
     spans = [s for s in spans if "Customer Info" not in s]
     if spans:
         fields["customer_name"] = spans[0]
@@ -160,25 +161,20 @@ def extract_customer_info(html_text: str) -> Dict[str, str]:
     return fields
 
 
-def extract_delivery_address(html_text: str) -> List[str]:
-    block = extract_td_block(html_text, "Delivery Address:")
-    if not block:
+def extract_delivery_address(doc: HtmlDoc) -> List[str]:
+    cell = doc.find_cell("Delivery Address:")
+    if not cell:
         return []
-    spans = extract_spans_from_block(block)
+    spans = cell.spans
     spans = [s for s in spans if "Delivery Address" not in s]
     return spans
 
 
-def extract_payment_info(html_text: str) -> Dict[str, str]:
+def extract_payment_info(doc: HtmlDoc) -> Dict[str, str]:
     fields: Dict[str, str] = {}
-    payment_block = re.search(
-        r"Payment Info:.*?</td>",
-        html_text,
-        re.IGNORECASE | re.DOTALL,
-    )
-    if not payment_block:
+    block = doc.block_from("Payment Info:")
+    if not block:
         return fields
-    block = payment_block.group(0)
     big = re.search(
         r'class="big_text[^"]*"\s*>\s*([^<]+?)\s*</span>',
         block,
@@ -210,20 +206,12 @@ def classify_payment(detail: str, payment_raw: str) -> str:
     return "unknown"
 
 
-def extract_fees(html_text: str) -> Dict[str, str]:
+def extract_fees(doc: HtmlDoc) -> Dict[str, str]:
     fees: Dict[str, str] = {}
-    for label, amount in re.findall(
-        r'fee_label[^>]*>\s*(?:<span>)?\s*([A-Z ]+):\s*(?:</span>)?\s*</td>\s*'
-        r'<td[^>]*fee[^>]*>\s*(?:<span>)?\s*([0-9]+\.[0-9]{2})',
-        html_text,
-        re.IGNORECASE | re.DOTALL,
-    ):
+    for match in doc.find_all(FEE_RE):
+        label, amount = match.groups()
         fees[normalize_space(label).upper()] = amount
-    total_match = re.search(
-        r'<b>\s*TOTAL:\s*</b>.*?<b>\s*([0-9]+\.[0-9]{2})\s*</b>',
-        html_text,
-        re.IGNORECASE | re.DOTALL,
-    )
+    total_match = TOTAL_RE.search(doc.source)
     if total_match:
         fees["TOTAL"] = total_match.group(1)
     return fees
@@ -274,134 +262,103 @@ def normalize_order_datetime(value: str) -> str:
     )
 
 
-def parse_orders(mbox_path: str) -> List[Dict[str, str]]:
-    orders: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
-        email_date = ""
-        if msg.get("Date"):
-            try:
-                email_date = parsedate_to_datetime(msg.get("Date")).isoformat()
-            except (TypeError, ValueError):
-                email_date = ""
-        html_text = extract_html(msg)
-        if not html_text:
-            continue
-        order_info = extract_order_info(html_text)
-        header_fields = extract_header_fields(html_text)
-        customer_fields = extract_customer_info(html_text)
-        payment_fields = extract_payment_info(html_text)
-        fees = extract_fees(html_text)
-
-        order_type = header_fields.get("order_type", "")
-        restaurant = header_fields.get("restaurant", "")
-        order_date = header_fields.get("order_date", "")
-        order_id = ""
-        phone = customer_fields.get("phone", "")
-        customer_name = customer_fields.get("customer_name", "")
-        address = ""
-        payment_detail = payment_fields.get("payment_detail", "")
-        payment_raw = ""
-        items_summary = ""
-        items_count = ""
-
-        if order_info:
-            order_id = str(order_info.get("id", "") or "")
-            phone = order_info.get("phoneNumber", "") or phone
-            order_type = OrderTypes.DELIVERY if order_info.get("delivery") else order_type
-            if order_info.get("delivery") is False:
-                order_type = OrderTypes.PICKUP
-            order_date = order_info.get("deliverAt", "") or order_date
-            payment_raw = order_info.get("payment", "") or ""
-            items_summary = summarize_items(order_info)
-            if order_info.get("items") is not None:
-                items_count = str(len(order_info.get("items", [])))
-            if order_info.get("delivery"):
-                address = format_address_from_info(order_info)
-
-        if not address and order_type == OrderTypes.DELIVERY:
-            address_lines = extract_delivery_address(html_text)
-            address = format_address_from_lines(address_lines)
-        if address:
-            address = address.replace(" | ", ", ").replace("|", ", ")
-
-        payment_type = classify_payment(payment_detail, payment_raw)
-
-        orders.append(
-            {
-                "order_id": order_id,
-                "platform": "EATSTREET",
-                "provider": normalize_provider(restaurant),
-                "restaurant_name": restaurant,
-                "order_datetime_raw": order_date,
-                "order_datetime_iso": normalize_order_datetime(order_date),
-                "order_type": order_type,
-                "customer_name": customer_name,
-                "phone": phone,
-                "email": "",
-                "address": address,
-                "payment_detail": payment_detail,
-                "payment_raw": payment_raw,
-                "payment_type": payment_type,
-                "subtotal": fees.get("SUBTOTAL", ""),
-                "tax": fees.get("TAX", ""),
-                "tip": fees.get("TIP", ""),
-                "delivery_fee": fees.get("DELIVERY", ""),
-                "total": fees.get("TOTAL", ""),
-                "items": items_summary,
-                "item_count": items_count,
-                "source_file": os.path.basename(mbox_path),
-                "email_date": email_date,
-            }
-        )
-    return orders
+def parse_order_message(msg, source_file: str) -> List[Dict[str, str]]:
+    email_date = ""
+    if msg.get("Date"):
+        try:
+            email_date = parsedate_to_datetime(msg.get("Date")).isoformat()
+        except (TypeError, ValueError):
+            email_date = ""
+    html_text = extract_html(msg)
+    if not html_text:
+        return []
+    doc = HtmlDoc(html_text)
+    order_info = extract_order_info(html_text)
+    header_fields = extract_header_fields(doc)
+    customer_fields = extract_customer_info(doc)
+    payment_fields = extract_payment_info(doc)
+    fees = extract_fees(doc)
+
+    order_type = header_fields.get("order_type", "")
+    restaurant = header_fields.get("restaurant", "")
+    order_date = header_fields.get("order_date", "")
+    order_id = ""
+    phone = customer_fields.get("phone", "")
+    customer_name = customer_fields.get("customer_name", "")
+    address = ""
+    payment_detail = payment_fields.get("payment_detail", "")
+    payment_raw = ""
+    items_summary = ""
+    items_count = ""
+
+    if order_info:
+        order_id = str(order_info.get("id", "") or "")
+        phone = order_info.get("phoneNumber", "") or phone
+        order_type = OrderTypes.DELIVERY if order_info.get("delivery") else order_type
+        if order_info.get("delivery") is False:
+            order_type = OrderTypes.PICKUP
+        order_date = order_info.get("deliverAt", "") or order_date
+        payment_raw = order_info.get("payment", "") or ""
+        items_summary = summarize_items(order_info)
+        if order_info.get("items") is not None:
+            items_count = str(len(order_info.get("items", [])))
+        if order_info.get("delivery"):
+            address = format_address_from_info(order_info)
+
+    if not address and order_type == OrderTypes.DELIVERY:
+        address_lines = extract_delivery_address(doc)
+        address = format_address_from_lines(address_lines)
+    if address:
+        address = address.replace(" | ", ", ").replace("|", ", ")
+
+    payment_type = classify_payment(payment_detail, payment_raw)
+
+    return [
+        {
+            "order_id": order_id,
+            "platform": "EATSTREET",
+            "provider": normalize_provider(restaurant),
+            "restaurant_name": restaurant,
+            "order_datetime_raw": order_date,
+            "order_datetime_iso": normalize_order_datetime(order_date),
+            "order_type": order_type,
+            "customer_name": customer_name,
+            "phone": phone,
+            "email": "",
+            "address": address,
+            "payment_detail": payment_detail,
+            "payment_raw": payment_raw,
+            "payment_type": payment_type,
+            "subtotal": fees.get("SUBTOTAL", ""),
+            "tax": fees.get("TAX", ""),
+            "tip": fees.get("TIP", ""),
+            "delivery_fee": fees.get("DELIVERY", ""),
+            "total": fees.get("TOTAL", ""),
+            "items": items_summary,
+            "item_count": items_count,
+            "source_file": source_file,
+            "email_date": email_date,
+        }
+    ]
+
+
+def parse_orders(mbox_path: str, consumer: str = "", workers: int = 1) -> List[Dict[str, str]]:
+    parse_message = partial(parse_order_message, source_file=os.path.basename(mbox_path))
+    return map_mbox(
+        mbox_path, parse_message, consumer=consumer, workers=workers, prefilter=PREFILTER
+    )
 
 
 def upsert_raw(existing_path: str, new_rows: List[Dict[str, str]]) -> int:
-    now = dt.datetime.now().isoformat()
-    if os.path.exists(existing_path):
-        existing_df = pd.read_csv(existing_path, dtype=str).fillna("")
-        existing_rows = existing_df.to_dict("records")
-    else:
-        existing_rows = []
-
-    existing_map = {str(row.get("order_id", "")).strip(): row for row in existing_rows}
-    updated = 0
-    for row in new_rows:
-        order_id = str(row.get("order_id", "")).strip()
-        if not order_id:
-            continue
-        current = existing_map.get(order_id)
-        if current is None:
-            row["added_at"] = now
-            existing_map[order_id] = row
-            updated += 1
-            continue
-        changed = False
-        for col in RAW_COLUMNS:
-            if col == "added_at":
-                continue
-            old_val = str(current.get(col, "") or "")
-            new_val = str(row.get(col, "") or "")
-            if old_val != new_val:
-                current[col] = new_val
-                changed = True
-        if changed:
-            current["added_at"] = now
-            updated += 1
-
-    final_rows = list(existing_map.values())
-    for row in final_rows:
-        row.setdefault("added_at", now)
-    os.makedirs(os.path.dirname(existing_path), exist_ok=True)
-    pd.DataFrame(final_rows).reindex(columns=RAW_COLUMNS).to_csv(existing_path, index=False)
-    return updated
+    return upsert_rows(existing_path, new_rows, RAW_COLUMNS)
 
 
-def run(mbox: str, out: str) -> int:
-    rows = parse_orders(mbox)
+@profiled
+def run(mbox: str, out: str, incremental: bool = True, workers: int = 1) -> int:
+    rows = parse_orders(mbox, consumer=out if incremental else "", workers=workers)
     rows = [row for row in rows if row.get("order_id")]
     updated = upsert_raw(out, rows)
+    commit_mbox(mbox, out)
     print(f"Upserted {updated} order(s) into {out}")
     return updated
 
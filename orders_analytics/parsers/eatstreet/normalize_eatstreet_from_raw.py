@@ -13,6 +13,7 @@ from orders_analytics.utils.constants import normalized_path, raw_path
 from orders_analytics.utils.validation import normalize_order_type, validate_tax_fields
 from orders_analytics.utils.platforms import Platforms
 from orders_analytics.utils.schema import build_normalized_row
+from orders_analytics.utils.profiling import profiled
 
 
 def load_raw(path: str) -> pd.DataFrame:
@@ -279,6 +280,7 @@ class EatstreetNormalizer(BaseParser):
         return rows
 
 
+@profiled
 def run(
     orders_raw_path: str,
     billings_raw_path: str,
@@ -2,7 +2,6 @@
 import argparse
 import os
 import sys
-from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from typing import Dict, List
 
 import pandas as pd
@@ -10,53 +9,74 @@ import pandas as pd
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
 
 from orders_analytics.utils.base_parser import BaseParser
+from orders_analytics.utils.column_mapping import (
+    Const,
+    DateTime,
+    Enum,
+    Joined,
+    Mapped,
+    MappingSpec,
+    Money,
+    MoneySum,
+    Note,
+    Notes,
+    Text,
+    join_notes,
+    normalized_rows,
+)
 from orders_analytics.utils.constants import normalized_path, raw_path
 from orders_analytics.utils.providers import normalize_provider
-from orders_analytics.utils.normalize import (
-    clean_text,
-    join_address_parts,
-    normalize_datetime,
-    normalize_money,
-    normalize_order_type,
-)
+from orders_analytics.utils.normalize import clean_text, normalize_datetime
 from orders_analytics.utils.order_types import OrderTypes
 from orders_analytics.utils.payment_types import PaymentTypes
 from orders_analytics.utils.platforms import Platforms
-from orders_analytics.utils.schema import build_normalized_row
 from orders_analytics.utils.google_sheets import download_sheet_entry
 from orders_analytics.utils.google_sheets_registry import SHEETS
 
 
+DATE_FORMATS = ("%m/%d/%Y %I:%M %p", "%m/%d/%Y")
+
+
 def normalize_date(value: str) -> str:
-    return normalize_datetime(
-        value,
-        formats=("%m/%d/%Y %I:%M %p", "%m/%d/%Y"),
-        allow_iso=False,
-    )
-
-
-def format_address(row: pd.Series) -> str:
-    street = str(row.get("Street Address", "") or "").strip()
-    city = str(row.get("City", "") or "").strip()
-    state = str(row.get("State", "") or "").strip()
-    zip_code = str(row.get("Zip Code", "") or "").strip()
-    city_state = ", ".join(p for p in [city, state] if p)
-    return join_address_parts([street, city_state, zip_code], sep=", ")
-
-
-def sum_money_fields(*values: str) -> str:
-    total = Decimal("0.00")
-    for value in values:
-        cleaned = normalize_money(value or "")
-        if not cleaned:
-            continue
-        try:
-            total += Decimal(cleaned)
-        except InvalidOperation:
-            continue
-    if total == Decimal("0.00"):
-        return ""
-    return str(total.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+    return normalize_datetime(value, formats=DATE_FORMATS, allow_iso=False)
+
+
+LOCATION = Text(("Store Name", "Location"), strip=False)
+ORDER_SPEC = MappingSpec(
+    fields={
+        "order_id": Mapped(Text("Order Number", strip=False), clean_text),
+        "provider": Mapped(LOCATION, normalize_provider),
+        "restaurant_name": LOCATION,
+        "order_datetime": DateTime("Event Date", formats=DATE_FORMATS, allow_iso=False),
+        # Relish orders are picked up even when the source says delivery.
+        "order_type": Enum(
+            Text("Source", strip=False),
+            (("relish", OrderTypes.PICKUP), ("delivery", OrderTypes.DELIVERY)),
+            default=OrderTypes.PICKUP,
+        ),
+        "payment_type": Const(PaymentTypes.CREDIT),
+        "subtotal": Money("Food Total"),
+        "tax": Money("Sales Tax"),
+        "tax_withheld": Money("Sales Tax Remitted by ezCater"),
+        "tip": Money("Tip"),
+        "delivery_fee": Money("Delivery Fee"),
+        "total": MoneySum(("Food Total", "Sales Tax", "Tip", "Delivery Fee"), blank_zero=True),
+        "payout": Money("Caterer Total Due"),
+        "processing_fee": Money("Payment Transaction Fee"),
+        "commission_fee": Money("Commission"),
+        "adjustments": MoneySum(("Adjustments", "Discounts", "Promotion", "Misc Fees"), blank_invalid=True),
+        "marketing_fee": MoneySum(("Preferred Partner Program", "ezRewards"), blank_invalid=True),
+        "__address": Joined(("Street Address", "City", "State", "Zip Code")),
+        "notes": Notes(
+            (
+                Note("status={}", Text("Status", strip=False)),
+                Note("source={}", Text("Source", strip=False)),
+                Note("promo_code={}", Text("Promotion Code", strip=False)),
+            )
+        ),
+    }
+)
+SUPPLEMENT_FIELDS = ("customer_name", "company_name", "phone", "email", "address")
 
 
 class EzCaterOrdersParser(BaseParser):
@@ -113,101 +133,14 @@ class EzCaterOrdersParser(BaseParser):
                 if oid and note:
                     notes_overrides[oid] = note
 
-        rows: List[Dict[str, str]] = []
-        for _, row in df.iterrows():
-            order_id = clean_text(row.get("Order Number", ""))
-            if order_id.lower() == "total":
-                continue
-            location = row.get("Store Name", "") or row.get("Location", "")
-            source = str(row.get("Source", "") or "")
-            source_lower = source.lower()
-            if "delivery" in source_lower:
-                order_type = OrderTypes.DELIVERY
-            else:
-                order_type = OrderTypes.PICKUP
-            if "relish" in source_lower:
-                order_type = OrderTypes.PICKUP
-            notes = []
-            status = row.get("Status", "")
-            promo = row.get("Promotion Code", "")
-            if status:
-                notes.append(f"status={status}")
-            if source:
-                notes.append(f"source={source}")
-            if promo:
-                notes.append(f"promo_code={promo}")
-            override_note = notes_overrides.get(order_id)
-            if override_note:
-                notes.append(override_note)
-
-            marketing_fee = ""
-            ppp = normalize_money(row.get("Preferred Partner Program", ""))
-            rewards = normalize_money(row.get("ezRewards", ""))
-            if ppp or rewards:
-                try:
-                    marketing_fee = str(
-                        (Decimal(ppp or "0") + Decimal(rewards or "0")).quantize(
-                            Decimal("0.01"), rounding=ROUND_HALF_UP
-                        )
-                    )
-                except InvalidOperation:
-                    marketing_fee = ""
-
-            adjustments = ""
-            adj = normalize_money(row.get("Adjustments", ""))
-            discounts = normalize_money(row.get("Discounts", ""))
-            promo_amt = normalize_money(row.get("Promotion", ""))
-            misc_fees = normalize_money(row.get("Misc Fees", ""))
-            if adj or discounts or promo_amt or misc_fees:
-                try:
-                    adjustments = str(
-                        (Decimal(adj or "0") + Decimal(discounts or "0") + Decimal(promo_amt or "0") + Decimal(misc_fees or "0")).quantize(
-                            Decimal("0.01"), rounding=ROUND_HALF_UP
-                        )
-                    )
-                except InvalidOperation:
-                    adjustments = ""
-
-            details = supplement.get(order_id, {})
-            address = details.get("address", "") or format_address(row)
-            subtotal = normalize_money(row.get("Food Total", ""))
-            tax = normalize_money(row.get("Sales Tax", ""))
-            tip = normalize_money(row.get("Tip", ""))
-            delivery_fee = normalize_money(row.get("Delivery Fee", ""))
-            total = sum_money_fields(subtotal, tax, tip, delivery_fee)
-
-            rows.append(
-                build_normalized_row(
-                    Platforms.EZCATER.upper(),
-                    order_id=order_id,
-                    provider=normalize_provider(location),
-                    restaurant_name=location,
-                    order_datetime=normalize_date(row.get("Event Date", "")),
-                    order_type=order_type
-                    if order_type in (OrderTypes.PICKUP, OrderTypes.DELIVERY)
-                    else OrderTypes.DELIVERY,
-                    customer_name=details.get("customer_name", ""),
-                    company_name=details.get("company_name", ""),
-                    phone=details.get("phone", ""),
-                    email=details.get("email", ""),
-                    address=address,
-                    payment_type=PaymentTypes.CREDIT,
-                    subtotal=subtotal,
-                    tax=tax,
-                    tax_withheld=normalize_money(row.get("Sales Tax Remitted by ezCater", "")),
-                    tip=tip,
-                    delivery_fee=delivery_fee,
-                    total=total,
-                    payout=normalize_money(row.get("Caterer Total Due", "")),
-                    processing_fee=normalize_money(row.get("Payment Transaction Fee", "")),
-                    commission_fee=normalize_money(row.get("Commission", "")),
-                    adjustments=adjustments,
-                    marketing_fee=marketing_fee,
-                    errors="",
-                    notes=" | ".join(notes),
-                )
-            )
-        return rows
+        out = ORDER_SPEC.apply(df).frame
+        out = out[out["order_id"].str.lower() != "total"].copy()
+        order_ids = out["order_id"]
+        out["notes"] = join_notes([out["notes"], order_ids.map(notes_overrides).fillna("")])
+        for name in SUPPLEMENT_FIELDS:
+            out[name] = order_ids.map({oid: details[name] for oid, details in supplement.items()}).fillna("")
+        out["address"] = out["address"].where(out["address"] != "", out["__address"])
+        return normalized_rows(out, Platforms.EZCATER.upper())
 
 
 def main() -> None:
@@ -8,6 +8,7 @@ from mailbox import mbox
 import pandas as pd
 
 from orders_analytics.utils.constants import raw_path, takeout_path
+from orders_analytics.utils.profiling import profiled
 
 
 def is_zero_or_blank(series: pd.Series) -> bool:
@@ -65,6 +66,7 @@ def extract_company_info(mbox_path: str, out_path: str) -> int:
     return len(df)
 
 
+@profiled
 def run(input_path: str, out_path: str) -> int:
     df = pd.read_csv(input_path, encoding="utf-16", sep="\t", dtype=str).fillna("")
 
@@ -1,18 +1,15 @@
 #!/usr/bin/env python3
 import argparse
-import datetime as dt
-import io
-import mailbox
-import os
 import re
 from email.utils import parsedate_to_datetime
 from typing import Dict, List
 
-import pandas as pd
-import pdfplumber
-
 from orders_analytics.utils.constants import raw_path, takeout_path
 from orders_analytics.utils.normalize import normalize_money
+from orders_analytics.utils.mbox_index import MboxFilter, commit_mbox, iter_mbox
+from orders_analytics.utils.pdf_cache import pdf_text
+from orders_analytics.utils.raw_store import upsert_rows
+from orders_analytics.utils.profiling import profiled
 
 RAW_COLUMNS = [
     "order_id",
@@ -33,11 +30,12 @@ RAW_COLUMNS = [
 DATE_RE = re.compile(r"[A-Za-z]{3}\d{1,2},\d{4}")
 ORDER_ID_RE = re.compile(r"\b[A-Z]{2,4}-\d+\b")
 
+PREFILTER = MboxFilter(content_types=("application/pdf",))
+
 
 def parse_pdf(payload: bytes) -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    with pdfplumber.open(io.BytesIO(payload)) as pdf:
-        text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+    text = pdf_text(payload)
     restaurant_name = "Aroma Pizza & Pasta"
     restaurant_address = "20491 Alton Parkway, Lake Forest, CA 92610, United States"
     name_match = re.search(r"Aroma\\s*Pizza\\s*&\\s*Pasta", text, re.IGNORECASE)
@@ -82,10 +80,9 @@ def parse_pdf(payload: bytes) -> List[Dict[str, str]]:
     return rows
 
 
-def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
+def parse_mbox(mbox_path: str, consumer: str = "") -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
+    for msg in iter_mbox(mbox_path, consumer, PREFILTER):
         email_date = ""
         if msg.get("Date"):
             try:
@@ -110,49 +107,14 @@ def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
 
 
 def upsert_raw(existing_path: str, new_rows: List[Dict[str, str]]) -> int:
-    now = dt.datetime.now().isoformat()
-    if os.path.exists(existing_path):
-        existing_df = pd.read_csv(existing_path, dtype=str).fillna("")
-        existing_rows = existing_df.to_dict("records")
-    else:
-        existing_rows = []
-
-    existing_map = {str(row.get("order_id", "")).strip(): row for row in existing_rows}
-    updated = 0
-    for row in new_rows:
-        order_id = str(row.get("order_id", "")).strip()
-        if not order_id:
-            continue
-        current = existing_map.get(order_id)
-        if current is None:
-            row["added_at"] = now
-            existing_map[order_id] = row
-            updated += 1
-            continue
-        changed = False
-        for col in RAW_COLUMNS:
-            if col == "added_at":
-                continue
-            old_val = str(current.get(col, "") or "")
-            new_val = str(row.get(col, "") or "")
-            if old_val != new_val:
-                current[col] = new_val
-                changed = True
-        if changed:
-            current["added_at"] = now
-            updated += 1
-
-    final_rows = list(existing_map.values())
-    for row in final_rows:
-        row.setdefault("added_at", now)
-    os.makedirs(os.path.dirname(existing_path), exist_ok=True)
-    pd.DataFrame(final_rows).reindex(columns=RAW_COLUMNS).to_csv(existing_path, index=False)
-    return updated
+    return upsert_rows(existing_path, new_rows, RAW_COLUMNS)
 
 
-def run(mbox: str, out: str) -> int:
-    rows = parse_mbox(mbox)
+@profiled
+def run(mbox: str, out: str, incremental: bool = True) -> int:
+    rows = parse_mbox(mbox, consumer=out if incremental else "")
     updated = upsert_raw(out, rows)
+    commit_mbox(mbox, out)
     print(f"Upserted {updated} billing row(s) into {out}")
     return updated
 
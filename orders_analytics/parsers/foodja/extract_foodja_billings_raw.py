@@ -9,6 +9,7 @@ import pandas as pd
 from orders_analytics.utils.constants import raw_path, takeout_path
 from orders_analytics.utils.providers import normalize_provider
 from orders_analytics.utils.normalize import normalize_money
+from orders_analytics.utils.profiling import profiled
 
 
 def infer_provider_from_filename(path: Path) -> str:
@@ -20,6 +21,7 @@ def infer_provider_from_filename(path: Path) -> str:
     return normalize_provider(path.stem)
 
 
+@profiled
 def run(input_dir: str, out_path: str) -> int:
     now = dt.datetime.now().isoformat()
     input_dir = Path(input_dir)
@@ -7,8 +7,10 @@ from pathlib import Path
 import pandas as pd
 
 from orders_analytics.utils.constants import raw_path, takeout_path
+from orders_analytics.utils.profiling import profiled
 
 
+@profiled
 def run(input_path: str, out_path: str) -> int:
     now = dt.datetime.now().isoformat()
     df = pd.read_csv(input_path, dtype=str).fillna("")
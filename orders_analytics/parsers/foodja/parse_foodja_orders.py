@@ -3,14 +3,29 @@ import argparse
 import os
 import sys
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
-from typing import Dict, List
+from typing import Callable, Dict, List
 
+import numpy as np
 import pandas as pd
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
 
 from orders_analytics.utils.base_parser import BaseParser
+from orders_analytics.utils.column_mapping import (
+    Const,
+    DateTime,
+    Mapped,
+    MappingSpec,
+    Money,
+    Note,
+    Notes,
+    Text,
+    join_notes,
+    money_text,
+    normalized_rows,
+)
 from orders_analytics.utils.constants import normalized_path, raw_path
+from orders_analytics.utils.money import cents_array
 from orders_analytics.utils.providers import normalize_provider
 from orders_analytics.utils.normalize import normalize_datetime, normalize_money
 from orders_analytics.utils.order_types import OrderTypes
@@ -19,12 +34,52 @@ from orders_analytics.utils.platforms import Platforms
 from orders_analytics.utils.schema import build_normalized_row
 
 
+DATE_FORMATS = ("%m/%d/%Y", "%m/%d/%y")
+CENT = Decimal("0.01")
+
+
 def normalize_date(value: str) -> str:
-    return normalize_datetime(
-        value,
-        formats=("%m/%d/%Y", "%m/%d/%y"),
-        allow_iso=False,
-    )
+    return normalize_datetime(value, formats=DATE_FORMATS, allow_iso=False)
+
+
+def _share(rate: str) -> Callable[[str], str]:
+    """`rate` times a normalized subtotal, rounded half up; blank when it is not an amount."""
+
+    def share(subtotal: str) -> str:
+        try:
+            subtotal_dec = Decimal(subtotal) if subtotal != "" else None
+        except InvalidOperation:
+            return ""
+        if subtotal_dec is None:
+            return ""
+        return str((subtotal_dec * Decimal(rate)).quantize(CENT, rounding=ROUND_HALF_UP))
+
+    return share
+
+
+SUBTOTAL = Money("Food Total")
+LOCATION = Text("Location", strip=False)
+ORDER_SPEC = MappingSpec(
+    fields={
+        "order_id": Mapped(Text(("order_id", "Order #"), strip=False), str.strip),
+        "provider": Mapped(LOCATION, normalize_provider),
+        "restaurant_name": LOCATION,
+        "order_datetime": DateTime("Delivery Date", formats=DATE_FORMATS, allow_iso=False),
+        "order_type": Const(OrderTypes.PICKUP),
+        "payment_type": Const(PaymentTypes.CREDIT),
+        "subtotal": SUBTOTAL,
+        # Estimates until billings say otherwise: 30% commission, 7.75% tax withheld.
+        "commission_fee": Mapped(SUBTOTAL, _share("-0.30")),
+        "tax_withheld": Mapped(SUBTOTAL, _share("0.0775")),
+        "processing_fee": Const("0.00"),
+        "__period_notes": Notes(
+            (
+                Note("period={}", Text("Period", strip=False)),
+                Note("check_date={}", Text("Check Date", strip=False)),
+            )
+        ),
+    }
+)
 
 
 class FoodjaOrdersParser(BaseParser):
@@ -46,101 +101,56 @@ class FoodjaOrdersParser(BaseParser):
         billings_path = raw_path("foodja", "billings_raw.csv")
         if os.path.exists(billings_path):
             billings_df = pd.read_csv(billings_path, dtype=str).fillna("")
-            for _, b in billings_df.iterrows():
+            for b in billings_df.to_dict("records"):
                 oid = str(b.get("order_id", "")).strip()
                 if not oid:
                     continue
                 billings[oid] = b
 
-        rows: List[Dict[str, str]] = []
-        seen_order_ids = set()
-        for _, row in df.iterrows():
-            location = row.get("Location", "")
-            order_id = str(row.get("order_id", "") or row.get("Order #", "")).strip()
-            if order_id:
-                seen_order_ids.add(order_id)
-            subtotal = normalize_money(row.get("Food Total", ""))
-            try:
-                subtotal_dec = Decimal(subtotal) if subtotal != "" else None
-            except InvalidOperation:
-                subtotal_dec = None
-            commission_fee = ""
-            tax_withheld = ""
-            if subtotal_dec is not None:
-                commission_fee = str((subtotal_dec * Decimal("-0.30")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
-                tax_withheld = str((subtotal_dec * Decimal("0.0775")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+        out = ORDER_SPEC.apply(df).frame
+        order_ids = out["order_id"]
+        seen_order_ids = set(order_ids[order_ids != ""])
+
+        # Billings values win over the orders export; mismatched subtotals are noted.
+        has_bill = order_ids.isin(billings).to_numpy()
+        bill_subtotal = order_ids.map(
+            {oid: normalize_money(bill.get("subtotal", "")) for oid, bill in billings.items()}
+        ).fillna("")
+        bill_payout = order_ids.map(
+            {oid: normalize_money(bill.get("payout", "")) for oid, bill in billings.items()}
+        ).fillna("")
+        orders_subtotal = out["subtotal"]
+        use_bill_subtotal = has_bill & (bill_subtotal != "").to_numpy()
+        mismatch = use_bill_subtotal & (orders_subtotal != "").to_numpy() & (bill_subtotal != orders_subtotal).to_numpy()
+        out["subtotal"] = np.where(use_bill_subtotal, bill_subtotal, orders_subtotal)
+        subtotal_ok, subtotal_cents = cents_array(out["subtotal"])
+        payout_ok, payout_cents = cents_array(bill_payout)
+        use_bill_payout = has_bill & (bill_payout != "").to_numpy()
+        out["payout"] = np.where(use_bill_payout, bill_payout, "")
+        billed_commission = use_bill_payout & subtotal_ok & payout_ok
+        out["commission_fee"] = np.where(
+            billed_commission, money_text(payout_cents - subtotal_cents), out["commission_fee"]
+        )
+        _, commission_cents = cents_array(out["commission_fee"])
+        estimated = (out["payout"] == "").to_numpy() & subtotal_ok & (out["commission_fee"] != "").to_numpy()
+        out["payout"] = np.where(estimated, money_text(subtotal_cents + commission_cents), out["payout"])
+        out["total"] = out["subtotal"]
+
+        mismatch_note = np.where(
+            mismatch, "subtotal_mismatch orders=" + orders_subtotal + " billings=" + bill_subtotal, ""
+        )
+        billing_note = np.where(has_bill, "billings_override", "billings_missing_receivable | billings_missing_order_record")
+        out["notes"] = join_notes(
+            [
+                out["__period_notes"],
+                mismatch_note,
+                billing_note,
+                np.where(estimated, "billings_missing_commission_payout_estimated", ""),
+            ]
+        )
+        out["errors"] = np.where(mismatch, "subtotal_mismatch_orders_vs_billings", "")
+        rows = normalized_rows(out, Platforms.FOODJA.upper())
 
-            notes = []
-            errors = []
-            period = row.get("Period", "")
-            check_date = row.get("Check Date", "")
-            if period:
-                notes.append(f"period={period}")
-            if check_date:
-                notes.append(f"check_date={check_date}")
-
-            payout = ""
-            processing_fee = "0.00"
-            bill = billings.get(order_id)
-            if bill is not None:
-                bill_subtotal = normalize_money(bill.get("subtotal", ""))
-                bill_payout = normalize_money(bill.get("payout", ""))
-                # Use billings values first; note mismatches with orders values.
-                if bill_subtotal:
-                    if subtotal and bill_subtotal != subtotal:
-                        notes.append(f"subtotal_mismatch orders={subtotal} billings={bill_subtotal}")
-                        errors.append("subtotal_mismatch_orders_vs_billings")
-                    subtotal = bill_subtotal
-                    try:
-                        subtotal_dec = Decimal(subtotal)
-                    except InvalidOperation:
-                        subtotal_dec = None
-                if bill_payout:
-                    payout = bill_payout
-                    try:
-                        if subtotal_dec is not None:
-                            commission_fee = str((Decimal(payout) - subtotal_dec).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
-                    except InvalidOperation:
-                        pass
-                notes.append("billings_override")
-            else:
-                notes.append("billings_missing_receivable")
-                notes.append("billings_missing_order_record")
-
-            if not payout and subtotal_dec is not None and commission_fee:
-                try:
-                    payout = str(
-                        (
-                            subtotal_dec
-                            + Decimal(commission_fee)
-                            + Decimal(processing_fee or "0")
-                        ).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-                    )
-                    notes.append("billings_missing_commission_payout_estimated")
-                except InvalidOperation:
-                    payout = ""
-            rows.append(
-                build_normalized_row(
-                    Platforms.FOODJA.upper(),
-                    order_id=order_id,
-                    provider=normalize_provider(location),
-                    restaurant_name=location,
-                    order_datetime=normalize_date(row.get("Delivery Date", "")),
-                    order_type=OrderTypes.PICKUP,
-                    payment_type=PaymentTypes.CREDIT,
-                    subtotal=subtotal,
-                    tax="",
-                    tax_withheld=tax_withheld,
-                    tip="",
-                    delivery_fee="",
-                    total=subtotal,
-                    processing_fee=processing_fee,
-                    commission_fee=commission_fee,
-                    payout=payout,
-                    errors=" | ".join(errors),
-                    notes=" | ".join(notes),
-                )
-            )
         for order_id, bill in billings.items():
             if order_id in seen_order_ids:
                 continue
@@ -1,19 +1,17 @@
 #!/usr/bin/env python3
 import argparse
-import datetime as dt
-import io
-import mailbox
-import os
 import re
-from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from decimal import Decimal, InvalidOperation
 from email.utils import parsedate_to_datetime
 from typing import Dict, List
 
-import pandas as pd
-import pdfplumber
-
 from orders_analytics.utils.constants import raw_path, takeout_path
+from orders_analytics.utils.money import allocate_cents, format_cents, parse_cents
 from orders_analytics.utils.normalize import normalize_money
+from orders_analytics.utils.mbox_index import MboxFilter, commit_mbox, iter_mbox
+from orders_analytics.utils.pdf_cache import pdf_text
+from orders_analytics.utils.raw_store import fill_blanks, upsert_rows
+from orders_analytics.utils.profiling import profiled
 
 RAW_COLUMNS = [
     "order_id",
@@ -31,6 +29,8 @@ RAW_COLUMNS = [
     "added_at",
 ]
 
+PREFILTER = MboxFilter(content_types=("application/pdf",))
+
 
 def allocate_fee(total_raw: str, rows: List[Dict[str, str]], column: str) -> None:
     if not total_raw or not rows:
@@ -42,36 +42,16 @@ def allocate_fee(total_raw: str, rows: List[Dict[str, str]], column: str) -> Non
     if len(rows) == 1:
         rows[0][column] = str(total)
         return
-    try:
-        subtotal_sum = sum(Decimal(row.get("subtotal") or "0") for row in rows)
-    except InvalidOperation:
-        subtotal_sum = Decimal("0")
-    if subtotal_sum == 0:
+    subtotals = [parse_cents(row.get("subtotal") or "0") for row in rows]
+    if None in subtotals or sum(subtotals) == 0:
         return
-    allocs: List[Decimal] = []
-    for row in rows:
-        try:
-            subtotal = Decimal(row.get("subtotal") or "0")
-        except InvalidOperation:
-            subtotal = Decimal("0")
-        share = (subtotal / subtotal_sum) * total
-        allocs.append(share.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
-    remainder = (total - sum(allocs)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-    cent = Decimal("0.01")
-    cents = int((abs(remainder) / cent).to_integral_value(rounding=ROUND_HALF_UP))
-    step = cent if remainder > 0 else -cent
-    for i in range(cents):
-        allocs[i % len(allocs)] = (allocs[i % len(allocs)] + step).quantize(
-            cent, rounding=ROUND_HALF_UP
-        )
-    for row, alloc in zip(rows, allocs):
-        row[column] = str(alloc)
+    for row, cents in zip(rows, allocate_cents(parse_cents(total) or 0, subtotals)):
+        row[column] = format_cents(int(cents))
 
 
 def parse_pdf(payload: bytes) -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    with pdfplumber.open(io.BytesIO(payload)) as pdf:
-        text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+    text = pdf_text(payload)
 
     statement_id = ""
     match = re.search(r"Settlement\s*#\s*(\d+)", text, re.IGNORECASE)
@@ -146,10 +126,9 @@ def parse_pdf(payload: bytes) -> List[Dict[str, str]]:
     return rows
 
 
-def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
+def parse_mbox(mbox_path: str, consumer: str = "") -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
+    for msg in iter_mbox(mbox_path, consumer, PREFILTER):
         email_date = ""
         if msg.get("Date"):
             try:
@@ -174,51 +153,14 @@ def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
 
 
 def upsert_raw(existing_path: str, new_rows: List[Dict[str, str]]) -> int:
-    now = dt.datetime.now().isoformat()
-    if os.path.exists(existing_path):
-        existing_df = pd.read_csv(existing_path, dtype=str).fillna("")
-        existing_rows = existing_df.to_dict("records")
-    else:
-        existing_rows = []
-
-    existing_map = {str(row.get("order_id", "")).strip(): row for row in existing_rows}
-    updated = 0
-    for row in new_rows:
-        order_id = str(row.get("order_id", "")).strip()
-        if not order_id:
-            continue
-        current = existing_map.get(order_id)
-        if current is None:
-            row["added_at"] = now
-            existing_map[order_id] = row
-            updated += 1
-            continue
-        changed = False
-        for col in RAW_COLUMNS:
-            if col == "added_at":
-                continue
-            old_val = str(current.get(col, "") or "")
-            new_val = str(row.get(col, "") or "")
-            if old_val:
-                continue
-            if new_val and old_val != new_val:
-                current[col] = new_val
-                changed = True
-        if changed:
-            current["added_at"] = now
-            updated += 1
-
-    final_rows = list(existing_map.values())
-    for row in final_rows:
-        row.setdefault("added_at", now)
-    os.makedirs(os.path.dirname(existing_path), exist_ok=True)
-    pd.DataFrame(final_rows).reindex(columns=RAW_COLUMNS).to_csv(existing_path, index=False)
-    return updated
+    return upsert_rows(existing_path, new_rows, RAW_COLUMNS, merge=fill_blanks)
 
 
-def run(mbox: str, out: str) -> int:
-    rows = parse_mbox(mbox)
+@profiled
+def run(mbox: str, out: str, incremental: bool = True) -> int:
+    rows = parse_mbox(mbox, consumer=out if incremental else "")
     updated = upsert_raw(out, rows)
+    commit_mbox(mbox, out)
     print(f"Upserted {updated} billing row(s) into {out}")
     return updated
 
@@ -1,20 +1,17 @@
 #!/usr/bin/env python3
 import argparse
-import datetime as dt
-import io
-import mailbox
-import os
 import re
 from email.utils import parsedate_to_datetime
 from typing import Dict, List
 
-import pandas as pd
-import pdfplumber
-
 from orders_analytics.utils.constants import raw_path, takeout_path
 from orders_analytics.utils.normalize import normalize_datetime, normalize_money
 from orders_analytics.utils.providers import normalize_provider
 from orders_analytics.utils.order_types import OrderTypes
+from orders_analytics.utils.mbox_index import MboxFilter, commit_mbox, iter_mbox
+from orders_analytics.utils.pdf_cache import pdf_text
+from orders_analytics.utils.raw_store import upsert_rows
+from orders_analytics.utils.profiling import profiled
 
 RAW_COLUMNS = [
     "order_id",
@@ -40,10 +37,11 @@ RAW_COLUMNS = [
     "added_at",
 ]
 
+PREFILTER = MboxFilter(content_types=("application/octet-stream",))
+
 
 def parse_pdf(payload: bytes) -> Dict[str, str]:
-    with pdfplumber.open(io.BytesIO(payload)) as pdf:
-        text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+    text = pdf_text(payload)
 
     order_id = ""
     match = re.search(r"INVOICE\s*#\s*(\d+)", text, re.IGNORECASE)
@@ -117,10 +115,9 @@ def parse_pdf(payload: bytes) -> Dict[str, str]:
     }
 
 
-def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
+def parse_mbox(mbox_path: str, consumer: str = "") -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
+    for msg in iter_mbox(mbox_path, consumer, PREFILTER):
         email_date = ""
         if msg.get("Date"):
             try:
@@ -145,49 +142,14 @@ def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
 
 
 def upsert_raw(existing_path: str, new_rows: List[Dict[str, str]]) -> int:
-    now = dt.datetime.now().isoformat()
-    if os.path.exists(existing_path):
-        existing_df = pd.read_csv(existing_path, dtype=str).fillna("")
-        existing_rows = existing_df.to_dict("records")
-    else:
-        existing_rows = []
-
-    existing_map = {str(row.get("order_id", "")).strip(): row for row in existing_rows}
-    updated = 0
-    for row in new_rows:
-        order_id = str(row.get("order_id", "")).strip()
-        if not order_id:
-            continue
-        current = existing_map.get(order_id)
-        if current is None:
-            row["added_at"] = now
-            existing_map[order_id] = row
-            updated += 1
-            continue
-        changed = False
-        for col in RAW_COLUMNS:
-            if col == "added_at":
-                continue
-            old_val = str(current.get(col, "") or "")
-            new_val = str(row.get(col, "") or "")
-            if old_val != new_val:
-                current[col] = new_val
-                changed = True
-        if changed:
-            current["added_at"] = now
-            updated += 1
-
-    final_rows = list(existing_map.values())
-    for row in final_rows:
-        row.setdefault("added_at", now)
-    os.makedirs(os.path.dirname(existing_path), exist_ok=True)
-    pd.DataFrame(final_rows).reindex(columns=RAW_COLUMNS).to_csv(existing_path, index=False)
-    return updated
+    return upsert_rows(existing_path, new_rows, RAW_COLUMNS)
 
 
-def run(mbox: str, out: str) -> int:
-    rows = parse_mbox(mbox)
+@profiled
+def run(mbox: str, out: str, incremental: bool = True) -> int:
+    rows = parse_mbox(mbox, consumer=out if incremental else "")
     updated = upsert_raw(out, rows)
+    commit_mbox(mbox, out)
     print(f"Upserted {updated} order row(s) into {out}")
     return updated
 
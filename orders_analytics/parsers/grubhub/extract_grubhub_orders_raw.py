@@ -8,6 +8,7 @@ import pandas as pd
 
 from orders_analytics.utils.constants import raw_path, takeout_path
 from orders_analytics.utils.grubhub_adjustments import compute_adjustment_total
+from orders_analytics.utils.profiling import profiled
 
 
 NUMERIC_COLUMNS = [
@@ -107,6 +108,7 @@ def _load_inputs(input_path: str) -> pd.DataFrame:
     return df
 
 
+@profiled
 def run(input_path: str, out_path: str, deduped_path: str) -> int:
     now = dt.datetime.now().isoformat()
     df = _load_inputs(input_path)
@@ -8,6 +8,7 @@ import os
 
 from orders_analytics.utils.base_parser import BaseParser
 from orders_analytics.utils.constants import normalized_path, raw_path, takeout_path
+from orders_analytics.utils.datetimes import parse_loose_datetime
 from orders_analytics.utils.grubhub_adjustments import compute_adjustment_total
 from orders_analytics.utils.google_sheets import download_sheet_entry
 from orders_analytics.utils.google_sheets_registry import SHEETS
@@ -75,8 +76,8 @@ def _build_datetime(date_str: str, time_str: str) -> str:
     # Drop trailing timezone abbreviations like PDT/PST to avoid parse warnings.
     time_clean = re.sub(r"\s+(PDT|PST)$", "", time_clean)
     combined = f"{date_clean} {time_clean}".strip()
-    parsed = pd.to_datetime(combined, errors="coerce")
-    if pd.isna(parsed):
+    parsed = parse_loose_datetime(combined)
+    if parsed is None:
         return ""
     return parsed.strftime("%Y-%m-%dT%H:%M:%S")
 
@@ -396,8 +397,8 @@ class GrubhubOrdersParser(BaseParser):
                     value = str(r.get("order_datetime", "")).strip()
                     if not value:
                         continue
-                    parsed = pd.to_datetime(value, errors="coerce")
-                    if pd.notna(parsed):
+                    parsed = parse_loose_datetime(value)
+                    if parsed is not None:
                         parsed_dates.append(parsed)
                 if parsed_dates:
                     merged["order_datetime"] = min(parsed_dates).isoformat()
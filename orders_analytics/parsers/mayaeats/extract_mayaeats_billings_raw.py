@@ -1,17 +1,17 @@
 #!/usr/bin/env python3
 import argparse
 import datetime as dt
-import io
-import mailbox
 import os
 import re
 from email.utils import parsedate_to_datetime
 from typing import Dict, List, Optional
 
 import pandas as pd
-import pdfplumber
 
 from orders_analytics.utils.constants import raw_path, takeout_path
+from orders_analytics.utils.mbox_index import iter_mbox
+from orders_analytics.utils.pdf_cache import pdf_page_tables, pdf_text
+from orders_analytics.utils.profiling import profiled
 
 
 def _clean(value: object) -> str:
@@ -51,38 +51,36 @@ def _parse_pdf_tables(
     email_date: str,
 ) -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    with pdfplumber.open(io.BytesIO(payload)) as pdf:
-        for page_number, page in enumerate(pdf.pages, start=1):
-            tables = page.extract_tables() or []
-            for table in tables:
-                if not table:
+    for page_number, tables in enumerate(pdf_page_tables(payload), start=1):
+        for table in tables:
+            if not table:
+                continue
+            header_idx: Optional[int] = None
+            for idx, table_row in enumerate(table):
+                if _is_header_row(table_row):
+                    header_idx = idx
+                    break
+            if header_idx is None:
+                continue
+            headers = _header_columns(table[header_idx])
+            for raw_row in table[header_idx + 1 :]:
+                values = [_clean(cell) for cell in raw_row]
+                if not any(values):
+                    continue
+                if values and values[0].lower().startswith("grand total"):
+                    continue
+                if any(cell.lower().startswith("grand total") for cell in values):
                     continue
-                header_idx: Optional[int] = None
-                for idx, table_row in enumerate(table):
-                    if _is_header_row(table_row):
-                        header_idx = idx
-                        break
-                if header_idx is None:
+                padded = values + [""] * max(0, len(headers) - len(values))
+                record = {headers[i]: padded[i] if i < len(padded) else "" for i in range(len(headers))}
+                order_id = _extract_order_id(record)
+                if not order_id:
                     continue
-                headers = _header_columns(table[header_idx])
-                for raw_row in table[header_idx + 1 :]:
-                    values = [_clean(cell) for cell in raw_row]
-                    if not any(values):
-                        continue
-                    if values and values[0].lower().startswith("grand total"):
-                        continue
-                    if any(cell.lower().startswith("grand total") for cell in values):
-                        continue
-                    padded = values + [""] * max(0, len(headers) - len(values))
-                    record = {headers[i]: padded[i] if i < len(padded) else "" for i in range(len(headers))}
-                    order_id = _extract_order_id(record)
-                    if not order_id:
-                        continue
-                    record["provider"] = "AROMA"
-                    record["source_file"] = filename
-                    record["source_sheet"] = f"pdf_page_{page_number}"
-                    record["email_date"] = email_date
-                    rows.append(record)
+                record["provider"] = "AROMA"
+                record["source_file"] = filename
+                record["source_sheet"] = f"pdf_page_{page_number}"
+                record["email_date"] = email_date
+                rows.append(record)
     return rows
 
 
@@ -92,8 +90,7 @@ def _parse_pdf_text_blocks(
     email_date: str,
 ) -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    with pdfplumber.open(io.BytesIO(payload)) as pdf:
-        text = "\n".join((page.extract_text() or "") for page in pdf.pages)
+    text = pdf_text(payload)
 
     block_pattern = re.compile(r"OrderId\s*:\s*(.+?)(?=\nOrderId\s*:|\Z)", re.IGNORECASE | re.DOTALL)
     for match in block_pattern.finditer(text):
@@ -147,8 +144,7 @@ def _parse_pdf_text_blocks(
 
 def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
+    for msg in iter_mbox(mbox_path):
         email_date = ""
         if msg.get("Date"):
             try:
@@ -191,6 +187,7 @@ def write_raw(path: str, rows: List[Dict[str, str]]) -> int:
     return len(rows)
 
 
+@profiled
 def run(mbox_path: str, out_path: str) -> int:
     rows = parse_mbox(mbox_path)
     count = write_raw(out_path, rows)
@@ -15,6 +15,7 @@ from orders_analytics.utils.payment_types import PaymentTypes
 from orders_analytics.utils.platforms import Platforms
 from orders_analytics.utils.providers import Providers
 from orders_analytics.utils.schema import build_normalized_row, compute_expected_payout
+from orders_analytics.utils.profiling import profiled
 
 
 ORDER_ID_COLUMNS = ["Order Id", "Order ID", "OrderId"]
@@ -287,6 +288,7 @@ class MayaeatsNormalizer(BaseParser):
         return normalize_rows(rows)
 
 
+@profiled
 def run(
     billings_raw_path: str,
     out_path: str,
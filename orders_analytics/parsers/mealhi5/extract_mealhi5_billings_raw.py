@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 import argparse
 import datetime as dt
-import mailbox
 import os
 import re
 from pathlib import Path
@@ -9,6 +8,8 @@ from typing import Dict, List
 
 from orders_analytics.utils.constants import raw_path, takeout_path
 from orders_analytics.utils.normalize import normalize_datetime, normalize_money
+from orders_analytics.utils.mbox_index import iter_mbox
+from orders_analytics.utils.profiling import profiled
 
 CHECK_RE = re.compile(r"check for \$([0-9,.]+)", re.IGNORECASE)
 PAYMENT_RE = re.compile(r"sent a payment\s*for\s*\$([0-9,.]+)", re.IGNORECASE)
@@ -23,8 +24,7 @@ def extract_amount(text: str) -> str:
 
 def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
+    for msg in iter_mbox(mbox_path):
         body_text = ""
         for part in msg.walk():
             if part.get_content_maintype() == "multipart":
@@ -52,6 +52,7 @@ def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
     return rows
 
 
+@profiled
 def run(mbox_path: str, out_path: str) -> int:
     rows = parse_mbox(mbox_path)
     if not rows:
@@ -1,18 +1,17 @@
 #!/usr/bin/env python3
 import argparse
 import datetime as dt
-import io
-import mailbox
 import os
 import re
 from pathlib import Path
 from typing import Dict, List, Tuple
 
-import pdfplumber
-
 from orders_analytics.utils.constants import raw_path, takeout_path
 from orders_analytics.utils.normalize import normalize_datetime, normalize_money
 from orders_analytics.utils.providers import normalize_provider
+from orders_analytics.utils.mbox_index import iter_mbox
+from orders_analytics.utils.pdf_cache import pdf_text
+from orders_analytics.utils.profiling import profiled
 
 
 ORDER_ID_RE = re.compile(r"Order (?:No|#)\s*:\s*([0-9]+)", re.IGNORECASE)
@@ -111,8 +110,7 @@ def extract_items_block(text: str) -> Tuple[str, str]:
 
 
 def parse_pdf(payload: bytes) -> Dict[str, str]:
-    with pdfplumber.open(io.BytesIO(payload)) as pdf:
-        text = "\n".join((page.extract_text() or "") for page in pdf.pages)
+    text = pdf_text(payload)
 
     lines = [line.strip() for line in text.splitlines() if line.strip()]
 
@@ -177,8 +175,7 @@ def parse_pdf(payload: bytes) -> Dict[str, str]:
 
 def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
+    for msg in iter_mbox(mbox_path):
         for part in msg.walk():
             if part.get_content_type() == "application/pdf":
                 payload = part.get_payload(decode=True)
@@ -192,6 +189,7 @@ def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
     return rows
 
 
+@profiled
 def run(mbox_path: str, out_path: str) -> int:
     rows = parse_mbox(mbox_path)
     if not rows:
@@ -12,6 +12,7 @@ from orders_analytics.utils.normalize import normalize_money
 from orders_analytics.utils.validation import normalize_order_type, normalize_payment_type
 from orders_analytics.utils.platforms import Platforms
 from orders_analytics.utils.schema import build_normalized_row
+from orders_analytics.utils.profiling import profiled
 
 
 def load_raw(path: str) -> pd.DataFrame:
@@ -108,6 +109,7 @@ class MenufyNormalizer(BaseParser):
         return normalize_rows(inputs.to_dict("records"))
 
 
+@profiled
 def run(orders_raw_path: str, out_path: str, reset_errors: bool = False) -> int:
     parser = MenufyNormalizer(
         input_path=orders_raw_path,
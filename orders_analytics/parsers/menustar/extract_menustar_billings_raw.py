@@ -3,7 +3,6 @@ import argparse
 import csv
 import datetime as dt
 import io
-import mailbox
 import os
 import re
 from email.utils import parsedate_to_datetime
@@ -15,6 +14,9 @@ import pandas as pd
 from orders_analytics.utils.constants import raw_path, takeout_path
 from orders_analytics.utils.providers import normalize_provider
 from orders_analytics.utils.normalize import normalize_money
+from orders_analytics.utils.mbox_index import commit_mbox, iter_mbox
+from orders_analytics.utils.xlsx_reader import cached_sheets, sheet_frame
+from orders_analytics.utils.profiling import profiled
 
 RAW_COLUMNS = [
     "order_id",
@@ -188,20 +190,22 @@ def read_attachment_rows(
         return parse_csv_rows(text, provider, filename, statement_email_date)
     if lower.endswith(".xlsx"):
         try:
-            df = pd.read_excel(io.BytesIO(payload))
+            sheets = cached_sheets(payload, sheets=(0,))
         except ImportError:
             print("Missing openpyxl; skipping xlsx attachment:", filename)
             return []
-        text = df.to_csv(index=False)
+        if sheets is None:
+            print("Unreadable xlsx attachment; skipping:", filename)
+            return []
+        text = sheet_frame(next(iter(sheets.values()), [])).to_csv(index=False)
         return parse_csv_rows(text, provider, filename, statement_email_date)
     return []
 
 
-def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
+def parse_mbox(mbox_path: str, consumer: str = "") -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
     skipped: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
+    for msg in iter_mbox(mbox_path, consumer):
         msg_date = msg.get("date", "")
         statement_email_date = ""
         if msg_date:
@@ -333,9 +337,11 @@ def upsert_raw(existing_path: str, new_rows: List[Dict[str, str]]) -> int:
     return updated
 
 
-def run(mbox_path: str, out_path: str) -> int:
-    rows = parse_mbox(mbox_path)
+@profiled
+def run(mbox_path: str, out_path: str, incremental: bool = True) -> int:
+    rows = parse_mbox(mbox_path, consumer=out_path if incremental else "")
     updated = upsert_raw(out_path, rows)
+    commit_mbox(mbox_path, out_path)
     print(f"Upserted {updated} billing row(s) into {out_path}")
     return updated
 
@@ -1,17 +1,19 @@
 #!/usr/bin/env python3
 import argparse
 import datetime as dt
-import mailbox
 import os
 import re
 from email.utils import parsedate_to_datetime
+from functools import partial
 from typing import Dict, List
 
-import pandas as pd
-
 from orders_analytics.utils.constants import raw_path, takeout_path
 from orders_analytics.utils.providers import normalize_provider
 from orders_analytics.utils.order_types import OrderTypes
+from orders_analytics.utils.mbox_index import MboxFilter, commit_mbox, map_mbox
+from orders_analytics.utils.html_cells import HtmlDoc
+from orders_analytics.utils.raw_store import upsert_rows
+from orders_analytics.utils.profiling import profiled
 
 RAW_COLUMNS = [
     "order_id",
@@ -37,11 +39,11 @@ RAW_COLUMNS = [
     "added_at",
 ]
 
+PREFILTER = MboxFilter(content_types=("text/html",))
+
 
 def strip_html(html: str) -> str:
-    text = re.sub(r"<[^>]+>", "\n", html or "")
-    text = re.sub(r"\n+", "\n", text)
-    return text.strip()
+    return HtmlDoc(html).text
 
 
 def next_nonempty(lines: List[str], start: int) -> str:
@@ -97,8 +99,9 @@ def parse_order_type(text: str) -> str:
 
 
 def parse_order(html: str, subject: str, msg_date: str) -> Dict[str, str]:
-    text = strip_html(html)
-    lines = [l for l in text.splitlines()]
+    text = HtmlDoc(html).text
+    lines = text.splitlines()
+    stripped = [l.strip() for l in lines]
     order_id = ""
     order_match = re.search(r"Order\s*Number:\s*([A-Z0-9_\-]+)", text, re.IGNORECASE)
     if order_match:
@@ -109,7 +112,7 @@ def parse_order(html: str, subject: str, msg_date: str) -> Dict[str, str]:
             order_id = subj_match.group(1).strip()
 
     restaurant = ""
-    for line in text.splitlines():
+    for line in lines:
         if "Pizza" in line or "Pasta" in line:
             restaurant = line.strip()
             if restaurant:
@@ -142,15 +145,15 @@ def parse_order(html: str, subject: str, msg_date: str) -> Dict[str, str]:
     items = []
     item_count = 0
     in_items = False
-    for idx, line in enumerate(lines):
-        if line.strip() == "Qty":
+    for idx, line in enumerate(stripped):
+        if line == "Qty":
             in_items = True
             continue
         if in_items:
-            if line.strip().lower().startswith(("subtotal", "tax", "total")):
+            if line.lower().startswith(("subtotal", "tax", "total")):
                 break
-            qty_only = re.match(r"^(\d+)x$", line.strip())
-            qty_name = re.match(r"^(\d+)x\s*(.+)$", line.strip())
+            qty_only = re.match(r"^(\d+)x$", line)
+            qty_name = re.match(r"^(\d+)x\s*(.+)$", line)
             if qty_only:
                 qty = int(qty_only.group(1))
                 name = next_nonempty(lines, idx + 1)
@@ -170,22 +173,25 @@ def parse_order(html: str, subject: str, msg_date: str) -> Dict[str, str]:
     delivery_fee = ""
     tip = ""
     discount = ""
-    for i, line in enumerate(lines):
-        if line.strip().lower() == "subtotal:" and i + 1 < len(text.splitlines()):
+    for i, line in enumerate(stripped):
+        if i + 1 >= len(lines):
+            break
+        label = line.lower()
+        if label == "subtotal:":
             subtotal = next_nonempty(lines, i + 1).replace("$", "").replace(",", "")
-        if line.strip().lower() == "tax:" and i + 1 < len(text.splitlines()):
+        elif label == "tax:":
             tax = next_nonempty(lines, i + 1).replace("$", "").replace(",", "")
-        if line.strip().lower() == "delivery:" and i + 1 < len(text.splitlines()):
+        elif label == "delivery:":
             delivery_fee = next_nonempty(lines, i + 1).replace("$", "").replace(",", "")
-        if line.strip().lower() == "tip:" and i + 1 < len(text.splitlines()):
+        elif label == "tip:":
             tip = next_nonempty(lines, i + 1).replace("$", "").replace(",", "")
-        if line.strip().lower() == "discount:" and i + 1 < len(text.splitlines()):
+        elif label == "discount:":
             raw_discount = next_nonempty(lines, i + 1).replace("$", "").replace(",", "").strip()
             if raw_discount:
                 discount = raw_discount
                 if not discount.startswith("-"):
                     discount = f"-{discount}"
-        if line.strip().lower() == "total:" and i + 1 < len(text.splitlines()):
+        elif label == "total:":
             total = next_nonempty(lines, i + 1).replace("$", "").replace(",", "")
 
     count_match = re.search(r"End of Order - (\d+) Items? Total", text, re.IGNORECASE)
@@ -197,7 +203,6 @@ def parse_order(html: str, subject: str, msg_date: str) -> Dict[str, str]:
 
     # Delivery Address block
     address = ""
-    stripped = [l.strip() for l in lines]
     if "Delivery Address:" in stripped:
         idx = stripped.index("Delivery Address:")
         addr_lines = []
@@ -239,78 +244,48 @@ def parse_order(html: str, subject: str, msg_date: str) -> Dict[str, str]:
     }
 
 
-def parse_mbox(mbox_path: str) -> List[Dict[str, str]]:
-    rows: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
-        email_date = ""
-        if msg.get("Date"):
-            try:
-                email_date = parsedate_to_datetime(msg.get("Date")).isoformat()
-            except (TypeError, ValueError):
-                email_date = ""
-        subject = msg.get("subject", "")
-        msg_date = msg.get("date", "")
-        html = ""
-        if msg.is_multipart():
-            for part in msg.walk():
-                if part.get_content_type() == "text/html":
-                    payload = part.get_payload(decode=True) or b""
-                    html = payload.decode(errors="ignore")
-                    break
-        if html.strip():
-            row = parse_order(html, subject, msg_date)
-            if row.get("order_id"):
-                row["source_file"] = os.path.basename(mbox_path)
-                row["email_date"] = email_date
-                rows.append(row)
-    return rows
+def parse_order_message(msg, source_file: str) -> List[Dict[str, str]]:
+    email_date = ""
+    if msg.get("Date"):
+        try:
+            email_date = parsedate_to_datetime(msg.get("Date")).isoformat()
+        except (TypeError, ValueError):
+            email_date = ""
+    subject = msg.get("subject", "")
+    msg_date = msg.get("date", "")
+    html = ""
+    if msg.is_multipart():
+        for part in msg.walk():
+            if part.get_content_type() == "text/html":
+                payload = part.get_payload(decode=True) or b""
+                html = payload.decode(errors="ignore")
+                break
+    if not html.strip():
+        return []
+    row = parse_order(html, subject, msg_date)
+    if not row.get("order_id"):
+        return []
+    row["source_file"] = source_file
+    row["email_date"] = email_date
+    return [row]
+
+
+def parse_mbox(mbox_path: str, consumer: str = "", workers: int = 1) -> List[Dict[str, str]]:
+    parse_message = partial(parse_order_message, source_file=os.path.basename(mbox_path))
+    return map_mbox(
+        mbox_path, parse_message, consumer=consumer, workers=workers, prefilter=PREFILTER
+    )
 
 
 def upsert_raw(existing_path: str, new_rows: List[Dict[str, str]]) -> int:
-    now = dt.datetime.now().isoformat()
-    if os.path.exists(existing_path):
-        existing_df = pd.read_csv(existing_path, dtype=str).fillna("")
-        existing_rows = existing_df.to_dict("records")
-    else:
-        existing_rows = []
-
-    existing_map = {str(row.get("order_id", "")).strip(): row for row in existing_rows}
-    updated = 0
-    for row in new_rows:
-        order_id = str(row.get("order_id", "")).strip()
-        if not order_id:
-            continue
-        current = existing_map.get(order_id)
-        if current is None:
-            row["added_at"] = now
-            existing_map[order_id] = row
-            updated += 1
-            continue
-        changed = False
-        for col in RAW_COLUMNS:
-            if col == "added_at":
-                continue
-            old_val = str(current.get(col, "") or "")
-            new_val = str(row.get(col, "") or "")
-            if old_val != new_val:
-                current[col] = new_val
-                changed = True
-        if changed:
-            current["added_at"] = now
-            updated += 1
-
-    final_rows = list(existing_map.values())
-    for row in final_rows:
-        row.setdefault("added_at", now)
-    os.makedirs(os.path.dirname(existing_path), exist_ok=True)
-    pd.DataFrame(final_rows).reindex(columns=RAW_COLUMNS).to_csv(existing_path, index=False)
-    return updated
+    return upsert_rows(existing_path, new_rows, RAW_COLUMNS)
 
 
-def run(mbox_path: str, out_path: str) -> int:
-    rows = parse_mbox(mbox_path)
+@profiled
+def run(mbox_path: str, out_path: str, incremental: bool = True, workers: int = 1) -> int:
+    rows = parse_mbox(mbox_path, consumer=out_path if incremental else "", workers=workers)
     updated = upsert_raw(out_path, rows)
+    commit_mbox(mbox_path, out_path)
     print(f"Upserted {updated} order row(s) into {out_path}")
     return updated
 
@@ -10,7 +10,9 @@ from typing import Dict, List, Tuple, Optional
 import pandas as pd
 
 from orders_analytics.utils.base_parser import BaseParser
+from orders_analytics.utils.billing_match import KeySpec, match_billings, order_candidates
 from orders_analytics.utils.constants import normalized_path, raw_path
+from orders_analytics.utils.money import allocate_groups, parse_cents
 from orders_analytics.utils.normalize import (
     normalize_address,
     normalize_order_type,
@@ -19,6 +21,7 @@ from orders_analytics.utils.normalize import (
 from orders_analytics.utils.providers import Providers, normalize_provider, normalize_datetime
 from orders_analytics.utils.platforms import Platforms
 from orders_analytics.utils.schema import build_normalized_row
+from orders_analytics.utils.profiling import profiled
 
 
 
@@ -147,66 +150,39 @@ def format_fee(value: Decimal) -> str:
     return str(quantized)
 
 
+AMOUNT_KEY_FIELDS = ("subtotal", "tax", "delivery_fee", "tip", "total")
+IDENTITY_KEY = KeySpec(
+    "identity", ("provider", "order_datetime", "order_type", "payment_type") + AMOUNT_KEY_FIELDS
+)
+LOOSE_KEY = KeySpec("loose", ("provider", "order_datetime") + AMOUNT_KEY_FIELDS)
+DAY_AMOUNT_KEY = KeySpec(
+    "day_amount", ("provider", "order_datetime") + AMOUNT_KEY_FIELDS, {"order_datetime": date_key}
+)
+SYNTHETIC_SUPPRESS_KEY = KeySpec(
+    "synthetic_suppress",
+    ("provider", "order_datetime", "order_type", "payment_type")
+    + AMOUNT_KEY_FIELDS
+    + ("processing_fee", "commission_fee"),
+    {"order_datetime": date_key},
+)
+# Billing -> order_id resolution, strongest key first.
+MATCH_LEVELS = (IDENTITY_KEY, LOOSE_KEY, DAY_AMOUNT_KEY)
+
+
 def billing_identity_key(row: Dict[str, str]) -> str:
-    return "|".join(
-        [
-            str(row.get("provider", "")).strip(),
-            str(row.get("order_datetime", "")).strip(),
-            str(row.get("order_type", "")).strip(),
-            str(row.get("payment_type", "")).strip(),
-            str(row.get("subtotal", "")).strip(),
-            str(row.get("tax", "")).strip(),
-            str(row.get("delivery_fee", "")).strip(),
-            str(row.get("tip", "")).strip(),
-            str(row.get("total", "")).strip(),
-        ]
-    )
+    return IDENTITY_KEY.row_key(row)
 
 
 def billing_loose_key(row: Dict[str, str]) -> str:
-    return "|".join(
-        [
-            str(row.get("provider", "")).strip(),
-            str(row.get("order_datetime", "")).strip(),
-            str(row.get("subtotal", "")).strip(),
-            str(row.get("tax", "")).strip(),
-            str(row.get("delivery_fee", "")).strip(),
-            str(row.get("tip", "")).strip(),
-            str(row.get("total", "")).strip(),
-        ]
-    )
+    return LOOSE_KEY.row_key(row)
 
 
 def billing_day_amount_key(row: Dict[str, str]) -> str:
-    return "|".join(
-        [
-            str(row.get("provider", "")).strip(),
-            date_key(str(row.get("order_datetime", "")).strip()),
-            str(row.get("subtotal", "")).strip(),
-            str(row.get("tax", "")).strip(),
-            str(row.get("delivery_fee", "")).strip(),
-            str(row.get("tip", "")).strip(),
-            str(row.get("total", "")).strip(),
-        ]
-    )
+    return DAY_AMOUNT_KEY.row_key(row)
 
 
 def billing_synthetic_suppress_key(row: Dict[str, str]) -> str:
-    return "|".join(
-        [
-            str(row.get("provider", "")).strip(),
-            date_key(str(row.get("order_datetime", "")).strip()),
-            str(row.get("order_type", "")).strip(),
-            str(row.get("payment_type", "")).strip(),
-            str(row.get("subtotal", "")).strip(),
-            str(row.get("tax", "")).strip(),
-            str(row.get("delivery_fee", "")).strip(),
-            str(row.get("tip", "")).strip(),
-            str(row.get("total", "")).strip(),
-            str(row.get("processing_fee", "")).strip(),
-            str(row.get("commission_fee", "")).strip(),
-        ]
-    )
+    return SYNTHETIC_SUPPRESS_KEY.row_key(row)
 
 
 def canonical_statement_file(value: str) -> str:
@@ -354,54 +330,39 @@ def allocate_commission(
         key = (row.get("provider", ""), row.get("statement_source_file", ""))
         grouped.setdefault(key, []).append(row)
 
-    for key, rows in grouped.items():
-        fee_raw = rows[0].get("statement_menustar_fees", "")
-        if not fee_raw:
-            continue
-        try:
-            fee_total = Decimal(fee_raw)
-        except InvalidOperation:
-            continue
-        try:
-            subtotal_sum = sum(
-                Decimal(r.get("subtotal") or "0") for r in rows
-            )
-        except InvalidOperation:
+    # Every statement's fee in one batched allocation (one group per statement).
+    alloc_rows: List[Dict[str, str]] = []
+    groups: List[int] = []
+    weights: List[int] = []
+    targets: List[int] = []
+    for rows in grouped.values():
+        fee_total = parse_cents(rows[0].get("statement_menustar_fees", ""))
+        if fee_total is None:
             continue
-        if subtotal_sum == 0:
+        subtotals = [parse_cents(r.get("subtotal") or "0") for r in rows]
+        if None in subtotals or sum(subtotals) == 0:
             continue
-        allocs: List[Decimal] = []
-        for row in rows:
-            try:
-                subtotal = Decimal(row.get("subtotal") or "0")
-            except InvalidOperation:
-                subtotal = Decimal("0")
-            share = (subtotal / subtotal_sum) * fee_total
-            allocs.append(share.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
-        remainder = (fee_total - sum(allocs)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-        cent = Decimal("0.01")
-        cents = int((abs(remainder) / cent).to_integral_value(rounding=ROUND_HALF_UP))
-        step = cent if remainder > 0 else -cent
-        for i in range(cents):
-            allocs[i % len(allocs)] = (allocs[i % len(allocs)] + step).quantize(
-                cent, rounding=ROUND_HALF_UP
-            )
-        for row, alloc in zip(rows, allocs):
-            payment_type = normalize_payment_type(str(row.get("payment_type", "")))
-            if payment_type == "cash":
-                commission = alloc.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-                processing = Decimal("0.00")
-            else:
-                commission = (alloc * Decimal("0.70")).quantize(
-                    Decimal("0.01"), rounding=ROUND_HALF_UP
-                )
-                processing = (alloc - commission).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-            row["commission_fee"] = str(
-                format_fee(commission * Decimal("-1"))
-            )
-            row["processing_fee"] = str(
-                format_fee(processing * Decimal("-1"))
+        alloc_rows.extend(rows)
+        groups.extend([len(targets)] * len(rows))
+        weights.extend(subtotals)
+        targets.append(fee_total)
+    allocs = [Decimal(int(cents)).scaleb(-2) for cents in allocate_groups(groups, weights, targets)]
+    for row, alloc in zip(alloc_rows, allocs):
+        payment_type = normalize_payment_type(str(row.get("payment_type", "")))
+        if payment_type == "cash":
+            commission = alloc.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+            processing = Decimal("0.00")
+        else:
+            commission = (alloc * Decimal("0.70")).quantize(
+                Decimal("0.01"), rounding=ROUND_HALF_UP
             )
+            processing = (alloc - commission).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        row["commission_fee"] = str(
+            format_fee(commission * Decimal("-1"))
+        )
+        row["processing_fee"] = str(
+            format_fee(processing * Decimal("-1"))
+        )
     return billing_rows
 
 
@@ -414,8 +375,7 @@ def merge_rows(
     billing_rows = allocate_commission(billing_rows)
 
     orders_by_day: Dict[Tuple[str, str], List[Dict[str, str]]] = {}
-    for _, row in orders_raw.iterrows():
-        row_dict = row.to_dict()
+    for row_dict in orders_raw.to_dict("records"):
         key = (
             normalize_provider_key(row_dict.get("provider", "")),
             date_key(str(row_dict.get("order_datetime", "")).strip()),
@@ -440,35 +400,45 @@ def merge_rows(
                     continue
         return None
 
-    def strict_match(row: Dict[str, str], candidate: Dict[str, str]) -> bool:
-        billing_amounts = {
-            "subtotal": parse_decimal(row.get("subtotal", "")),
-            "tax": parse_decimal(row.get("tax", "")),
-            "delivery_fee": parse_decimal(row.get("delivery_fee", "")),
-            "tip": parse_decimal(row.get("tip", "")),
-            "total": parse_decimal(row.get("total", "")),
-        }
-        candidate_amounts = {
-            "subtotal": parse_decimal(candidate.get("subtotal", "")),
-            "tax": parse_decimal(candidate.get("tax", "")),
-            "delivery_fee": parse_decimal(candidate.get("delivery_fee", "")),
-            "tip": parse_decimal(candidate.get("tip", "")),
-            "total": parse_decimal(candidate.get("total", "")),
-        }
-        for field in ("subtotal", "tax", "delivery_fee", "tip", "total"):
-            if billing_amounts[field] is None or candidate_amounts[field] is None:
-                continue
-            if not amount_equal(billing_amounts[field], candidate_amounts[field]):
+    def strict_fields(row: Dict[str, str]) -> Tuple[Tuple[Optional[Decimal], ...], str, str]:
+        # Amounts rounded to cents (blank -> None) plus normalized order/payment type.
+        amounts = tuple(
+            None if value is None else value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+            for value in (parse_decimal(row.get(field, "")) for field in AMOUNT_KEY_FIELDS)
+        )
+        order_type = normalize_order_type(str(row.get("order_type", ""))).strip()
+        payment_type = normalize_payment_type(str(row.get("payment_type", ""))).strip()
+        return amounts, order_type, payment_type
+
+    def strict_match(
+        row: Tuple[Tuple[Optional[Decimal], ...], str, str],
+        candidate: Tuple[Tuple[Optional[Decimal], ...], str, str],
+    ) -> bool:
+        # Blank amounts and types match anything.
+        for left, right in zip(row[0], candidate[0]):
+            if left is not None and right is not None and left != right:
+                return False
+        for left, right in zip(row[1:], candidate[1:]):
+            if left and right and left != right:
                 return False
-        billing_order_type = normalize_order_type(str(row.get("order_type", ""))).strip()
-        candidate_order_type = normalize_order_type(str(candidate.get("order_type", ""))).strip()
-        if billing_order_type and candidate_order_type and billing_order_type != candidate_order_type:
-            return False
-        billing_payment_type = normalize_payment_type(str(row.get("payment_type", ""))).strip()
-        candidate_payment_type = normalize_payment_type(str(candidate.get("payment_type", ""))).strip()
-        if billing_payment_type and candidate_payment_type and billing_payment_type != candidate_payment_type:
-            return False
         return True
+
+    # Parsed amounts/types/datetime per order, computed once rather than per billing.
+    order_info: Dict[int, Tuple[Dict[str, Optional[Decimal]], str, str, Optional[dt.datetime]]] = {}
+
+    def candidate_info(
+        candidate: Dict[str, str]
+    ) -> Tuple[Dict[str, Optional[Decimal]], str, str, Optional[dt.datetime]]:
+        info = order_info.get(id(candidate))
+        if info is None:
+            info = order_info[id(candidate)] = (
+                {field: parse_decimal(candidate.get(field, "")) for field in AMOUNT_KEY_FIELDS},
+                normalize_order_type(str(candidate.get("order_type", ""))).strip(),
+                normalize_payment_type(str(candidate.get("payment_type", ""))).strip(),
+                parse_dt_local(str(candidate.get("order_datetime", ""))),
+            )
+        return info
+
     for row in billing_rows:
         key = (
             normalize_provider_key(row.get("provider", "")),
@@ -490,16 +460,13 @@ def merge_rows(
         }
         billing_order_type = normalize_order_type(str(row.get("order_type", ""))).strip()
         billing_payment_type = normalize_payment_type(str(row.get("payment_type", ""))).strip()
+        billing_dt = parse_dt_local(str(row.get("order_datetime", "")))
 
         for idx, candidate in enumerate(candidates):
             score = 0
-            candidate_amounts = {
-                "subtotal": parse_decimal(candidate.get("subtotal", "")),
-                "tax": parse_decimal(candidate.get("tax", "")),
-                "delivery_fee": parse_decimal(candidate.get("delivery_fee", "")),
-                "tip": parse_decimal(candidate.get("tip", "")),
-                "total": parse_decimal(candidate.get("total", "")),
-            }
+            candidate_amounts, candidate_order_type, candidate_payment_type, candidate_dt = candidate_info(
+                candidate
+            )
             strict_ok = True
             for field in ("subtotal", "tax", "delivery_fee", "tip", "total"):
                 if billing_amounts[field] is None or candidate_amounts[field] is None:
@@ -509,14 +476,10 @@ def merge_rows(
                     break
                 score += 2
 
-            candidate_order_type = normalize_order_type(str(candidate.get("order_type", ""))).strip()
             if billing_order_type and candidate_order_type and billing_order_type == candidate_order_type:
                 score += 1
             elif billing_order_type and candidate_order_type and billing_order_type != candidate_order_type:
                 strict_ok = False
-            candidate_payment_type = normalize_payment_type(
-                str(candidate.get("payment_type", ""))
-            ).strip()
             if billing_payment_type and candidate_payment_type and billing_payment_type == candidate_payment_type:
                 score += 1
             elif billing_payment_type and candidate_payment_type and billing_payment_type != candidate_payment_type:
@@ -535,8 +498,6 @@ def merge_rows(
             ):
                 subtotal_diff = abs(billing_amounts["subtotal"] - candidate_amounts["subtotal"])
             time_diff = None
-            billing_dt = parse_dt_local(str(row.get("order_datetime", "")))
-            candidate_dt = parse_dt_local(str(candidate.get("order_datetime", "")))
             if billing_dt and candidate_dt:
                 time_diff = abs((billing_dt - candidate_dt).total_seconds())
 
@@ -595,52 +556,58 @@ def merge_rows(
                         continue
             return None
 
-        def billing_key(row: Dict[str, str]) -> str:
-            return "|".join(
-                [
-                    str(row.get("provider", "")).strip(),
-                    str(row.get("order_datetime", "")).strip(),
-                    str(row.get("order_type", "")).strip(),
-                    str(row.get("payment_type", "")).strip(),
-                    str(row.get("subtotal", "")).strip(),
-                    str(row.get("tax", "")).strip(),
-                    str(row.get("delivery_fee", "")).strip(),
-                    str(row.get("tip", "")).strip(),
-                    str(row.get("total", "")).strip(),
-                ]
-            )
-
-        merged_index = {billing_key(row): row for row in merged}
+        merged_index = {billing_identity_key(row): row for row in merged}
         unmatched_orders = []
         for candidates in orders_by_day.values():
             unmatched_orders.extend(candidates)
-        remaining_billings = list(unmatched_billings)
+        # Remaining billings bucketed by provider and total (in statement order), with
+        # parsed dates and amounts, so each order only scans billings it could match.
+        remaining_by_total: Dict[Tuple[str, Optional[Decimal]], List[int]] = {}
+        remaining_by_provider: Dict[str, List[int]] = {}
+        billing_dts: List[Optional[dt.datetime]] = []
+        billing_fields: List[Tuple[Tuple[Optional[Decimal], ...], str, str]] = []
+        for position, billing in enumerate(unmatched_billings):
+            provider_key = normalize_provider_key(billing.get("provider", ""))
+            fields = strict_fields(billing)
+            remaining_by_total.setdefault((provider_key, fields[0][-1]), []).append(position)
+            remaining_by_provider.setdefault(provider_key, []).append(position)
+            billing_dts.append(parse_dt(str(billing.get("order_datetime", ""))))
+            billing_fields.append(fields)
+        taken: set[int] = set()
         still_unmatched_orders: List[Dict[str, str]] = []
 
         for order in unmatched_orders:
             order_provider = normalize_provider_key(order.get("provider", ""))
             order_dt = parse_dt(str(order.get("order_datetime", "")))
-            best_idx = None
+            order_fields = strict_fields(order)
+            order_total = order_fields[0][-1]
+            if order_total is None:
+                positions = remaining_by_provider.get(order_provider, [])
+            else:
+                # A blank billing total matches any order total.
+                positions = sorted(
+                    remaining_by_total.get((order_provider, order_total), [])
+                    + remaining_by_total.get((order_provider, None), [])
+                )
+            best_position = None
             best_diff = None
-            for idx, billing in enumerate(remaining_billings):
-                if normalize_provider_key(billing.get("provider", "")) != order_provider:
-                    continue
-                if not strict_match(billing, order):
+            for position in positions:
+                if position in taken or not strict_match(billing_fields[position], order_fields):
                     continue
-                billing_dt = parse_dt(str(billing.get("order_datetime", "")))
+                billing_dt = billing_dts[position]
                 if order_dt and billing_dt:
                     diff = abs((order_dt - billing_dt).total_seconds())
                 else:
                     diff = float("inf")
                 if best_diff is None or diff < best_diff:
                     best_diff = diff
-                    best_idx = idx
-            if best_idx is None:
+                    best_position = position
+            if best_position is None:
                 still_unmatched_orders.append(order)
                 continue
-            billing = remaining_billings.pop(best_idx)
-            key = billing_key(billing)
-            target = merged_index.get(key)
+            taken.add(best_position)
+            billing = unmatched_billings[best_position]
+            target = merged_index.get(billing_identity_key(billing))
             note = f"order_date={order.get('order_datetime','')} billing_date={billing.get('order_datetime','')}"
             if target is not None:
                 for k, v in order.items():
@@ -648,7 +615,9 @@ def merge_rows(
                 target["date_mismatch_note"] = note
             else:
                 merged.append({**billing, **{f"{k}_order": v for k, v in order.items()}, "date_mismatch_note": note})
-        unmatched_billings = remaining_billings
+        unmatched_billings = [
+            billing for position, billing in enumerate(unmatched_billings) if position not in taken
+        ]
         unmatched_orders = still_unmatched_orders
         return merged, unmatched_billings, unmatched_orders
 
@@ -1048,59 +1017,34 @@ class MenuStarNormalizer(BaseParser):
                 billings_df, billings_overrides
             )
 
-            def billing_key(row: Dict[str, str]) -> str:
-                return "|".join(
-                    [
-                        str(row.get("provider", "")).strip(),
-                        str(row.get("order_datetime", "")).strip(),
-                        str(row.get("order_type", "")).strip(),
-                        str(row.get("payment_type", "")).strip(),
-                        str(row.get("subtotal", "")).strip(),
-                        str(row.get("tax", "")).strip(),
-                        str(row.get("delivery_fee", "")).strip(),
-                        str(row.get("tip", "")).strip(),
-                        str(row.get("total", "")).strip(),
-                    ]
+            # One preferred merged row per order_id, then every billing resolved against
+            # them in a single pass per key level (identity, then loose, then day+amount).
+            merged_df = pd.DataFrame(rows)
+            preferred = order_candidates(
+                merged_df,
+                ["order_id_order"],
+                score=pd.Series(
+                    [merged_row_quality_score(row) for row in rows], index=merged_df.index
+                ),
+                recency_column="statement_email_date",
+            )
+            matches = match_billings(billings_for_match, preferred, MATCH_LEVELS)
+            if not matches.ambiguous.empty:
+                print(
+                    f"Resolved {len(matches.ambiguous)} MenuStar billing(s) matching several orders by quality score."
                 )
-
-            # Keep one preferred billing key per order_id, then project to key->order_id map.
-            preferred_row_by_order_id: Dict[str, Dict[str, str]] = {}
-            for merged_row in rows:
-                order_id = str(merged_row.get("order_id_order", "")).strip()
-                if not order_id:
-                    continue
-                current = preferred_row_by_order_id.get(order_id)
-                if current is None:
-                    preferred_row_by_order_id[order_id] = merged_row
-                    continue
-                current_score = merged_row_quality_score(current)
-                new_score = merged_row_quality_score(merged_row)
-                if new_score > current_score:
-                    preferred_row_by_order_id[order_id] = merged_row
-                    continue
-                if new_score == current_score:
-                    current_email = str(current.get("statement_email_date", "")).strip()
-                    new_email = str(merged_row.get("statement_email_date", "")).strip()
-                    if new_email and (not current_email or new_email > current_email):
-                        preferred_row_by_order_id[order_id] = merged_row
-            match_map = {
-                billing_key(merged_row): order_id
-                for order_id, merged_row in preferred_row_by_order_id.items()
-            }
-            updated = False
-            stale_cleared = 0
-            assigned = 0
-            for idx, row in billings_for_match.iterrows():
-                key = billing_key(row)
-                match_id = match_map.get(key, "")
-                current = str(billings_df.iloc[idx].get("order_id", "") or "").strip()
-                if current != match_id:
-                    billings_df.at[idx, "order_id"] = match_id
-                    updated = True
-                    if match_id:
-                        assigned += 1
-                    elif current:
-                        stale_cleared += 1
+            match_ids = matches.matched["order_id"].reindex(billings_df.index, fill_value="")
+            current_ids = (
+                billings_df["order_id"].fillna("").astype(str).str.strip()
+                if "order_id" in billings_df.columns
+                else pd.Series("", index=billings_df.index, dtype=object)
+            )
+            changed = current_ids != match_ids
+            updated = bool(changed.any())
+            assigned = int((changed & (match_ids != "")).sum())
+            stale_cleared = int((changed & (match_ids == "") & (current_ids != "")).sum())
+            if updated:
+                billings_df.loc[changed, "order_id"] = match_ids[changed]
             if updated:
                 billings_df.to_csv(billings_path, index=False)
                 if stale_cleared:
@@ -1206,24 +1150,19 @@ class MenuStarNormalizer(BaseParser):
             ]
             seen_identity: set[str] = set()
             seen_synthetic_suppress: set[str] = set()
-            matched_loose_keys = {
-                billing_loose_key(row)
-                for row in rows
-                if str(row.get("order_id_order", "")).strip() or str(row.get("order_id", "")).strip()
-            }
-            matched_day_amount_keys = {
-                billing_day_amount_key(row)
-                for row in rows
-                if str(row.get("order_id_order", "")).strip() or str(row.get("order_id", "")).strip()
-            }
-            for billing_row in unmatched_billings:
+            # Billings whose amounts already belong to a matched order (same loose or
+            # day+amount key) never become synthetic orders.
+            covered = match_billings(
+                pd.DataFrame(unmatched_billings),
+                order_candidates(pd.DataFrame(rows), ["order_id_order", "order_id"], one_per_order=False),
+                (LOOSE_KEY, DAY_AMOUNT_KEY),
+            ).matched.index
+            for position, billing_row in enumerate(unmatched_billings):
                 if extract_year(billing_row.get("order_datetime", "")) < min_include_year:
                     continue
                 if not has_nonzero_amounts(billing_row):
                     continue
-                if billing_loose_key(billing_row) in matched_loose_keys:
-                    continue
-                if billing_day_amount_key(billing_row) in matched_day_amount_keys:
+                if position in covered:
                     continue
                 identity = billing_identity_key(billing_row)
                 if identity in seen_identity:
@@ -1278,6 +1217,7 @@ class MenuStarNormalizer(BaseParser):
         return normalized_rows
 
 
+@profiled
 def run(
     orders_raw_path: str,
     billings_raw_path: str,
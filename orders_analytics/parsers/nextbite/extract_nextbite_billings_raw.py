@@ -2,16 +2,19 @@
 import argparse
 import datetime as dt
 import io
-import mailbox
 import os
-import re
 from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
-from openpyxl import load_workbook
 
 from orders_analytics.utils.constants import raw_path, takeout_path
+from orders_analytics.utils.mbox_index import iter_mbox
+from orders_analytics.utils.xlsx_reader import SheetRows, cached_sheets, sheet_frame
+from orders_analytics.utils.profiling import profiled
+
+ORDER_ID_HEADERS = ("order id", "orderid")
 
 
 def _clean_value(value: object) -> str:
@@ -24,14 +27,11 @@ def _find_order_id_column(columns: List[str]) -> Optional[str]:
     for column in columns:
         lowered = str(column).strip().lower().replace("_", " ")
         lowered = " ".join(lowered.split())
-        if lowered in {"order id", "orderid"}:
+        if lowered in ORDER_ID_HEADERS:
             return column
     return None
 
 
-ORDER_ID_FORMULA_RE = re.compile(r'^\s*=\s*"([^"]+)"\s*$')
-
-
 def _normalize_date_text(value: str) -> str:
     text = _clean_value(value)
     if not text:
@@ -193,6 +193,20 @@ def _normalize_csv_columns(df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
+@lru_cache(maxsize=1)
+def _read_xlsx_sheets(payload: bytes) -> Optional[Dict[str, SheetRows]]:
+    # One streaming read per workbook serves both the order rows and the Summary tab, so
+    # callers must not mutate the result. Tabs without an Order ID header are skipped
+    # after their first row, and string Order IDs stored as formulas (e.g. ="51ff14f8")
+    # are recovered instead of the cached numeric 0.
+    return cached_sheets(
+        payload,
+        sheets=("Summary",),
+        header_names=ORDER_ID_HEADERS,
+        formula_literals=ORDER_ID_HEADERS,
+    )
+
+
 def _parse_xlsx_bytes(
     payload: bytes,
     provider: str,
@@ -201,34 +215,13 @@ def _parse_xlsx_bytes(
     member_name: str,
 ) -> List[Dict[str, str]]:
     rows: List[Dict[str, str]] = []
-    try:
-        sheets = pd.read_excel(io.BytesIO(payload), sheet_name=None, dtype=str, engine="openpyxl")
-    except Exception:
+    sheets = _read_xlsx_sheets(payload)
+    if sheets is None:
         return []
-    wb_formula = None
-    try:
-        wb_formula = load_workbook(io.BytesIO(payload), data_only=False)
-    except Exception:
-        wb_formula = None
-    for sheet_name, df in sheets.items():
-        # Recover string Order ID values stored as formulas (e.g. ="51ff14f8"),
-        # which pandas may otherwise read as cached numeric 0.
-        if wb_formula is not None and sheet_name in wb_formula.sheetnames:
-            order_col = _find_order_id_column([str(c) for c in df.columns])
-            if order_col:
-                ws = wb_formula[sheet_name]
-                col_idx = list(df.columns).index(order_col) + 1
-                for row_idx in range(len(df)):
-                    excel_row = row_idx + 2  # header in row 1
-                    cell = ws.cell(excel_row, col_idx)
-                    value = cell.value
-                    if isinstance(value, str):
-                        m = ORDER_ID_FORMULA_RE.match(value)
-                        if m:
-                            df.at[row_idx, order_col] = m.group(1)
+    for sheet_name, sheet_rows in sheets.items():
         rows.extend(
             _rows_from_dataframe(
-                df=df,
+                df=sheet_frame(sheet_rows, dtype=str),
                 provider=provider,
                 email_date=email_date,
                 attachment_name=attachment_name,
@@ -253,10 +246,10 @@ def _extract_summary_rows_from_xlsx(
     attachment_name: str,
     member_name: str,
 ) -> List[Dict[str, str]]:
-    try:
-        df = pd.read_excel(io.BytesIO(payload), sheet_name="Summary", dtype=str, engine="openpyxl").fillna("")
-    except Exception:
+    sheets = _read_xlsx_sheets(payload)
+    if not sheets or "Summary" not in sheets:
         return []
+    df = sheet_frame(sheets["Summary"], dtype=str).fillna("")
     if df.empty:
         return []
 
@@ -339,8 +332,7 @@ def _parse_payload(
 def parse_mbox(mbox_path: str) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
     order_rows: List[Dict[str, str]] = []
     summary_rows: List[Dict[str, str]] = []
-    mbox = mailbox.mbox(mbox_path)
-    for msg in mbox:
+    for msg in iter_mbox(mbox_path):
         email_date = ""
         if msg.get("Date"):
             try:
@@ -507,6 +499,7 @@ def write_raw(path: str, rows: List[Dict[str, str]]) -> int:
     return len(rows)
 
 
+@profiled
 def run(
     mbox_path: str,
     out_path: str = raw_path("nextbite", "orders_raw.csv"),
@@ -5,15 +5,18 @@ from datetime import date
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 from orders_analytics.utils.base_parser import BaseParser
 from orders_analytics.utils.constants import normalized_path, raw_path
+from orders_analytics.utils.money import allocate_cents, cents_array, format_cents
 from orders_analytics.utils.normalize import normalize_datetime, normalize_money
 from orders_analytics.utils.order_types import OrderTypes
 from orders_analytics.utils.payment_types import PaymentTypes
 from orders_analytics.utils.platforms import Platforms
 from orders_analytics.utils.schema import build_normalized_row
+from orders_analytics.utils.profiling import profiled
 
 
 NUMERIC_SUM_COLUMNS = (
@@ -84,6 +87,35 @@ def _format_decimal(value: Decimal) -> str:
     return str(value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
 
 
+def _map_unique(values: pd.Series, func) -> pd.Series:
+    # Apply `func` once per distinct value and broadcast back.
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    mapped = np.empty(len(uniques), dtype=object)
+    mapped[:] = [func(value) for value in uniques]
+    return pd.Series(mapped.take(codes), index=values.index, dtype=object)
+
+
+def _column(frame: pd.DataFrame, col: str) -> pd.Series:
+    if col in frame.columns:
+        return frame[col].astype(str)
+    return pd.Series("", index=frame.index, dtype=object)
+
+
+def _cents_column(frame: pd.DataFrame, col: str) -> np.ndarray:
+    """`_to_decimal` of every value of `col`, as int cents."""
+    return cents_array(_column(frame, col))[1]
+
+
+def _round_half_up(numerators: np.ndarray, denominator: int) -> np.ndarray:
+    # numerators / denominator rounded half away from zero, like Decimal ROUND_HALF_UP.
+    numerators = np.asarray(numerators, dtype=np.int64)
+    return np.sign(numerators) * ((2 * np.abs(numerators) + denominator) // (2 * denominator))
+
+
+def _format_cents_array(cents: np.ndarray) -> List[str]:
+    return [format_cents(int(value)) for value in cents]
+
+
 def _nonempty(value: object) -> str:
     if value is None:
         return ""
@@ -111,16 +143,16 @@ def _to_date(value: object) -> Optional[date]:
     return parsed.date()
 
 
-def _normalized_tax_remitted_for_transaction(
-    tax_remitted_value: object, transaction_type: object
-) -> Decimal:
-    value = _to_decimal(tax_remitted_value)
-    if value == Decimal("0"):
-        return Decimal("0")
-    tx = _nonempty(transaction_type).lower()
-    if tx == "fulfilled orders":
-        return abs(value)
-    return -abs(value)
+def _day_number(value: object) -> int:
+    parsed = _to_date(value)
+    return parsed.toordinal() if parsed else 0
+
+
+def _tax_remitted_cents(frame: pd.DataFrame) -> np.ndarray:
+    """Tax Remitted as int cents: positive on fulfilled orders, negative on everything else."""
+    cents = np.abs(_cents_column(frame, "Tax Remitted"))
+    tx = _column(frame, "Transaction Type").str.strip().str.lower()
+    return np.where(tx.eq("fulfilled orders").to_numpy(), cents, -cents)
 
 
 def _primary_source_sheet(value: object) -> str:
@@ -183,24 +215,27 @@ def _close_enough(a: Decimal, b: Decimal, cents: Decimal = Decimal("0.01")) -> b
     return abs(a - b) <= cents
 
 
-def _is_all_zero_financial_row(row: pd.Series) -> bool:
-    check_cols = [
-        "Subtotal",
-        "Gross Tax",
-        "Tax Remitted",
-        "Total Commissions",
-        "Total Promotions",
-        "Total Adjustments",
-        "Savings",
-        "total_gross_sales",
-        "nextbite_total_commission_reconciled",
-        "nextbite_base_payout_reconciled",
-        "nextbite_true_payout_reconciled",
-    ]
-    total = Decimal("0")
-    for col in check_cols:
-        total += abs(_to_decimal(row.get(col, "")))
-    return total == Decimal("0")
+ZERO_CHECK_COLUMNS = (
+    "Subtotal",
+    "Gross Tax",
+    "Tax Remitted",
+    "Total Commissions",
+    "Total Promotions",
+    "Total Adjustments",
+    "Savings",
+    "total_gross_sales",
+    "nextbite_total_commission_reconciled",
+    "nextbite_base_payout_reconciled",
+    "nextbite_true_payout_reconciled",
+)
+
+
+def _all_zero_financial_rows(frame: pd.DataFrame) -> np.ndarray:
+    """Rows whose financial columns (missing ones count as zero) are all zero."""
+    nonzero = np.zeros(len(frame), dtype=bool)
+    for col in ZERO_CHECK_COLUMNS:
+        nonzero |= _cents_column(frame, col) != 0
+    return ~nonzero
 
 
 def _quantize_cents(value: Decimal) -> Decimal:
@@ -215,24 +250,22 @@ def _base_payout_from_subtotal(subtotal: Decimal) -> Decimal:
     return subtotal
 
 
+def _to_cents(value: Decimal) -> int:
+    return int((value * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
 def _reconcile_to_target(values: List[Decimal], target: Decimal) -> List[Decimal]:
     if not values:
         return values
     reconciled = [_quantize_cents(v) for v in values]
-    target_q = _quantize_cents(target)
-    delta = target_q - sum(reconciled, Decimal("0"))
-    cents = int((delta * 100).to_integral_value(rounding=ROUND_HALF_UP))
-    if cents == 0:
+    delta = _to_cents(target) - sum(_to_cents(v) for v in reconciled)
+    if delta == 0:
         return reconciled
-
-    # Deterministic distribution: apply residual cents to largest absolute-value rows first.
+    # Deterministic distribution: the residual is split evenly, and its odd cents go
+    # to the largest absolute-value rows first (an even split hands them out in order).
     order = sorted(range(len(values)), key=lambda i: (abs(values[i]), i), reverse=True)
-    if not order:
-        return reconciled
-    step = Decimal("0.01") if cents > 0 else Decimal("-0.01")
-    for idx in range(abs(cents)):
-        target_idx = order[idx % len(order)]
-        reconciled[target_idx] = _quantize_cents(reconciled[target_idx] + step)
+    for i, cents in zip(order, allocate_cents(delta, [1] * len(order))):
+        reconciled[i] += Decimal(int(cents)).scaleb(-2)
     return reconciled
 
 
@@ -249,106 +282,85 @@ def _collapse_orders(orders_df: pd.DataFrame) -> pd.DataFrame:
     if work.empty:
         return work
 
-    for col in NUMERIC_SUM_COLUMNS:
-        if col not in work.columns:
-            work[col] = ""
-        if col == "Tax Remitted":
-            work[f"__num_{col}"] = work.apply(
-                lambda r: _normalized_tax_remitted_for_transaction(
-                    r.get("Tax Remitted", ""),
-                    r.get("Transaction Type", ""),
-                ),
-                axis=1,
-            )
-        else:
-            work[f"__num_{col}"] = work[col].astype(str).map(_to_decimal)
-    for col in RECONCILED_SUM_COLUMNS:
-        if col not in work.columns:
-            work[col] = ""
-        work[f"__num_{col}"] = work[col].astype(str).map(_to_decimal)
-
-    tx_lower = work["Transaction Type"].astype(str).str.lower().str.strip()
-    work["__is_fulfilled"] = tx_lower.isin(["fulfilled orders", "adjustments"])
-    work["__is_refund"] = tx_lower.str.contains("refund", na=False)
-
     group_cols = ["Order ID"]
     if "period_dsp" in work.columns and "pay_period_ending" in work.columns:
         group_cols = ["Order ID", "period_dsp", "pay_period_ending"]
+    # Group number per row, in order of first appearance; every aggregate below is
+    # one groupby over these codes.
+    codes = work.groupby(group_cols, dropna=False, sort=False).ngroup().to_numpy()
+    n_groups = int(codes.max()) + 1
+    groups = pd.RangeIndex(n_groups)
 
-    collapsed_rows: List[Dict[str, str]] = []
-    for group_key, group in work.groupby(group_cols, dropna=False, sort=False):
-        order_id = group_key[0] if isinstance(group_key, tuple) else group_key
-        row: Dict[str, str] = {}
-        row["Order ID"] = str(order_id)
-        row["Store Name"] = (
-            _first_nonempty(group["Store Name"].tolist()) if "Store Name" in group else ""
-        )
-        row["Date (Reportable)"] = (
-            _first_nonempty(group["Date (Reportable)"].tolist())
-            if "Date (Reportable)" in group
-            else ""
-        )
-        row["Commission Rate"] = (
-            _first_nonempty(group["Commission Rate"].tolist()) if "Commission Rate" in group else ""
-        )
-        row["email_date"] = _first_nonempty(group["email_date"].tolist()) if "email_date" in group else ""
-        row["source_file"] = _first_nonempty(group["source_file"].tolist()) if "source_file" in group else ""
-        row["source_member"] = _first_nonempty(group["source_member"].tolist()) if "source_member" in group else ""
-        row["period_dsp"] = _first_nonempty(group["period_dsp"].tolist()) if "period_dsp" in group else ""
-        row["pay_period_ending"] = _first_nonempty(group["pay_period_ending"].tolist()) if "pay_period_ending" in group else ""
-        row["pay_period_start"] = _first_nonempty(group["pay_period_start"].tolist()) if "pay_period_start" in group else ""
-        row["pay_period_end"] = _first_nonempty(group["pay_period_end"].tolist()) if "pay_period_end" in group else ""
-
-        tx_types = sorted({_nonempty(v) for v in group["Transaction Type"].tolist() if _nonempty(v)})
-        row["Transaction Type"] = " | ".join(tx_types)
-        source_sheets = sorted({_nonempty(v) for v in group["source_sheet"].tolist() if _nonempty(v)})
-        row["source_sheet"] = " | ".join(source_sheets)
-
-        for col in NUMERIC_SUM_COLUMNS:
-            total = sum(group[f"__num_{col}"].tolist(), Decimal("0"))
-            row[col] = _format_decimal(total)
-
-        fulfilled_mask = group["__is_fulfilled"]
-        refund_mask = group["__is_refund"]
-
-        fulfilled_orders_count = Decimal("1") if bool(fulfilled_mask.any()) else Decimal("0")
-        delivery_fulfilled_orders = sum(
-            group.loc[fulfilled_mask, "__num_Subtotal"].tolist(), Decimal("0")
-        )
-        refunds = sum(group.loc[refund_mask, "__num_Subtotal"].tolist(), Decimal("0"))
-        gross_sales_tax = sum(group["__num_Gross Tax"].tolist(), Decimal("0"))
-        sales_tax_remitted = sum(group["__num_Tax Remitted"].tolist(), Decimal("0"))
-        total_gross_sales = sum(group["__num_Subtotal"].tolist(), Decimal("0"))
-
-        row["fulfilled_order_count"] = str(int(fulfilled_orders_count))
-        row["delivery_fulfilled_orders"] = _format_decimal(delivery_fulfilled_orders)
-        row["refunds"] = _format_decimal(refunds)
-        row["gross_sales_tax_collected"] = _format_decimal(gross_sales_tax)
-        row["sales_tax_remitted"] = _format_decimal(sales_tax_remitted)
-        row["total_gross_sales"] = _format_decimal(total_gross_sales)
-
-        nextbite_total_commission = total_gross_sales * Decimal("0.45")
-        nextbite_base_payout = total_gross_sales * Decimal("0.55")
-        savings = _to_decimal(row.get("Savings", ""))
-        nextbite_true_payout = nextbite_base_payout + savings
-
-        row["nextbite_total_commission"] = _format_decimal(nextbite_total_commission)
-        row["nextbite_base_payout"] = _format_decimal(nextbite_base_payout)
-        row["nextbite_true_payout"] = _format_decimal(nextbite_true_payout)
-        row["nextbite_total_commission_reconciled"] = _format_decimal(
-            sum(group["__num_nextbite_total_commission_reconciled"].tolist(), Decimal("0"))
-        )
-        row["nextbite_base_payout_reconciled"] = _format_decimal(
-            sum(group["__num_nextbite_base_payout_reconciled"].tolist(), Decimal("0"))
-        )
-        row["nextbite_true_payout_reconciled"] = _format_decimal(
-            sum(group["__num_nextbite_true_payout_reconciled"].tolist(), Decimal("0"))
-        )
+    def first_nonempty(col: str) -> pd.Series:
+        if col not in work.columns:
+            return pd.Series("", index=groups, dtype=object)
+        text = work[col].astype(str).str.strip()
+        valid = ((text != "") & (text.str.lower() != "nan")).to_numpy()
+        return text[valid].groupby(codes[valid]).first().reindex(groups, fill_value="")
+
+    def joined_distinct(col: str) -> pd.Series:
+        text = _column(work, col).str.strip()
+        valid = ((text != "") & (text.str.lower() != "nan")).to_numpy()
+        distinct = pd.DataFrame({"group": codes[valid], "value": text[valid].to_numpy()})
+        distinct = distinct.drop_duplicates().sort_values(["group", "value"])
+        return distinct.groupby("group")["value"].agg(" | ".join).reindex(groups, fill_value="")
+
+    def group_sum(cents: np.ndarray) -> np.ndarray:
+        totals = np.zeros(n_groups, dtype=np.int64)
+        np.add.at(totals, codes, cents)
+        return totals
+
+    tx_lower = work["Transaction Type"].astype(str).str.lower().str.strip()
+    is_fulfilled = tx_lower.isin(["fulfilled orders", "adjustments"]).to_numpy()
+    is_refund = tx_lower.str.contains("refund", na=False).to_numpy()
 
-        row["collapsed_records"] = str(len(group))
-        collapsed_rows.append(row)
+    collapsed: Dict[str, object] = {
+        "Order ID": work["Order ID"].groupby(codes).first().reindex(groups).astype(str),
+    }
+    for col in (
+        "Store Name",
+        "Date (Reportable)",
+        "Commission Rate",
+        "email_date",
+        "source_file",
+        "source_member",
+        "period_dsp",
+        "pay_period_ending",
+        "pay_period_start",
+        "pay_period_end",
+    ):
+        collapsed[col] = first_nonempty(col)
+    collapsed["Transaction Type"] = joined_distinct("Transaction Type")
+    collapsed["source_sheet"] = joined_distinct("source_sheet")
+
+    sums: Dict[str, np.ndarray] = {}
+    for col in NUMERIC_SUM_COLUMNS:
+        cents = _tax_remitted_cents(work) if col == "Tax Remitted" else _cents_column(work, col)
+        sums[col] = group_sum(cents)
+        collapsed[col] = _format_cents_array(sums[col])
+
+    subtotal = _cents_column(work, "Subtotal")
+    total_gross_sales = sums["Subtotal"]
+    fulfilled_any = np.zeros(n_groups, dtype=bool)
+    np.logical_or.at(fulfilled_any, codes, is_fulfilled)
+    collapsed["fulfilled_order_count"] = np.where(fulfilled_any, "1", "0")
+    collapsed["delivery_fulfilled_orders"] = _format_cents_array(group_sum(np.where(is_fulfilled, subtotal, 0)))
+    collapsed["refunds"] = _format_cents_array(group_sum(np.where(is_refund, subtotal, 0)))
+    collapsed["gross_sales_tax_collected"] = collapsed["Gross Tax"]
+    collapsed["sales_tax_remitted"] = collapsed["Tax Remitted"]
+    collapsed["total_gross_sales"] = collapsed["Subtotal"]
+
+    # 45% / 55% of gross sales, and the 55% plus savings, each rounded once.
+    collapsed["nextbite_total_commission"] = _format_cents_array(_round_half_up(total_gross_sales * 45, 100))
+    collapsed["nextbite_base_payout"] = _format_cents_array(_round_half_up(total_gross_sales * 55, 100))
+    collapsed["nextbite_true_payout"] = _format_cents_array(
+        _round_half_up(total_gross_sales * 55 + sums["Savings"] * 100, 100)
+    )
+    for col in RECONCILED_SUM_COLUMNS:
+        collapsed[col] = _format_cents_array(group_sum(_cents_column(work, col)))
 
-    return pd.DataFrame(collapsed_rows)
+    collapsed["collapsed_records"] = np.bincount(codes, minlength=n_groups).astype(str)
+    return pd.DataFrame({col: np.asarray(values, dtype=object) for col, values in collapsed.items()})
 
 
 def _apply_reconciled_true_payouts(
@@ -477,10 +489,10 @@ def _build_summary_periods(summary_df: pd.DataFrame) -> List[Dict[str, object]]:
     if summary_df.empty:
         return []
     work = summary_df.fillna("").copy()
+    work["__pay_period_ending"] = _map_unique(_column(work, "Pay Period Ending"), _to_date)
     periods: List[Dict[str, object]] = []
-    for _, row in work.iterrows():
-        pay_period_ending_text = _nonempty(row.get("Pay Period Ending", ""))
-        pay_period_ending = _to_date(pay_period_ending_text)
+    for row in work.to_dict("records"):
+        pay_period_ending = row["__pay_period_ending"]
         if pay_period_ending is None:
             continue
 
@@ -533,43 +545,47 @@ def _assign_pay_periods(
     for period in periods:
         dsp = str(period["dsp"])
         period_index.setdefault(dsp, []).append(period)
-    for dsp in period_index:
-        period_index[dsp] = sorted(period_index[dsp], key=lambda x: x["window_end"])
-
-    pay_period_ending_vals: List[str] = []
-    pay_period_start_vals: List[str] = []
-    pay_period_end_vals: List[str] = []
-    dsp_vals: List[str] = []
-
-    for _, row in assigned.iterrows():
-        order_date = _to_date(row.get(date_col, ""))
-        raw_dsp = row.get(dsp_col, "")
-        dsp = _primary_source_sheet(raw_dsp) if split_source else _nonempty(raw_dsp).lower().strip()
-        matched: Optional[Dict[str, object]] = None
-
-        if order_date and dsp and dsp in period_index:
-            for period in period_index[dsp]:
-                start = period["window_start"]
-                end = period["window_end"]
-                if start <= order_date <= end:
-                    matched = period
-                    break
-
-        if matched is None:
-            pay_period_ending_vals.append("")
-            pay_period_start_vals.append("")
-            pay_period_end_vals.append("")
-            dsp_vals.append(dsp)
-        else:
-            pay_period_ending_vals.append(str(matched["pay_period_ending"]))
-            pay_period_start_vals.append(str(matched["window_start"]))
-            pay_period_end_vals.append(str(matched["window_end"]))
-            dsp_vals.append(str(matched["dsp"]))
-
-    assigned["period_dsp"] = dsp_vals
-    assigned["pay_period_ending"] = pay_period_ending_vals
-    assigned["pay_period_start"] = pay_period_start_vals
-    assigned["pay_period_end"] = pay_period_end_vals
+
+    dsp_func = _primary_source_sheet if split_source else (lambda value: _nonempty(value).lower().strip())
+    dsps = _map_unique(_column(assigned, dsp_col), dsp_func).to_numpy()
+    # Dates as day ordinals (0 = no date) so periods can be located with searchsorted.
+    order_days = _map_unique(_column(assigned, date_col), _day_number).to_numpy(dtype=np.int64)
+    matched = np.full(len(assigned), -1, dtype=np.int64)
+    candidates: List[Dict[str, object]] = []
+
+    for dsp, dsp_periods in period_index.items():
+        if not dsp:
+            continue
+        # The first period by window end whose window holds the order date.
+        dsp_periods = sorted(dsp_periods, key=lambda x: x["window_end"])
+        starts = np.array([p["window_start"].toordinal() for p in dsp_periods], dtype=np.int64)
+        ends = np.array([p["window_end"].toordinal() for p in dsp_periods], dtype=np.int64)
+        rows = np.flatnonzero((dsps == dsp) & (order_days > 0))
+        days = order_days[rows]
+        # Periods ending before the date are skipped outright; walk forward from the
+        # first one ending on/after it until a window also starts on/before it
+        # (more than one step only when windows overlap).
+        pos = np.searchsorted(ends, days, side="left")
+        pending = np.ones(len(rows), dtype=bool)
+        while True:
+            pending &= pos < len(ends)
+            if not pending.any():
+                break
+            hit = pending.copy()
+            hit[pending] = starts[pos[pending]] <= days[pending]
+            matched[rows[hit]] = len(candidates) + pos[hit]
+            pending &= ~hit
+            pos[pending] += 1
+        candidates.extend(dsp_periods)
+
+    def period_field(name: str) -> np.ndarray:
+        values = np.array([""] + [str(p[name]) for p in candidates], dtype=object)
+        return values[matched + 1]
+
+    assigned["period_dsp"] = dsps
+    assigned["pay_period_ending"] = period_field("pay_period_ending")
+    assigned["pay_period_start"] = period_field("window_start")
+    assigned["pay_period_end"] = period_field("window_end")
     return assigned
 
 
@@ -587,17 +603,14 @@ def _prepare_orders_for_period_comparison(orders_df: pd.DataFrame) -> pd.DataFra
     work["__is_unfulfilled"] = tx_lower.str.contains("unfulfilled", na=False)
     work["__is_count_fulfilled"] = tx_lower.isin(["fulfilled orders", "adjustments"])
     work["__is_refund"] = tx_lower.str.contains("refund", na=False)
-    work["__num_subtotal"] = work["Subtotal"].astype(str).map(_to_decimal)
-    work["__num_gross_tax"] = work["Gross Tax"].astype(str).map(_to_decimal)
-    work["__num_tax_remitted"] = work.apply(
-        lambda r: _normalized_tax_remitted_for_transaction(
-            r.get("Tax Remitted", ""),
-            r.get("Transaction Type", ""),
-        ),
-        axis=1,
+    work["__num_subtotal"] = _map_unique(work["Subtotal"].astype(str), _to_decimal)
+    work["__num_gross_tax"] = _map_unique(work["Gross Tax"].astype(str), _to_decimal)
+    work["__num_tax_remitted"] = _map_unique(
+        pd.Series(_tax_remitted_cents(work), index=work.index),
+        lambda cents: Decimal(format_cents(cents)) if cents else Decimal("0"),
     )
-    work["__num_savings"] = work["Savings"].astype(str).map(_to_decimal)
-    work["__num_total_commissions"] = work["Total Commissions"].astype(str).map(_to_decimal)
+    work["__num_savings"] = _map_unique(work["Savings"].astype(str), _to_decimal)
+    work["__num_total_commissions"] = _map_unique(work["Total Commissions"].astype(str), _to_decimal)
     work["__nextbite_total_commission"] = work["__num_subtotal"] * Decimal("0.45")
     work["__nextbite_base_payout"] = work["__num_subtotal"] * Decimal("0.55")
     work["__nextbite_true_payout"] = work["__nextbite_base_payout"] + work["__num_savings"]
@@ -615,105 +628,76 @@ def _orders_period_aggregates(assigned_df: pd.DataFrame) -> Dict[Tuple[str, str]
     if work.empty:
         return {}
 
-    out: Dict[Tuple[str, str], Dict[str, object]] = {}
-    for (dsp, pay_period_ending), group in work.groupby(["period_dsp", "pay_period_ending"], sort=True):
-        key = (str(dsp), str(pay_period_ending))
-        mode = COUNT_MODE_OVERRIDES.get(key, "unique_countable_order_ids")
-        non_unfulfilled_mask = ~group["__is_unfulfilled"].astype(bool)
-        if mode == "fulfilled_rows":
-            count_fulfilled = int(
-                (
-                    non_unfulfilled_mask
-                    & (group["Transaction Type"].astype(str).str.lower().str.strip() == "fulfilled orders")
-                ).sum()
-            )
-        elif mode == "all_non_unfulfilled_rows":
-            count_fulfilled = int(non_unfulfilled_mask.sum())
-        else:
-            count_fulfilled = int(
-                group.loc[
-                    non_unfulfilled_mask & group["__is_count_fulfilled"].astype(bool),
-                    "Order ID",
-                ]
-                .astype(str)
-                .str.strip()
-                .nunique()
-            )
-        include_unfulfilled_in_gross = key in INCLUDE_UNFULFILLED_IN_GROSS_OVERRIDES
-        gross_scope_mask = (
-            pd.Series([True] * len(group), index=group.index)
-            if include_unfulfilled_in_gross
-            else non_unfulfilled_mask
-        )
-        non_refund_gross_scope_mask = gross_scope_mask & (~group["__is_refund"].astype(bool))
-        agg: Dict[str, object] = {
-            "orders_in_period": len(group),
-            "count_fulfilled": count_fulfilled,
-            "delivery_fulfilled": sum(
-                group.loc[
-                    non_unfulfilled_mask & group["__is_count_fulfilled"].astype(bool),
-                    "__num_subtotal",
-                ].tolist(),
-                Decimal("0"),
-            ),
-            "refunds": sum(
-                group.loc[
-                    non_unfulfilled_mask & group["__is_refund"].astype(bool),
-                    "__num_subtotal",
-                ].tolist(),
-                Decimal("0"),
-            ),
-            "gross_sales_tax": sum(
-                group.loc[non_refund_gross_scope_mask, "__num_gross_tax"].tolist(),
-                Decimal("0"),
-            ),
-            "sales_tax_remitted": Decimal("0"),
-            # Statement "Total Gross Sales" is treated as gross-before-refunds.
-            "total_gross_sales": sum(
-                group.loc[non_refund_gross_scope_mask, "__num_subtotal"].tolist(),
-                Decimal("0"),
-            ),
-            "commission_cap_savings": sum(group["__num_savings"].tolist(), Decimal("0")),
-            "total_fp_payout": sum(
-                (
-                    group["nextbite_true_payout_reconciled"].astype(str).map(_to_decimal).tolist()
-                    if "nextbite_true_payout_reconciled" in group.columns
-                    else group["__nextbite_true_payout"].tolist()
-                ),
-                Decimal("0"),
-            ),
-            "nextbite_total_commission": sum(
-                (
-                    group["nextbite_total_commission_reconciled"]
-                    .astype(str)
-                    .map(_to_decimal)
-                    .tolist()
-                    if "nextbite_total_commission_reconciled" in group.columns
-                    else group["__nextbite_total_commission"].tolist()
-                ),
-                Decimal("0"),
-            ),
-            "nextbite_base_payout": sum(
-                (
-                    group["nextbite_base_payout_reconciled"]
-                    .astype(str)
-                    .map(_to_decimal)
-                    .tolist()
-                    if "nextbite_base_payout_reconciled" in group.columns
-                    else group["__nextbite_base_payout"].tolist()
-                ),
-                Decimal("0"),
-            ),
-        }
-        if key in REMITTED_EQUALS_GROSS_TAX_OVERRIDES:
-            agg["sales_tax_remitted"] = agg["gross_sales_tax"]
+    grouped = work.groupby(["period_dsp", "pay_period_ending"], sort=True)
+    codes = grouped.ngroup().to_numpy()
+    keys = [(str(dsp), str(ppe)) for dsp, ppe in grouped.size().index]
+    n_groups = len(keys)
+
+    def group_sum(values: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        totals = np.zeros(n_groups, dtype=np.int64)
+        np.add.at(totals, codes, values if mask is None else np.where(mask, values, 0))
+        return totals
+
+    def cents_of(col: str) -> np.ndarray:
+        return _map_unique(work[col], lambda value: _to_cents(_to_decimal(value))).to_numpy(dtype=np.int64)
+
+    def as_decimals(cents: np.ndarray) -> List[Decimal]:
+        return [Decimal(int(value)).scaleb(-2) for value in cents]
+
+    # Per-statement quirks, looked up once per period and broadcast to its rows.
+    modes = np.array([COUNT_MODE_OVERRIDES.get(key, "unique_countable_order_ids") for key in keys])
+    include_unfulfilled = np.array([key in INCLUDE_UNFULFILLED_IN_GROSS_OVERRIDES for key in keys])
+    remitted_is_gross = np.array([key in REMITTED_EQUALS_GROSS_TAX_OVERRIDES for key in keys])
+
+    non_unfulfilled = ~work["__is_unfulfilled"].astype(bool).to_numpy()
+    count_fulfilled_rows = non_unfulfilled & work["__is_count_fulfilled"].astype(bool).to_numpy()
+    is_refund = work["__is_refund"].astype(bool).to_numpy()
+    fulfilled_tx = (
+        work["Transaction Type"].astype(str).str.lower().str.strip().eq("fulfilled orders").to_numpy()
+    )
+    countable_ids = pd.DataFrame(
+        {"group": codes[count_fulfilled_rows], "order_id": work["Order ID"].astype(str).str.strip()[count_fulfilled_rows]}
+    )
+    unique_ids = countable_ids.drop_duplicates().groupby("group").size().reindex(range(n_groups), fill_value=0)
+    count_fulfilled = np.select(
+        [modes == "fulfilled_rows", modes == "all_non_unfulfilled_rows"],
+        [
+            group_sum(np.ones(len(work), dtype=np.int64), non_unfulfilled & fulfilled_tx),
+            group_sum(np.ones(len(work), dtype=np.int64), non_unfulfilled),
+        ],
+        unique_ids.to_numpy(),
+    )
+
+    subtotal = cents_of("__num_subtotal")
+    gross_tax = cents_of("__num_gross_tax")
+    # Statement "Total Gross Sales" is treated as gross-before-refunds.
+    non_refund_gross_scope = (include_unfulfilled[codes] | non_unfulfilled) & ~is_refund
+    gross_sales_tax = group_sum(gross_tax, non_refund_gross_scope)
+    sales_tax_remitted = np.where(
+        remitted_is_gross, gross_sales_tax, group_sum(cents_of("__num_tax_remitted"), non_refund_gross_scope)
+    )
+    columns: Dict[str, List[object]] = {
+        "orders_in_period": np.bincount(codes, minlength=n_groups).tolist(),
+        "count_fulfilled": count_fulfilled.tolist(),
+        "delivery_fulfilled": as_decimals(group_sum(subtotal, count_fulfilled_rows)),
+        "refunds": as_decimals(group_sum(subtotal, non_unfulfilled & is_refund)),
+        "gross_sales_tax": as_decimals(gross_sales_tax),
+        "sales_tax_remitted": as_decimals(sales_tax_remitted),
+        "total_gross_sales": as_decimals(group_sum(subtotal, non_refund_gross_scope)),
+        "commission_cap_savings": as_decimals(group_sum(cents_of("__num_savings"))),
+    }
+    for name, reconciled, fallback in (
+        ("total_fp_payout", "nextbite_true_payout_reconciled", "__nextbite_true_payout"),
+        ("nextbite_total_commission", "nextbite_total_commission_reconciled", "__nextbite_total_commission"),
+        ("nextbite_base_payout", "nextbite_base_payout_reconciled", "__nextbite_base_payout"),
+    ):
+        if reconciled in work.columns:
+            columns[name] = as_decimals(group_sum(cents_of(reconciled)))
         else:
-            agg["sales_tax_remitted"] = sum(
-                group.loc[non_refund_gross_scope_mask, "__num_tax_remitted"].tolist(),
-                Decimal("0"),
-            )
-        out[(str(dsp), str(pay_period_ending))] = agg
-    return out
+            # Unrounded 45%/55% amounts: summed exactly as Decimals.
+            totals = work[fallback].groupby(codes).agg(lambda values: sum(values, Decimal("0")))
+            columns[name] = totals.tolist()
+    return {key: {name: values[i] for name, values in columns.items()} for i, key in enumerate(keys)}
 
 
 def _write_period_comparison(
@@ -927,9 +911,7 @@ class NextbiteOrdersParser(BaseParser):
 
         collapsed = _collapse_orders(compare_orders)
         if not collapsed.empty:
-            collapsed = collapsed[
-                ~collapsed.apply(_is_all_zero_financial_row, axis=1)
-            ].copy()
+            collapsed = collapsed[~_all_zero_financial_rows(collapsed)].copy()
 
         collapsed_path = raw_path("nextbite", "orders_collapsed_raw.csv")
         os.makedirs(os.path.dirname(collapsed_path), exist_ok=True)
@@ -944,7 +926,7 @@ class NextbiteOrdersParser(BaseParser):
             if not collapsed.empty and "Order ID" in collapsed.columns
             else {}
         )
-        for _, row in collapsed.iterrows():
+        for row in collapsed.to_dict("records"):
             base_order_id = _nonempty(row.get("Order ID", ""))
             if not base_order_id:
                 continue
@@ -1040,6 +1022,7 @@ class NextbiteOrdersParser(BaseParser):
         return rows
 
 
+@profiled
 def run(
     orders_raw_path: str,
     out_path: str,
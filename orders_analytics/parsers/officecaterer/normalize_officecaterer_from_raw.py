@@ -11,6 +11,7 @@ from orders_analytics.utils.validation import normalize_order_type
 from orders_analytics.utils.payment_types import PaymentTypes
 from orders_analytics.utils.platforms import Platforms
 from orders_analytics.utils.schema import build_normalized_row
+from orders_analytics.utils.profiling import profiled
 
 
 def load_raw(path: str) -> pd.DataFrame:
@@ -122,6 +123,7 @@ class OfficeCatererNormalizer(BaseParser):
         return normalize_rows(orders)
 
 
+@profiled
 def run(
     orders_raw_path: str,
     out_path: str,
@@ -10,6 +10,7 @@ import pandas as pd
 
 from orders_analytics.utils.constants import raw_path
 from orders_analytics.utils.wave import filter_transactions, load_wave_transactions
+from orders_analytics.utils.profiling import profiled
 
 
 def _build_mask(df: pd.DataFrame, columns: List[str], pattern: str) -> pd.Series:
@@ -20,6 +21,7 @@ def _build_mask(df: pd.DataFrame, columns: List[str], pattern: str) -> pd.Series
     return mask
 
 
+@profiled
 def run(out_path: str | None = None) -> int:
     out_path = out_path or raw_path("orderinn", "commissions_raw.csv")
     transactions = load_wave_transactions("ameci")
@@ -15,6 +15,7 @@ from orders_analytics.utils.payment_types import PaymentTypes
 from orders_analytics.utils.platforms import Platforms
 from orders_analytics.utils.providers import normalize_provider
 from orders_analytics.utils.schema import build_normalized_row
+from orders_analytics.utils.profiling import profiled
 
 
 def _normalize_amount(row: pd.Series) -> str:
@@ -86,6 +87,7 @@ class OrderInnParser(BaseParser):
         return rows
 
 
+@profiled
 def run(raw_path_in: str, out_path: str) -> None:
     runner = OrderInnParser(input_path=raw_path_in, out_path=out_path)
     runner.run()
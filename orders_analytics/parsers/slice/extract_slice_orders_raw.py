@@ -3,16 +3,22 @@ import argparse
 import datetime as dt
 import glob
 import hashlib
+import json
 import os
 import re
-from typing import Dict, List
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 import pdfplumber
 
-from orders_analytics.utils.constants import raw_path
+from orders_analytics.utils.constants import SLICE_MANIFEST_PATH, raw_path
+from orders_analytics.utils.datetimes import parse_datetime
 from orders_analytics.utils.normalize import normalize_money
+from orders_analytics.utils.pdf_cache import cached_value
 from orders_analytics.utils.providers import normalize_provider
+from orders_analytics.utils.profiling import profiled
 
 RAW_COLUMNS = [
     "order_id",
@@ -66,6 +72,14 @@ STATEMENT_COLUMNS = [
     "added_at",
 ]
 
+# Duplicate download of the August 2025 Ameci statement.
+SKIPPED_PDFS = {"oar-full-3057-2025-08-01-2025-08-31 (1).pdf"}
+MANIFEST_VERSION = 1
+ORDER_DATETIME_FORMATS = ("%b %d, %Y %I:%M %p",)
+OCR_RESOLUTION = 300
+# A raster must cover this share of a text-less page before adjustments OCR is considered.
+IMAGE_AREA_FRACTION = 0.25
+
 WEEKDAYS = (
     "Monday",
     "Tuesday",
@@ -123,10 +137,7 @@ def parse_time(line: str) -> str:
 def parse_order_datetime(date_str: str, time_str: str) -> str:
     if not date_str or not time_str:
         return ""
-    try:
-        return dt.datetime.strptime(f"{date_str} {time_str}", "%b %d, %Y %I:%M %p").isoformat()
-    except ValueError:
-        return ""
+    return parse_datetime(f"{date_str} {time_str}", ORDER_DATETIME_FORMATS, allow_iso=False) or ""
 
 def normalize_money_or_blank(value: str) -> str:
     if str(value or "").strip() == "-":
@@ -235,8 +246,9 @@ def infer_adjustment_order_id(
     return f"{slug}_{digest}"
 
 
-def parse_adjustments_table(page) -> List[Dict[str, str]]:
-    page_text = page.extract_text() or ""
+def parse_adjustments_table(page, page_text: Optional[str] = None) -> List[Dict[str, str]]:
+    if page_text is None:
+        page_text = page.extract_text() or ""
     if not page_text.strip():
         return []
     hits = page.search("Slice Adjustments")
@@ -318,21 +330,39 @@ def parse_adjustments_table(page) -> List[Dict[str, str]]:
     return rows
 
 
-def parse_adjustments_table_ocr(page) -> List[Dict[str, str]]:
+def has_large_image(page, min_fraction: float = IMAGE_AREA_FRACTION) -> bool:
+    page_area = float(page.width * page.height) or 1.0
+    for image in page.images:
+        area = (image["x1"] - image["x0"]) * (image["bottom"] - image["top"])
+        if area / page_area >= min_fraction:
+            return True
+    return False
+
+
+def adjustments_region_is_image(page, page_text: str) -> bool:
+    """
+    Cheap pdfplumber probe run before OCR: the page has no text layer at all but
+    carries a large raster, i.e. it was scanned or flattened. Pages with any text are
+    left to `parse_adjustments_table`.
+    """
+    if page_text.strip():
+        return False
+    return has_large_image(page)
+
+
+def ocr_page_words(page) -> Optional[Dict[str, object]]:
+    """Tesseract word boxes for a page rendered at OCR_RESOLUTION, plus the image width."""
     try:
         import pytesseract
         from PIL import Image
     except Exception:
-        return []
+        return None
 
-    image = page.to_image(resolution=300).original
+    image = page.to_image(resolution=OCR_RESOLUTION).original
     if not isinstance(image, Image.Image):
-        return []
+        return None
     data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
     n = len(data.get("text", []))
-    if n == 0:
-        return []
-
     words = []
     for i in range(n):
         text = (data["text"][i] or "").strip()
@@ -348,6 +378,29 @@ def parse_adjustments_table_ocr(page) -> List[Dict[str, str]]:
                 "line_num": data.get("line_num", [0] * n)[i],
             }
         )
+    return {"width": image.width, "words": words}
+
+
+def ocr_page_text(page) -> Optional[str]:
+    try:
+        import pytesseract
+        from PIL import Image
+    except Exception:
+        return None
+
+    image = page.to_image(resolution=OCR_RESOLUTION).original
+    if not isinstance(image, Image.Image):
+        return None
+    return pytesseract.image_to_string(image)
+
+
+def parse_adjustments_table_ocr(page) -> List[Dict[str, str]]:
+    return parse_adjustments_ocr_words(ocr_page_words(page))
+
+
+def parse_adjustments_ocr_words(ocr: Optional[Dict[str, object]]) -> List[Dict[str, str]]:
+    ocr = ocr or {}
+    words = ocr.get("words") or []
     if not words:
         return []
 
@@ -367,7 +420,7 @@ def parse_adjustments_table_ocr(page) -> List[Dict[str, str]]:
     x_date = header_words["date"]["left"]
     x_id = header_words["id"]["left"]
     x_adjust = header_words["adjustment"]["left"]
-    x_desc = header_words.get("description", {"left": image.width})["left"]
+    x_desc = header_words.get("description", {"left": ocr.get("width", 0)})["left"]
     b_date_id = (x_date + x_id) / 2
     b_id_amt = (x_id + x_adjust) / 2
     b_amt_desc = (x_adjust + x_desc) / 2
@@ -541,8 +594,34 @@ def parse_pdf(
     orders: List[Dict[str, str]] = []
     adjustments: List[Dict[str, str]] = []
     statements: List[Dict[str, str]] = []
+    ocr_stats = {"pages": 0, "cached": 0, "seconds": 0.0}
+    file_key = ""
+
+    def cached_ocr(page_index: int, kind: str, compute):
+        # OCR output is cached per page (statement hash + page number), so re-runs and
+        # manifest rebuilds never rasterize the same page twice.
+        nonlocal file_key
+        if not file_key:
+            file_key = file_sha256(path)
+        computed = []
+
+        def run_ocr():
+            started = time.perf_counter()
+            value = compute()
+            ocr_stats["seconds"] += time.perf_counter() - started
+            computed.append(True)
+            return value
+
+        value = cached_value(f"{file_key}-p{page_index}", f"{kind}{OCR_RESOLUTION}", run_ocr)
+        if value is not None:
+            ocr_stats["pages"] += 1
+            if not computed:
+                ocr_stats["cached"] += 1
+        return value
+
     with pdfplumber.open(path) as pdf:
-        text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+        page_texts = [page.extract_text() or "" for page in pdf.pages]
+        text = "\n".join(page_texts)
 
         restaurant_name = parse_restaurant_name(text)
         provider = normalize_provider(restaurant_name)
@@ -550,7 +629,13 @@ def parse_pdf(
         account_id = parse_account_id(text)
 
         for page_index, page in enumerate(pdf.pages):
-            for adjustment in parse_adjustments_table(page):
+            page_text = page_texts[page_index]
+            page_adjustments = parse_adjustments_table(page, page_text)
+            if not page_adjustments and adjustments_region_is_image(page, page_text):
+                page_adjustments = parse_adjustments_ocr_words(
+                    cached_ocr(page_index, "ocr_words", lambda: ocr_page_words(page))
+                )
+            for adjustment in page_adjustments:
                 adjustments.append(
                     {
                         **adjustment,
@@ -571,17 +656,8 @@ def parse_pdf(
                 )
 
             if page_index == 0:
-                page_text = page.extract_text() or ""
                 if not page_text:
-                    try:
-                        import pytesseract
-                        from PIL import Image
-                    except Exception:
-                        page_text = ""
-                    else:
-                        image = page.to_image(resolution=300).original
-                        if isinstance(image, Image.Image):
-                            page_text = pytesseract.image_to_string(image)
+                    page_text = cached_ocr(page_index, "ocr_text", lambda: ocr_page_text(page)) or ""
                 for statement in parse_statement_summary(page_text):
                     statements.append(
                         {
@@ -731,23 +807,110 @@ def parse_pdf(
         if new_has_dt and not current_has_dt:
             deduped_adjustments[key] = adjustment
 
-    return {"orders": orders, "adjustments": list(deduped_adjustments.values()), "statements": statements}
+    return {
+        "orders": orders,
+        "adjustments": list(deduped_adjustments.values()),
+        "statements": statements,
+        "ocr": ocr_stats,
+    }
 
 
-def parse_dir(root: str) -> Dict[str, List[Dict[str, str]]]:
+def list_pdfs(root: str) -> List[str]:
+    return sorted(
+        path
+        for path in glob.glob(os.path.join(root, "**", "*.pdf"), recursive=True)
+        if os.path.basename(path) not in SKIPPED_PDFS
+    )
+
+
+def parse_paths(paths: List[str], workers: int = 1) -> Dict[str, Dict[str, List[Dict[str, str]]]]:
+    """Parse each PDF, in a process pool when `workers > 1`; keyed by path in input order."""
+    if workers <= 1 or len(paths) <= 1:
+        return {path: parse_pdf(path) for path in paths}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(paths, executor.map(parse_pdf, paths)))
+
+
+def parse_dir(root: str, workers: int = 1) -> Dict[str, List[Dict[str, str]]]:
     orders: List[Dict[str, str]] = []
     adjustments: List[Dict[str, str]] = []
     statements: List[Dict[str, str]] = []
-    for path in glob.glob(os.path.join(root, "**", "*.pdf"), recursive=True):
-        if os.path.basename(path) == "oar-full-3057-2025-08-01-2025-08-31 (1).pdf":
-            continue
-        parsed = parse_pdf(path)
+    for parsed in parse_paths(list_pdfs(root), workers).values():
         orders.extend(parsed["orders"])
         adjustments.extend(parsed["adjustments"])
         statements.extend(parsed["statements"])
     return {"orders": orders, "adjustments": adjustments, "statements": statements}
 
 
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path: str) -> Dict[str, object]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest
+
+
+def save_manifest(path: str, manifest: Dict[str, object]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def scan_changes(
+    paths: List[str],
+    previous: Dict[str, Dict[str, object]],
+) -> Tuple[Dict[str, Dict[str, object]], List[str]]:
+    """
+    Compare PDFs on disk to the manifest. Size and mtime short-circuit the check; a
+    touched file whose SHA-256 is unchanged keeps its rows. Returns the refreshed
+    manifest entries and the paths whose contents are new or changed.
+    """
+    entries: Dict[str, Dict[str, object]] = {}
+    changed: List[str] = []
+    for path in paths:
+        stat = os.stat(path)
+        entry = previous.get(path)
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime:
+            entries[path] = entry
+            continue
+        digest = file_sha256(path)
+        if entry and entry.get("sha256") == digest:
+            entries[path] = {**entry, "size": stat.st_size, "mtime": stat.st_mtime}
+            continue
+        entries[path] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": digest,
+            "source_file": os.path.basename(path),
+        }
+        changed.append(path)
+    return entries, changed
+
+
+def read_rows_by_source(path: str) -> Dict[str, List[Dict[str, str]]]:
+    grouped: Dict[str, List[Dict[str, str]]] = {}
+    if not os.path.exists(path):
+        return grouped
+    for row in pd.read_csv(path, dtype=str).fillna("").to_dict("records"):
+        grouped.setdefault(str(row.get("source_file", "") or ""), []).append(row)
+    return grouped
+
+
 def upsert_raw(
     existing_path: str,
     new_rows: List[Dict[str, str]],
@@ -803,19 +966,93 @@ def write_raw(path: str, rows: List[Dict[str, str]], columns: List[str]) -> int:
     return len(rows)
 
 
+def report_ocr(parsed_by_path: Dict[str, Dict[str, object]]) -> None:
+    """Print OCR pages and time per statement so the monthly OCR cost is visible."""
+    total_pages = 0
+    total_cached = 0
+    total_seconds = 0.0
+    for path, parsed in parsed_by_path.items():
+        stats = parsed.get("ocr") or {}
+        pages = int(stats.get("pages", 0))
+        if not pages:
+            continue
+        cached = int(stats.get("cached", 0))
+        seconds = float(stats.get("seconds", 0.0))
+        rows = parsed.get("statements") or parsed.get("orders") or parsed.get("adjustments") or []
+        period = rows[0].get("statement_period_start", "") if rows else ""
+        print(
+            f"OCR {os.path.basename(path)} ({period or 'unknown period'}): "
+            f"{pages} page(s), {cached} cached, {seconds:.1f}s"
+        )
+        total_pages += pages
+        total_cached += cached
+        total_seconds += seconds
+    if total_pages:
+        print(f"OCR total: {total_pages} page(s), {total_cached} cached, {total_seconds:.1f}s")
+
+
+@profiled
 def run(
     root: str,
     orders_out: str,
     adjustments_out: str = None,
     statements_out: str = None,
+    incremental: bool = True,
+    workers: int = 1,
+    manifest_path: str = SLICE_MANIFEST_PATH,
 ) -> int:
-    parsed = parse_dir(root)
     adjustments_out = adjustments_out or raw_path("slice", "adjustments_raw.csv")
     statements_out = statements_out or raw_path("slice", "statements_raw.csv")
+    outputs = {
+        "orders": (orders_out, RAW_COLUMNS),
+        "adjustments": (adjustments_out, ADJUSTMENT_COLUMNS),
+        "statements": (statements_out, STATEMENT_COLUMNS),
+    }
+    output_paths = [out for out, _ in outputs.values()]
+
+    manifest = load_manifest(manifest_path) if incremental else {}
+    # The manifest only describes rows still on disk in the same outputs.
+    if manifest.get("outputs") != output_paths or not all(os.path.exists(p) for p in output_paths):
+        manifest = {}
+    previous: Dict[str, Dict[str, object]] = manifest.get("files", {})
+
+    paths = list_pdfs(root)
+    entries, changed = scan_changes(paths, previous)
+    removed = [path for path in previous if path not in entries]
+    # Rows are attributed to PDFs by basename (source_file), so every PDF sharing a
+    # basename with a changed or removed file is re-parsed together.
+    dirty_sources = {os.path.basename(path) for path in changed + removed}
+    parsed_by_path = parse_paths(
+        [path for path in paths if os.path.basename(path) in dirty_sources], workers
+    )
+    retained = {
+        key: read_rows_by_source(out) if previous else {}
+        for key, (out, _) in outputs.items()
+    }
+
+    parsed: Dict[str, List[Dict[str, str]]] = {key: [] for key in outputs}
+    emitted_sources = set()
+    for path in paths:
+        source = os.path.basename(path)
+        if path in parsed_by_path:
+            for key in outputs:
+                parsed[key].extend(parsed_by_path[path][key])
+            entries[path]["rows"] = {key: len(parsed_by_path[path][key]) for key in outputs}
+            entries[path]["ocr"] = parsed_by_path[path]["ocr"]
+            continue
+        if source in emitted_sources:
+            continue
+        emitted_sources.add(source)
+        for key in outputs:
+            parsed[key].extend(retained[key].get(source, []))
 
     updated_orders = write_raw(orders_out, parsed["orders"], RAW_COLUMNS)
     updated_adjustments = write_raw(adjustments_out, parsed["adjustments"], ADJUSTMENT_COLUMNS)
     updated_statements = write_raw(statements_out, parsed["statements"], STATEMENT_COLUMNS)
+    save_manifest(
+        manifest_path,
+        {"version": MANIFEST_VERSION, "outputs": output_paths, "files": entries},
+    )
     orders_count = None
     phone_orders_count = None
     for row in parsed["statements"]:
@@ -837,6 +1074,11 @@ def run(
                 "WARNING: Slice orders count mismatch "
                 f"(statement {expected_total} vs extracted {actual_total})."
             )
+    print(
+        f"Parsed {len(parsed_by_path)} of {len(paths)} Slice PDF(s); "
+        f"retracted {len(removed)} removed PDF(s)"
+    )
+    report_ocr(parsed_by_path)
     print(f"Upserted {updated_orders} Slice order row(s) into {orders_out}")
     print(f"Upserted {updated_adjustments} Slice adjustment row(s) into {adjustments_out}")
     print(f"Upserted {updated_statements} Slice statement row(s) into {statements_out}")
@@ -11,6 +11,7 @@ import pandas as pd
 
 from orders_analytics.utils.constants import raw_path, wave_aroma_path
 from orders_analytics.utils.normalize import normalize_money
+from orders_analytics.utils.profiling import profiled
 
 
 def _money(value: object) -> str:
@@ -232,6 +233,7 @@ def _payment_by_invoice(accounting: pd.DataFrame) -> Dict[str, Tuple[float, floa
     return result
 
 
+@profiled
 def run(
     accounting_csv: str,
     customers_csv: str,
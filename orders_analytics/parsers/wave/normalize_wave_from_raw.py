@@ -16,6 +16,7 @@ from orders_analytics.utils.payment_types import PaymentTypes
 from orders_analytics.utils.platforms import Platforms
 from orders_analytics.utils.providers import Providers
 from orders_analytics.utils.schema import build_normalized_row, compute_expected_payout
+from orders_analytics.utils.profiling import profiled
 
 
 def load_raw(path: str) -> pd.DataFrame:
@@ -132,6 +133,7 @@ class WaveNormalizer(BaseParser):
         return normalize_rows(inputs["orders_raw"].to_dict("records"))
 
 
+@profiled
 def run(orders_raw_path: str, out_path: str, reset_errors: bool = False) -> int:
     parser = WaveNormalizer(
         input_path=orders_raw_path,
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark: wall time of `cli.py --help` and of importing each platform's
+entry points (from the platform registry), each in a fresh interpreter.
+
+    python3 orders_analytics/scripts/bench_imports.py --repeat 5 --max-help-seconds 0.5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from orders_analytics.utils.platform_registry import PLATFORM_SPECS
+
+LOAD_PLATFORM = """
+from orders_analytics.utils.platform_registry import get_spec, load
+spec = get_spec({platform!r})
+for step in spec.extract + spec.normalize:
+    load(step.target)
+if spec.parser:
+    load(spec.parser)
+"""
+
+
+def _time_command(command: List[str], repeat: int) -> Optional[float]:
+    """Median wall seconds over `repeat` runs, or None if the command fails."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = subprocess.run(command, cwd=REPO_ROOT, capture_output=True)
+        if result.returncode != 0:
+            return None
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def run(platforms: List[str], repeat: int = 3, max_help_seconds: float = 0.0) -> int:
+    baseline = _time_command([sys.executable, "-c", "pass"], repeat) or 0.0
+    help_s = _time_command([sys.executable, "-m", "orders_analytics.cli", "--help"], repeat)
+    print(f"{'target':<24} {'wall s':>8} {'imports s':>10}")
+    print(f"{'python -c pass':<24} {baseline:>8.3f}")
+    if help_s is None:
+        print(f"{'cli --help':<24} {'failed':>8}")
+    else:
+        print(f"{'cli --help':<24} {help_s:>8.3f} {help_s - baseline:>10.3f}")
+    for platform in platforms:
+        seconds = _time_command(
+            [sys.executable, "-c", LOAD_PLATFORM.format(platform=platform)], repeat
+        )
+        if seconds is None:
+            # Usually a parser dependency (pdfplumber, openpyxl, ...) that is not installed.
+            print(f"{platform:<24} {'failed':>8}")
+        else:
+            print(f"{platform:<24} {seconds:>8.3f} {seconds - baseline:>10.3f}")
+    if max_help_seconds and (help_s is None or help_s > max_help_seconds):
+        print(f"cli --help exceeded {max_help_seconds:.2f}s")
+        return 1
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark CLI and per-platform import time.")
+    parser.add_argument(
+        "--platform",
+        action="append",
+        default=None,
+        help="Platform to time (can repeat; default: every registered platform).",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per target (median is reported).")
+    parser.add_argument(
+        "--max-help-seconds",
+        type=float,
+        default=0.0,
+        help="Exit non-zero if `cli.py --help` takes longer than this.",
+    )
+    args = parser.parse_args()
+    platforms = args.platform or [spec.name for spec in PLATFORM_SPECS]
+    raise SystemExit(run(platforms, args.repeat, args.max_help_seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,67 @@
 #!/usr/bin/env python3
 import argparse
+import hashlib
 import io
 import os
 import re
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple
 
 import pandas as pd
 import pdfplumber
 
-from orders_analytics.utils.constants import raw_path, takeout_path
+from orders_analytics.utils.constants import ZIP_MEMBER_CACHE_DIR, raw_path, takeout_path
+from orders_analytics.utils.pdf_cache import cached_value
 from orders_analytics.utils.providers import normalize_provider
+from orders_analytics.utils.xlsx_reader import read_sheets, sheet_frame
 from orders_analytics.parsers.menustar.extract_menustar_billings_raw import (
     parse_csv_rows,
     RAW_COLUMNS as BILLING_COLUMNS,
     allowed_menustar_restaurant,
     upsert_raw,
 )
+from orders_analytics.utils.profiling import profiled
+
+
+# Bump when cached member results change shape or semantics.
+ZIP_CACHE_VERSION = "1"
+
+
+def member_key(info: zipfile.ZipInfo) -> str:
+    """Cache key for a ZIP member: its basename, CRC-32 and uncompressed size."""
+    ident = f"{os.path.basename(info.filename)}:{info.CRC:08x}:{info.file_size}"
+    return hashlib.sha256(ident.encode("utf-8")).hexdigest()
+
+
+def _member_cache(info: zipfile.ZipInfo, kind: str, compute):
+    return cached_value(
+        member_key(info), kind, compute, cache_dir=ZIP_MEMBER_CACHE_DIR, version=ZIP_CACHE_VERSION
+    )
+
+
+def parse_order_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo) -> List[Dict[str, str]]:
+    name = info.filename
+    basename = os.path.basename(name)
+    allowed, _ = allowed_menustar_restaurant(basename.replace(".csv", "").replace(".xlsx", ""))
+    if not allowed:
+        return []
+    if name.lower().endswith(".csv"):
+        with zf.open(info) as member:
+            text = io.TextIOWrapper(member, encoding="utf-8", errors="ignore", newline="").read()
+    else:
+        sheets = read_sheets(zf.read(info), sheets=(0,))
+        text = sheet_frame(next(iter(sheets.values()), [])).to_csv(index=False)
+    provider = normalize_provider(basename)
+    parsed = parse_csv_rows(text, provider, basename, "")
+    for row in parsed:
+        row["statement_source_file"] = basename
+    return parsed
 
 
 def extract_orders_from_zip(zip_path: Path) -> List[Dict[str, str]]:
-    rows: List[Dict[str, str]] = []
-    with zipfile.ZipFile(zip_path) as zf:
-        for name in zf.namelist():
-            lower = name.lower()
-            if not lower.endswith((".csv", ".xlsx")):
-                continue
-            payload = zf.read(name)
-            if lower.endswith(".csv"):
-                text = payload.decode(errors="ignore")
-            else:
-                df = pd.read_excel(io.BytesIO(payload))
-                text = df.to_csv(index=False)
-            basename = os.path.basename(name)
-            allowed, _ = allowed_menustar_restaurant(basename.replace(".csv", "").replace(".xlsx", ""))
-            if not allowed:
-                continue
-            provider = normalize_provider(basename)
-            parsed = parse_csv_rows(text, provider, basename, "")
-            for row in parsed:
-                row["statement_source_file"] = basename
-                row["source_file"] = f"{zip_path.name}:{name}"
-            rows.extend(parsed)
-    return rows
+    return ingest_zip(zip_path)[0]
 
 
 def parse_pdf_summary(pdf_bytes: bytes, source_name: str) -> Dict[str, str] | None:
@@ -87,36 +105,69 @@ def parse_pdf_summary(pdf_bytes: bytes, source_name: str) -> Dict[str, str] | No
 
 
 def extract_yearly_from_zip(zip_path: Path) -> List[Dict[str, str]]:
-    rows: List[Dict[str, str]] = []
+    return ingest_zip(zip_path)[1]
+
+
+def ingest_zip(zip_path: Path) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """
+    Order rows and yearly summaries from one ZIP, in member order. Members are read
+    straight from the archive, and parsed results are cached by `member_key`, so
+    members seen before (in this or any other ZIP) are not decompressed again.
+    """
+    order_rows: List[Dict[str, str]] = []
+    yearly_rows: List[Dict[str, str]] = []
+    zip_path = Path(zip_path)
     with zipfile.ZipFile(zip_path) as zf:
-        for name in zf.namelist():
-            if not name.lower().endswith(".pdf"):
-                continue
-            payload = zf.read(name)
-            summary = parse_pdf_summary(payload, f"{zip_path.name}:{name}")
-            if summary:
-                rows.append(summary)
-    return rows
+        for info in zf.infolist():
+            source = f"{zip_path.name}:{info.filename}"
+            lower = info.filename.lower()
+            if lower.endswith((".csv", ".xlsx")):
+                parsed = _member_cache(
+                    info, "menustar-zip-orders", lambda: parse_order_member(zf, info)
+                )
+                for row in parsed:
+                    row["source_file"] = source
+                order_rows.extend(parsed)
+            elif lower.endswith(".pdf"):
+                cached = _member_cache(
+                    info,
+                    "menustar-zip-summary",
+                    lambda: {"summary": parse_pdf_summary(zf.read(info), "")},
+                )
+                if cached["summary"]:
+                    yearly_rows.append({**cached["summary"], "source_file": source})
+    return order_rows, yearly_rows
 
 
-def collect_zip_rows(zip_dir: Path) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+def collect_zip_rows(
+    zip_dir: Path, workers: int = 1
+) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """Ingest every ZIP in `zip_dir`, in a process pool when `workers > 1`."""
     order_rows: List[Dict[str, str]] = []
     yearly_rows: List[Dict[str, str]] = []
-    for zip_path in sorted(zip_dir.glob("*.zip")):
-        order_rows.extend(extract_orders_from_zip(zip_path))
-        yearly_rows.extend(extract_yearly_from_zip(zip_path))
+    zip_paths = sorted(zip_dir.glob("*.zip"))
+    if workers <= 1 or len(zip_paths) <= 1:
+        results = [ingest_zip(zip_path) for zip_path in zip_paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(ingest_zip, zip_paths))
+    for orders, yearly in results:
+        order_rows.extend(orders)
+        yearly_rows.extend(yearly)
     return order_rows, yearly_rows
 
 
+@profiled
 def run(
     zip_dir: str,
     orders_out: str,
     yearly_out: str,
     merge_into_billings: bool = False,
     billings_out: str = "",
+    workers: int = 1,
 ) -> Tuple[int, int]:
     zip_dir_path = Path(zip_dir)
-    order_rows, yearly_rows = collect_zip_rows(zip_dir_path)
+    order_rows, yearly_rows = collect_zip_rows(zip_dir_path, workers=workers)
 
     if order_rows:
         os.makedirs(os.path.dirname(orders_out), exist_ok=True)
@@ -166,6 +217,12 @@ def main() -> None:
         default=raw_path("menustar", "billings_raw.csv"),
         help="MenuStar billings_raw CSV path used when --merge-into-billings is set.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Process zip files across N processes.",
+    )
     args = parser.parse_args()
     run(
         zip_dir=args.zip_dir,
@@ -173,6 +230,7 @@ def main() -> None:
         yearly_out=args.yearly_out,
         merge_into_billings=args.merge_into_billings,
         billings_out=args.billings_out,
+        workers=args.workers,
     )
 
 
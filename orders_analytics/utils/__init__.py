@@ -1,4 +1,4 @@
-from .constants import DATE_GRAINS, DEFAULT_DB_PATH, NORMALIZED_DIR, PLATFORMS, PROVIDERS, RAW_DIR
+from .constants import DATE_GRAINS, DEFAULT_DB_PATH, NORMALIZED_DIR, RAW_DIR
 
 __all__ = [
     "DATE_GRAINS",
@@ -8,3 +8,11 @@ __all__ = [
     "PROVIDERS",
     "RAW_DIR",
 ]
+
+
+def __getattr__(name: str):
+    if name in ("PLATFORMS", "PROVIDERS"):
+        from . import constants
+
+        return getattr(constants, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
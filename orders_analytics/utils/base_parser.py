@@ -1,29 +1,35 @@
 from __future__ import annotations
 
+import csv
+import functools
 import os
+import tempfile
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from orders_analytics.utils.errors import reconcile_errors, clear_errors_for_platform
-from orders_analytics.utils.schema import canonicalize_rows, write_normalized_rows, compute_expected_payout
+from orders_analytics.utils.schema import (
+    CANONICAL_COLUMNS,
+    canonicalize_rows,
+    write_normalized_rows,
+    compute_expected_payout,
+)
+from orders_analytics.utils.columnar_validation import validate_rows
+from orders_analytics.utils.external_sort import DedupeIndex, SortedRuns, order_datetime_key
+from orders_analytics.utils.normalized_changes import diff_hashes, diff_rows, row_hash
+from orders_analytics.utils.normalized_parquet import (
+    NormalizedParquetWriter,
+    parquet_path,
+    write_normalized_parquet,
+)
+from orders_analytics.utils.profiling import collect, stage
 from orders_analytics.utils.validation import (
     normalize_order_type,
     normalize_payment_type,
     normalize_phone,
-    validate_enum_fields,
-    validate_delivery_fee,
-    validate_required_fields,
-    validate_tax_fields,
-    validate_test_customer_names,
-    validate_negative_fees,
-    validate_cash_processing_fee,
-    validate_total_components,
-    validate_order_datetime_iso,
-    validate_canonical_columns,
-    validate_payout_expected,
 )
-from orders_analytics.utils.constants import ERRORS_PATH
+from orders_analytics.utils.constants import ERRORS_PATH, STREAM_SPILL_DIR, TRUE_VALUES
+from orders_analytics.utils.datetimes import datetime_stats, reset_datetime_stats
 
 
 @dataclass
@@ -35,6 +41,9 @@ class ParseStats:
     conflicts: List[Dict[str, object]] = field(default_factory=list)
     warnings: List[str] = field(default_factory=list)
     errors: List[Dict[str, str]] = field(default_factory=list)
+    stages: List[Dict[str, object]] = field(default_factory=list)
+    changes: Dict[str, int] = field(default_factory=dict)  # inserted/updated/deleted vs the previous output
+    datetimes: Dict[str, Dict[str, object]] = field(default_factory=dict)  # `datetime_stats()` per column
 
 
 class BaseParser:
@@ -49,6 +58,10 @@ class BaseParser:
         "delivery_fee",
         "misc_fee",
     )
+    # Streaming runs (`--extra streaming=1`) process `parse_batches` output one batch
+    # at a time; see `_run_streaming_stages`.
+    streaming: bool = False
+    batch_rows: int = 50_000
 
     def __init__(
         self,
@@ -60,6 +73,8 @@ class BaseParser:
         self.out_path = out_path
         self.stats = ParseStats()
         self.reset_errors = bool(kwargs.pop("reset_errors", False))
+        self.streaming = str(kwargs.pop("streaming", self.streaming)).strip().lower() in TRUE_VALUES
+        self.batch_rows = int(kwargs.pop("batch_rows", None) or self.batch_rows)
         self.extra = kwargs
 
     def default_input_path(self) -> str:
@@ -79,6 +94,14 @@ class BaseParser:
     def parse_rows(self, inputs) -> List[Dict[str, str]]:
         raise NotImplementedError
 
+    def parse_batches(self, input_path: str) -> Iterator[List[Dict[str, str]]]:
+        """
+        Streaming counterpart of `load_inputs` + `parse_rows`: parsed rows in batches of
+        about `batch_rows`. By default the whole input is a single batch; parsers whose
+        rows can be built a chunk of input at a time override this.
+        """
+        yield self.parse_rows(self.load_inputs(input_path))
+
     def pre_process(self, rows: List[Dict[str, str]]) -> List[Dict[str, str]]:
         return rows
 
@@ -86,6 +109,30 @@ class BaseParser:
         return compute_expected_payout(row)
 
     def post_process(self, rows: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        with stage("normalize_values", rows_in=len(rows)):
+            self._normalize_values(rows)
+        with stage("validators", rows_in=len(rows)):
+            errors = validate_rows(
+                rows,
+                source=self.resolve_paths()[1],
+                skip_tax_on_negative_payout=self.tax_validation_skip_negative_payout,
+                total_components=list(self.total_components_fields),
+            )
+        if errors:
+            self.stats.errors.extend(errors)
+        with stage("geocode_cache", rows_in=len(rows)):
+            try:
+                from orders_analytics.utils.geocodio import apply_cache_to_rows
+
+                rows = apply_cache_to_rows(rows)
+            except Exception:
+                pass
+
+        with stage("sort", rows_in=len(rows)):
+            rows = sorted(rows, key=order_datetime_key)
+        return rows
+
+    def _normalize_values(self, rows: List[Dict[str, str]]) -> None:
         # Normalize "nan"/None-like values to empty strings for consistency.
         for row in rows:
             row["order_type"] = normalize_order_type(str(row.get("order_type") or ""))
@@ -105,56 +152,6 @@ class BaseParser:
                     row[key] = ""
             if not str(row.get("expected_payout") or "").strip():
                 row["expected_payout"] = self.compute_expected_payout(row)
-        validators = [
-            validate_canonical_columns,
-            validate_required_fields,
-            validate_enum_fields,
-            validate_delivery_fee,
-            validate_tax_fields,
-            validate_test_customer_names,
-            validate_negative_fees,
-            validate_cash_processing_fee,
-            validate_order_datetime_iso,
-            validate_payout_expected,
-        ]
-        for validator in validators:
-            if validator is validate_tax_fields:
-                rows, errors = validator(
-                    rows,
-                    source=self.resolve_paths()[1],
-                    skip_on_negative_payout=self.tax_validation_skip_negative_payout,
-                )
-            else:
-                rows, errors = validator(rows, source=self.resolve_paths()[1])
-            if errors:
-                self.stats.errors.extend(errors)
-        rows, errors = validate_total_components(
-            rows,
-            source=self.resolve_paths()[1],
-            components=list(self.total_components_fields),
-        )
-        if errors:
-            self.stats.errors.extend(errors)
-        try:
-            from orders_analytics.utils.geocodio import apply_cache_to_rows
-
-            rows = apply_cache_to_rows(rows)
-        except Exception:
-            pass
-        def sort_key(row: Dict[str, str]) -> tuple:
-            value = str(row.get("order_datetime") or "").strip()
-            if not value:
-                return (1, "")
-            try:
-                dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
-                if dt.tzinfo is not None:
-                    dt = dt.replace(tzinfo=None)
-                return (0, dt)
-            except ValueError:
-                return (1, value)
-
-        rows = sorted(rows, key=sort_key)
-        return rows
 
     def validate(self, rows: List[Dict[str, str]]) -> List[str]:
         return []
@@ -183,42 +180,161 @@ class BaseParser:
                 seen[key] = row
                 continue
             duplicates_removed += 1
-            existing = seen[key]
-            for field in set(existing.keys()).union(row.keys()):
-                old = existing.get(field, "")
-                new = row.get(field, "")
-                if not old and new:
-                    existing[field] = new
-                    continue
-                if old and new and old != new:
-                    if key not in conflicts_map:
-                        conflicts_map[key] = {}
-                    if field not in conflicts_map[key]:
-                        conflicts_map[key][field] = {"first": old, "other": new}
-        conflicts = [
+            self._merge_duplicate(seen[key], row, key, conflicts_map)
+        return list(seen.values()), self._conflicts(conflicts_map), duplicates_removed
+
+    @staticmethod
+    def _merge_duplicate(
+        existing: Dict[str, str],
+        row: Dict[str, str],
+        key: str,
+        conflicts_map: Dict[str, Dict[str, Dict[str, str]]],
+    ) -> None:
+        # Blanks are filled from the duplicate; differing values are kept and reported.
+        for field in set(existing.keys()).union(row.keys()):
+            old = existing.get(field, "")
+            new = row.get(field, "")
+            if not old and new:
+                existing[field] = new
+                continue
+            if old and new and old != new:
+                if key not in conflicts_map:
+                    conflicts_map[key] = {}
+                if field not in conflicts_map[key]:
+                    conflicts_map[key][field] = {"first": old, "other": new}
+
+    @staticmethod
+    def _conflicts(conflicts_map: Dict[str, Dict[str, Dict[str, str]]]) -> List[Dict[str, object]]:
+        return [
             {"order_id": key, "diffs": [{"field": f, **vals} for f, vals in fields.items()]}
             for key, fields in conflicts_map.items()
         ]
-        return list(seen.values()), conflicts, duplicates_removed
 
     def run(self) -> ParseStats:
-        """Standard parser flow: load → parse → pre/post → drop null ids → dedupe → validate → write."""
+        """Standard parser flow: load → parse → pre/post → drop null ids → dedupe → validate → write (CSV + Parquet)."""
+        reset_datetime_stats()
+        with collect() as records:
+            if self.streaming:
+                self._run_streaming_stages()
+            else:
+                self._run_stages()
+        self.stats.stages = [vars(record) for record in records]
+        self.stats.datetimes = datetime_stats()
+        return self.stats
+
+    def _run_stages(self) -> None:
         input_path, out_path = self.resolve_paths()
-        inputs = self.load_inputs(input_path)
-        rows = self.parse_rows(inputs)
+        with stage("load_inputs"):
+            inputs = self.load_inputs(input_path)
+        with stage("parse_rows") as timed:
+            rows = self.parse_rows(inputs)
+            timed.rows_out = len(rows)
         self.stats.rows_parsed = len(rows)
-        rows = self.pre_process(rows)
-        rows = self.post_process(rows)
-        rows = self.drop_null_keys(rows, self.dedupe_key)
-        rows, conflicts, duplicates_removed = self.dedupe_rows(rows, self.dedupe_key)
+        with stage("pre_process", rows_in=len(rows)) as timed:
+            rows = self.pre_process(rows)
+            timed.rows_out = len(rows)
+        with stage("post_process", rows_in=len(rows)) as timed:
+            rows = self.post_process(rows)
+            timed.rows_out = len(rows)
+        with stage("dedupe", rows_in=len(rows)) as timed:
+            rows = self.drop_null_keys(rows, self.dedupe_key)
+            rows, conflicts, duplicates_removed = self.dedupe_rows(rows, self.dedupe_key)
+            timed.rows_out = len(rows)
         self.stats.conflicts = conflicts
         self.stats.duplicates_removed = duplicates_removed
-        self.stats.warnings.extend(self.validate(rows))
-        rows = canonicalize_rows(rows)
-        os.makedirs(os.path.dirname(out_path), exist_ok=True)
-        write_normalized_rows(rows, out_path)
-        if self.reset_errors:
-            clear_errors_for_platform(ERRORS_PATH, self.platform)
-        reconcile_errors(self.stats.errors, ERRORS_PATH)
+        with stage("validate", rows_in=len(rows)):
+            self.stats.warnings.extend(self.validate(rows))
+        with stage("write", rows_in=len(rows)):
+            rows = canonicalize_rows(rows)
+            changes = diff_rows(rows, out_path, self.platform, key=self.dedupe_key)
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            write_normalized_rows(rows, out_path)
+        with stage("write_parquet", rows_in=len(rows)):
+            write_normalized_parquet(rows, parquet_path(out_path))
+        with stage("changelog", rows_in=len(rows)):
+            changes.record()
+        self.stats.changes = changes.counts()
+        with stage("reconcile_errors", rows_in=len(self.stats.errors)):
+            if self.reset_errors:
+                clear_errors_for_platform(ERRORS_PATH, self.platform)
+            reconcile_errors(self.stats.errors, ERRORS_PATH)
         self.stats.rows_written = len(rows)
-        return self.stats
+
+    def _run_streaming_stages(self) -> None:
+        """
+        `_run_stages` with memory bounded by `batch_rows`: each `parse_batches` batch is
+        pre/post-processed (validators included) and spilled as a sorted run; the runs
+        are merged on `order_datetime` into a SQLite dedupe index, whose rows are then
+        written out (CSV, Parquet, changelog) a batch at a time, `validate` included.
+        The output matches a regular run; error records come out batch by batch.
+        """
+        input_path, out_path = self.resolve_paths()
+        os.makedirs(STREAM_SPILL_DIR, exist_ok=True)
+        with tempfile.TemporaryDirectory(prefix=f"{self.platform.lower()}_", dir=STREAM_SPILL_DIR) as work_dir:
+            runs = SortedRuns(os.path.join(work_dir, "runs"))
+            with stage("parse_batches") as timed:
+                for rows in self.parse_batches(input_path):
+                    self.stats.rows_parsed += len(rows)
+                    rows = self.pre_process(rows)
+                    runs.add(self.post_process(rows))
+                timed.rows_out = self.stats.rows_parsed
+
+            index = DedupeIndex(os.path.join(work_dir, "dedupe.sqlite"))
+            try:
+                conflicts_map: Dict[str, Dict[str, Dict[str, str]]] = {}
+                merge = functools.partial(self._merge_duplicate, conflicts_map=conflicts_map)
+                with stage("dedupe", rows_in=self.stats.rows_parsed) as timed:
+                    kept = 0
+                    keyed_rows: List[Tuple[str, Dict[str, str]]] = []
+                    for row in runs.merged():
+                        key = str(row.get(self.dedupe_key) or "").strip()
+                        if key:
+                            keyed_rows.append((key, row))
+                        if len(keyed_rows) >= self.batch_rows:
+                            kept += index.add(keyed_rows, merge)
+                            self.stats.duplicates_removed += len(keyed_rows)
+                            keyed_rows = []
+                    kept += index.add(keyed_rows, merge)
+                    self.stats.duplicates_removed += len(keyed_rows)
+                    self.stats.duplicates_removed -= kept
+                    timed.rows_out = kept
+                self.stats.conflicts = self._conflicts(conflicts_map)
+
+                # Both outputs go to temporary files first (the diff may need to read the
+                # old CSV) and are moved into place together, the CSV first: the Parquet
+                # twin is written last, so it is never older than the CSV it pairs with.
+                tmp_path = f"{out_path}.tmp"
+                hashes: Dict[str, str] = {}
+                with stage("write", rows_in=kept):
+                    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                    parquet = NormalizedParquetWriter(parquet_path(out_path), work_dir)
+                    try:
+                        with open(tmp_path, "w", newline="", encoding="utf-8") as handle:
+                            writer = csv.DictWriter(handle, fieldnames=CANONICAL_COLUMNS)
+                            writer.writeheader()
+                            for rows in index.batches(self.batch_rows):
+                                self.stats.warnings.extend(self.validate(rows))
+                                rows = canonicalize_rows(rows)
+                                for row in rows:
+                                    hashes[str(row.get(self.dedupe_key) or "")] = row_hash(row)
+                                writer.writerows(rows)
+                                parquet.add(rows)
+                        parquet.close(publish=False)
+                        changes = diff_hashes(hashes, out_path, self.platform, key=self.dedupe_key)
+                        os.replace(tmp_path, out_path)
+                        os.replace(parquet.tmp_path, parquet.path)
+                    except BaseException:
+                        parquet.discard()
+                        if os.path.exists(tmp_path):
+                            os.remove(tmp_path)
+                        raise
+            finally:
+                index.close()
+        with stage("changelog", rows_in=kept):
+            changes.record()
+        self.stats.changes = changes.counts()
+        with stage("reconcile_errors", rows_in=len(self.stats.errors)):
+            if self.reset_errors:
+                clear_errors_for_platform(ERRORS_PATH, self.platform)
+            reconcile_errors(self.stats.errors, ERRORS_PATH)
+        self.stats.rows_written = kept
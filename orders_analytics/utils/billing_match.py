@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+# Billing <-> order matching by exact string keys, done as hash joins over whole
+# frames instead of per-row dict lookups.
+
+
+@dataclass(frozen=True)
+class KeySpec:
+    """A match key: the stripped text of `columns` joined by `|`, some passed through a transform."""
+
+    name: str
+    columns: Tuple[str, ...]
+    transforms: Dict[str, Callable[[str], str]] = field(default_factory=dict)
+
+    def row_key(self, row: Dict[str, object]) -> str:
+        parts = []
+        for col in self.columns:
+            text = str(row.get(col, "")).strip()
+            transform = self.transforms.get(col)
+            parts.append(transform(text) if transform else text)
+        return "|".join(parts)
+
+    def frame_keys(self, frame: pd.DataFrame) -> pd.Series:
+        """`row_key` of every row of `frame` (missing columns and NaN read as blank)."""
+        parts: List[pd.Series] = []
+        for col in self.columns:
+            if col not in frame.columns:
+                parts.append(pd.Series("", index=frame.index, dtype=object))
+                continue
+            text = frame[col].fillna("").astype(str).str.strip()
+            transform = self.transforms.get(col)
+            if transform:
+                # Transform each distinct value once.
+                codes, uniques = pd.factorize(text)
+                mapped = pd.Index([transform(value) for value in uniques], dtype=object)
+                text = pd.Series(mapped.take(codes), index=frame.index, dtype=object)
+            parts.append(text)
+        if not parts:
+            return pd.Series("", index=frame.index, dtype=object)
+        return parts[0].str.cat(parts[1:], sep="|") if len(parts) > 1 else parts[0]
+
+
+@dataclass
+class BillingMatches:
+    """
+    Result of `match_billings`, indexed by billing row label:
+    `matched` (order_id, level, candidates), `unmatched` (the billing rows without
+    any key hit) and `ambiguous` (matched rows whose key fit several orders; the
+    order_id shown is the tie-break winner, `order_ids` lists them all).
+    """
+
+    matched: pd.DataFrame
+    unmatched: pd.DataFrame
+    ambiguous: pd.DataFrame
+
+
+def order_candidates(
+    rows: pd.DataFrame,
+    id_columns: Sequence[str],
+    score: Optional[pd.Series] = None,
+    recency_column: str = "",
+    one_per_order: bool = True,
+) -> pd.DataFrame:
+    """
+    Rows of `rows` that carry an order id (first non-blank of `id_columns`), with
+    `match_order_id`, `match_score`, `match_recency` and `match_position` (where the id
+    first appears) added. With `one_per_order` only the preferred row of each id is
+    kept: highest `score`, then latest non-blank `recency_column`, then the first row.
+    """
+    ids = pd.Series("", index=rows.index, dtype=object)
+    for col in reversed(list(id_columns)):
+        if col in rows.columns:
+            values = rows[col].fillna("").astype(str).str.strip()
+            ids = values.where(values != "", ids)
+    out = rows.assign(
+        match_order_id=ids,
+        match_score=score if score is not None else 0,
+        match_recency=(
+            rows[recency_column].fillna("").astype(str).str.strip()
+            if recency_column in rows.columns
+            else ""
+        ),
+        match_position=pd.Series(range(len(rows)), index=rows.index).groupby(ids).transform("min"),
+    )
+    out = out[out["match_order_id"] != ""]
+    if not one_per_order:
+        return out
+    # Stable sort: among equal score and recency the earlier row stays first.
+    out = out.sort_values(["match_score", "match_recency"], ascending=False, kind="stable")
+    return out.drop_duplicates("match_order_id", keep="first")
+
+
+def match_billings(
+    billings: pd.DataFrame, candidates: pd.DataFrame, levels: Sequence[KeySpec]
+) -> BillingMatches:
+    """
+    Match each billing row to an order id from `candidates` (see `order_candidates`)
+    by the first key in `levels` that hits. When one key fits several orders the
+    highest-scored candidate wins, then the most recent, then the one seen last.
+    """
+    matched_parts: List[pd.DataFrame] = []
+    ambiguous_parts: List[pd.DataFrame] = []
+    remaining = billings.index
+    ranked = candidates.sort_values(
+        ["match_score", "match_recency", "match_position"],
+        ascending=[False, False, False],
+        kind="stable",
+    )
+    for spec in levels:
+        if remaining.empty or ranked.empty:
+            break
+        keys = pd.DataFrame({"key": spec.frame_keys(ranked), "order_id": ranked["match_order_id"]})
+        grouped = keys.groupby("key", sort=False)["order_id"]
+        winners = pd.DataFrame({"order_id": grouped.first(), "candidates": grouped.size()})
+        shared = keys[keys["key"].isin(winners.index[winners["candidates"] > 1])]
+        winners["order_ids"] = shared.sort_values("order_id").groupby("key")["order_id"].agg(" | ".join)
+        billing_keys = spec.frame_keys(billings.loc[remaining])
+        hit = billing_keys[billing_keys.isin(winners.index)]
+        if hit.empty:
+            continue
+        level = winners.reindex(hit.values).set_axis(hit.index)
+        level.insert(1, "level", spec.name)
+        matched_parts.append(level[["order_id", "level", "candidates"]])
+        ambiguous_parts.append(level[level["candidates"] > 1])
+        remaining = remaining.difference(hit.index, sort=False)
+    columns = ["order_id", "level", "candidates"]
+    matched = pd.concat(matched_parts) if matched_parts else pd.DataFrame(columns=columns)
+    ambiguous = (
+        pd.concat(ambiguous_parts) if ambiguous_parts else pd.DataFrame(columns=columns + ["order_ids"])
+    )
+    return BillingMatches(
+        matched=matched.reindex(billings.index.intersection(matched.index, sort=False)),
+        unmatched=billings.loc[remaining],
+        ambiguous=ambiguous,
+    )
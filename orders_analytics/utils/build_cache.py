@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from orders_analytics.utils.constants import (
+    NORMALIZE_BUILD_CACHE_PATH,
+    RAW_DIR,
+    normalized_path,
+    raw_path,
+)
+from orders_analytics.utils.google_sheets_registry import SHEETS
+from orders_analytics.utils.platforms import Platforms
+
+BUILD_CACHE_VERSION = 2
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Read by every BaseParser run: post_process fills lat/lng from the geocodio cache.
+SHARED_INPUTS = [raw_path("geocode_cache.csv")]
+# Code outside parsers/<platform>/ and utils/ that a normalize run executes.
+EXTRA_SOURCES = {
+    Platforms.BRYGID: [
+        "scripts/brygid_normalize_report_csvs.py",
+        "scripts/brygid_merge_email_csv_orders.py",
+    ],
+}
+# Normalizers that download these Google Sheets while loading inputs; their real
+# inputs are only known after the download, so they always rebuild.
+LIVE_SHEETS = {
+    Platforms.BEYONDMENU: ["beyond_menu_order_history", "beyond_menu_annual_billing_summary"],
+    Platforms.EZCATER: ["ezcater_order_history"],
+    Platforms.GRUBHUB: ["grubhub_order_history"],
+}
+
+FileHashes = Dict[str, List[object]]  # path -> [size, mtime_ns, sha256]
+
+
+@dataclass
+class Fingerprint:
+    args: Dict[str, object]
+    sources: FileHashes = field(default_factory=dict)
+    inputs: FileHashes = field(default_factory=dict)
+
+    @property
+    def digest(self) -> str:
+        payload = {
+            "args": self.args,
+            "sources": {path: entry[2] for path, entry in self.sources.items()},
+            "inputs": {path: entry[2] for path, entry in self.inputs.items()},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Decision:
+    platform: str
+    rebuild: bool
+    reasons: List[str]
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _hash_files(paths: List[str], previous: FileHashes) -> FileHashes:
+    # Files whose size and mtime match the last build reuse its hash.
+    hashes: FileHashes = {}
+    for path in sorted(set(paths)):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        known = previous.get(path)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            hashes[path] = known
+        else:
+            hashes[path] = [stat.st_size, stat.st_mtime_ns, _sha256(path)]
+    return hashes
+
+
+def _stamp(path: str) -> Optional[List[int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _walk(root: str, suffix: str = "") -> List[str]:
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if name not in {"backups", "__pycache__"}]
+        found.extend(
+            os.path.join(dirpath, name)
+            for name in filenames
+            if name.endswith(suffix) and not name.startswith(".")
+        )
+    return found
+
+
+def source_files(platform: str) -> List[str]:
+    paths = _walk(os.path.join(PACKAGE_DIR, "parsers", platform), ".py")
+    paths += _walk(os.path.join(PACKAGE_DIR, "utils"), ".py")
+    paths += [os.path.join(PACKAGE_DIR, path) for path in EXTRA_SOURCES.get(platform, [])]
+    return [os.path.relpath(path, os.path.dirname(PACKAGE_DIR)) for path in paths]
+
+
+def input_files(platform: str, args: Dict[str, object]) -> List[str]:
+    """Everything under data/raw/<platform>/ (except backups), shared inputs and CLI path overrides."""
+    paths = _walk(os.path.join(RAW_DIR, platform)) + SHARED_INPUTS
+    for name in ("input", "orders_raw", "billings_raw"):
+        if args.get(name):
+            paths.append(str(args[name]))
+    return paths
+
+
+def output_path(platform: str, args: Dict[str, object]) -> str:
+    return str(args.get("out") or normalized_path(f"{platform}_orders_normalized.csv"))
+
+
+def live_sheets(platform: str) -> List[str]:
+    return [name for name in LIVE_SHEETS.get(platform, []) if name in SHEETS]
+
+
+def _diff(label: str, old: FileHashes, new: FileHashes) -> List[str]:
+    reasons = []
+    for path in sorted(set(old) | set(new)):
+        if path not in old:
+            reasons.append(f"new {label}: {path}")
+        elif path not in new:
+            reasons.append(f"removed {label}: {path}")
+        elif old[path][2] != new[path][2]:
+            reasons.append(f"changed {label}: {path}")
+    return reasons
+
+
+class BuildCache:
+    """
+    Fingerprints of the last successful normalize run per platform.
+
+    A fingerprint covers the platform's raw inputs, the parser/utils source and the
+    CLI arguments. Each entry also keeps the output's stamp and the errors the build
+    reconciled, so a skipped platform can replay them into errors.csv.
+    """
+
+    def __init__(self, path: str = NORMALIZE_BUILD_CACHE_PATH):
+        self.path = path
+        self.entries: Dict[str, Dict[str, object]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as handle:
+                    data = json.load(handle)
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == BUILD_CACHE_VERSION:
+                self.entries = data.get("platforms", {})
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(
+                {"version": BUILD_CACHE_VERSION, "platforms": self.entries},
+                handle,
+                indent=1,
+                default=str,
+            )
+        os.replace(tmp_path, self.path)
+
+    def fingerprint(self, platform: str, args: Dict[str, object]) -> Fingerprint:
+        entry = self.entries.get(platform, {})
+        return Fingerprint(
+            args=args,
+            sources=_hash_files(source_files(platform), entry.get("sources", {})),
+            inputs=_hash_files(input_files(platform, args), entry.get("inputs", {})),
+        )
+
+    def decide(self, platform: str, args: Dict[str, object], force: bool = False) -> Decision:
+        if force:
+            return Decision(platform, True, ["--force"])
+        sheets = live_sheets(platform)
+        if sheets:
+            return Decision(platform, True, [f"reads live Google Sheets: {', '.join(sheets)}"])
+        entry = self.entries.get(platform)
+        if not entry:
+            return Decision(platform, True, ["no previous successful build"])
+        current = self.fingerprint(platform, args)
+        reasons: List[str] = []
+        if entry.get("args") != args:
+            reasons.append(f"arguments changed: {entry.get('args')} -> {args}")
+        reasons += _diff("source", entry.get("sources", {}), current.sources)
+        reasons += _diff("input", entry.get("inputs", {}), current.inputs)
+        out_path = output_path(platform, args)
+        if entry.get("output") != _stamp(out_path):
+            reasons.append(f"output missing or modified: {out_path}")
+        if not reasons and entry.get("digest") != current.digest:
+            reasons.append("fingerprint changed")
+        if reasons:
+            return Decision(platform, True, reasons)
+        return Decision(platform, False, [f"up to date (last built {entry.get('built_at', '?')})"])
+
+    def invalidate(self, platform: str) -> None:
+        if self.entries.pop(platform, None) is not None:
+            self.save()
+
+    def record(
+        self, platform: str, args: Dict[str, object], error_ops: List[list], built_at: str
+    ) -> None:
+        """Store a successful build along with the `deferred_errors` calls it made."""
+        # Fingerprinted after the run: some normalizers write reports into their raw dir.
+        current = self.fingerprint(platform, args)
+        self.entries[platform] = {
+            "digest": current.digest,
+            "args": args,
+            "sources": current.sources,
+            "inputs": current.inputs,
+            "output": _stamp(output_path(platform, args)),
+            "errors": [[path, errors] for op, path, errors in error_ops if op == "reconcile"],
+            "built_at": built_at,
+        }
+        self.save()
+
+    def replay_errors(self, platform: str, reset_errors: bool) -> List[list]:
+        """Error calls (for `apply_error_ops`) matching what a rebuild would make."""
+        ops: List[list] = []
+        for path, errors in self.entries.get(platform, {}).get("errors", []):
+            if reset_errors:
+                ops.append(["clear", path, platform])
+            carried = [
+                {key: value for key, value in error.items() if key not in {"resolved", "resolved_time"}}
+                for error in errors
+            ]
+            ops.append(["reconcile", path, carried])
+        return ops
@@ -0,0 +1,435 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from orders_analytics.utils.datetimes import normalize_datetimes
+from orders_analytics.utils.money import format_cents, parse_cents
+from orders_analytics.utils.normalize import normalize_money
+from orders_analytics.utils.schema import CANONICAL_COLUMNS
+
+# Declarative column mappings for CSV-export parsers. A `MappingSpec` names, per
+# output field, where its value comes from (column aliases, money sums, date + time
+# composition, enum rules, note templates); `apply` evaluates every field over the
+# whole frame at once, optionally collapsing rows into one output row per group.
+# Text transforms run once per distinct value and money is summed as int cents.
+
+Columns = Union[str, Tuple[str, ...]]
+
+
+def _as_tuple(columns: Columns) -> Tuple[str, ...]:
+    return (columns,) if isinstance(columns, str) else tuple(columns)
+
+
+def header_key(name: object) -> str:
+    """Header compared loosely: newlines and repeated spaces collapsed, lowercased."""
+    return " ".join(str(name).replace("\n", " ").split()).strip().lower()
+
+
+def map_distinct(values: pd.Series, func: Callable[[str], object]) -> pd.Series:
+    """`values.map(func)`, calling `func` once per distinct value."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    mapped = np.empty(len(uniques), dtype=object)
+    mapped[:] = [func(value) for value in uniques]
+    return pd.Series(mapped.take(codes), index=values.index, dtype=object)
+
+
+class _Context:
+    """The frame being mapped: header lookup, and the group each row collapses into."""
+
+    def __init__(self, frame: pd.DataFrame, group_by: Optional[str], loose_headers: bool):
+        self.frame = frame
+        self.size = len(frame)
+        self._headers = {header_key(col): col for col in frame.columns} if loose_headers else {}
+        self._text: Dict[str, Optional[pd.Series]] = {}
+        if group_by is None:
+            self.codes: Optional[np.ndarray] = None
+            self.n_out = self.size
+            self.first_rows = np.arange(self.size)
+            self.sizes = np.ones(self.size, dtype=np.int64)
+        else:
+            keys = self.column(group_by)
+            keys = keys if keys is not None else pd.Series("", index=frame.index, dtype=object)
+            self.codes = keys.groupby(keys, sort=True).ngroup().to_numpy()
+            self.n_out = int(self.codes.max()) + 1 if self.size else 0
+            _, self.first_rows = np.unique(self.codes, return_index=True)
+            self.sizes = np.bincount(self.codes, minlength=self.n_out)
+
+    def column(self, name: str) -> Optional[pd.Series]:
+        """Raw text of `name` (exact header, else a loosely equal one), None when absent."""
+        if name not in self._text:
+            col = name if name in self.frame.columns else self._headers.get(header_key(name))
+            self._text[name] = None if col is None else self.frame[col].fillna("").astype(str)
+        return self._text[name]
+
+    def blank(self) -> pd.Series:
+        return pd.Series("", index=self.frame.index, dtype=object)
+
+    def first(self, values: np.ndarray) -> np.ndarray:
+        return values if self.codes is None else values[self.first_rows]
+
+    def group_sum(self, values: np.ndarray) -> np.ndarray:
+        if self.codes is None:
+            return values
+        totals = np.zeros(self.n_out, dtype=values.dtype)
+        np.add.at(totals, self.codes, values)
+        return totals
+
+    def group_any(self, values: np.ndarray) -> np.ndarray:
+        if self.codes is None:
+            return values
+        found = np.zeros(self.n_out, dtype=bool)
+        np.logical_or.at(found, self.codes, values)
+        return found
+
+    def distinct(self, values: pd.Series, sort: bool = False) -> List[List[str]]:
+        """Per output row, the distinct non-blank `values` of its rows (first-seen order, or sorted)."""
+        codes = self.codes if self.codes is not None else np.arange(self.size)
+        pairs = pd.DataFrame({"code": codes, "value": values.to_numpy()})
+        pairs = pairs[pairs["value"] != ""].drop_duplicates()
+        if sort:
+            pairs = pairs.sort_values(["code", "value"], kind="stable")
+        out: List[List[str]] = [[] for _ in range(self.n_out)]
+        for code, value in zip(pairs["code"].tolist(), pairs["value"].tolist()):
+            out[code].append(value)
+        return out
+
+
+@dataclass(frozen=True)
+class Values:
+    """An evaluated field: text per output row, plus cents when it is an amount."""
+
+    text: np.ndarray
+    cents: Optional[np.ndarray] = None
+    present: Optional[np.ndarray] = None
+
+
+class Field:
+    def rows(self, ctx: _Context) -> pd.Series:
+        """Text per source row."""
+        raise NotImplementedError
+
+    def evaluate(self, ctx: _Context) -> Values:
+        """Values per output row (the first row of each group unless the field aggregates)."""
+        return Values(ctx.first(self.rows(ctx).to_numpy(dtype=object)))
+
+
+@dataclass(frozen=True)
+class Const(Field):
+    value: str
+
+    def rows(self, ctx: _Context) -> pd.Series:
+        return pd.Series(self.value, index=ctx.frame.index, dtype=object)
+
+
+@dataclass(frozen=True)
+class Text(Field):
+    """
+    First non-blank of the `columns` aliases. `agg` collapses a group: `first` (its
+    first row), `distinct` / `sorted_distinct` (non-blank values joined by ` | `).
+    """
+
+    columns: Columns
+    strip: bool = True
+    agg: str = "first"
+
+    def rows(self, ctx: _Context) -> pd.Series:
+        out: Optional[pd.Series] = None
+        for name in _as_tuple(self.columns):
+            values = ctx.column(name)
+            if values is None:
+                continue
+            if self.strip:
+                values = values.str.strip()
+            out = values if out is None else out.where(out != "", values)
+        return out if out is not None else ctx.blank()
+
+    def evaluate(self, ctx: _Context) -> Values:
+        if self.agg == "first" or ctx.codes is None:
+            return super().evaluate(ctx)
+        joined = [" | ".join(values) for values in ctx.distinct(self.rows(ctx), self.agg == "sorted_distinct")]
+        return Values(np.array(joined, dtype=object))
+
+
+@dataclass(frozen=True)
+class Joined(Field):
+    """The non-blank values of `columns` (stripped), joined by `sep`: address parts and the like."""
+
+    columns: Tuple[str, ...]
+    sep: str = ", "
+
+    def rows(self, ctx: _Context) -> pd.Series:
+        parts = [Text(name).rows(ctx).tolist() for name in self.columns]
+        joined = [self.sep.join(part for part in values if part) for values in zip(*parts)]
+        return pd.Series(joined, index=ctx.frame.index, dtype=object) if parts else ctx.blank()
+
+
+@dataclass(frozen=True)
+class Mapped(Field):
+    """`func` of another field's text, called once per distinct value."""
+
+    source: Field
+    func: Callable[[str], str]
+
+    def rows(self, ctx: _Context) -> pd.Series:
+        return map_distinct(self.source.rows(ctx), self.func)
+
+    def evaluate(self, ctx: _Context) -> Values:
+        values = self.source.evaluate(ctx).text
+        return Values(map_distinct(pd.Series(values, dtype=object), self.func).to_numpy())
+
+
+@dataclass(frozen=True)
+class Enum(Field):
+    """The value of the first `(substring, value)` rule found in the lowercased source, else `default`."""
+
+    source: Field
+    rules: Tuple[Tuple[str, str], ...]
+    default: str = ""
+
+    def _lookup(self, text: str) -> str:
+        lowered = text.lower()
+        for needle, value in self.rules:
+            if needle in lowered:
+                return value
+        return self.default
+
+    def rows(self, ctx: _Context) -> pd.Series:
+        return map_distinct(self.source.rows(ctx), self._lookup)
+
+    def evaluate(self, ctx: _Context) -> Values:
+        return Mapped(self.source, self._lookup).evaluate(ctx)
+
+
+def _parse_money(text: str) -> Tuple[bool, bool, int]:
+    # (present, parsed, cents): present like `normalize_money(text) != ""`.
+    cents = parse_cents(text)
+    return normalize_money(text) != "", cents is not None, cents or 0
+
+
+def _money_columns(ctx: _Context, columns: Columns) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    values = map_distinct(Text(columns).rows(ctx), _parse_money)
+    present, parsed, cents = (np.array(part) for part in zip(*values)) if len(values) else ([], [], [])
+    return (
+        np.asarray(present, dtype=bool),
+        np.asarray(parsed, dtype=bool),
+        np.asarray(cents, dtype=np.int64),
+    )
+
+
+@dataclass(frozen=True)
+class Money(Field):
+    """One amount, as `normalize_money` writes it (first non-blank of the aliases)."""
+
+    columns: Columns
+
+    def rows(self, ctx: _Context) -> pd.Series:
+        return map_distinct(Text(self.columns).rows(ctx), normalize_money)
+
+    def evaluate(self, ctx: _Context) -> Values:
+        present, _, cents = _money_columns(ctx, self.columns)
+        return Values(ctx.first(self.rows(ctx).to_numpy(dtype=object)), ctx.first(cents), ctx.first(present))
+
+
+@dataclass(frozen=True)
+class MoneySum(Field):
+    """
+    Total of several money columns (`negate` ones subtracted) over every row of the
+    group, as canonical text. Blank when none of the values is filled in, and with
+    `blank_zero` also when they add up to zero. Values that are not amounts count 0
+    (a total made only of such values reads `0`), or with `blank_invalid` blank the
+    whole total.
+    """
+
+    columns: Tuple[str, ...]
+    negate: Tuple[str, ...] = ()
+    blank_zero: bool = False
+    blank_invalid: bool = False
+
+    def _row_cents(self, ctx: _Context) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        present = np.zeros(ctx.size, dtype=bool)
+        parsed = np.zeros(ctx.size, dtype=bool)
+        invalid = np.zeros(ctx.size, dtype=bool)
+        cents = np.zeros(ctx.size, dtype=np.int64)
+        for name in self.columns + self.negate:
+            if ctx.column(name) is None:
+                continue
+            col_present, col_parsed, col_cents = _money_columns(ctx, name)
+            present |= col_present
+            parsed |= col_parsed
+            invalid |= col_present & ~col_parsed
+            cents += -col_cents if name in self.negate else col_cents
+        return present, parsed, invalid, cents
+
+    def _text(self, present: np.ndarray, parsed: np.ndarray, invalid: np.ndarray, cents: np.ndarray) -> np.ndarray:
+        text = money_text(cents, present, self.blank_zero)
+        text[present & ~parsed & (text != "")] = "0"
+        if self.blank_invalid:
+            text[invalid] = ""
+        return text
+
+    def rows(self, ctx: _Context) -> pd.Series:
+        return pd.Series(self._text(*self._row_cents(ctx)), index=ctx.frame.index, dtype=object)
+
+    def evaluate(self, ctx: _Context) -> Values:
+        present, parsed, invalid, cents = self._row_cents(ctx)
+        present, parsed, invalid = ctx.group_any(present), ctx.group_any(parsed), ctx.group_any(invalid)
+        cents = ctx.group_sum(cents)
+        return Values(self._text(present, parsed, invalid, cents), cents, present)
+
+
+def money_text(cents: np.ndarray, present: Optional[np.ndarray] = None, blank_zero: bool = False) -> np.ndarray:
+    """`format_cents` of each amount; blank where not `present` (and with `blank_zero`, where 0)."""
+    cents = np.asarray(cents, dtype=np.int64)
+    codes, uniques = pd.factorize(cents)
+    text = np.array([format_cents(value) for value in uniques], dtype=object).take(codes)
+    blank = np.zeros(cents.size, dtype=bool) if present is None else ~np.asarray(present, dtype=bool)
+    if blank_zero:
+        blank |= cents == 0
+    return np.where(blank, "", text).astype(object)
+
+
+@dataclass(frozen=True)
+class DateTime(Field):
+    """
+    `date` (plus a `time` column, `default_time` when that is blank) through
+    `normalize_datetimes`; blank without a date. `agg="min"` keeps a group's earliest
+    ISO value (its first row's text when none normalized to ISO).
+    """
+
+    date: Columns
+    time: Optional[Columns] = None
+    formats: Tuple[str, ...] = ()
+    allow_iso: bool = True
+    default_time: str = ""
+    agg: str = "first"
+
+    def rows(self, ctx: _Context) -> pd.Series:
+        date = Text(self.date).rows(ctx)
+        if self.time is None:
+            combined = date
+        else:
+            time = Text(self.time).rows(ctx)
+            if self.default_time:
+                time = time.where(time != "", self.default_time)
+            combined = (date + " " + time).str.strip().where(date != "", "")
+        label = "/".join(_as_tuple(self.date))
+        return pd.Series(
+            normalize_datetimes(combined.to_numpy(dtype=object), self.formats, self.allow_iso, label),
+            index=combined.index,
+            dtype=object,
+        )
+
+    def evaluate(self, ctx: _Context) -> Values:
+        values = self.rows(ctx)
+        if self.agg != "min" or ctx.codes is None:
+            return Values(ctx.first(values.to_numpy(dtype=object)))
+        stamps = map_distinct(values, lambda text: pd.to_datetime(text or None, format="ISO8601", errors="coerce"))
+        parsed = stamps.notna().to_numpy()
+        text = ctx.first(values.to_numpy(dtype=object)).copy()
+        if parsed.any():
+            nanos = np.array([stamp.value for stamp in stamps[parsed]], dtype=np.int64)
+            rows = np.flatnonzero(parsed)
+            order = np.lexsort((nanos, ctx.codes[rows]))
+            codes = ctx.codes[rows][order]
+            earliest = rows[order][np.r_[True, codes[1:] != codes[:-1]]]
+            text[ctx.codes[earliest]] = [stamp.isoformat() for stamp in stamps.iloc[earliest]]
+        return Values(text)
+
+
+@dataclass(frozen=True)
+class Note:
+    """`template` (a `{}` slot) for each distinct non-blank source value not in `skip` (lowercased)."""
+
+    template: str
+    source: Field
+    skip: Tuple[str, ...] = ()
+    transform: Optional[Callable[[str], str]] = None
+
+
+@dataclass(frozen=True)
+class Notes(Field):
+    """Note templates joined by ` | ` (`dedupe` drops repeated notes)."""
+
+    notes: Tuple[Note, ...]
+    dedupe: bool = False
+
+    def evaluate(self, ctx: _Context) -> Values:
+        parts: List[np.ndarray] = []
+        for note in self.notes:
+            values = note.source.rows(ctx)
+            if note.transform is not None:
+                values = map_distinct(values, note.transform)
+            rendered = map_distinct(
+                values,
+                lambda value, note=note: ""
+                if not value or value.lower() in note.skip
+                else note.template.format(value),
+            )
+            parts.append(np.array([" | ".join(items) for items in ctx.distinct(rendered)], dtype=object))
+        return Values(join_notes(parts, self.dedupe, size=ctx.n_out))
+
+
+def join_notes(columns: Sequence[Sequence[str]], dedupe: bool = False, size: int = 0) -> np.ndarray:
+    """Per row, the non-blank entries of `columns` joined by ` | ` (`dedupe` keeps the first of equal entries)."""
+    if not columns:
+        return np.full(size, "", dtype=object)
+    joined = []
+    for entries in zip(*columns):
+        kept = [entry for entry in entries if entry]
+        joined.append(" | ".join(dict.fromkeys(kept) if dedupe else kept))
+    return np.array(joined, dtype=object)
+
+
+@dataclass
+class MappedFrame:
+    """
+    `MappingSpec.apply` output: one row per source row (or group) holding every
+    field's text, with int cents for amount fields, the number of source rows behind
+    each output row and the position of its first source row.
+    """
+
+    frame: pd.DataFrame
+    cents: Dict[str, np.ndarray]
+    present: Dict[str, np.ndarray]
+    sizes: np.ndarray
+    first_rows: np.ndarray
+
+    def rows(self, platform: str) -> List[Dict[str, str]]:
+        return normalized_rows(self.frame, platform)
+
+
+def normalized_rows(frame: pd.DataFrame, platform: str) -> List[Dict[str, str]]:
+    """Canonical row dicts (`build_normalized_row` shape) of `frame`; other columns are dropped."""
+    out = frame.reindex(columns=CANONICAL_COLUMNS, fill_value="")
+    out["platform"] = platform
+    return out.to_dict("records")
+
+
+@dataclass(frozen=True)
+class MappingSpec:
+    fields: Dict[str, Field]
+    group_by: Optional[str] = None
+    loose_headers: bool = False
+
+    def apply(self, frame: pd.DataFrame) -> MappedFrame:
+        ctx = _Context(frame, self.group_by, self.loose_headers)
+        data: Dict[str, np.ndarray] = {}
+        cents: Dict[str, np.ndarray] = {}
+        present: Dict[str, np.ndarray] = {}
+        for name, spec in self.fields.items():
+            values = spec.evaluate(ctx)
+            data[name] = values.text
+            if values.cents is not None:
+                cents[name] = values.cents
+                present[name] = values.present
+        return MappedFrame(
+            frame=pd.DataFrame(data, index=pd.RangeIndex(ctx.n_out), columns=list(self.fields)),
+            cents=cents,
+            present=present,
+            sizes=ctx.sizes,
+            first_rows=ctx.first_rows,
+        )
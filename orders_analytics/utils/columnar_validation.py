@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import operator
+import re
+from itertools import repeat
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype
+
+from orders_analytics.utils.money import cents_array, format_cents, sum_cents, within_cents
+from orders_analytics.utils.order_types import OrderTypes
+from orders_analytics.utils.payment_types import PaymentTypes
+from orders_analytics.utils.schema import CANONICAL_COLUMNS
+from orders_analytics.utils.validation import (
+    _append_error,
+    _is_iso_datetime,
+    normalize_order_type,
+    normalize_payment_type,
+)
+
+REQUIRED_FIELDS = ["order_id", "platform", "provider", "order_datetime", "order_type", "payment_type"]
+FEE_FIELDS = ["commission_fee", "processing_fee", "marketing_fee", "misc_fee"]
+DEFAULT_TOTAL_COMPONENTS = ["subtotal", "tax", "tip", "delivery_fee"]
+TEST_NAME_RE = re.compile(r"\btest\b", re.IGNORECASE)
+
+Row = Dict[str, str]
+
+
+class RowColumns:
+    """
+    Column view over a list of row dicts for the validators below.
+
+    Each column is pulled out of the rows once and factorized; stripping, money
+    parsing and type normalization then run once per distinct value and are broadcast
+    back by code, so the validators work on whole numpy arrays.
+    """
+
+    def __init__(self, rows: List[Row]):
+        self.rows = rows
+        self.size = len(rows)
+        self._columns: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._text: Dict[str, np.ndarray] = {}
+        self._cents: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _column(self, col: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(codes, distinct stripped `str(value or "")` texts) for `col`."""
+        if col not in self._columns:
+            raw = list(map(dict.get, self.rows, repeat(col)))
+            if infer_dtype(raw, skipna=False) != "string":
+                # Missing keys and non-string values; 1, 1.0 and True must not share a code.
+                raw = [value if value.__class__ is str else str(value or "") for value in raw]
+            codes, uniques = pd.factorize(np.array(raw, dtype=object))
+            stripped = np.array([value.strip() for value in uniques], dtype=object)
+            self._columns[col] = (codes, stripped)
+        return self._columns[col]
+
+    def text(self, col: str) -> np.ndarray:
+        if col not in self._text:
+            codes, uniques = self._column(col)
+            self._text[col] = uniques.take(codes)
+        return self._text[col]
+
+    def mapped(self, col: str, func: Callable[[str], object], dtype=object) -> np.ndarray:
+        """`func` applied to each distinct stripped value of `col`."""
+        codes, uniques = self._column(col)
+        return np.array([func(value) for value in uniques], dtype=dtype).take(codes)
+
+    def cents(self, col: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(parsed, cents): whether `parse_cents` accepts the text and the int64 amount (0 if not)."""
+        if col not in self._cents:
+            codes, uniques = self._column(col)
+            parsed, cents = cents_array(uniques)
+            self._cents[col] = (parsed.take(codes), cents.take(codes))
+        return self._cents[col]
+
+    def real(self, col: str) -> np.ndarray:
+        # `_is_real`: a non-zero amount at cent precision.
+        return self.cents(col)[1] != 0
+
+    def lower(self, col: str) -> np.ndarray:
+        return self.mapped(col, str.lower)
+
+
+def _error(row: Row, flag: str, message: str, source: str) -> Dict[str, str]:
+    _append_error(row, flag)
+    return {
+        "order_id": row.get("order_id", ""),
+        "platform": row.get("platform", ""),
+        "provider": row.get("provider", ""),
+        "error_code": flag,
+        "message": message,
+        "source": source,
+    }
+
+
+def _flagged(mask: np.ndarray) -> List[int]:
+    return np.flatnonzero(mask).tolist()
+
+
+def _canonical_columns(cols: RowColumns, source: str) -> List[Dict[str, str]]:
+    canonical = set(CANONICAL_COLUMNS)
+    complete = np.fromiter(
+        map(operator.ge, map(dict.keys, cols.rows), repeat(canonical)), bool, cols.size
+    )
+    errors = []
+    for idx in _flagged(~complete):
+        row = cols.rows[idx]
+        missing = [col for col in CANONICAL_COLUMNS if col not in row]
+        errors.append(_error(row, "missing_canonical_columns", f"missing={','.join(missing)}", source))
+    return errors
+
+
+def _required_fields(cols: RowColumns, source: str) -> List[Dict[str, str]]:
+    blank = {key: cols.text(key) == "" for key in REQUIRED_FIELDS}
+    errors = []
+    for idx in _flagged(np.logical_or.reduce(list(blank.values()))):
+        missing = [key for key in REQUIRED_FIELDS if blank[key][idx]]
+        errors.append(
+            _error(cols.rows[idx], "missing_required_fields", f"missing={','.join(missing)}", source)
+        )
+    return errors
+
+
+def _enum_fields(cols: RowColumns, source: str) -> List[Dict[str, str]]:
+    checks = [
+        ("order_type", normalize_order_type, OrderTypes.get_all(), "invalid_order_type"),
+        ("payment_type", normalize_payment_type, PaymentTypes.get_all(), "invalid_payment_type"),
+    ]
+    masks = []
+    for col, normalize, allowed, flag in checks:
+        valid = set(allowed)
+        invalid = cols.mapped(
+            col, lambda value: bool(value) and normalize(value) not in valid, dtype=bool
+        )
+        masks.append((col, flag, invalid))
+    errors = []
+    for idx in _flagged(masks[0][2] | masks[1][2]):
+        for col, flag, invalid in masks:
+            if invalid[idx]:
+                errors.append(_error(cols.rows[idx], flag, f"{col}={cols.text(col)[idx]}", source))
+    return errors
+
+
+def _delivery_fee(cols: RowColumns, source: str) -> List[Dict[str, str]]:
+    mask = (cols.lower("order_type") == OrderTypes.DELIVERY) & ~cols.real("delivery_fee")
+    fees = cols.text("delivery_fee")
+    return [
+        _error(cols.rows[idx], "delivery_fee_missing_for_delivery", f"delivery_fee={fees[idx]}", source)
+        for idx in _flagged(mask)
+    ]
+
+
+def _tax_fields(cols: RowColumns, source: str, skip_on_negative_payout: bool) -> List[Dict[str, str]]:
+    tax_real = cols.real("tax")
+    tw_real = cols.real("tax_withheld")
+    mask = tax_real == tw_real
+    mask &= ~((cols.lower("order_type") == OrderTypes.PHONE_CALL) & ~tax_real & ~tw_real)
+    if skip_on_negative_payout:
+        payout = cols.cents("payout")[1]
+        mask &= ~(payout < 0)
+    tax, tax_withheld = cols.text("tax"), cols.text("tax_withheld")
+    return [
+        _error(
+            cols.rows[idx],
+            "tax_tax_withheld_needs_review",
+            f"tax={tax[idx]} tax_withheld={tax_withheld[idx]}",
+            source,
+        )
+        for idx in _flagged(mask)
+    ]
+
+
+def _test_customer_names(cols: RowColumns, source: str) -> List[Dict[str, str]]:
+    names = cols.text("customer_name")
+    mask = cols.mapped("customer_name", lambda name: bool(TEST_NAME_RE.search(name)), dtype=bool)
+    return [
+        _error(cols.rows[idx], "test_customer_name", f"customer_name={names[idx]}", source)
+        for idx in _flagged(mask)
+    ]
+
+
+def _negative_fees(cols: RowColumns, source: str) -> List[Dict[str, str]]:
+    positive = {}
+    for field in FEE_FIELDS:
+        positive[field] = cols.cents(field)[1] > 0
+    errors = []
+    for idx in _flagged(np.logical_or.reduce(list(positive.values()))):
+        for field in FEE_FIELDS:
+            if positive[field][idx]:
+                errors.append(
+                    _error(
+                        cols.rows[idx],
+                        "fee_should_be_negative",
+                        f"{field}={cols.text(field)[idx]}",
+                        source,
+                    )
+                )
+    return errors
+
+
+def _cash_processing_fee(cols: RowColumns, source: str) -> List[Dict[str, str]]:
+    cash = cols.mapped("payment_type", normalize_payment_type) == "cash"
+    fees = cols.text("processing_fee")
+    return [
+        _error(
+            cols.rows[idx],
+            "cash_processing_fee_should_be_zero",
+            f"processing_fee={fees[idx]}",
+            source,
+        )
+        for idx in _flagged(cash & cols.real("processing_fee"))
+    ]
+
+
+def _order_datetime_iso(cols: RowColumns, source: str) -> List[Dict[str, str]]:
+    iso = cols.mapped("order_datetime", _is_iso_datetime, dtype=bool)
+    errors = []
+    for idx in _flagged(~iso):
+        row = cols.rows[idx]
+        value = row.get("order_datetime", "")
+        errors.append(_error(row, "order_datetime_not_iso", f"order_datetime={value}", source))
+    return errors
+
+
+def _payout_expected(cols: RowColumns, source: str) -> List[Dict[str, str]]:
+    payout_ok, payout = cols.cents("payout")
+    expected_ok, expected = cols.cents("expected_payout")
+    mask = payout_ok & expected_ok & ~within_cents(payout, expected)
+    payout_raw, expected_raw = cols.text("payout"), cols.text("expected_payout")
+    return [
+        _error(
+            cols.rows[idx],
+            "payout_expected_mismatch",
+            f"payout={payout_raw[idx]} expected={expected_raw[idx]}",
+            source,
+        )
+        for idx in _flagged(mask)
+    ]
+
+
+def _total_components(
+    cols: RowColumns, source: str, components: Optional[Sequence[str]]
+) -> List[Dict[str, str]]:
+    fields = list(components or DEFAULT_TOTAL_COMPONENTS)
+    total_raw = cols.text("total")
+    total = cols.cents("total")[1]
+    expected = sum_cents([cols.cents(field)[1] for field in fields])
+    mask = (total_raw != "") & ~within_cents(total, expected)
+    return [
+        _error(
+            cols.rows[idx],
+            "total_components_mismatch",
+            f"total={total_raw[idx]} expected={format_cents(expected[idx])}",
+            source,
+        )
+        for idx in _flagged(mask)
+    ]
+
+
+def validate_rows(
+    rows: List[Row],
+    source: str,
+    skip_tax_on_negative_payout: bool = False,
+    total_components: Optional[Sequence[str]] = None,
+) -> List[Dict[str, str]]:
+    """
+    Run the `BaseParser.post_process` validators over `rows` column-wise.
+
+    Rows get the same `errors` annotations, and the returned error records come out in
+    the same order, as running the per-row validators in `validation` one after another.
+    """
+    if not rows:
+        return []
+    cols = RowColumns(rows)
+    errors: List[Dict[str, str]] = []
+    errors.extend(_canonical_columns(cols, source))
+    errors.extend(_required_fields(cols, source))
+    errors.extend(_enum_fields(cols, source))
+    errors.extend(_delivery_fee(cols, source))
+    errors.extend(_tax_fields(cols, source, skip_tax_on_negative_payout))
+    errors.extend(_test_customer_names(cols, source))
+    errors.extend(_negative_fees(cols, source))
+    errors.extend(_cash_processing_fee(cols, source))
+    errors.extend(_order_datetime_iso(cols, source))
+    errors.extend(_payout_expected(cols, source))
+    errors.extend(_total_components(cols, source, total_components))
+    return errors
@@ -3,11 +3,12 @@ from __future__ import annotations
 import csv
 import os
 from dataclasses import dataclass
-from decimal import Decimal, InvalidOperation
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import pandas as pd
 
+from orders_analytics.utils.money import format_cents, parse_cents
+
 
 def _normalize_blank(value: Any) -> str:
     text = str(value or "").strip()
@@ -26,24 +27,15 @@ def _coalesce(row: Dict[str, Any], columns: Sequence[str]) -> str:
     return ""
 
 
-def _parse_decimal(value: str) -> Optional[Decimal]:
+def _parse_cents(value: str) -> Optional[int]:
     text = _normalize_blank(value)
     if not text:
         return None
-    try:
-        return Decimal(text.replace("$", "").replace(",", ""))
-    except InvalidOperation:
-        return None
+    return parse_cents(text)
 
 
 def _is_zeroish(value: str) -> bool:
-    text = _normalize_blank(value)
-    if not text:
-        return False
-    dec = _parse_decimal(text)
-    if dec is None:
-        return False
-    return dec == Decimal("0.00")
+    return _parse_cents(value) == 0
 
 
 def _apply_transforms(value: str, transforms: Sequence[str]) -> str:
@@ -55,15 +47,12 @@ def _apply_transforms(value: str, transforms: Sequence[str]) -> str:
             current = current.lower()
         elif transform == "upper":
             current = current.upper()
-        elif transform == "money":
-            dec = _parse_decimal(current)
-            current = "" if dec is None else f"{dec:.2f}"
+        elif transform in ("money", "round_2"):
+            cents = _parse_cents(current)
+            current = "" if cents is None else format_cents(cents)
         elif transform == "abs":
-            dec = _parse_decimal(current)
-            current = "" if dec is None else f"{abs(dec):.2f}"
-        elif transform == "round_2":
-            dec = _parse_decimal(current)
-            current = "" if dec is None else f"{dec:.2f}"
+            cents = _parse_cents(current)
+            current = "" if cents is None else format_cents(abs(cents))
         else:
             raise ValueError(f"Unknown transform: {transform}")
     return current
@@ -127,7 +116,7 @@ class FieldConfig:
     left: List[str]
     right: List[str]
     transforms: List[str]
-    tolerance: Optional[Decimal]
+    tolerance: Optional[int]  # cents
 
 
 def load_csv(path: str) -> List[Dict[str, Any]]:
@@ -151,10 +140,7 @@ def build_field_configs(fields: Iterable[Dict[str, Any]]) -> List[FieldConfig]:
         tol_value = field.get("tolerance")
         tolerance = None
         if tol_value is not None and str(tol_value).strip() != "":
-            try:
-                tolerance = Decimal(str(tol_value))
-            except InvalidOperation:
-                tolerance = None
+            tolerance = parse_cents(tol_value)
         configs.append(FieldConfig(name=name, left=left_cols, right=right_cols, transforms=transforms, tolerance=tolerance))
     return configs
 
@@ -258,8 +244,8 @@ def compare_datasets(
                 continue
 
             if field.tolerance is not None:
-                left_num = _parse_decimal(left_value)
-                right_num = _parse_decimal(right_value)
+                left_num = _parse_cents(left_value)
+                right_num = _parse_cents(right_value)
                 if left_num is None or right_num is None:
                     if left_value == right_value:
                         continue
@@ -282,8 +268,8 @@ def compare_datasets(
                 "field": field.name,
                 "left_value": left_value,
                 "right_value": right_value,
-                "diff": f"{diff:.2f}" if isinstance(diff, Decimal) else "",
-                "diff_abs": f"{diff_abs:.2f}" if isinstance(diff_abs, Decimal) else "",
+                "diff": "" if diff == "" else format_cents(diff),
+                "diff_abs": "" if diff_abs == "" else format_cents(diff_abs),
                 "notes": "",
             }
             output.append(payload)
@@ -2,9 +2,21 @@ DEFAULT_DB_PATH = "orders_analytics/data/orders.duckdb"
 NORMALIZED_DIR = "orders_analytics/data/normalized"
 RAW_DIR = "orders_analytics/data/raw"
 ERRORS_PATH = "orders_analytics/data/errors/errors.csv"
+MBOX_INDEX_DIR = "orders_analytics/data/cache/mbox_index"
+PDF_CACHE_DIR = "orders_analytics/data/cache/pdf_text"
+XLSX_CACHE_DIR = "orders_analytics/data/cache/xlsx_sheets"
+RAW_STORE_DIR = "orders_analytics/data/cache/raw_store"
+ZIP_MEMBER_CACHE_DIR = "orders_analytics/data/cache/zip_members"
+SLICE_MANIFEST_PATH = "orders_analytics/data/cache/slice_pdf_manifest.json"
+NORMALIZE_BUILD_CACHE_PATH = "orders_analytics/data/cache/normalize_builds.json"
+STREAM_SPILL_DIR = "orders_analytics/data/cache/stream_spill"
+PROFILE_DIR = "orders_analytics/data/profiling"
+RUN_HISTORY_PATH = f"{PROFILE_DIR}/run_history.jsonl"
 TAKEOUT_DIR = "Takeout"
 WAVE_AMECI_DIR = f"{TAKEOUT_DIR}/wave_ameci"
 WAVE_AROMA_DIR = f"{TAKEOUT_DIR}/wave_aroma"
+# Text flags (`--extra key=value`, parser options) read as true.
+TRUE_VALUES = {"1", "true", "yes", "y"}
 
 
 def raw_path(*parts: str) -> str:
@@ -28,13 +40,24 @@ def wave_aroma_path(*parts: str) -> str:
 
 DATE_GRAINS = ["day", "month", "year"]
 
-from orders_analytics.utils.platforms import Platforms
-from orders_analytics.utils.providers import Providers
-from orders_analytics.utils.order_types import OrderTypes
-from orders_analytics.utils.payment_types import PaymentTypes
 
-PLATFORMS = Platforms.all_platforms()
-PROVIDERS = Providers.all_providers()
+def __getattr__(name: str):
+    # Value lists are built on first use, so importing a path constant does not
+    # import every enum module.
+    if name == "PLATFORMS":
+        from orders_analytics.utils.platforms import Platforms
 
-ORDER_TYPES = OrderTypes.get_all()
-PAYMENT_TYPES = PaymentTypes.get_all()
+        return Platforms.all_platforms()
+    if name == "PROVIDERS":
+        from orders_analytics.utils.providers import Providers
+
+        return Providers.all_providers()
+    if name == "ORDER_TYPES":
+        from orders_analytics.utils.order_types import OrderTypes
+
+        return OrderTypes.get_all()
+    if name == "PAYMENT_TYPES":
+        from orders_analytics.utils.payment_types import PaymentTypes
+
+        return PaymentTypes.get_all()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import functools
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Datetime parsing shared by the parsers. Each distinct raw string is parsed once
+# (memoized), and `normalize_datetimes` handles a whole column at a time: the
+# format most of a sample of its values use is applied to every value in one
+# vectorized pass, and only the values it misses (or that an earlier candidate
+# format would also read) go through the one-value-at-a-time rules.
+
+ISO = -1  # `_resolve` match index of `datetime.fromisoformat`
+SAMPLE_SIZE = 64
+# `fromisoformat` only reads text starting with a 4-digit year.
+ISO_LIKE_RE = re.compile(r"^\d{4}")
+# Formats whose strptime result (microseconds, offsets) the vectorized pass does not reproduce.
+UNVECTORIZED_DIRECTIVES = ("%f", "%z", "%Z")
+BLANK_TEXT = ("", "nan", "none")
+
+
+@functools.lru_cache(maxsize=1 << 17)
+def _resolve(text: str, formats: Tuple[str, ...], allow_iso: bool) -> Tuple[Optional[str], Optional[int]]:
+    """(ISO text, index of the format that read it) for `text`; (None, None) when none does."""
+    if allow_iso:
+        try:
+            if text.endswith("Z"):
+                return datetime.fromisoformat(text.replace("Z", "+00:00")).isoformat(), ISO
+            return datetime.fromisoformat(text).isoformat(), ISO
+        except ValueError:
+            pass
+    for idx, fmt in enumerate(formats):
+        try:
+            return datetime.strptime(text, fmt).isoformat(), idx
+        except ValueError:
+            continue
+    return None, None
+
+
+def parse_datetime(text: str, formats: Iterable[str] = (), allow_iso: bool = True) -> Optional[str]:
+    """ISO text of `text` (ISO first when allowed, then each format in turn), None when nothing reads it."""
+    return _resolve(str(text), tuple(formats), allow_iso)[0]
+
+
+def normalize_datetime(
+    value: str,
+    formats: Optional[Iterable[str]] = None,
+    allow_iso: bool = True,
+) -> str:
+    text = str(value or "").strip()
+    if text.lower() in BLANK_TEXT:
+        return ""
+    parsed = parse_datetime(text, formats or (), allow_iso)
+    return text if parsed is None else parsed
+
+
+@functools.lru_cache(maxsize=1 << 17)
+def iso_sort_text(value: str) -> Optional[str]:
+    """`value` read by `fromisoformat` (offset dropped) as sortable text, None when it is not ISO."""
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return dt.replace(tzinfo=None).isoformat(timespec="microseconds")
+
+
+@functools.lru_cache(maxsize=1 << 17)
+def parse_loose_datetime(text: str) -> Optional[pd.Timestamp]:
+    """`pd.to_datetime(text)` (pandas' own format inference) for one value, None when it does not parse."""
+    parsed = pd.to_datetime(text, errors="coerce")
+    return None if pd.isna(parsed) else parsed
+
+
+@dataclass
+class DatetimeStats:
+    """Counts for one labelled column (distinct values unless noted)."""
+
+    values: int = 0  # non-blank values, repeats included
+    distinct: int = 0
+    vectorized: int = 0  # read by the column format in the vectorized pass
+    per_value: int = 0  # read one at a time (ISO, other formats, misses of the column format)
+    ambiguous: int = 0  # also read by a format tried before the column format
+    unparsed: int = 0  # read by no format (kept as text)
+    formats: Counter = field(default_factory=Counter)  # column format chosen, per call
+
+
+_stats: Dict[str, DatetimeStats] = {}
+
+
+def datetime_stats() -> Dict[str, Dict[str, object]]:
+    return {label: {**asdict(stats), "formats": dict(stats.formats)} for label, stats in _stats.items()}
+
+
+def reset_datetime_stats() -> None:
+    _stats.clear()
+
+
+def memo_stats() -> Dict[str, Dict[str, int]]:
+    """Hits/misses of the per-value caches (each miss is one distinct string parsed)."""
+    caches = {"formats": _resolve, "iso_sort": iso_sort_text, "loose": parse_loose_datetime}
+    return {name: {"hits": func.cache_info().hits, "misses": func.cache_info().misses} for name, func in caches.items()}
+
+
+def format_datetime_stats() -> str:
+    lines = [f"{'datetime column':<40} {'values':>9} {'distinct':>9} {'vector':>9} {'single':>9} {'ambig':>7} {'unparsed':>9}  format"]
+    for label, stats in _stats.items():
+        formats = ", ".join(fmt for fmt, _ in stats.formats.most_common()) or "-"
+        lines.append(
+            f"{label[-40:]:<40} {stats.values:>9} {stats.distinct:>9} {stats.vectorized:>9} "
+            f"{stats.per_value:>9} {stats.ambiguous:>7} {stats.unparsed:>9}  {formats}"
+        )
+    memo = ", ".join(f"{name} {counts['hits']} hits/{counts['misses']} parsed" for name, counts in memo_stats().items())
+    lines.append(f"memoized: {memo}")
+    return "\n".join(lines)
+
+
+def _column_format(sample: Sequence[str], formats: Tuple[str, ...], allow_iso: bool) -> Optional[int]:
+    """Index of the format most of `sample` is read by, None when that is ISO or nothing."""
+    matched = Counter(_resolve(text, formats, allow_iso)[1] for text in sample)
+    matched.pop(None, None)
+    if not matched:
+        return None
+    best = matched.most_common(1)[0][0]
+    if best == ISO or any(directive in formats[best] for directive in UNVECTORIZED_DIRECTIVES):
+        return None
+    return best
+
+
+def _parse_with(values: np.ndarray, fmt: str) -> pd.Series:
+    return pd.to_datetime(pd.Series(values, dtype=object), format=fmt, errors="coerce")
+
+
+def normalize_datetimes(
+    values: Iterable[object],
+    formats: Optional[Iterable[str]] = None,
+    allow_iso: bool = True,
+    label: str = "",
+) -> np.ndarray:
+    """
+    `normalize_datetime` of every value, the same text value for value. Repeated
+    values are parsed once; the column format (see `_column_format`) is applied to
+    the distinct values in one pass, checked against `_resolve` on the sample.
+    Counts are added to `datetime_stats()[label]`.
+    """
+    formats = tuple(formats or ())
+    texts = np.array([str(value or "").strip() for value in values], dtype=object)
+    codes, uniques = pd.factorize(texts, use_na_sentinel=False)
+    uniques = np.asarray(uniques, dtype=object)
+    out = np.empty(len(uniques), dtype=object)
+    blank = np.array([text.lower() in BLANK_TEXT for text in uniques], dtype=bool)
+    out[blank] = ""
+
+    stats = _stats.setdefault(label, DatetimeStats())
+    stats.values += int((~blank[codes]).sum()) if len(codes) else 0
+    stats.distinct += int((~blank).sum())
+
+    pending = ~blank
+    candidates = np.flatnonzero(pending)
+    sampled = candidates[:SAMPLE_SIZE]
+    column = _column_format(uniques[sampled].tolist(), formats, allow_iso)
+    if column is not None:
+        fmt = formats[column]
+        stats.formats[fmt] += 1
+        # `fromisoformat` is tried first, so ISO-looking text is left to `_resolve`.
+        if allow_iso:
+            candidates = candidates[[not ISO_LIKE_RE.match(text) for text in uniques[candidates]]]
+        parsed = _parse_with(uniques[candidates], fmt)
+        read = parsed.notna().to_numpy()
+        ambiguous = np.zeros(len(candidates), dtype=bool)
+        for earlier in formats[:column]:
+            ambiguous[read] |= _parse_with(uniques[candidates[read]], earlier).notna().to_numpy()
+        take = read & ~ambiguous
+        # Whole seconds (no %f), so this is `datetime.isoformat()`'s text.
+        text = np.datetime_as_string(parsed.to_numpy(dtype="datetime64[s]"), unit="s").astype(object)
+        # Check the vectorized text against `_resolve` on the values the format was inferred
+        # from. On any mismatch nothing is taken here and every value goes through `_resolve`.
+        sample = np.flatnonzero(take & np.isin(candidates, sampled))
+        if all(text[i] == _resolve(uniques[candidates[i]], formats, allow_iso)[0] for i in sample):
+            out[candidates[take]] = text[take]
+            pending[candidates[take]] = False
+            stats.vectorized += int(take.sum())
+            stats.ambiguous += int(ambiguous.sum())
+
+    for idx in np.flatnonzero(pending):
+        parsed_text = _resolve(uniques[idx], formats, allow_iso)[0]
+        if parsed_text is None:
+            stats.unparsed += 1
+            out[idx] = uniques[idx]
+        else:
+            stats.per_value += 1
+            out[idx] = parsed_text
+    return out.take(codes) if len(codes) else np.array([], dtype=object)
+
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import csv
+import math
 import os
+import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import pandas as pd
 
@@ -17,6 +21,30 @@ ERROR_COLUMNS = [
     "resolved",
     "resolved_time",
 ]
+KEY_COLUMNS = ["order_id", "platform", "provider", "error_code"]
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS errors (
+    order_id TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    error_code TEXT NOT NULL,
+    message TEXT NOT NULL DEFAULT '',
+    source TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL DEFAULT '',
+    resolved TEXT NOT NULL DEFAULT '',
+    resolved_time TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (order_id, platform, provider, error_code)
+);
+CREATE INDEX IF NOT EXISTS errors_platform ON errors (upper(platform));
+CREATE INDEX IF NOT EXISTS errors_open ON errors (order_id, platform, provider, error_code)
+    WHERE resolved != 'true';
+"""
+INSERT_COLUMNS = ", ".join(ERROR_COLUMNS)
+INSERT_VALUES = ", ".join("?" for _ in ERROR_COLUMNS)
+KEY_MATCH = " AND ".join(f"c.{col} = errors.{col}" for col in KEY_COLUMNS)
+
+Key = Tuple[str, str, str, str]
 
 
 def error_key(error: Dict[str, str]) -> str:
@@ -30,95 +58,295 @@ def error_key(error: Dict[str, str]) -> str:
     )
 
 
+def error_store_path(path: str) -> str:
+    """SQLite store backing the errors CSV at `path`."""
+    return f"{os.path.splitext(path)[0]}.sqlite"
+
+
+def _text(value: object) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    return str(value)
+
+
+def _key_tuple(error: Dict[str, object]) -> Key:
+    return tuple(_text(error.get(col, "")).strip() for col in KEY_COLUMNS)
+
+
+def _record(error: Dict[str, object], key: Key) -> tuple:
+    return key + tuple(_text(error.get(col, "")) for col in ERROR_COLUMNS[len(KEY_COLUMNS) :])
+
+
+def _csv_stamp(path: str) -> str:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return ""
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class ErrorStore:
+    """
+    Validation errors keyed by (order_id, platform, provider, error_code), in SQLite.
+
+    Reconciling touches only new rows and rows whose resolved state flips, and stale
+    errors are resolved with one statement over the partial index of open errors. The
+    CSV is an export (`export_csv`); if it is edited or deleted after the store last
+    wrote it, the store is reseeded from it (or cleared) on the next open, so
+    spreadsheet edits and `rm errors.csv` keep working.
+    """
+
+    def __init__(self, csv_path: str, store_path: Optional[str] = None):
+        self.csv_path = csv_path
+        self.store_path = store_path or error_store_path(csv_path)
+        os.makedirs(os.path.dirname(self.store_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.store_path)
+        self.conn.executescript(SCHEMA)
+        self._sync()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "ErrorStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _meta(self, name: str) -> str:
+        found = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return found[0] if found else ""
+
+    def _set_meta(self, name: str, value: str) -> None:
+        self.conn.execute(
+            "INSERT INTO meta (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+            (name, value),
+        )
+
+    def _sync(self) -> None:
+        stamp = _csv_stamp(self.csv_path)
+        exported = self._meta("csv_stamp")
+        seeded = self._meta("seeded")
+        # Never exported and no CSV: the store is the only copy.
+        if stamp == exported and (stamp or seeded):
+            return
+        with self.conn:
+            self.conn.execute("DELETE FROM errors")
+            if stamp:
+                self._seed()
+            self._set_meta("csv_stamp", stamp)
+            self._set_meta("seeded", "1")
+
+    def _seed(self) -> None:
+        with open(self.csv_path, newline="", encoding="utf-8") as handle:
+            records = [
+                _record(row, _key_tuple(row)) for row in csv.DictReader(handle)
+            ]
+        # Duplicate keys keep their first position and last values, like the old dict rebuild.
+        self.conn.executemany(
+            f"INSERT INTO errors ({INSERT_COLUMNS}) VALUES ({INSERT_VALUES}) "
+            "ON CONFLICT (order_id, platform, provider, error_code) DO UPDATE SET "
+            + ", ".join(f"{col} = excluded.{col}" for col in ERROR_COLUMNS[len(KEY_COLUMNS) :]),
+            records,
+        )
+
+    def _records(self, errors: List[Dict[str, str]]) -> List[tuple]:
+        now = datetime.now().isoformat()
+        records = []
+        for error in errors:
+            error.setdefault("created_at", now)
+            error.setdefault("resolved", "false")
+            error.setdefault("resolved_time", "")
+            key = _key_tuple(error)
+            if any(key):
+                records.append(_record(error, key))
+        return records
+
+    def reconcile(self, errors: List[Dict[str, str]]) -> int:
+        """
+        Upsert current errors and auto-resolve stale ones.
+        - New errors are inserted (no duplicates by key).
+        - Previously resolved errors that are present again are unresolved.
+        - Existing errors not present in the current set are marked resolved=true.
+        """
+        # Last record per key wins, in first-seen key order.
+        current = {record[: len(KEY_COLUMNS)]: record for record in self._records(errors)}
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.execute("DROP TABLE IF EXISTS temp.c")
+            self.conn.execute(
+                "CREATE TEMP TABLE c (order_id, platform, provider, error_code, "
+                "PRIMARY KEY (order_id, platform, provider, error_code))"
+            )
+            self.conn.executemany("INSERT INTO temp.c VALUES (?, ?, ?, ?)", list(current))
+            self.conn.execute(
+                "UPDATE errors SET resolved = 'false', resolved_time = '' "
+                f"WHERE resolved = 'true' AND EXISTS (SELECT 1 FROM temp.c AS c WHERE {KEY_MATCH})"
+            )
+            before = self.conn.total_changes
+            self.conn.executemany(
+                f"INSERT INTO errors ({INSERT_COLUMNS}) VALUES ({INSERT_VALUES}) "
+                "ON CONFLICT DO NOTHING",
+                list(current.values()),
+            )
+            inserted = self.conn.total_changes - before
+            self.conn.execute(
+                "UPDATE errors SET resolved = 'true', resolved_time = ? "
+                f"WHERE resolved != 'true' AND NOT EXISTS (SELECT 1 FROM temp.c AS c WHERE {KEY_MATCH})",
+                (now,),
+            )
+            self.conn.execute("DROP TABLE temp.c")
+        return inserted
+
+    def insert_new(self, errors: List[Dict[str, str]]) -> int:
+        """Insert errors whose key is not stored yet; existing records are left as-is."""
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                f"INSERT INTO errors ({INSERT_COLUMNS}) VALUES ({INSERT_VALUES}) "
+                "ON CONFLICT DO NOTHING",
+                self._records(errors),
+            )
+            return self.conn.total_changes - before
+
+    def clear_platform(self, platform: str) -> int:
+        platform_key = str(platform or "").strip().upper()
+        if not platform_key:
+            return 0
+        with self.conn:
+            return self.conn.execute(
+                "DELETE FROM errors WHERE upper(platform) = ?", (platform_key,)
+            ).rowcount
+
+    def resolve(self, error: Dict[str, object], resolved_time: Optional[str] = None) -> bool:
+        with self.conn:
+            return bool(
+                self.conn.execute(
+                    "UPDATE errors SET resolved = 'true', resolved_time = ? WHERE "
+                    + " AND ".join(f"{col} = ?" for col in KEY_COLUMNS),
+                    (resolved_time or datetime.now().isoformat(), *_key_tuple(error)),
+                ).rowcount
+            )
+
+    def rows(self) -> Iterable[tuple]:
+        return self.conn.execute(f"SELECT {INSERT_COLUMNS} FROM errors ORDER BY rowid")
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame(list(self.rows()), columns=ERROR_COLUMNS)
+
+    def export_csv(self) -> int:
+        """Write the CSV export (atomically) and remember its stamp; returns the row count."""
+        os.makedirs(os.path.dirname(self.csv_path) or ".", exist_ok=True)
+        tmp_path = f"{self.csv_path}.tmp"
+        count = 0
+        with open(tmp_path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle, lineterminator="\n")
+            writer.writerow(ERROR_COLUMNS)
+            for row in self.rows():
+                writer.writerow(row)
+                count += 1
+        os.replace(tmp_path, self.csv_path)
+        with self.conn:
+            self._set_meta("csv_stamp", _csv_stamp(self.csv_path))
+        return count
+
+
 def write_errors(errors: List[Dict[str, str]], path: str) -> int:
     if not errors:
         return 0
-    now = datetime.now().isoformat()
-    for error in errors:
-        error.setdefault("created_at", now)
-        error.setdefault("resolved", "false")
-        error.setdefault("resolved_time", "")
-
-    if os.path.exists(path):
-        existing_df = pd.read_csv(path, dtype=str).fillna("")
-        existing_rows = existing_df.to_dict("records")
-    else:
-        existing_rows = []
-
-    existing_map = {error_key(row): row for row in existing_rows}
-    inserted = 0
-    for error in errors:
-        key = error_key(error)
-        if not key.strip("|"):
-            continue
-        if key in existing_map:
-            # Do not update existing records; if resolved, keep as-is.
-            continue
-        existing_map[key] = error
-        inserted += 1
-
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    df = pd.DataFrame(list(existing_map.values()))
-    df = df.reindex(columns=ERROR_COLUMNS, fill_value="")
-    df.to_csv(path, index=False)
-    return inserted
+    with ErrorStore(path) as store:
+        inserted = store.insert_new(errors)
+        store.export_csv()
+        return inserted
+
+
+# Buffers for `deferred_errors`; while one is open, the two functions below record
+# their calls as ["clear", path, platform] / ["reconcile", path, errors] instead.
+# Outside one, every write re-exports the CSV: a stale export that is then edited
+# would reseed the store over the newer results (see `ErrorStore._sync`).
+_deferred: List[List[list]] = []
+
+
+@contextmanager
+def deferred_errors() -> Iterator[List[list]]:
+    """Buffer `clear_errors_for_platform` / `reconcile_errors` calls made inside the block."""
+    ops: List[list] = []
+    _deferred.append(ops)
+    try:
+        yield ops
+    finally:
+        _deferred.pop()
+
+
+def apply_error_ops(ops: List[list], export: bool = True) -> None:
+    """Apply buffered calls in order, opening each error store once, then export its CSV."""
+    stores: Dict[str, ErrorStore] = {}
+    try:
+        for op, path, payload in ops:
+            if path not in stores:
+                stores[path] = ErrorStore(path)
+            if op == "clear":
+                stores[path].clear_platform(payload)
+            else:
+                stores[path].reconcile(payload)
+        if export:
+            for store in stores.values():
+                store.export_csv()
+    finally:
+        for store in stores.values():
+            store.close()
 
 
 def reconcile_errors(errors: List[Dict[str, str]], path: str) -> int:
     """
-    Upsert current errors and auto-resolve stale ones.
-    - New errors are inserted (no duplicates by key).
-    - Existing errors not present in the current set are marked resolved=true.
+    Upsert current errors into the store behind `path` and auto-resolve stale ones
+    (see `ErrorStore.reconcile`). Returns the number inserted, or 0 while deferred.
     """
-    now = datetime.now().isoformat()
-    current_map = {}
-    for error in errors:
-        error.setdefault("created_at", now)
-        error.setdefault("resolved", "false")
-        error.setdefault("resolved_time", "")
-        key = error_key(error)
-        if key.strip("|"):
-            current_map[key] = error
-
-    if os.path.exists(path):
-        existing_df = pd.read_csv(path, dtype=str).fillna("")
-        existing_rows = existing_df.to_dict("records")
-    else:
-        existing_rows = []
-
-    existing_map = {error_key(row): row for row in existing_rows}
-    inserted = 0
-    # insert new errors
-    for key, error in current_map.items():
-        if key not in existing_map:
-            existing_map[key] = error
-            inserted += 1
-        else:
-            # If previously resolved but still present, unresolve.
-            if existing_map[key].get("resolved") == "true":
-                existing_map[key]["resolved"] = "false"
-                existing_map[key]["resolved_time"] = ""
-
-    # resolve stale errors
-    for key, row in existing_map.items():
-        if key not in current_map:
-            if row.get("resolved") != "true":
-                row["resolved"] = "true"
-                row["resolved_time"] = now
-
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    df = pd.DataFrame(list(existing_map.values()))
-    df = df.reindex(columns=ERROR_COLUMNS, fill_value="")
-    df.to_csv(path, index=False)
-    return inserted
+    if _deferred:
+        _deferred[-1].append(["reconcile", path, [dict(error) for error in errors]])
+        return 0
+    with ErrorStore(path) as store:
+        inserted = store.reconcile(errors)
+        store.export_csv()
+        return inserted
 
 
 def clear_errors_for_platform(path: str, platform: str) -> None:
-    platform_key = str(platform or "").strip().upper()
-    if not platform_key or not os.path.exists(path):
+    if _deferred:
+        _deferred[-1].append(["clear", path, platform])
         return
-    df = pd.read_csv(path, dtype=str).fillna("")
-    if "platform" not in df.columns:
-        return
-    df = df[df["platform"].str.upper() != platform_key]
-    df.to_csv(path, index=False)
+    with ErrorStore(path) as store:
+        store.clear_platform(platform)
+        store.export_csv()
+
+
+def load_errors(path: str) -> pd.DataFrame:
+    """All stored errors (in first-seen order) as strings."""
+    if not os.path.exists(path) and not os.path.exists(error_store_path(path)):
+        return pd.DataFrame(columns=ERROR_COLUMNS)
+    with ErrorStore(path) as store:
+        return store.frame()
+
+
+def resolve_error(path: str, error: Dict[str, object], resolved_time: Optional[str] = None) -> bool:
+    with ErrorStore(path) as store:
+        resolved = store.resolve(error, resolved_time)
+        if resolved:
+            store.export_csv()
+        return resolved
+
+
+def export_errors_csv(path: str) -> int:
+    with ErrorStore(path) as store:
+        return store.export_csv()
+
+
+def reset_errors_store(path: str) -> bool:
+    """Delete the errors CSV and its store; returns whether either existed."""
+    deleted = False
+    for target in (path, error_store_path(path)):
+        if os.path.exists(target):
+            os.remove(target)
+            deleted = True
+    return deleted
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import sqlite3
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from orders_analytics.utils.datetimes import iso_sort_text
+
+Row = Dict[str, str]
+SortKey = Tuple[int, str]
+LOOKUP_CHUNK = 900  # keys per `IN (...)` query, under SQLite's bound-parameter limit
+
+# Streaming parser runs (`BaseParser.streaming`) keep only one batch of rows in
+# memory: batches are spilled as sorted runs, merged back in `order_datetime`
+# order, and deduplicated through a SQLite key index, all under a scratch dir.
+
+
+def order_datetime_key(row: Row) -> SortKey:
+    """
+    Sort key of a normalized row: ISO `order_datetime` values chronologically (any
+    offset dropped), then the other values by text, blank first. Plain text, so it
+    can be written to disk and compared after reading it back.
+    """
+    value = str(row.get("order_datetime") or "").strip()
+    if not value:
+        return (1, "")
+    text = iso_sort_text(value)
+    return (1, value) if text is None else (0, text)
+
+
+class SortedRuns:
+    """Row batches spilled to `directory` as sorted JSON-lines runs, read back as one merged stream."""
+
+    def __init__(self, directory: str, key: Callable[[Row], SortKey] = order_datetime_key):
+        self.directory = directory
+        self.key = key
+        self.paths: List[str] = []
+        os.makedirs(directory, exist_ok=True)
+
+    def add(self, rows: List[Row]) -> None:
+        if not rows:
+            return
+        path = os.path.join(self.directory, f"run_{len(self.paths):05d}.jsonl")
+        keyed = sorted(((self.key(row), row) for row in rows), key=lambda item: item[0])
+        with open(path, "w", encoding="utf-8") as handle:
+            for (flag, text), row in keyed:
+                handle.write(json.dumps([flag, text, row], ensure_ascii=False) + "\n")
+        self.paths.append(path)
+
+    @staticmethod
+    def _read(path: str) -> Iterator[Tuple[int, str, Row]]:
+        with open(path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                flag, text, row = json.loads(line)
+                yield flag, text, row
+
+    def merged(self) -> Iterator[Row]:
+        """Every row in key order; equal keys keep the order they were added in."""
+        # heapq.merge is stable across its inputs, and each run was sorted stably.
+        runs = [self._read(path) for path in self.paths]
+        for _, _, row in heapq.merge(*runs, key=lambda item: (item[0], item[1])):
+            yield row
+
+
+class DedupeIndex:
+    """
+    Rows by key in a SQLite file: the first row seen for a key is kept (in the order
+    keys were first seen) and later ones are folded into it, a batch at a time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows (seq INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, row TEXT NOT NULL)"
+        )
+
+    def _stored(self, keys: List[str]) -> Dict[str, Tuple[int, Row]]:
+        found: Dict[str, Tuple[int, Row]] = {}
+        for start in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[start : start + LOOKUP_CHUNK]
+            query = f"SELECT key, seq, row FROM rows WHERE key IN ({', '.join('?' * len(chunk))})"
+            for key, seq, text in self.conn.execute(query, chunk):
+                found[key] = (seq, json.loads(text))
+        return found
+
+    def add(self, keyed_rows: List[Tuple[str, Row]], merge: Callable[[Row, Row, str], None]) -> int:
+        """
+        Store a batch of `(key, row)` in order: a row whose key is already stored (or
+        earlier in the batch) is folded into the kept row by `merge(kept, row, key)`.
+        Returns how many keys were new.
+        """
+        stored = self._stored(list(dict.fromkeys(key for key, _ in keyed_rows)))
+        kept: Dict[str, Row] = {key: row for key, (_, row) in stored.items()}
+        for key, row in keyed_rows:
+            if key in kept:
+                merge(kept[key], row, key)
+            else:
+                kept[key] = row
+        self.conn.executemany(
+            "UPDATE rows SET row = ? WHERE seq = ?",
+            [(json.dumps(kept[key], ensure_ascii=False), seq) for key, (seq, _) in stored.items()],
+        )
+        # Dicts keep insertion order, so new keys are inserted in first-seen order.
+        new_keys = [key for key in kept if key not in stored]
+        self.conn.executemany(
+            "INSERT INTO rows (key, row) VALUES (?, ?)",
+            [(key, json.dumps(kept[key], ensure_ascii=False)) for key in new_keys],
+        )
+        return len(new_keys)
+
+    def batches(self, size: int) -> Iterator[List[Row]]:
+        """The kept rows, `size` at a time, in the order their keys were first seen."""
+        cursor = self.conn.execute("SELECT row FROM rows ORDER BY seq")
+        while True:
+            chunk = cursor.fetchmany(size)
+            if not chunk:
+                return
+            yield [json.loads(text) for (text,) in chunk]
+
+    def close(self) -> None:
+        self.conn.close()
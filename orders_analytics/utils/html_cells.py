@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import html
+import re
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Match, Optional, Pattern, Tuple
+
+# "<td" opens and "</td>" closes can never overlap, so one scan finds both.
+TD_TOKEN_RE = re.compile(r"<td|</td>", re.IGNORECASE)
+TD_CELL_RE = re.compile(r"<td[^>]*>(.*?)</td>", re.IGNORECASE | re.DOTALL)
+SPAN_RE = re.compile(r"<span[^>]*>\s*([^<]+?)\s*</span>", re.IGNORECASE | re.DOTALL)
+TAG_RE = re.compile(r"<[^>]+>")
+NEWLINES_RE = re.compile(r"\n+")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def block_spans(block: str) -> List[str]:
+    """Unescaped, whitespace-normalized text of each non-empty `<span>` in `block`."""
+    cleaned = [WHITESPACE_RE.sub(" ", html.unescape(s)).strip() for s in SPAN_RE.findall(block)]
+    return [s for s in cleaned if s]
+
+
+class HtmlCell:
+    """
+    A `<td>` cell: from the opening tag to the first `</td>` after it, which is exactly
+    what `<td[^>]*>.*?</td>` matches (a nested cell shares its parent's end).
+    """
+
+    __slots__ = ("source", "start", "content_start", "content_end", "_spans")
+
+    def __init__(self, source: str, start: int, content_start: int, content_end: int):
+        self.source = source
+        self.start = start
+        self.content_start = content_start
+        self.content_end = content_end
+        self._spans: Optional[List[str]] = None
+
+    @property
+    def end(self) -> int:
+        return self.content_end + len("</td>")
+
+    @property
+    def block(self) -> str:
+        return self.source[self.start : self.end]
+
+    @property
+    def content(self) -> str:
+        return self.source[self.content_start : self.content_end]
+
+    @property
+    def spans(self) -> List[str]:
+        if self._spans is None:
+            self._spans = block_spans(self.block)
+        return self._spans
+
+
+class HtmlDoc:
+    """
+    One-pass view of an order email's HTML.
+
+    Cell boundaries and `<td>`/`</td>` token offsets are collected once per message
+    (lazily, in C via `finditer`), and each cell's spans are memoized. Field extractors
+    then answer "which cell holds this label" with a single label search plus bisects
+    instead of re-scanning the message with one backtracking regex per label.
+    """
+
+    def __init__(self, source: str):
+        self.source = source or ""
+        self._cell_matches: Optional[List[Match[str]]] = None
+        self._cell_starts: Optional[List[int]] = None
+        self._tokens: Optional[Tuple[List[int], List[int]]] = None
+        self._by_start: Dict[int, HtmlCell] = {}
+        self._found: Dict[Pattern[str], List[Match[str]]] = {}
+        self._text: Optional[str] = None
+
+    def _cell_at(self, start: int, content_start: int, content_end: int) -> HtmlCell:
+        cell = self._by_start.get(start)
+        if cell is None:
+            cell = HtmlCell(self.source, start, content_start, content_end)
+            self._by_start[start] = cell
+        return cell
+
+    def find_all(self, pattern: Pattern[str]) -> List[Match[str]]:
+        """All matches of `pattern` over the whole message, memoized per pattern."""
+        found = self._found.get(pattern)
+        if found is None:
+            found = self._found[pattern] = list(pattern.finditer(self.source))
+        return found
+
+    def _top_level_matches(self) -> List[Match[str]]:
+        if self._cell_matches is None:
+            self._cell_matches = list(TD_CELL_RE.finditer(self.source))
+            self._cell_starts = [match.start() for match in self._cell_matches]
+        return self._cell_matches
+
+    def _cell_from_match(self, match: Match[str]) -> HtmlCell:
+        return self._cell_at(match.start(), match.start(1), match.end(1))
+
+    def top_level_cells(self) -> List[HtmlCell]:
+        """Non-overlapping cells, as `re.findall(r"<td[^>]*>.*?</td>", ...)` returns them."""
+        return [self._cell_from_match(match) for match in self._top_level_matches()]
+
+    def top_level_cells_matching(self, pattern: Pattern[str]) -> List[HtmlCell]:
+        """
+        Top-level cells whose block contains a `pattern` match, in document order. Cells
+        start with "<" and end with ">", so word boundaries at the block edges behave as
+        they would when searching the block alone.
+        """
+        cell_matches = self._top_level_matches()
+        starts = self._cell_starts or []
+        matched: List[HtmlCell] = []
+        last_idx = -1
+        for match in self.find_all(pattern):
+            idx = bisect_right(starts, match.start()) - 1
+            if idx < 0 or idx == last_idx or match.start() >= cell_matches[idx].end():
+                continue
+            matched.append(self._cell_from_match(cell_matches[idx]))
+            last_idx = idx
+        return matched
+
+    def _td_tokens(self) -> Tuple[List[int], List[int]]:
+        if self._tokens is None:
+            opens: List[int] = []
+            closes: List[int] = []
+            for match in TD_TOKEN_RE.finditer(self.source):
+                (closes if match.group(0)[1] == "/" else opens).append(match.start())
+            self._tokens = (opens, closes)
+        return self._tokens
+
+    def find_cell(self, label: str) -> Optional[HtmlCell]:
+        """
+        First cell (by start, nested cells included) whose content up to its `</td>`
+        contains `label`: the same cell `<td[^>]*>(?:(?!</td>).)*label(?:(?!</td>).)*</td>`
+        finds, without the per-character lookahead.
+        """
+        source = self.source
+        pattern = re.compile(label, re.IGNORECASE | re.DOTALL)
+        match = pattern.search(source)
+        if not match:
+            return None
+        opens, closes = self._td_tokens()
+        tag_ends: Dict[int, int] = {}
+
+        def tag_end(idx: int) -> int:
+            if idx not in tag_ends:
+                tag_ends[idx] = source.find(">", opens[idx] + 3)
+            return tag_ends[idx]
+
+        while match:
+            label_start, label_end = match.span()
+            close_idx = bisect_left(closes, label_end)
+            if close_idx == len(closes):
+                return None
+            # The enclosing cell's tag must end at or after the last `</td>` before the
+            # label (else that close ends the cell first) and before the label starts.
+            # Tag ends never decrease with the open's position, so bisect over opens.
+            last_close = closes[close_idx - 1] if close_idx else -1
+            lo, hi = 0, bisect_left(opens, label_start)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                end = tag_end(mid)
+                if end == -1 or end >= last_close:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            if lo < len(opens) and opens[lo] < label_start:
+                end = tag_end(lo)
+                if end != -1 and last_close <= end < label_start:
+                    return self._cell_at(opens[lo], end + 1, closes[close_idx])
+            match = pattern.search(source, label_start + 1)
+        return None
+
+    def block_from(self, label: str) -> Optional[str]:
+        """From the first `label` match through the next `</td>`, i.e. `label.*?</td>`."""
+        match = re.compile(label, re.IGNORECASE | re.DOTALL).search(self.source)
+        if not match:
+            return None
+        _, closes = self._td_tokens()
+        close_idx = bisect_left(closes, match.end())
+        if close_idx == len(closes):
+            return None
+        return self.source[match.start() : closes[close_idx] + len("</td>")]
+
+    @property
+    def text(self) -> str:
+        """Tags replaced by newlines, runs of newlines collapsed, outer whitespace stripped."""
+        if self._text is None:
+            self._text = NEWLINES_RE.sub("\n", TAG_RE.sub("\n", self.source)).strip()
+        return self._text
@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mailbox
+import os
+import re
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from email.header import decode_header, make_header
+from email.parser import BytesHeaderParser
+from email.utils import parseaddr, parsedate_to_datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from orders_analytics.utils.constants import MBOX_INDEX_DIR
+
+INDEX_VERSION = 2
+LINESEP = os.linesep.encode("ascii")
+# Shards per worker; more, smaller shards keep workers busy when message sizes vary.
+SHARDS_PER_WORKER = 4
+# Content-Type headers of the message and every MIME part, read from the raw bytes.
+CONTENT_TYPE_RE = re.compile(
+    rb"^content-type:[ \t]*(?:\r?\n[ \t]+)?([\w.+-]+/[\w.+-]+)", re.IGNORECASE | re.MULTILINE
+)
+
+
+@dataclass
+class MboxEntry:
+    offset: int
+    length: int
+    message_id: str
+    date: str
+    subject: str
+    content_hash: str
+    sender: str = ""
+    content_types: Tuple[str, ...] = ()
+
+    def to_list(self) -> list:
+        return [
+            self.offset,
+            self.length,
+            self.message_id,
+            self.date,
+            self.subject,
+            self.content_hash,
+            self.sender,
+            list(self.content_types),
+        ]
+
+    @classmethod
+    def from_list(cls, values: list) -> "MboxEntry":
+        return cls(
+            int(values[0]),
+            int(values[1]),
+            *[str(v) for v in values[2:7]],
+            tuple(str(v) for v in values[7]),
+        )
+
+
+@dataclass(frozen=True)
+class MboxFilter:
+    """
+    Header-only prefilter evaluated against index entries, so skipped messages are never
+    read or decoded.
+
+    Each populated field must match: `senders` are From addresses, `subjects` are
+    case-insensitive substrings, `content_types` are MIME types of which at least one
+    must appear on the message or one of its parts, and `since`/`until` bound the
+    message date (inclusive ISO dates, compared on the date in the sender's timezone).
+    A filter may only skip mail its extractor would ignore anyway.
+    """
+
+    senders: Tuple[str, ...] = ()
+    subjects: Tuple[str, ...] = ()
+    content_types: Tuple[str, ...] = ()
+    since: str = ""
+    until: str = ""
+
+    def matches(self, entry: MboxEntry) -> bool:
+        if self.senders and entry.sender not in self.senders:
+            return False
+        if self.subjects:
+            subject = entry.subject.lower()
+            if not any(value.lower() in subject for value in self.subjects):
+                return False
+        if self.content_types and not set(self.content_types) & set(entry.content_types):
+            return False
+        if self.since or self.until:
+            day = entry.date[:10]
+            if not day or (self.since and day < self.since) or (self.until and day > self.until):
+                return False
+        return True
+
+
+# Set by `date_window` for the duration of a windowed (backfill) extract.
+_window: Optional[MboxFilter] = None
+
+
+@contextmanager
+def date_window(since: Optional[str] = None, until: Optional[str] = None) -> Iterator[None]:
+    """
+    Limit incremental readers (those passing a `consumer`) to mail dated within
+    [since, until]. Inside the window consumer cursors are ignored and not advanced, so
+    a backfill re-reads the month it targets without hiding later mail from the next
+    regular extract. Readers without a consumer rewrite their whole output and keep
+    reading every message.
+    """
+    global _window
+    previous = _window
+    _window = MboxFilter(since=since or "", until=until or "") if since or until else None
+    try:
+        yield
+    finally:
+        _window = previous
+
+
+def default_index_path(mbox_path: str) -> str:
+    # Keyed by the absolute path too: exports from different accounts often share a file name.
+    digest = hashlib.sha1(os.path.abspath(mbox_path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(MBOX_INDEX_DIR, f"{os.path.basename(mbox_path)}-{digest}.index.json")
+
+
+def _header_text(value) -> str:
+    if value is None:
+        return ""
+    try:
+        return str(make_header(decode_header(str(value)))).strip()
+    except Exception:
+        return str(value).strip()
+
+
+def _header_date(value) -> str:
+    text = str(value or "").strip()
+    if not text:
+        return ""
+    try:
+        return parsedate_to_datetime(text).isoformat()
+    except (TypeError, ValueError):
+        return ""
+
+
+def _build_entry(offset: int, data: bytes) -> MboxEntry:
+    _, _, body = data.partition(b"\n")
+    headers = BytesHeaderParser().parsebytes(body)
+    return MboxEntry(
+        offset=offset,
+        length=len(data),
+        message_id=_header_text(headers.get("Message-ID")),
+        date=_header_date(headers.get("Date")),
+        subject=_header_text(headers.get("Subject")),
+        content_hash=hashlib.sha1(data.rstrip(b"\r\n")).hexdigest(),
+        sender=parseaddr(str(headers.get("From") or ""))[1].strip().lower(),
+        content_types=tuple(
+            sorted({value.decode("ascii").lower() for value in CONTENT_TYPE_RE.findall(body)})
+        ),
+    )
+
+
+def scan_entries(handle, start: int = 0) -> Iterator[MboxEntry]:
+    """Yield entries from `start`, using the same message boundaries as mailbox.mbox."""
+    handle.seek(start)
+    msg_start: Optional[int] = None
+    chunks: List[bytes] = []
+    last_was_empty = False
+    while True:
+        line_pos = handle.tell()
+        line = handle.readline()
+        if line.startswith(b"From ") or not line:
+            if msg_start is not None:
+                data = b"".join(chunks)
+                if last_was_empty:
+                    data = data[: -len(LINESEP)]
+                yield _build_entry(msg_start, data)
+            if not line:
+                return
+            msg_start = line_pos
+            chunks = [line]
+            last_was_empty = False
+            continue
+        if msg_start is not None:
+            chunks.append(line)
+        last_was_empty = line == LINESEP
+
+
+def read_message(handle, offset: int, length: int) -> mailbox.mboxMessage:
+    """Read one message the same way mailbox.mbox.get_message does."""
+    handle.seek(offset)
+    data = handle.read(length)
+    from_line, _, body = data.partition(b"\n")
+    from_line = from_line.decode("ascii", errors="replace")
+    msg = mailbox.mboxMessage(body.replace(LINESEP, b"\n"))
+    msg.set_unixfrom(from_line)
+    msg.set_from(from_line[5:])
+    return msg
+
+
+def shard_spans(spans: List[Tuple[int, int]], shards: int) -> List[List[Tuple[int, int]]]:
+    """Split (offset, length) spans into contiguous groups of roughly equal byte size."""
+    if shards <= 1 or len(spans) <= 1:
+        return [list(spans)]
+    target = sum(length for _, length in spans) / shards
+    groups: List[List[Tuple[int, int]]] = [[]]
+    size = 0
+    for span in spans:
+        if groups[-1] and size >= target:
+            groups.append([])
+            size = 0
+        groups[-1].append(span)
+        size += span[1]
+    return groups
+
+
+def _parse_shard(
+    mbox_path: str,
+    spans: List[Tuple[int, int]],
+    parse_message: Callable[[mailbox.mboxMessage], List],
+) -> List:
+    results: List = []
+    with open(mbox_path, "rb") as handle:
+        for offset, length in spans:
+            results.extend(parse_message(read_message(handle, offset, length)))
+    return results
+
+
+class IndexedMbox:
+    """
+    Append-aware reader for Takeout mbox exports.
+
+    The index records each message's byte offset plus Message-ID, Date, Subject, sender,
+    MIME types and a content hash, which is enough to evaluate `MboxFilter`s. Refreshing only scans bytes appended since the last refresh; if the
+    previously indexed tail no longer matches, the file was replaced and the index is
+    rebuilt (which also resets consumer cursors).
+
+    Consumers (typically the raw CSV they write) keep a byte cursor so
+    `messages(since=cursor(out_path))` yields only mail added since their last run.
+    """
+
+    def __init__(self, mbox_path: str, index_path: Optional[str] = None):
+        self.mbox_path = mbox_path
+        self.index_path = index_path or default_index_path(mbox_path)
+        self.size = 0
+        self.mtime = 0.0
+        self.entries: List[MboxEntry] = []
+        self.cursors: Dict[str, int] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        self.size = int(data.get("size", 0))
+        self.mtime = float(data.get("mtime", 0.0))
+        self.entries = [MboxEntry.from_list(values) for values in data.get("entries", [])]
+        self.cursors = {str(k): int(v) for k, v in (data.get("cursors") or {}).items()}
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        payload = {
+            "version": INDEX_VERSION,
+            "mbox_path": self.mbox_path,
+            "size": self.size,
+            "mtime": self.mtime,
+            "cursors": self.cursors,
+            "entries": [entry.to_list() for entry in self.entries],
+        }
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+
+    def _reset(self) -> None:
+        self.size = 0
+        self.mtime = 0.0
+        self.entries = []
+        self.cursors = {}
+
+    def refresh(self) -> int:
+        """Bring the index up to date with the mbox; returns the number of new entries."""
+        if not os.path.exists(self.mbox_path):
+            return 0
+        stat = os.stat(self.mbox_path)
+        file_size = stat.st_size
+        if file_size == self.size and stat.st_mtime == self.mtime and self.entries:
+            return 0
+        if file_size < self.size:
+            self._reset()
+        before = len(self.entries)
+        with open(self.mbox_path, "rb") as handle:
+            resume = 0
+            if self.entries:
+                # Re-scan the last indexed message: its stop moves once mail is appended.
+                tail = self.entries[-1]
+                rescanned = next(scan_entries(handle, tail.offset), None)
+                if rescanned is None or rescanned.content_hash != tail.content_hash:
+                    self._reset()
+                    before = 0
+                else:
+                    self.entries.pop()
+                    resume = tail.offset
+            self.entries.extend(scan_entries(handle, resume))
+        self.size = file_size
+        self.mtime = stat.st_mtime
+        self.save()
+        return max(len(self.entries) - before, 0)
+
+    def cursor(self, consumer: str) -> int:
+        # A consumer whose output is missing starts over from the first message.
+        if not consumer or not os.path.exists(consumer):
+            return 0
+        return self.cursors.get(consumer, 0)
+
+    def commit(self, consumer: str) -> None:
+        """Mark everything indexed so far as consumed by `consumer`."""
+        if not consumer:
+            return
+        self._load()
+        self.cursors[consumer] = self.size
+        self.save()
+
+    def select(self, since: int = 0, prefilters: Tuple[MboxFilter, ...] = ()) -> List[MboxEntry]:
+        """Entries at or after byte offset `since` that pass every prefilter."""
+        self.refresh()
+        return [
+            entry
+            for entry in self.entries
+            if entry.offset >= since and all(f.matches(entry) for f in prefilters)
+        ]
+
+    def messages(
+        self, since: int = 0, prefilters: Tuple[MboxFilter, ...] = ()
+    ) -> Iterator[mailbox.mboxMessage]:
+        entries = self.select(since, prefilters)
+        if not entries:
+            return
+        with open(self.mbox_path, "rb") as handle:
+            for entry in entries:
+                yield read_message(handle, entry.offset, entry.length)
+
+    def map_messages(
+        self,
+        parse_message: Callable[[mailbox.mboxMessage], List],
+        since: int = 0,
+        workers: int = 1,
+        prefilters: Tuple[MboxFilter, ...] = (),
+    ) -> List:
+        """
+        Apply `parse_message` to each message and concatenate the returned lists.
+
+        With `workers > 1` the messages are split into contiguous, message-aligned byte
+        ranges parsed in a process pool; results are merged in file order so the output
+        matches a sequential run. `parse_message` must be picklable (module-level
+        function or functools.partial of one).
+        """
+        spans = [(e.offset, e.length) for e in self.select(since, prefilters)]
+        if not spans:
+            return []
+        shards = shard_spans(spans, max(workers, 1) * SHARDS_PER_WORKER)
+        if workers <= 1 or len(shards) <= 1:
+            return _parse_shard(self.mbox_path, spans, parse_message)
+        results: List = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_parse_shard, self.mbox_path, shard, parse_message)
+                for shard in shards
+            ]
+            for future in futures:
+                results.extend(future.result())
+        return results
+
+
+def _reader_args(
+    index: IndexedMbox, consumer: str, prefilter: Optional[MboxFilter]
+) -> Tuple[int, Tuple[MboxFilter, ...]]:
+    prefilters = tuple(f for f in (prefilter,) if f is not None)
+    if consumer and _window is not None:
+        return 0, prefilters + (_window,)
+    return index.cursor(consumer), prefilters
+
+
+def iter_mbox(
+    mbox_path: str, consumer: str = "", prefilter: Optional[MboxFilter] = None
+) -> Iterator[mailbox.mboxMessage]:
+    """Iterate messages, limited to mail added since `consumer` last committed when given."""
+    index = IndexedMbox(mbox_path)
+    since, prefilters = _reader_args(index, consumer, prefilter)
+    yield from index.messages(since=since, prefilters=prefilters)
+
+
+def map_mbox(
+    mbox_path: str,
+    parse_message: Callable[[mailbox.mboxMessage], List],
+    consumer: str = "",
+    workers: int = 1,
+    prefilter: Optional[MboxFilter] = None,
+) -> List:
+    """Parse messages (new ones only when `consumer` is given) across `workers` processes."""
+    index = IndexedMbox(mbox_path)
+    since, prefilters = _reader_args(index, consumer, prefilter)
+    return index.map_messages(parse_message, since=since, workers=workers, prefilters=prefilters)
+
+
+def commit_mbox(mbox_path: str, consumer: str) -> None:
+    # A windowed backfill has not seen the mail outside its window.
+    if _window is not None:
+        return
+    IndexedMbox(mbox_path).commit(consumer)
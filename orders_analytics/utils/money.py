@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import functools
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Amounts are int cents: parsed once at the edge (CSV/sheet text), summed and
+# compared as integers, and only turned back into text by `format_cents`.
+PLAIN_AMOUNT_RE = re.compile(r"([+-]?)(\d*)(?:\.(\d*))?", re.ASCII)
+CENT = Decimal("0.01")
+
+
+def _strip_money(text: str) -> Tuple[str, bool]:
+    """`text` without `$`/`,` and accounting parentheses, and whether it was parenthesized."""
+    neg = False
+    if text.startswith("(") and text.endswith(")"):
+        neg = True
+        text = text[1:-1]
+    return text.replace("$", "").replace(",", "").strip(), neg
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _parse_text(text: str) -> Optional[int]:
+    text, neg = _strip_money(text)
+    match = PLAIN_AMOUNT_RE.fullmatch(text)
+    if match and (match.group(2) or match.group(3)):
+        sign, whole, frac = match.group(1), match.group(2), match.group(3) or ""
+        frac = (frac + "000")[:3]
+        # ROUND_HALF_UP: the third decimal alone decides, away from zero.
+        cents = int(whole or "0") * 100 + int(frac[:2]) + (frac[2] >= "5")
+        if sign == "-":
+            cents = -cents
+    else:
+        # Exponents, underscores and other forms `Decimal` accepts.
+        try:
+            amount = Decimal(text)
+            if not amount.is_finite():
+                return None
+            # Raises when the quantized value needs more digits than the context has ("9e60").
+            cents = int(amount.quantize(CENT, rounding=ROUND_HALF_UP).scaleb(2))
+        except InvalidOperation:
+            return None
+    return -cents if neg else cents
+
+
+def parse_cents(value: object) -> Optional[int]:
+    """
+    Parse a money value (`$1,234.50`, `(12.00)`, `-3.2`) into int cents, rounding half
+    up like `Decimal.quantize(ROUND_HALF_UP)`; None for blanks and non-amounts.
+    """
+    text = value if value.__class__ is str else ("" if value is None else str(value))
+    return _parse_text(text.strip()) if text else None
+
+
+def format_cents(cents: int) -> str:
+    """Canonical CSV text for `cents`: `-12.50`, `0.00`, `1000.00`."""
+    sign = "-" if cents < 0 else ""
+    whole, frac = divmod(abs(int(cents)), 100)
+    return f"{sign}{whole}.{frac:02d}"
+
+
+def cents_array(values: Iterable[object]) -> Tuple[np.ndarray, np.ndarray]:
+    """(parsed, cents) int64 arrays for `values`; unparsed entries hold 0 cents."""
+    parsed_cents = [parse_cents(value) for value in values]
+    parsed = np.array([cents is not None for cents in parsed_cents], dtype=bool)
+    cents = np.array([cents or 0 for cents in parsed_cents], dtype=np.int64)
+    return parsed, cents
+
+
+def sum_cents(columns: Sequence[np.ndarray]) -> np.ndarray:
+    """Element-wise total of equally sized cents arrays."""
+    if not columns:
+        return np.zeros(0, dtype=np.int64)
+    return np.sum(np.vstack(columns), axis=0, dtype=np.int64)
+
+
+def within_cents(left: np.ndarray, right: np.ndarray, tolerance: int = 1) -> np.ndarray:
+    """Whether each pair of amounts differs by at most `tolerance` cents."""
+    return np.abs(np.asarray(left, dtype=np.int64) - np.asarray(right, dtype=np.int64)) <= tolerance
+
+
+def allocate_groups(
+    groups: Sequence[int],
+    weights: Sequence[int],
+    targets: Sequence[int],
+    exclude: Optional[Sequence[bool]] = None,
+) -> np.ndarray:
+    """
+    Split each group's target cents across its rows in proportion to `weights`, for
+    every group in one pass. `groups` holds each row's group number (an index into
+    `targets`); negative weights count as zero and `exclude`d rows get nothing. Shares
+    are floored and the leftover cents go to the largest remainders (ties to the
+    earlier row), so each group adds up to its target exactly; a group whose weights
+    are all zero splits evenly, and one with no rows left keeps nothing. Negative
+    targets are split by magnitude and negated.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    if groups.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    included = np.ones(groups.size, dtype=bool) if exclude is None else ~np.asarray(exclude, dtype=bool)
+    weights = np.where(included, np.clip(np.asarray(weights, dtype=np.int64), 0, None), 0)
+    totals = np.zeros(targets.size, dtype=np.int64)
+    np.add.at(totals, groups, weights)
+    even = included & (totals[groups] == 0)
+    if even.any():
+        weights = np.where(even, 1, weights)
+        totals = np.zeros(targets.size, dtype=np.int64)
+        np.add.at(totals, groups, weights)
+    magnitude = np.abs(targets)
+    denominators = np.maximum(totals[groups], 1)
+    shares, remainders = np.divmod(weights * magnitude[groups], denominators)
+    allocated = np.zeros(targets.size, dtype=np.int64)
+    np.add.at(allocated, groups, shares)
+    leftover = magnitude - allocated
+    leftover[totals == 0] = 0
+    # Within a group every row has the same denominator, so the integer remainders
+    # rank the fractional parts exactly; excluded rows sort last and never qualify.
+    order = np.lexsort((np.arange(groups.size), -remainders, ~included, groups))
+    sorted_groups = groups[order]
+    starts = np.searchsorted(sorted_groups, sorted_groups, side="left")
+    rank = np.arange(groups.size) - starts
+    shares[order] += rank < leftover[sorted_groups]
+    return shares * np.sign(targets)[groups]
+
+
+def allocate_cents(total: int, weights: Sequence[int]) -> np.ndarray:
+    """`allocate_groups` for a single group: split `total` cents in proportion to `weights`."""
+    weights = np.asarray(weights, dtype=np.int64)
+    return allocate_groups(np.zeros(weights.size, dtype=np.int64), weights, [int(total)])
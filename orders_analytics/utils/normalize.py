@@ -1,58 +1,23 @@
 from __future__ import annotations
 
-from datetime import datetime
 import os
-from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 import re
-from typing import Iterable, List, Optional
+from typing import Iterable, List
 
+from orders_analytics.utils.datetimes import normalize_datetime  # noqa: F401
+from orders_analytics.utils.money import _strip_money, format_cents, parse_cents
 from orders_analytics.utils.validation import normalize_order_type, normalize_payment_type
 
 
-def normalize_datetime(
-    value: str,
-    formats: Optional[Iterable[str]] = None,
-    allow_iso: bool = True,
-) -> str:
-    text = str(value or "").strip()
-    if not text or text.lower() in ("nan", "none"):
-        return ""
-    if allow_iso:
-        try:
-            if text.endswith("Z"):
-                return datetime.fromisoformat(text.replace("Z", "+00:00")).isoformat()
-            return datetime.fromisoformat(text).isoformat()
-        except ValueError:
-            pass
-    for fmt in formats or []:
-        try:
-            return datetime.strptime(text, fmt).isoformat()
-        except ValueError:
-            continue
-    return text
-
-
 def normalize_money(value: str) -> str:
     text = str(value or "").strip()
     if text == "":
         return ""
-    neg = False
-    if text.startswith("(") and text.endswith(")"):
-        neg = True
-        text = text[1:-1]
-    text = text.replace("$", "").replace(",", "").strip()
-    if text == "":
-        return ""
-    try:
-        amount = Decimal(text)
-    except InvalidOperation:
-        return text
-    if neg:
-        amount = -amount
-    amount = amount.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-    if amount == Decimal("0.00"):
-        return "0.00"
-    return str(amount)
+    cents = parse_cents(text)
+    if cents is None:
+        # Not an amount: hand back the text without `$`/`,`/parentheses, as before.
+        return _strip_money(text)[0]
+    return format_cents(cents)
 
 
 def clean_text(value: str) -> str:
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import math
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from orders_analytics.utils.schema import CANONICAL_COLUMNS
+
+CHANGE_COLUMNS = ["run_id", "changed_at", "platform", "order_id", "change", "row_hash"]
+INSERTED = "inserted"
+UPDATED = "updated"
+DELETED = "deleted"
+STATE_VERSION = 1
+KEPT_RUNS = 1000  # run ids remembered in the state, for `changed_ids_since`
+
+
+def _changes_dir(csv_path: str) -> str:
+    # A subdirectory, so `normalized/*.csv` globs only ever see outputs.
+    return os.path.join(os.path.dirname(csv_path), "changes")
+
+
+def changes_path(csv_path: str) -> str:
+    """Append-only changelog of a normalized CSV: `changes/<name>.csv` beside it."""
+    return os.path.join(_changes_dir(csv_path), os.path.basename(csv_path))
+
+
+def state_path(csv_path: str) -> str:
+    """Row hashes of the last written output, plus its run id and CSV stamp."""
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(_changes_dir(csv_path), f"{stem}.hashes.json")
+
+
+def _text(value: object) -> str:
+    # Render values the way csv.DictWriter wrote them.
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    return str(value)
+
+
+def row_hash(row: Dict[str, object]) -> str:
+    values = [_text(row.get(col, "")) for col in CANONICAL_COLUMNS]
+    return hashlib.sha1(json.dumps(values, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _csv_stamp(path: str) -> str:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return ""
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def new_run_id() -> str:
+    # Sortable, so "after run X" is a string comparison.
+    return datetime.now().strftime("%Y%m%dT%H%M%S%f")
+
+
+def _read_state(csv_path: str) -> Optional[Dict[str, object]]:
+    try:
+        with open(state_path(csv_path), "r", encoding="utf-8") as handle:
+            state = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    return state if state.get("version") == STATE_VERSION else None
+
+
+def load_state(csv_path: str) -> Optional[Dict[str, object]]:
+    """The saved state, if it describes the CSV as it is on disk (not edited or replaced since)."""
+    state = _read_state(csv_path)
+    if state is None or state.get("csv_stamp") != _csv_stamp(csv_path):
+        return None
+    return state
+
+
+def current_run_id(csv_path: str) -> Optional[str]:
+    state = load_state(csv_path)
+    return str(state["run_id"]) if state else None
+
+
+def build_run_id(state: Dict[str, object]) -> str:
+    """The parser run behind the output; `run_id` moves on with each in-place rewrite of it."""
+    return str(state.get("build_run_id") or state["run_id"])
+
+
+def format_changes(counts: Dict[str, int]) -> str:
+    return f"+{counts.get(INSERTED, 0)} inserted, ~{counts.get(UPDATED, 0)} updated, -{counts.get(DELETED, 0)} deleted"
+
+
+def _hash_csv(csv_path: str, key: str) -> Dict[str, str]:
+    if not os.path.exists(csv_path):
+        return {}
+    with open(csv_path, newline="", encoding="utf-8") as handle:
+        return {str(row.get(key) or ""): row_hash(row) for row in csv.DictReader(handle)}
+
+
+@dataclass
+class ChangeSet:
+    """Difference between a parser run's rows and the previous output, by key."""
+
+    csv_path: str
+    platform: str
+    run_id: str
+    hashes: Dict[str, str]
+    runs: List[str] = field(default_factory=list)
+    inserted: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    # For an in-place rewrite: run_id, built_at and counts of the parser run it rewrote.
+    build: Dict[str, object] = field(default_factory=dict)
+
+    def counts(self) -> Dict[str, int]:
+        return {INSERTED: len(self.inserted), UPDATED: len(self.updated), DELETED: len(self.deleted)}
+
+    def record(self) -> None:
+        """Append the changes to the changelog and save the new hashes (after the CSV is written)."""
+        changed_at = datetime.now().isoformat()
+        log_path = changes_path(self.csv_path)
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        entries = (
+            [(order_id, INSERTED, self.hashes[order_id]) for order_id in self.inserted]
+            + [(order_id, UPDATED, self.hashes[order_id]) for order_id in self.updated]
+            + [(order_id, DELETED, "") for order_id in self.deleted]
+        )
+        if entries:
+            new_file = not os.path.exists(log_path)
+            with open(log_path, "a", newline="", encoding="utf-8") as handle:
+                writer = csv.writer(handle, lineterminator="\n")
+                if new_file:
+                    writer.writerow(CHANGE_COLUMNS)
+                for order_id, change, digest in entries:
+                    writer.writerow([self.run_id, changed_at, self.platform, order_id, change, digest])
+        build = self.build or {"run_id": self.run_id, "built_at": changed_at, "counts": self.counts()}
+        state = {
+            "version": STATE_VERSION,
+            "run_id": self.run_id,
+            "build_run_id": build["run_id"],
+            "runs": (self.runs + [self.run_id])[-KEPT_RUNS:],
+            "built_at": build["built_at"],
+            "platform": self.platform,
+            "csv_stamp": _csv_stamp(self.csv_path),
+            "log_stamp": _csv_stamp(log_path),
+            "counts": build["counts"],
+            "hashes": self.hashes,
+        }
+        tmp_path = f"{state_path(self.csv_path)}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(state, handle)
+        os.replace(tmp_path, state_path(self.csv_path))
+
+
+def diff_rows(
+    rows: Iterable[Dict[str, object]], csv_path: str, platform: str, key: str = "order_id"
+) -> ChangeSet:
+    """
+    Compare `rows` with the output currently at `csv_path` (call before overwriting it).
+    Previous hashes come from the saved state, or from the CSV itself if it was edited
+    since or predates the changelog.
+    """
+    hashes = {str(row.get(key) or ""): row_hash(row) for row in rows}
+    return diff_hashes(hashes, csv_path, platform, key)
+
+
+def diff_hashes(hashes: Dict[str, str], csv_path: str, platform: str, key: str = "order_id") -> ChangeSet:
+    """`diff_rows` for row hashes already computed (e.g. while streaming the rows out)."""
+    state = load_state(csv_path)
+    previous = state["hashes"] if state else _hash_csv(csv_path, key)
+    runs = list(state.get("runs", [])) if state else []
+    return _diff(ChangeSet(csv_path, platform, new_run_id(), hashes, runs), previous)
+
+
+def _diff(changes: ChangeSet, previous: Dict[str, str]) -> ChangeSet:
+    for order_id, digest in changes.hashes.items():
+        old = previous.get(order_id)
+        if old is None:
+            changes.inserted.append(order_id)
+        elif old != digest:
+            changes.updated.append(order_id)
+    changes.deleted = [order_id for order_id in previous if order_id not in changes.hashes]
+    return changes
+
+
+def record_rewrite(csv_path: str, key: str = "order_id") -> Optional[ChangeSet]:
+    """
+    Log an in-place rewrite of a normalized CSV (geocode, fees) as a run of its own,
+    against the hashes saved before it, so the output keeps its changelog and
+    `changed_ids_since` keeps returning deltas. Returns None, leaving the CSV to be
+    reloaded whole, when it had no state or the changelog was touched since.
+    """
+    state = _read_state(csv_path)
+    if state is None or state.get("log_stamp") != _csv_stamp(changes_path(csv_path)):
+        return None
+    build = {
+        "run_id": build_run_id(state),
+        "built_at": state.get("built_at", ""),
+        "counts": state.get("counts", {}),
+    }
+    changes = ChangeSet(
+        csv_path,
+        str(state.get("platform") or ""),
+        new_run_id(),
+        _hash_csv(csv_path, key),
+        list(state.get("runs", [])),
+        build=build,
+    )
+    _diff(changes, dict(state.get("hashes", {})))
+    changes.record()
+    return changes
+
+
+def read_changes(csv_path: str, after_run: Optional[str] = None) -> List[Dict[str, str]]:
+    """Changelog entries, optionally only those of runs after `after_run`."""
+    path = changes_path(csv_path)
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="", encoding="utf-8") as handle:
+        return [
+            row for row in csv.DictReader(handle) if after_run is None or row["run_id"] > after_run
+        ]
+
+
+def changed_ids_since(csv_path: str, run_id: str) -> Optional[Set[str]]:
+    """
+    Keys touched by the runs after `run_id` up to the current output, or None when
+    that cannot be told from the changelog (the CSV was edited, or the log lost
+    track of `run_id`), in which case the caller should reload everything.
+    """
+    state = load_state(csv_path)
+    if state is None or state.get("log_stamp") != _csv_stamp(changes_path(csv_path)):
+        return None
+    if run_id not in state.get("runs", []):
+        return None
+    if run_id == state["run_id"]:
+        return set()
+    return {row["order_id"] for row in read_changes(csv_path, after_run=run_id)}
+
+
+def latest_changes(csv_path: str) -> List[Dict[str, str]]:
+    """Changelog entries of the parser run that produced the current output, and of its rewrites."""
+    state = load_state(csv_path)
+    if state is None:
+        return []
+    build = build_run_id(state)
+    return [row for row in read_changes(csv_path) if row["run_id"] >= build]
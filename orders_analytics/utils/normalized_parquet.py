@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import os
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from orders_analytics.utils.money import parse_cents
+from orders_analytics.utils.normalized_changes import changed_ids_since, current_run_id
+from orders_analytics.utils.schema import CANONICAL_COLUMNS
+
+MONEY_COLUMNS = [
+    "subtotal",
+    "tax",
+    "tax_withheld",
+    "tip",
+    "delivery_fee",
+    "total",
+    "processing_fee",
+    "commission_fee",
+    "adjustments",
+    "marketing_fee",
+    "misc_fee",
+    "payout",
+    "expected_payout",
+]
+# Parquet/DuckDB type per canonical column; anything not listed is VARCHAR. DuckDB
+# dictionary-encodes low-cardinality strings (platform, order_type, payment_type, ...).
+COLUMN_TYPES: Dict[str, str] = {
+    **{col: "DECIMAL(12,2)" for col in MONEY_COLUMNS},
+    "order_datetime": "TIMESTAMP",
+    "lat": "DOUBLE",
+    "lng": "DOUBLE",
+    "item_count": "INTEGER",
+}
+STAGING_MEMORY_LIMIT = "64MB"  # `NormalizedParquetWriter` DuckDB staging
+
+
+def parquet_path(csv_path: str) -> str:
+    """Typed twin of a normalized CSV: same path with `.parquet`."""
+    return f"{os.path.splitext(csv_path)[0]}.parquet"
+
+
+def fresh_parquet(csv_path: str) -> Optional[str]:
+    """The Parquet twin of `csv_path`, unless it is missing or older than the CSV (edited by hand)."""
+    path = parquet_path(csv_path)
+    try:
+        parquet_mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    try:
+        csv_mtime = os.stat(csv_path).st_mtime_ns
+    except OSError:
+        return path
+    return path if parquet_mtime >= csv_mtime else None
+
+
+def _text(value: object) -> str:
+    if value.__class__ is str:
+        return value.strip()
+    if value is None or value != value:  # None / NaN
+        return ""
+    return str(value).strip()
+
+
+def typed_frame(rows: Iterable[Dict[str, object]]) -> pd.DataFrame:
+    """
+    Canonical rows as a frame with real types: money as nullable int cents,
+    `order_datetime` as naive UTC (naive values are taken as UTC, like the dashboard
+    does), lat/lng/item_count numeric, blanks as nulls and everything else as text.
+    """
+    rows = list(rows)
+    data: Dict[str, object] = {}
+    for col in CANONICAL_COLUMNS:
+        # Convert each distinct value once and broadcast back by code.
+        raw = np.array(list(map(dict.get, rows, repeat(col))), dtype=object)
+        codes, uniques = pd.factorize(raw, use_na_sentinel=False)
+        values = [_text(value) for value in uniques]
+        if col in MONEY_COLUMNS:
+            data[col] = pd.array([parse_cents(value) for value in values], dtype="Int64").take(codes)
+        elif col == "order_datetime":
+            parsed = pd.to_datetime(pd.Series(values, dtype=object), errors="coerce", utc=True, format="ISO8601")
+            data[col] = parsed.dt.tz_convert(None).take(codes).reset_index(drop=True)
+        elif col in COLUMN_TYPES:
+            data[col] = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").take(codes).reset_index(drop=True)
+        else:
+            data[col] = np.array([value or None for value in values], dtype=object).take(codes)
+    return pd.DataFrame(data)
+
+
+def typed_select(relation: str) -> str:
+    """SQL casting a registered `typed_frame` to the Parquet schema, in canonical order."""
+    columns = []
+    for col in CANONICAL_COLUMNS:
+        if col in MONEY_COLUMNS:
+            # Exact: cents * 0.01 stays DECIMAL; out-of-range amounts become NULL.
+            columns.append(f"TRY_CAST(CAST({col} AS DECIMAL(18,0)) * 0.01 AS DECIMAL(12,2)) AS {col}")
+        else:
+            columns.append(f"TRY_CAST({col} AS {COLUMN_TYPES.get(col, 'VARCHAR')}) AS {col}")
+    return f"SELECT {', '.join(columns)} FROM {relation}"
+
+
+def _quote(path: str) -> str:
+    return "'" + path.replace("'", "''") + "'"
+
+
+def write_normalized_parquet(rows: List[Dict[str, object]], path: str) -> None:
+    import duckdb
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    conn = duckdb.connect()
+    try:
+        conn.register("normalized_rows", typed_frame(rows))
+        conn.execute(
+            f"COPY ({typed_select('normalized_rows')}) TO {_quote(tmp_path)} "
+            "(FORMAT PARQUET, COMPRESSION ZSTD)"
+        )
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+
+class NormalizedParquetWriter:
+    """
+    `write_normalized_parquet` a batch of rows at a time: batches are typed and
+    appended to a staging DuckDB database file in `work_dir`, copied to Parquet by `close`.
+    `close(publish=False)` leaves the file at `tmp_path` for the caller to move into place.
+    """
+
+    def __init__(self, path: str, work_dir: str):
+        import duckdb
+
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.staging_path = os.path.join(work_dir, "parquet_staging.duckdb")
+        self.conn = duckdb.connect(self.staging_path)
+        # Keep DuckDB's buffer pool small too; it spills to `work_dir` instead.
+        self.conn.execute(f"SET memory_limit = '{STAGING_MEMORY_LIMIT}'")
+        self.conn.execute(f"SET temp_directory = {_quote(work_dir)}")
+        self.created = False
+
+    def add(self, rows: List[Dict[str, object]]) -> None:
+        self.conn.register("normalized_batch", typed_frame(rows))
+        try:
+            if self.created:
+                self.conn.execute(f"INSERT INTO normalized_rows {typed_select('normalized_batch')}")
+            else:
+                self.conn.execute(f"CREATE TABLE normalized_rows AS {typed_select('normalized_batch')}")
+                self.created = True
+        finally:
+            self.conn.unregister("normalized_batch")
+
+    def close(self, publish: bool = True) -> None:
+        try:
+            if not self.created:
+                self.add([])
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.conn.execute(
+                f"COPY normalized_rows TO {_quote(self.tmp_path)} (FORMAT PARQUET, COMPRESSION ZSTD)"
+            )
+        finally:
+            self.conn.close()
+        if publish:
+            os.replace(self.tmp_path, self.path)
+
+    def discard(self) -> None:
+        """Drop the staged rows and any unpublished Parquet file."""
+        self.conn.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def _relation(conn, csv_path: str, name: str, registered: List[str]) -> str:
+    """FROM-clause for `csv_path`: its Parquet twin when current, else the CSV registered as `name`."""
+    parquet = fresh_parquet(csv_path)
+    if parquet:
+        return f"read_parquet({_quote(parquet)})"
+    frame = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    conn.register(name, typed_frame(frame.to_dict("records")))
+    registered.append(name)
+    return f"({typed_select(name)})"
+
+
+def _select(relation: str, csv_path: str) -> str:
+    source = _quote(os.path.basename(csv_path))
+    return f"SELECT {', '.join(CANONICAL_COLUMNS)}, {source} AS source_file FROM {relation}"
+
+
+def _version(csv_path: str) -> str:
+    # The run that wrote the CSV, or its stamp when it was edited or has no changelog state.
+    run_id = current_run_id(csv_path)
+    if run_id:
+        return run_id
+    stat = os.stat(csv_path)
+    return f"csv:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def load_normalized_table(conn, csv_paths: List[str], table: str = "orders_raw") -> int:
+    """
+    Replace `table` with the canonical columns of every normalized output, plus
+    `source_file` (the CSV's name). Each platform is read from its Parquet twin when
+    that is current and from the CSV otherwise, cast to the same types either way.
+    """
+    selects = []
+    registered: List[str] = []
+    for idx, csv_path in enumerate(sorted(csv_paths)):
+        relation = _relation(conn, csv_path, f"normalized_csv_{idx}", registered)
+        selects.append(_select(relation, csv_path))
+    if not selects:
+        return 0
+    try:
+        conn.execute(f"CREATE OR REPLACE TABLE {table} AS {' UNION ALL '.join(selects)}")
+    finally:
+        for name in registered:
+            conn.unregister(name)
+    conn.execute(f"CREATE OR REPLACE TABLE {table}_versions (source_file TEXT PRIMARY KEY, version TEXT)")
+    conn.executemany(
+        f"INSERT INTO {table}_versions VALUES (?, ?)",
+        [[os.path.basename(path), _version(path)] for path in csv_paths],
+    )
+    return conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+
+
+def sync_normalized_table(conn, csv_paths: List[str], table: str = "orders_raw") -> int:
+    """
+    Bring `table` up to date with the normalized outputs, touching only what changed.
+
+    `<table>_versions` remembers which parser run (see `normalized_changes`) each
+    source file was loaded from. Files still at that run are skipped; files a later
+    run rewrote only have the order_ids from the changelog deleted and re-inserted;
+    anything else (new, edited by hand, changelog gone) has its rows replaced, and
+    rows of files that no longer exist are dropped. Without a versions table (first
+    load, or a table built before the changelog) everything is loaded from scratch.
+    """
+    tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+    if table not in tables or f"{table}_versions" not in tables:
+        return load_normalized_table(conn, csv_paths, table)
+    loaded = dict(conn.execute(f"SELECT source_file, version FROM {table}_versions").fetchall())
+    paths = {os.path.basename(path): path for path in csv_paths}
+    registered: List[str] = []
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        for source_file in sorted(set(loaded) - set(paths)):
+            conn.execute(f"DELETE FROM {table} WHERE source_file = ?", [source_file])
+            conn.execute(f"DELETE FROM {table}_versions WHERE source_file = ?", [source_file])
+        for idx, (source_file, csv_path) in enumerate(sorted(paths.items())):
+            version = _version(csv_path)
+            previous = loaded.get(source_file)
+            if previous == version:
+                continue
+            changed = None
+            if previous and not previous.startswith("csv:") and not version.startswith("csv:"):
+                changed = changed_ids_since(csv_path, previous)
+            relation = _relation(conn, csv_path, f"normalized_csv_{idx}", registered)
+            if changed is None:
+                conn.execute(f"DELETE FROM {table} WHERE source_file = ?", [source_file])
+                conn.execute(f"INSERT INTO {table} {_select(relation, csv_path)}")
+            elif changed:
+                conn.execute("CREATE OR REPLACE TEMP TABLE changed_ids (order_id TEXT)")
+                conn.executemany("INSERT INTO changed_ids VALUES (?)", [[key] for key in sorted(changed)])
+                conn.execute(
+                    f"DELETE FROM {table} WHERE source_file = ? "
+                    "AND order_id IN (SELECT order_id FROM changed_ids)",
+                    [source_file],
+                )
+                conn.execute(
+                    f"INSERT INTO {table} SELECT * FROM ({_select(relation, csv_path)}) "
+                    "WHERE order_id IN (SELECT order_id FROM changed_ids)"
+                )
+                conn.execute("DROP TABLE changed_ids")
+            conn.execute(
+                f"INSERT OR REPLACE INTO {table}_versions VALUES (?, ?)", [source_file, version]
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        for name in registered:
+            conn.unregister(name)
+    return conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+from orders_analytics.utils.constants import PDF_CACHE_DIR
+
+# Bump when the cached extraction output changes shape or semantics.
+EXTRACTOR_VERSION = "1"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Running size of each cache directory, measured on first write in this process.
+_cache_bytes: Dict[str, int] = {}
+
+
+@lru_cache(maxsize=1)
+def extractor_version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return f"{EXTRACTOR_VERSION}-pdfplumber{version('pdfplumber')}"
+    except Exception:
+        return EXTRACTOR_VERSION
+
+
+def payload_key(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _entry_path(key: str, kind: str, cache_dir: str, version: str) -> str:
+    return os.path.join(cache_dir, key[:2], f"{key}.{kind}.{version}.json.gz")
+
+
+def _dir_size(cache_dir: str) -> int:
+    total = 0
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    return total
+
+
+def prune_pdf_cache(max_bytes: int = DEFAULT_MAX_BYTES, cache_dir: str = PDF_CACHE_DIR) -> int:
+    """Evict least recently used entries until the cache fits in `max_bytes`."""
+    entries = []
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    _cache_bytes[cache_dir] = total
+    return removed
+
+
+def clear_pdf_cache(cache_dir: str = PDF_CACHE_DIR) -> None:
+    if os.path.isdir(cache_dir):
+        shutil.rmtree(cache_dir)
+    _cache_bytes[cache_dir] = 0
+
+
+def _load(path: str):
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            value = json.load(handle)
+    except (OSError, ValueError, EOFError):
+        return None
+    # Touch on hit so eviction drops the least recently used statements first.
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return value
+
+
+def _store(path: str, value, cache_dir: str, max_bytes: int) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Per-process temp name: sharded extract workers may cache the same attachment.
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as handle:
+        json.dump(value, handle, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    if cache_dir not in _cache_bytes:
+        _cache_bytes[cache_dir] = _dir_size(cache_dir)
+    else:
+        _cache_bytes[cache_dir] += os.path.getsize(path)
+    if _cache_bytes[cache_dir] > max_bytes:
+        prune_pdf_cache(max_bytes, cache_dir)
+
+
+def cached_value(
+    key: str,
+    kind: str,
+    compute: Callable[[], object],
+    cache_dir: str = PDF_CACHE_DIR,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    version: Optional[str] = None,
+):
+    """
+    Return `compute()`, cached on disk under `key` and `kind` for the current extractor
+    version (or `version`, for other extractors sharing the cache layout). A `None`
+    result means "could not compute" and is not cached.
+    """
+    path = _entry_path(key, kind, cache_dir, version or extractor_version())
+    if os.path.exists(path):
+        value = _load(path)
+        if value is not None:
+            return value
+    value = compute()
+    if value is None:
+        return value
+    try:
+        _store(path, value, cache_dir, max_bytes)
+    except OSError:
+        pass
+    return value
+
+
+def cached_extract(
+    payload: bytes,
+    kind: str,
+    compute: Callable[[bytes], list],
+    cache_dir: str = PDF_CACHE_DIR,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> list:
+    """
+    Return `compute(payload)`, cached on disk by the payload's SHA-256 and the extractor
+    version so a re-sent or re-exported statement is only run through pdfplumber once.
+    """
+    return cached_value(
+        payload_key(payload), kind, lambda: compute(payload), cache_dir, max_bytes
+    )
+
+
+def _extract_page_texts(payload: bytes) -> List[str]:
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(payload)) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+
+def _extract_page_words(payload: bytes) -> List[List[Dict[str, object]]]:
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(payload)) as pdf:
+        return [page.extract_words() or [] for page in pdf.pages]
+
+
+def _extract_page_tables(payload: bytes) -> List[List[List[List[Optional[str]]]]]:
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(payload)) as pdf:
+        return [page.extract_tables() or [] for page in pdf.pages]
+
+
+def pdf_page_texts(payload: bytes) -> List[str]:
+    """Per-page `extract_text()` output, served from the attachment cache when possible."""
+    return cached_extract(payload, "text", _extract_page_texts)
+
+
+def pdf_text(payload: bytes) -> str:
+    return "\n".join(pdf_page_texts(payload))
+
+
+def pdf_page_words(payload: bytes) -> List[List[Dict[str, object]]]:
+    return cached_extract(payload, "words", _extract_page_words)
+
+
+def pdf_page_tables(payload: bytes) -> List[List[List[List[Optional[str]]]]]:
+    return cached_extract(payload, "tables", _extract_page_tables)
@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import importlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from orders_analytics.utils.constants import (
+    TRUE_VALUES,
+    normalized_path,
+    raw_path,
+    takeout_path,
+    wave_aroma_path,
+)
+from orders_analytics.utils.platforms import Platforms
+
+PARSERS = "orders_analytics.parsers"
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    One call made for a platform: `target` ("module" for its `run`, or "module:function")
+    with context values as arguments. Modules are imported when the step runs.
+    """
+
+    target: str
+    args: Tuple[str, ...] = ()
+    kwargs: Tuple[Tuple[str, str], ...] = ()  # (parameter, context key)
+    when: str = ""  # context key that must be truthy
+    flow: str = ""  # only run in this flow ("parse" / "normalize")
+
+
+@dataclass(frozen=True)
+class PlatformSpec:
+    """
+    How to run one platform. `parser` is a BaseParser class ("module:Class") used by
+    `parse` (and by `normalize` when there are no normalize steps); otherwise `parse`
+    is the extract steps followed by the normalize steps. `defaults` holds the default
+    paths and options, overridable by CLI options and `--extra key=value`.
+    """
+
+    name: str
+    parser: str = ""
+    extract: Tuple[Step, ...] = ()
+    normalize: Tuple[Step, ...] = ()
+    defaults: Dict[str, object] = field(default_factory=dict)
+    aliases: Dict[str, str] = field(default_factory=dict)  # CLI option -> context key
+
+    @property
+    def can_extract(self) -> bool:
+        return bool(self.extract)
+
+    @property
+    def normalized_out(self) -> str:
+        return normalized_path(f"{self.name}_orders_normalized.csv")
+
+    def context(
+        self, overrides: Dict[str, object], extras: Optional[Dict[str, str]] = None
+    ) -> Dict[str, object]:
+        """
+        Step arguments: `defaults`, then matching `extras` (popped, so the rest can go
+        to a parser class), then non-empty `overrides` (CLI options).
+        """
+        context: Dict[str, object] = {"normalized_out": self.normalized_out, **self.defaults}
+        if extras is not None:
+            for key in list(extras):
+                if key in context:
+                    context[key] = _coerce(extras.pop(key), context[key])
+        for key, value in overrides.items():
+            if value not in (None, ""):
+                context[self.aliases.get(key, key)] = value
+        return context
+
+
+def _coerce(value: object, default: object) -> object:
+    # `--extra` values are text; follow the type of the default.
+    if isinstance(default, bool):
+        return str(value).strip().lower() in TRUE_VALUES
+    if isinstance(default, int):
+        return int(value or default)
+    if isinstance(default, list) and isinstance(value, str):
+        return [part.strip() for part in value.split(",") if part.strip()]
+    return value
+
+
+def load(target: str) -> object:
+    module_name, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module_name), attr or "run")
+
+
+def run_steps(steps: Tuple[Step, ...], context: Dict[str, object], flow: str) -> None:
+    for step in steps:
+        if (step.flow and step.flow != flow) or (step.when and not context.get(step.when)):
+            continue
+        func = load(step.target)
+        func(
+            *[context[key] for key in step.args],
+            **{param: context[key] for param, key in step.kwargs},
+        )
+
+
+def _mail(name: str) -> str:
+    return takeout_path("Mail", name)
+
+
+def _mbox_defaults(platform: str, label: str) -> Dict[str, object]:
+    return {
+        "orders_mbox": _mail(f"Orders-{label}.mbox"),
+        "billings_mbox": _mail(f"Billings-{label}.mbox"),
+        "orders_raw": raw_path(platform, "orders_raw.csv"),
+        "billings_raw": raw_path(platform, "billings_raw.csv"),
+    }
+
+
+INCREMENTAL = (("incremental", "incremental"),)
+SHARDED = (("incremental", "incremental"), ("workers", "workers"))
+RESET_ERRORS = (("reset_errors", "reset_errors"),)
+
+
+def _mbox_extract(platform: str, orders_kwargs=INCREMENTAL, billings_kwargs=INCREMENTAL) -> Tuple[Step, ...]:
+    package = f"{PARSERS}.{platform}"
+    return (
+        Step(f"{package}.extract_{platform}_orders_raw", ("orders_mbox", "orders_raw"), orders_kwargs),
+        Step(f"{package}.extract_{platform}_billings_raw", ("billings_mbox", "billings_raw"), billings_kwargs),
+    )
+
+
+def _normalize(platform: str, *args: str, kwargs=RESET_ERRORS) -> Tuple[Step, ...]:
+    target = f"{PARSERS}.{platform}.normalize_{platform}_from_raw"
+    return (Step(target, (*args, "normalized_out"), kwargs),)
+
+
+PLATFORM_SPECS: List[PlatformSpec] = [
+    PlatformSpec(
+        Platforms.EATSTREET,
+        extract=_mbox_extract(Platforms.EATSTREET, orders_kwargs=SHARDED),
+        normalize=_normalize(Platforms.EATSTREET, "orders_raw", "billings_raw"),
+        defaults=_mbox_defaults(Platforms.EATSTREET, "Eatstreet"),
+    ),
+    PlatformSpec(
+        Platforms.BEYONDMENU,
+        parser=f"{PARSERS}.beyondmenu.parse_beyondmenu_orders:BeyondMenuOrdersParser",
+    ),
+    PlatformSpec(Platforms.FOODJA, parser=f"{PARSERS}.foodja.parse_foodja_orders:FoodjaOrdersParser"),
+    PlatformSpec(
+        Platforms.FOODA,
+        parser=f"{PARSERS}.fooda.parse_fooda_orders:FoodaOrdersParser",
+        extract=(Step(f"{PARSERS}.fooda.extract_fooda_orders_raw", ("orders_mbox", "orders_raw")),),
+        defaults={
+            "orders_mbox": _mail("fooda_sales.csv"),
+            "orders_raw": raw_path(Platforms.FOODA, "fooda_sales.csv"),
+        },
+    ),
+    PlatformSpec(Platforms.EZCATER, parser=f"{PARSERS}.ezcater.parse_ezcater_orders:EzCaterOrdersParser"),
+    PlatformSpec(
+        Platforms.CATER2ME,
+        extract=_mbox_extract(Platforms.CATER2ME),
+        normalize=_normalize(Platforms.CATER2ME, "orders_raw", "billings_raw"),
+        defaults=_mbox_defaults(Platforms.CATER2ME, "Cater2Me"),
+    ),
+    PlatformSpec(
+        Platforms.MENUSTAR,
+        extract=_mbox_extract(Platforms.MENUSTAR, orders_kwargs=SHARDED)
+        + (
+            Step(
+                "orders_analytics.scripts.menustar_zip_reports",
+                kwargs=(
+                    ("zip_dir", "zip_dir"),
+                    ("orders_out", "zip_orders_out"),
+                    ("yearly_out", "zip_yearly_out"),
+                    ("merge_into_billings", "zip_merge_into_billings"),
+                    ("billings_out", "billings_raw"),
+                    ("workers", "zip_workers"),
+                ),
+                when="include_zip_backfill",
+                flow="parse",
+            ),
+        ),
+        normalize=_normalize(
+            Platforms.MENUSTAR, "orders_raw", "billings_raw", "adjustments_raw", "billings_overrides_raw"
+        ),
+        defaults={
+            **_mbox_defaults(Platforms.MENUSTAR, "Menustar"),
+            "adjustments_raw": raw_path(Platforms.MENUSTAR, "adjustments_raw.csv"),
+            "billings_overrides_raw": raw_path(Platforms.MENUSTAR, "billings_overrides.csv"),
+            "include_zip_backfill": False,
+            "zip_dir": _mail("menustar"),
+            "zip_orders_out": raw_path(Platforms.MENUSTAR, "orders_from_zip_reports.csv"),
+            "zip_yearly_out": raw_path(Platforms.MENUSTAR, "yearly_summaries_from_zip_reports.csv"),
+            "zip_merge_into_billings": False,
+            "zip_workers": 1,
+        },
+    ),
+    PlatformSpec(
+        Platforms.DELIVERYCOM,
+        parser=f"{PARSERS}.deliverycom.parse_deliverycom_orders:DeliveryComOrdersParser",
+        extract=_mbox_extract(Platforms.DELIVERYCOM, orders_kwargs=SHARDED),
+        normalize=_normalize(Platforms.DELIVERYCOM, "orders_raw", "billings_raw"),
+        defaults=_mbox_defaults(Platforms.DELIVERYCOM, "DeliveryCom"),
+    ),
+    PlatformSpec(
+        Platforms.FOODEE,
+        extract=_mbox_extract(Platforms.FOODEE, orders_kwargs=()),
+        normalize=_normalize(Platforms.FOODEE, "orders_raw", "billings_raw", "adjustments_raw"),
+        defaults={
+            **_mbox_defaults(Platforms.FOODEE, "Foodee"),
+            "adjustments_raw": raw_path(Platforms.FOODEE, "adjustments_raw.csv"),
+        },
+    ),
+    PlatformSpec(
+        Platforms.FOODRUNNERS,
+        extract=_mbox_extract(Platforms.FOODRUNNERS),
+        normalize=_normalize(Platforms.FOODRUNNERS, "orders_raw", "billings_raw"),
+        defaults=_mbox_defaults(Platforms.FOODRUNNERS, "FoodRunners"),
+    ),
+    PlatformSpec(
+        Platforms.OFFICECATERER,
+        extract=_mbox_extract(Platforms.OFFICECATERER),
+        normalize=_normalize(
+            Platforms.OFFICECATERER,
+            "orders_raw",
+            kwargs=RESET_ERRORS + (("billings_raw_path", "billings_raw"),),
+        ),
+        defaults=_mbox_defaults(Platforms.OFFICECATERER, "OfficeCaterer"),
+    ),
+    PlatformSpec(
+        Platforms.MENUFY,
+        extract=(
+            Step(
+                f"{PARSERS}.menufy.extract_menufy_orders_raw",
+                ("orders_root", "orders_raw", "emails_csv", "addresses_csv"),
+            ),
+        ),
+        normalize=_normalize(Platforms.MENUFY, "orders_raw"),
+        defaults={
+            "orders_root": takeout_path("Menufy", "orders"),
+            "emails_csv": takeout_path("Menufy", "Customer_Emails_02-05-2026.csv"),
+            "addresses_csv": takeout_path("Menufy", "Customer_Delivery_Addresses_02-05-2026.csv"),
+            "orders_raw": raw_path(Platforms.MENUFY, "orders_raw.csv"),
+        },
+    ),
+    PlatformSpec(
+        Platforms.SLICE,
+        extract=(Step(f"{PARSERS}.slice.extract_slice_orders_raw", ("orders_root", "orders_raw"), SHARDED),),
+        normalize=_normalize(Platforms.SLICE, "orders_raw", "adjustments_raw"),
+        defaults={
+            "orders_root": takeout_path("Slice"),
+            "orders_raw": raw_path(Platforms.SLICE, "orders_raw.csv"),
+            "adjustments_raw": raw_path(Platforms.SLICE, "adjustments_raw.csv"),
+        },
+    ),
+    PlatformSpec(
+        Platforms.CHOWNOW,
+        extract=(
+            Step(
+                f"{PARSERS}.chownow.extract_chownow_orders_raw",
+                ("orders_mbox", "orders_raw", "customer_files"),
+                INCREMENTAL,
+            ),
+            Step(f"{PARSERS}.chownow.extract_chownow_billings_raw", ("billings_mbox", "billings_raw")),
+        ),
+        normalize=_normalize(Platforms.CHOWNOW, "orders_raw", "billings_raw", "cancellations_raw"),
+        defaults={
+            **_mbox_defaults(Platforms.CHOWNOW, "ChowNow"),
+            "customer_files": [
+                takeout_path("Chownow", "CustomerOrders_lastran_06Feb26.xls"),
+                takeout_path("Chownow", "CustomerOrders_lastran_06Feb26 (1).xls"),
+            ],
+            "cancellations_raw": raw_path(Platforms.CHOWNOW, "cancellations_raw.csv"),
+        },
+    ),
+    PlatformSpec(
+        Platforms.BRYGID,
+        extract=_mbox_extract(Platforms.BRYGID, orders_kwargs=(), billings_kwargs=()),
+        normalize=(
+            # Brygid CSV + email merges are refreshed before normalizing.
+            Step("orders_analytics.scripts.brygid_normalize_report_csvs", flow="normalize"),
+            Step("orders_analytics.scripts.brygid_merge_email_csv_orders", flow="normalize"),
+        )
+        + _normalize(Platforms.BRYGID, "orders_raw"),
+        defaults=_mbox_defaults(Platforms.BRYGID, "Brygid"),
+    ),
+    PlatformSpec(
+        Platforms.ORDERINN,
+        extract=(Step(f"{PARSERS}.orderinn.extract_orderinn_raw", ("orders_raw",)),),
+        normalize=_normalize(Platforms.ORDERINN, "orders_raw", kwargs=()),
+        defaults={"orders_raw": raw_path(Platforms.ORDERINN, "commissions_raw.csv")},
+    ),
+    PlatformSpec(
+        Platforms.UBEREATS, parser=f"{PARSERS}.ubereats.parse_ubereats_orders:UberEatsOrdersParser"
+    ),
+    PlatformSpec(Platforms.GRUBHUB, parser=f"{PARSERS}.grubhub.parse_grubhub_orders:GrubhubOrdersParser"),
+    PlatformSpec(Platforms.MEALHI5, parser=f"{PARSERS}.mealhi5.parse_mealhi5_orders:MealHi5OrdersParser"),
+    PlatformSpec(
+        Platforms.DOORDASH, parser=f"{PARSERS}.doordash.parse_doordash_orders:DoorDashOrdersParser"
+    ),
+    PlatformSpec(
+        Platforms.MAYAEATS,
+        extract=(Step(f"{PARSERS}.mayaeats.extract_mayaeats_billings_raw", ("billings_mbox", "billings_raw")),),
+        normalize=_normalize(Platforms.MAYAEATS, "billings_raw"),
+        defaults={
+            "billings_mbox": _mail("Billings-Mayaeats.mbox"),
+            "billings_raw": raw_path(Platforms.MAYAEATS, "billings_raw.csv"),
+        },
+    ),
+    PlatformSpec(
+        Platforms.NEXTBITE,
+        extract=(
+            Step(
+                f"{PARSERS}.nextbite.extract_nextbite_billings_raw",
+                ("billings_mbox", "orders_raw", "billings_raw"),
+            ),
+        ),
+        normalize=_normalize(Platforms.NEXTBITE, "orders_raw"),
+        defaults={
+            "billings_mbox": _mail("Billings-Nextbite.mbox"),
+            "orders_raw": raw_path(Platforms.NEXTBITE, "orders_raw.csv"),
+            "billings_raw": raw_path(Platforms.NEXTBITE, "billings_raw.csv"),
+        },
+    ),
+    PlatformSpec(
+        Platforms.WAVE,
+        extract=(
+            Step(f"{PARSERS}.wave.extract_wave_orders_raw", ("accounting_csv", "customers_csv", "orders_raw")),
+        ),
+        normalize=_normalize(Platforms.WAVE, "orders_raw"),
+        defaults={
+            "accounting_csv": wave_aroma_path("accounting.csv"),
+            "customers_csv": wave_aroma_path("customers.csv"),
+            "orders_raw": raw_path(Platforms.WAVE, "orders_raw.csv"),
+        },
+        aliases={"orders_mbox": "accounting_csv", "billings_mbox": "customers_csv"},
+    ),
+]
+REGISTRY: Dict[str, PlatformSpec] = {spec.name: spec for spec in PLATFORM_SPECS}
+
+
+def get_spec(platform: str) -> PlatformSpec:
+    try:
+        return REGISTRY[platform]
+    except KeyError:
+        raise ValueError(f"Unknown platform: {platform}") from None
+
+
+def extract_platforms() -> List[str]:
+    return [spec.name for spec in PLATFORM_SPECS if spec.can_extract]
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from orders_analytics.utils.errors import deferred_errors
+from orders_analytics.utils.profiling import ProfileRun, profile_run
+
+
+@dataclass
+class PlatformJob:
+    command: str
+    platform: str
+    func: Callable[..., object]
+    args: Tuple[object, ...] = ()
+    kwargs: Dict[str, object] = field(default_factory=dict)
+
+
+@dataclass
+class PlatformResult:
+    platform: str
+    error_ops: List[list]
+    run: Optional[ProfileRun]
+    output: str = ""
+    failure: str = ""  # traceback when the platform raised
+
+    @property
+    def ok(self) -> bool:
+        return not self.failure
+
+
+def run_job(job: PlatformJob, capture: bool = True) -> PlatformResult:
+    """
+    Run one platform with its errors.csv writes deferred (see `deferred_errors`) and,
+    with `capture`, its stdout buffered; the caller applies and prints both in order.
+    """
+    output = io.StringIO()
+    redirect = contextlib.redirect_stdout(output) if capture else contextlib.nullcontext()
+    run = None
+    failure = ""
+    with redirect, deferred_errors() as error_ops:
+        try:
+            with profile_run(job.command, job.platform, history_path=None) as run:
+                job.func(*job.args, **job.kwargs)
+        except (Exception, SystemExit):
+            failure = traceback.format_exc()
+    return PlatformResult(job.platform, error_ops, run, output.getvalue(), failure)
+
+
+def iter_results(jobs: List[PlatformJob], workers: int = 1) -> Iterator[PlatformResult]:
+    """
+    Run `jobs` across up to `workers` processes, yielding results in job order so
+    whatever the caller does with them does not depend on completion order.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield run_job(job, capture=False)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        yield from pool.map(run_job, jobs)
+
+
+def format_wall_times(results: List[PlatformResult], elapsed_s: float) -> str:
+    lines = [f"{'platform':<16} {'status':<7} {'wall s':>9}"]
+    for result in results:
+        wall = f"{result.run.wall_s:>9.2f}" if result.run else f"{'':>9}"
+        lines.append(f"{result.platform:<16} {'ok' if result.ok else 'failed':<7} {wall}")
+    lines.append(f"{'total elapsed':<24} {elapsed_s:>9.2f}")
+    return "\n".join(lines)
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import datetime as dt
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from orders_analytics.utils.constants import RUN_HISTORY_PATH
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@dataclass
+class StageRecord:
+    name: str
+    wall_s: float
+    cpu_s: float
+    peak_rss_mb: Optional[float]
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+
+
+@dataclass
+class Stage:
+    """Handle yielded by `stage`; set `rows_out` (or `rows_in`) before the block ends."""
+
+    name: str
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+
+
+@dataclass
+class ProfileRun:
+    command: str
+    platform: str
+    started_at: str
+    status: str = "ok"
+    wall_s: float = 0.0
+    stages: List[StageRecord] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+# Stage names currently open (joined with "/" in records) and the record lists
+# collecting finished stages; both are per-process, like mbox_index's date window.
+_path: List[str] = []
+_collectors: List[List[StageRecord]] = []
+
+
+def _cpu_seconds() -> float:
+    # Includes reaped worker processes (ProcessPoolExecutor), not just this one.
+    cpu = time.process_time()
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu += children.ru_utime + children.ru_stime
+    return cpu
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux.
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+@contextmanager
+def stage(name: str, rows_in: Optional[int] = None) -> Iterator[Stage]:
+    """Time the enclosed block (wall, CPU, peak RSS) as a stage nested under any open stage."""
+    handle = Stage(name, rows_in=rows_in)
+    _path.append(name)
+    # Parents are listed before the stages nested in them.
+    slots = [(records, len(records)) for records in _collectors]
+    wall_start = time.perf_counter()
+    cpu_start = _cpu_seconds()
+    try:
+        yield handle
+    finally:
+        record = StageRecord(
+            name="/".join(_path),
+            wall_s=round(time.perf_counter() - wall_start, 4),
+            cpu_s=round(_cpu_seconds() - cpu_start, 4),
+            peak_rss_mb=peak_rss_mb(),
+            rows_in=handle.rows_in,
+            rows_out=handle.rows_out,
+        )
+        _path.pop()
+        for records, slot in slots:
+            records.insert(slot, record)
+
+
+@contextmanager
+def collect() -> Iterator[List[StageRecord]]:
+    """Collect the records of every stage that finishes inside the block."""
+    records: List[StageRecord] = []
+    _collectors.append(records)
+    try:
+        yield records
+    finally:
+        # By identity: nested collectors can hold equal lists.
+        del _collectors[next(i for i, held in enumerate(_collectors) if held is records)]
+
+
+def profiled(func):
+    """Run a module-level `run()` as a stage named after its module; int results become `rows_out`."""
+    name = func.__module__.rsplit(".", 1)[-1]
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with stage(name) as handle:
+            result = func(*args, **kwargs)
+            if isinstance(result, int) and not isinstance(result, bool):
+                handle.rows_out = result
+            return result
+
+    return wrapper
+
+
+def append_history(run: ProfileRun, history_path: str = RUN_HISTORY_PATH) -> None:
+    os.makedirs(os.path.dirname(history_path) or ".", exist_ok=True)
+    with open(history_path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(run.to_dict()) + "\n")
+
+
+@contextmanager
+def profile_run(
+    command: str, platform: str, history_path: Optional[str] = RUN_HISTORY_PATH
+) -> Iterator[ProfileRun]:
+    """
+    Record every stage of one CLI run and append the run to the history file
+    (`history_path=None` skips that), including failed runs.
+    """
+    run = ProfileRun(command=command, platform=platform, started_at=dt.datetime.now().isoformat())
+    wall_start = time.perf_counter()
+    with collect() as records:
+        try:
+            yield run
+        except BaseException:
+            run.status = "error"
+            raise
+        finally:
+            run.wall_s = round(time.perf_counter() - wall_start, 4)
+            run.stages = list(records)
+            if history_path:
+                try:
+                    append_history(run, history_path)
+                except OSError:
+                    pass
+
+
+def format_stages(records: List[StageRecord]) -> str:
+    lines = [f"{'stage':<64} {'wall s':>9} {'cpu s':>9} {'rss MB':>8} {'rows in':>9} {'rows out':>9}"]
+    for record in records:
+        lines.append(
+            f"{record.name[-64:]:<64} {record.wall_s:>9.3f} {record.cpu_s:>9.3f} "
+            f"{'' if record.peak_rss_mb is None else record.peak_rss_mb:>8} "
+            f"{'' if record.rows_in is None else record.rows_in:>9} "
+            f"{'' if record.rows_out is None else record.rows_out:>9}"
+        )
+    return "\n".join(lines)
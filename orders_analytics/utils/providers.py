@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from datetime import datetime
+from orders_analytics.utils.datetimes import parse_datetime
+
+DATETIME_FORMATS = ("%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M", "%m/%d/%Y")
 
 
 class Providers:
@@ -31,9 +33,4 @@ def normalize_datetime(value: str) -> str:
     text = str(value or "").strip()
     if not text or text.lower() == "nan":
         return ""
-    for fmt in ("%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M", "%m/%d/%Y"):
-        try:
-            return datetime.strptime(text, fmt).isoformat()
-        except ValueError:
-            continue
-    return text
+    return parse_datetime(text, DATETIME_FORMATS, allow_iso=False) or text
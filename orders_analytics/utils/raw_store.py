@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import csv
+import datetime as dt
+import hashlib
+import json
+import math
+import os
+import sqlite3
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from orders_analytics.utils.constants import RAW_STORE_DIR
+
+ADDED_AT = "added_at"
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS rows (
+    seq INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    row_hash TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS log (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    op TEXT NOT NULL,
+    row_hash TEXT NOT NULL,
+    data TEXT NOT NULL,
+    logged_at TEXT NOT NULL
+);
+"""
+
+Row = Dict[str, str]
+Merge = Callable[[Row, Row, List[str]], Row]
+
+
+def replace_changed(current: Row, row: Row, columns: List[str]) -> Row:
+    """Incoming values win, blanks included (the default `upsert_raw` behavior)."""
+    return {col: row[col] for col in columns}
+
+
+def keep_nonblank(current: Row, row: Row, columns: List[str]) -> Row:
+    """Incoming values win, except that a blank never clears a stored value."""
+    return {col: row[col] or current[col] for col in columns}
+
+
+def fill_blanks(current: Row, row: Row, columns: List[str]) -> Row:
+    """Stored values win; incoming values only fill blank columns."""
+    return {col: current[col] or row[col] for col in columns}
+
+
+def _text(value: object) -> str:
+    # Render values the way DataFrame.to_csv wrote them.
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    return str(value)
+
+
+def _row_hash(row: Row, columns: List[str]) -> str:
+    values = [row[col] for col in columns if col != ADDED_AT]
+    return hashlib.sha1(json.dumps(values, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _csv_stamp(path: str) -> str:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return ""
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def default_store_path(csv_path: str) -> str:
+    parts = os.path.normpath(os.path.abspath(csv_path)).split(os.sep)[-2:]
+    return os.path.join(RAW_STORE_DIR, f"{'__'.join(parts)}.sqlite")
+
+
+class RawStore:
+    """
+    Keyed store behind a raw CSV.
+
+    `rows` is the compacted snapshot (one row per key, first-seen order, with a hash of
+    its non-`added_at` values) and `log` is an append-only record of every insert and
+    update. The CSV stays the export readers use: it is appended to when a run only adds
+    keys, rewritten when stored rows change, and left alone otherwise. If the CSV was
+    edited, replaced or deleted since the store last wrote it, the snapshot is reseeded
+    from it (or cleared), so the CSV remains the source of truth.
+    """
+
+    def __init__(
+        self,
+        csv_path: str,
+        columns: List[str],
+        key: str = "order_id",
+        store_path: Optional[str] = None,
+    ):
+        self.csv_path = csv_path
+        self.columns = list(columns)
+        self.key = key
+        self.store_path = store_path or default_store_path(csv_path)
+        os.makedirs(os.path.dirname(self.store_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.store_path)
+        self.conn.executescript(SCHEMA)
+        self._appendable = False
+        self._sync()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _meta(self, name: str) -> str:
+        found = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return found[0] if found else ""
+
+    def _set_meta(self, name: str, value: str) -> None:
+        self.conn.execute(
+            "INSERT INTO meta (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+            (name, value),
+        )
+
+    def _sync(self) -> None:
+        columns = json.dumps(self.columns)
+        if self._meta("csv_stamp") == _csv_stamp(self.csv_path) and self._meta("columns") == columns:
+            self._appendable = bool(self._meta("csv_stamp"))
+            return
+        with self.conn:
+            self.conn.execute("DELETE FROM rows")
+            self._appendable = self._seed()
+            self._set_meta("columns", columns)
+            self._set_meta("csv_stamp", _csv_stamp(self.csv_path))
+
+    def _seed(self) -> bool:
+        """Load the CSV into the snapshot; returns whether new rows can be appended to it."""
+        if not os.path.exists(self.csv_path):
+            return False
+        now = dt.datetime.now().isoformat()
+        with open(self.csv_path, newline="", encoding="utf-8") as handle:
+            reader = csv.DictReader(handle)
+            header = list(reader.fieldnames or [])
+            seen = set()
+            records = 0
+            for record in reader:
+                records += 1
+                row = {col: _text(record.get(col)) for col in self.columns}
+                if ADDED_AT in self.columns and ADDED_AT not in header:
+                    row[ADDED_AT] = now
+                key = str(record.get(self.key) or "").strip()
+                seen.add(key)
+                self._put(key, row)
+        # Duplicate keys collapse in the snapshot, so the next write must rewrite the CSV.
+        return header == self.columns and records == len(seen)
+
+    def _put(self, key: str, row: Row) -> None:
+        self.conn.execute(
+            "INSERT INTO rows (key, row_hash, data) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET row_hash = excluded.row_hash, data = excluded.data",
+            (key, _row_hash(row, self.columns), json.dumps(row, ensure_ascii=False)),
+        )
+
+    def _fetch(self, key: str) -> Optional[Tuple[Row, str]]:
+        found = self.conn.execute(
+            "SELECT data, row_hash FROM rows WHERE key = ?", (key,)
+        ).fetchone()
+        if found is None:
+            return None
+        data = json.loads(found[0])
+        return {col: data.get(col, "") for col in self.columns}, found[1]
+
+    def upsert(self, rows: Iterable[Dict[str, object]], merge: Merge = replace_changed) -> int:
+        """Insert new keys and merge existing ones; returns the number of inserts + changes."""
+        now = dt.datetime.now().isoformat()
+        touched: Dict[str, Tuple[Row, str]] = {}
+        inserted: List[str] = []
+        changed: List[str] = []
+        updated = 0
+        for raw in rows:
+            key = str(raw.get(self.key, "") or "").strip()
+            if not key:
+                continue
+            row = {col: _text(raw.get(col)) for col in self.columns}
+            current = touched.get(key) or self._fetch(key)
+            if current is None:
+                row[ADDED_AT] = now
+                touched[key] = (row, _row_hash(row, self.columns))
+                inserted.append(key)
+                updated += 1
+                continue
+            stored, stored_hash = current
+            if _row_hash(row, self.columns) == stored_hash:
+                continue
+            merged = merge(stored, row, self.columns)
+            merged_hash = _row_hash(merged, self.columns)
+            if merged_hash == stored_hash:
+                continue
+            merged[ADDED_AT] = now
+            touched[key] = (merged, merged_hash)
+            if key not in inserted and key not in changed:
+                changed.append(key)
+            updated += 1
+
+        with self.conn:
+            for op, keys in (("insert", inserted), ("update", changed)):
+                for key in keys:
+                    row, row_hash = touched[key]
+                    self._put(key, row)
+                    self.conn.execute(
+                        "INSERT INTO log (key, op, row_hash, data, logged_at) VALUES (?, ?, ?, ?, ?)",
+                        (key, op, row_hash, json.dumps(row, ensure_ascii=False), now),
+                    )
+            # Export inside the transaction: if the CSV write fails the snapshot rolls
+            # back, and a CSV written without its stamp is reseeded on the next open.
+            if changed or not self._appendable:
+                self._write_csv()
+            elif inserted:
+                self._append_csv([touched[key][0] for key in inserted])
+            self._set_meta("csv_stamp", _csv_stamp(self.csv_path))
+        self._appendable = True
+        return updated
+
+    def snapshot(self) -> List[Row]:
+        rows = []
+        for (data,) in self.conn.execute("SELECT data FROM rows ORDER BY seq"):
+            stored = json.loads(data)
+            rows.append({col: stored.get(col, "") for col in self.columns})
+        return rows
+
+    def _write_csv(self) -> None:
+        os.makedirs(os.path.dirname(self.csv_path) or ".", exist_ok=True)
+        tmp_path = f"{self.csv_path}.tmp"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle, lineterminator=os.linesep)
+            writer.writerow(self.columns)
+            writer.writerows([row[col] for col in self.columns] for row in self.snapshot())
+        os.replace(tmp_path, self.csv_path)
+
+    def _append_csv(self, rows: List[Row]) -> None:
+        with open(self.csv_path, "a", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle, lineterminator=os.linesep)
+            writer.writerows([row[col] for col in self.columns] for row in rows)
+
+
+def upsert_rows(
+    csv_path: str,
+    rows: Iterable[Dict[str, object]],
+    columns: List[str],
+    key: str = "order_id",
+    merge: Merge = replace_changed,
+) -> int:
+    """Upsert `rows` into the raw CSV at `csv_path` through its `RawStore`."""
+    store = RawStore(csv_path, columns, key)
+    try:
+        return store.upsert(rows, merge)
+    finally:
+        store.close()
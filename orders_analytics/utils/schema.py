@@ -3,7 +3,8 @@ from __future__ import annotations
 import csv
 import os
 from typing import Dict, Iterable, List
-from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from orders_analytics.utils.money import format_cents, parse_cents
 from orders_analytics.utils.platforms import Platforms
 
 CANONICAL_COLUMNS: List[str] = [
@@ -59,8 +60,8 @@ def write_normalized_rows(rows: Iterable[Dict[str, str]], path: str) -> None:
     with open(path, "w", newline="", encoding="utf-8") as handle:
         writer = csv.DictWriter(handle, fieldnames=CANONICAL_COLUMNS)
         writer.writeheader()
-        for row in canonicalize_rows(rows):
-            writer.writerow(row)
+        for row in rows:
+            writer.writerow(canonicalize_row(row))
 
 
 def build_normalized_row(platform: str, **kwargs: str) -> Dict[str, str]:
@@ -74,75 +75,29 @@ def build_normalized_row(platform: str, **kwargs: str) -> Dict[str, str]:
     return row
 
 
+PAYOUT_FIELDS = [
+    "subtotal",
+    "tax",
+    "tip",
+    "delivery_fee",
+    "adjustments",
+    "commission_fee",
+    "processing_fee",
+    "marketing_fee",
+    "misc_fee",
+]
+
+
 def compute_expected_payout(row: Dict[str, str]) -> str:
-    def to_decimal(value: str):
-        text = str(value or "").strip()
-        if not text:
-            return None
-        try:
-            return Decimal(text.replace("$", "").replace(",", ""))
-        except InvalidOperation:
-            return None
-
-    subtotal = to_decimal(row.get("subtotal", ""))
-    tax = to_decimal(row.get("tax", ""))
-    tip = to_decimal(row.get("tip", ""))
-    delivery_fee = to_decimal(row.get("delivery_fee", ""))
-    adjustments = to_decimal(row.get("adjustments", ""))
-    commission_fee = to_decimal(row.get("commission_fee", ""))
-    processing_fee = to_decimal(row.get("processing_fee", ""))
-    marketing_fee = to_decimal(row.get("marketing_fee", ""))
-    misc_fee = to_decimal(row.get("misc_fee", ""))
-
-    values = [
-        subtotal,
-        tax,
-        tip,
-        delivery_fee,
-        adjustments,
-        commission_fee,
-        processing_fee,
-        marketing_fee,
-        misc_fee,
-    ]
-    if all(v is None for v in values):
+    cents = {field: parse_cents(row.get(field, "")) for field in PAYOUT_FIELDS}
+    if all(value is None for value in cents.values()):
         return ""
 
-    expected = Decimal("0.00")
     from orders_analytics.utils.payment_types import PaymentTypes
     payment_type = str(row.get("payment_type") or "").strip().lower()
     platform = str(row.get("platform") or "").strip().lower()
-    if payment_type == PaymentTypes.CASH:
-        if platform in Platforms.get_pos_providers():
-            if subtotal is not None:
-                expected += subtotal
-            if tax is not None:
-                expected += tax
-            if tip is not None:
-                expected += tip
-            if delivery_fee is not None:
-                expected += delivery_fee
-            if adjustments is not None:
-                expected += adjustments
-            for fee in (commission_fee, processing_fee, marketing_fee, misc_fee):
-                if fee is not None:
-                    expected += fee
-        else:
-            if commission_fee is None:
-                return ""
-            expected = commission_fee
-    else:
-        if subtotal is not None:
-            expected += subtotal
-        if tax is not None:
-            expected += tax
-        if tip is not None:
-            expected += tip
-        if delivery_fee is not None:
-            expected += delivery_fee
-        if adjustments is not None:
-            expected += adjustments
-        for fee in (commission_fee, processing_fee, marketing_fee, misc_fee):
-            if fee is not None:
-                expected += fee
-    return f"{expected.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)}"
+    if payment_type == PaymentTypes.CASH and platform not in Platforms.get_pos_providers():
+        if cents["commission_fee"] is None:
+            return ""
+        return format_cents(cents["commission_fee"])
+    return format_cents(sum(value for value in cents.values() if value is not None))
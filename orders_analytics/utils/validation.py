@@ -4,18 +4,15 @@ from datetime import datetime
 import re
 from typing import Dict, List, Tuple, Optional
 
+from orders_analytics.utils.money import format_cents, parse_cents
 from orders_analytics.utils.order_types import OrderTypes
 from orders_analytics.utils.schema import CANONICAL_COLUMNS
 from orders_analytics.utils.payment_types import PaymentTypes
 
 
 def _is_real(value: str) -> bool:
-    if value == "":
-        return False
-    try:
-        return float(value) != 0.0
-    except ValueError:
-        return False
+    # A money amount that is non-zero at cent precision.
+    return bool(parse_cents(value))
 
 
 def _append_error(row: Dict[str, str], flag: str) -> None:
@@ -201,12 +198,9 @@ def validate_tax_fields(
         order_type = str(row.get("order_type") or "").strip().lower()
         if skip_on_negative_payout:
             payout_raw = str(row.get("payout") or "").strip()
-            if _is_real(payout_raw):
-                try:
-                    if float(payout_raw) < 0:
-                        continue
-                except ValueError:
-                    pass
+            payout = parse_cents(payout_raw)
+            if payout is not None and payout < 0:
+                continue
         if order_type == OrderTypes.PHONE_CALL and not tax_real and not tw_real:
             continue
         if tax_real == tw_real:
@@ -236,9 +230,8 @@ def validate_negative_fees(
             raw = str(row.get(field) or "").strip()
             if raw == "":
                 continue
-            try:
-                value = float(raw)
-            except ValueError:
+            value = parse_cents(raw)
+            if value is None:
                 continue
             if value > 0:
                 flag = "fee_should_be_negative"
@@ -290,12 +283,11 @@ def validate_payout_expected(
         expected_raw = str(row.get("expected_payout") or "").strip()
         if not payout_raw or not expected_raw:
             continue
-        try:
-            payout_val = float(payout_raw.replace("$", "").replace(",", ""))
-            expected_val = float(expected_raw.replace("$", "").replace(",", ""))
-        except ValueError:
+        payout_val = parse_cents(payout_raw)
+        expected_val = parse_cents(expected_raw)
+        if payout_val is None or expected_val is None:
             continue
-        if abs(payout_val - expected_val) > 0.01:
+        if abs(payout_val - expected_val) > 1:
             flag = "payout_expected_mismatch"
             _append_error(row, flag)
             errors.append(
@@ -337,14 +329,8 @@ def validate_cash_processing_fee(
     return rows, errors
 
 
-def _parse_money(value: str) -> float:
-    text = str(value or "").strip()
-    if not text:
-        return 0.0
-    try:
-        return float(text.replace("$", "").replace(",", ""))
-    except ValueError:
-        return 0.0
+def _money_cents(value: str) -> int:
+    return parse_cents(value) or 0
 
 
 def validate_total_components(
@@ -358,11 +344,9 @@ def validate_total_components(
         total_raw = str(row.get("total") or "").strip()
         if not total_raw:
             continue
-        total_val = _parse_money(total_raw)
-        expected = round(
-            sum(_parse_money(row.get(field, "")) for field in component_fields), 2
-        )
-        if abs(total_val - expected) > 0.01:
+        total_val = _money_cents(total_raw)
+        expected = sum(_money_cents(row.get(field, "")) for field in component_fields)
+        if abs(total_val - expected) > 1:
             flag = "total_components_mismatch"
             _append_error(row, flag)
             errors.append(
@@ -371,7 +355,7 @@ def validate_total_components(
                     "platform": row.get("platform", ""),
                     "provider": row.get("provider", ""),
                     "error_code": flag,
-                    "message": f"total={total_raw} expected={expected:.2f}",
+                    "message": f"total={total_raw} expected={format_cents(expected)}",
                     "source": source,
                 }
             )
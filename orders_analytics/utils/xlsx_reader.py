@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import io
+import json
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Union
+
+from orders_analytics.utils.constants import XLSX_CACHE_DIR
+from orders_analytics.utils.pdf_cache import cached_value, payload_key
+
+# Bump when the cached sheet output changes shape or semantics.
+READER_VERSION = "1"
+# String literals stored as formulas (e.g. ="51ff14f8"); their cached value may be 0.
+FORMULA_LITERAL_RE = re.compile(r'^\s*=\s*"([^"]+)"\s*$')
+
+SheetRows = List[List[object]]
+
+
+@lru_cache(maxsize=1)
+def reader_version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return f"{READER_VERSION}-openpyxl{version('openpyxl')}"
+    except Exception:
+        return READER_VERSION
+
+
+def header_key(value: object) -> str:
+    return " ".join(str(value).strip().lower().replace("_", " ").split())
+
+
+def _convert_cell(cell) -> object:
+    # Mirrors pandas' openpyxl reader: "" for blanks, NaN (None here) for error cells and
+    # integral floats as ints, so frames built from these rows match `pd.read_excel`.
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    value = cell.value
+    if value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return None
+    if cell.data_type == TYPE_NUMERIC:
+        as_int = int(value)
+        return as_int if as_int == value else float(value)
+    return value
+
+
+def _sheet_rows(rows) -> SheetRows:
+    data: SheetRows = []
+    last_row_with_data = -1
+    for row_number, row in enumerate(rows):
+        converted = [_convert_cell(cell) for cell in row]
+        while converted and converted[-1] == "":
+            converted.pop()
+        if converted:
+            last_row_with_data = row_number
+        data.append(converted)
+    data = data[: last_row_with_data + 1]
+    if data:
+        width = max(len(row) for row in data)
+        data = [row + [""] * (width - len(row)) for row in data]
+    return data
+
+
+def _header_matches(ws, header_names: Sequence[str]) -> bool:
+    for row in ws.iter_rows(max_row=1):
+        return any(header_key(_convert_cell(cell)) in header_names for cell in row)
+    return False
+
+
+def read_sheets(
+    payload: bytes,
+    sheets: Optional[Sequence[Union[str, int]]] = None,
+    header_names: Sequence[str] = (),
+    formula_literals: Sequence[str] = (),
+) -> Dict[str, SheetRows]:
+    """
+    Stream worksheets with openpyxl in read-only mode, in workbook order.
+
+    `sheets` names (or positions) the sheets to read; `None` reads them all. With
+    `header_names`, any other sheet is read only when its first row has one of those
+    headers (compared via `header_key`), so unrelated tabs cost a single row. Cells in
+    `formula_literals` columns that hold a string-literal formula are replaced by the
+    literal, read from a second pass over just those columns.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(io.BytesIO(payload), read_only=True, data_only=True, keep_links=False)
+    header_names = [header_key(name) for name in header_names]
+    selected: Dict[str, SheetRows] = {}
+    try:
+        for position, name in enumerate(wb.sheetnames):
+            ws = wb[name]
+            ws.reset_dimensions()
+            listed = sheets is None or name in sheets or position in sheets
+            if not listed and not (header_names and _header_matches(ws, header_names)):
+                continue
+            selected[name] = _sheet_rows(ws.rows)
+    finally:
+        wb.close()
+    if formula_literals:
+        _apply_formula_literals(payload, selected, [header_key(n) for n in formula_literals])
+    return selected
+
+
+def _apply_formula_literals(
+    payload: bytes, selected: Dict[str, SheetRows], columns: Sequence[str]
+) -> None:
+    from openpyxl import load_workbook
+
+    try:
+        wb = load_workbook(io.BytesIO(payload), read_only=True, data_only=False, keep_links=False)
+    except Exception:
+        return
+    try:
+        for name, rows in selected.items():
+            if len(rows) < 2 or name not in wb.sheetnames:
+                continue
+            keys = [header_key(value) for value in rows[0]]
+            col_idx = next((idx for idx, key in enumerate(keys) if key in columns), None)
+            if col_idx is None:
+                continue
+            ws = wb[name]
+            formulas = ws.iter_rows(
+                min_row=2,
+                max_row=len(rows),
+                min_col=col_idx + 1,
+                max_col=col_idx + 1,
+                values_only=True,
+            )
+            for row, (value,) in zip(rows[1:], formulas):
+                if isinstance(value, str):
+                    match = FORMULA_LITERAL_RE.match(value)
+                    if match:
+                        row[col_idx] = match.group(1)
+    finally:
+        wb.close()
+
+
+def _encode_cell(value: object) -> object:
+    if isinstance(value, (dt.datetime, dt.date, dt.time)):
+        return {type(value).__name__: value.isoformat()}
+    if isinstance(value, dt.timedelta):
+        return {"timedelta": value.total_seconds()}
+    return value
+
+
+def _decode_cell(value: object) -> object:
+    if not isinstance(value, dict):
+        return value
+    (kind, raw), = value.items()
+    if kind == "timedelta":
+        return dt.timedelta(seconds=raw)
+    return getattr(dt, kind).fromisoformat(raw)
+
+
+def cached_sheets(
+    payload: bytes,
+    sheets: Optional[Sequence[Union[str, int]]] = None,
+    header_names: Sequence[str] = (),
+    formula_literals: Sequence[str] = (),
+) -> Optional[Dict[str, SheetRows]]:
+    """
+    `read_sheets`, cached on disk by the attachment's SHA-256 and the requested sheets so
+    unchanged workbooks are never reopened. Returns `None` for unreadable workbooks.
+    """
+    spec = json.dumps([sheets, list(header_names), list(formula_literals)], sort_keys=True)
+    kind = f"sheets-{hashlib.sha1(spec.encode('utf-8')).hexdigest()[:12]}"
+
+    def compute():
+        try:
+            selected = read_sheets(payload, sheets, header_names, formula_literals)
+        except ImportError:
+            raise
+        except Exception:
+            return None
+        return {
+            name: [[_encode_cell(value) for value in row] for row in rows]
+            for name, rows in selected.items()
+        }
+
+    encoded = cached_value(
+        payload_key(payload), kind, compute, cache_dir=XLSX_CACHE_DIR, version=reader_version()
+    )
+    if encoded is None:
+        return None
+    return {
+        name: [[_decode_cell(value) for value in row] for row in rows]
+        for name, rows in encoded.items()
+    }
+
+
+def sheet_frame(rows: SheetRows, dtype=None):
+    """Build the DataFrame `pd.read_excel` would return for these rows (header in row 0)."""
+    import pandas as pd
+
+    if not rows:
+        return pd.DataFrame()
+    data = [[float("nan") if value is None else value for value in row] for row in rows]
+    return pd.io.parsers.TextParser(data, header=0, dtype=dtype, skip_blank_lines=False).read()